@@ -0,0 +1,75 @@
+"""JSONB analysis payloads
+
+Revision ID: 002_jsonb_payloads
+Revises: 001_initial
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002_jsonb_payloads'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'daily_analyses',
+        'analysis_data',
+        existing_type=sa.Text(),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using='analysis_data::jsonb'
+    )
+    op.alter_column(
+        'trading_mode_recommendations',
+        'reasons_data',
+        existing_type=sa.Text(),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using='reasons_data::jsonb'
+    )
+    op.create_index(
+        'ix_daily_analyses_analysis_data_gin',
+        'daily_analyses',
+        ['analysis_data'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'analysis_data': 'jsonb_path_ops'}
+    )
+    op.create_index(
+        'ix_trading_mode_recommendations_reasons_data_gin',
+        'trading_mode_recommendations',
+        ['reasons_data'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'reasons_data': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trading_mode_recommendations_reasons_data_gin', table_name='trading_mode_recommendations')
+    op.drop_index('ix_daily_analyses_analysis_data_gin', table_name='daily_analyses')
+    op.alter_column(
+        'trading_mode_recommendations',
+        'reasons_data',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='reasons_data::text'
+    )
+    op.alter_column(
+        'daily_analyses',
+        'analysis_data',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='analysis_data::text'
+    )
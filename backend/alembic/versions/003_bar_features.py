@@ -0,0 +1,46 @@
+"""Bar features store
+
+Revision ID: 003_bar_features
+Revises: 002_jsonb_payloads
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_bar_features'
+down_revision: Union[str, None] = '002_jsonb_payloads'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bar_features',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('instrument', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=10), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('close_price', sa.Float(), nullable=False),
+        sa.Column('rsi', sa.Float(), nullable=True),
+        sa.Column('ema_50', sa.Float(), nullable=True),
+        sa.Column('ema_100', sa.Float(), nullable=True),
+        sa.Column('ema_200', sa.Float(), nullable=True),
+        sa.Column('atr', sa.Float(), nullable=True),
+        sa.Column('trend', sa.String(length=20), nullable=False),
+        sa.Column('session', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('instrument', 'interval', 'timestamp', name='uq_bar_features_instrument_interval_timestamp'),
+        comment='Indicadores precalculados por vela (RSI, EMAs, ATR, tendencia, sesión)'
+    )
+    op.create_index(op.f('ix_bar_features_id'), 'bar_features', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bar_features_id'), table_name='bar_features')
+    op.drop_table('bar_features')
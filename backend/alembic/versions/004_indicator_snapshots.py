@@ -0,0 +1,40 @@
+"""Indicator snapshots for streaming indicators
+
+Revision ID: 004_indicator_snapshots
+Revises: 003_bar_features
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_indicator_snapshots'
+down_revision: Union[str, None] = '003_bar_features'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'indicator_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('instrument', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=10), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('state', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('instrument', 'interval', name='uq_indicator_snapshots_instrument_interval'),
+        comment='Estado de indicadores incrementales (EMA, RSI/ATR de Wilder, máximo/mínimo móvil)'
+    )
+    op.create_index(op.f('ix_indicator_snapshots_id'), 'indicator_snapshots', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_indicator_snapshots_id'), table_name='indicator_snapshots')
+    op.drop_table('indicator_snapshots')
@@ -0,0 +1,62 @@
+"""Unique candle key and backfill checkpoints
+
+Revision ID: 005_market_data_backfill
+Revises: 004_indicator_snapshots
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_market_data_backfill'
+down_revision: Union[str, None] = '004_indicator_snapshots'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Conservar una sola fila por vela (la más reciente) antes de crear la clave única
+    op.execute(
+        """
+        DELETE FROM market_data a
+        USING market_data b
+        WHERE a.instrument = b.instrument
+          AND a.interval = b.interval
+          AND a.timestamp = b.timestamp
+          AND a.id < b.id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_market_data_instrument_interval_timestamp',
+        'market_data',
+        ['instrument', 'interval', 'timestamp']
+    )
+
+    op.create_table(
+        'backfill_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('instrument', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=10), nullable=False),
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('chunk_start', sa.DateTime(), nullable=False),
+        sa.Column('chunk_end', sa.DateTime(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'instrument', 'interval', 'provider', 'chunk_start', 'chunk_end',
+            name='uq_backfill_checkpoints_chunk'
+        ),
+        comment='Bloques de fechas ya cargados por el backfill histórico (para reanudar)'
+    )
+    op.create_index(op.f('ix_backfill_checkpoints_id'), 'backfill_checkpoints', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_backfill_checkpoints_id'), table_name='backfill_checkpoints')
+    op.drop_table('backfill_checkpoints')
+    op.drop_constraint('uq_market_data_instrument_interval_timestamp', 'market_data', type_='unique')
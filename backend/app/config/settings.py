@@ -65,7 +65,37 @@ class Settings(BaseSettings):
         default=None,
         description="URL base de la API de datos de mercado (opcional)"
     )
-    
+
+    # Almacén local de velas (alternativa a market_data en PostgreSQL)
+    candle_store_path: Optional[str] = Field(
+        default=None,
+        description="Directorio del almacén de velas en disco (numpy.memmap); si se define sustituye a market_data"
+    )
+
+    # Screener multi-instrumento
+    screener_watchlist: Optional[str] = Field(
+        default=None,
+        description="Watchlist del screener separada por comas (por defecto metales, FX mayores e índices)"
+    )
+    screener_concurrency: int = Field(
+        default=4,
+        description="Análisis simultáneos máximos del screener (limita peticiones al proveedor)"
+    )
+
+    # Reparación programada de huecos en market_data
+    gap_repair_instruments: str = Field(
+        default="XAUUSD",
+        description="Instrumentos revisados por el job de huecos, separados por comas"
+    )
+    gap_repair_intervals: str = Field(
+        default="1h,4h,1d",
+        description="Intervalos revisados por el job de huecos, separados por comas"
+    )
+    gap_repair_lookback_days: int = Field(
+        default=30,
+        description="Días hacia atrás que revisa el job de huecos"
+    )
+
     # FRED API para DXY y bonos (Federal Reserve Economic Data)
     fred_api_key: Optional[str] = Field(
         default=None,
@@ -4,12 +4,16 @@ Modelos de base de datos SQLAlchemy
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, Text, JSON, UniqueConstraint, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
+# JSONB en PostgreSQL (consultable por sub-campos), JSON genérico en otros motores
+JSONPayload = JSON().with_variant(JSONB(), "postgresql")
+
 
 class EconomicEventModel(Base):
     """Modelo de evento económico en base de datos"""
@@ -44,10 +48,74 @@ class MarketDataModel(Base):
     created_at = Column(DateTime, server_default=func.now())
 
     __table_args__ = (
+        UniqueConstraint("instrument", "interval", "timestamp", name="uq_market_data_instrument_interval_timestamp"),
         {"comment": "Datos históricos de mercado (velas OHLCV)"},
     )
 
 
+class BackfillCheckpointModel(Base):
+    """Modelo de bloque de fechas ya cargado por el backfill histórico"""
+    __tablename__ = "backfill_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    instrument = Column(String(20), nullable=False)
+    interval = Column(String(10), nullable=False)
+    provider = Column(String(20), nullable=False)
+    chunk_start = Column(DateTime, nullable=False)
+    chunk_end = Column(DateTime, nullable=False)
+    rows = Column(Integer, nullable=False)  # Velas recibidas del proveedor en el bloque
+    completed_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint(
+            "instrument", "interval", "provider", "chunk_start", "chunk_end",
+            name="uq_backfill_checkpoints_chunk"
+        ),
+        {"comment": "Bloques de fechas ya cargados por el backfill histórico (para reanudar)"},
+    )
+
+
+class BarFeatureModel(Base):
+    """Modelo de indicadores precalculados por vela (feature store)"""
+    __tablename__ = "bar_features"
+
+    id = Column(Integer, primary_key=True, index=True)
+    instrument = Column(String(20), nullable=False)
+    interval = Column(String(10), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    close_price = Column(Float, nullable=False)
+    rsi = Column(Float, nullable=True)
+    ema_50 = Column(Float, nullable=True)
+    ema_100 = Column(Float, nullable=True)
+    ema_200 = Column(Float, nullable=True)
+    atr = Column(Float, nullable=True)
+    trend = Column(String(20), nullable=False)  # alcista, bajista, lateral
+    session = Column(String(20), nullable=True)  # asia, london, new_york
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("instrument", "interval", "timestamp", name="uq_bar_features_instrument_interval_timestamp"),
+        {"comment": "Indicadores precalculados por vela (RSI, EMAs, ATR, tendencia, sesión)"},
+    )
+
+
+class IndicatorSnapshotModel(Base):
+    """Modelo de snapshot de indicadores incrementales por (instrumento, intervalo)"""
+    __tablename__ = "indicator_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    instrument = Column(String(20), nullable=False)
+    interval = Column(String(10), nullable=False)
+    last_timestamp = Column(DateTime, nullable=False)  # Última vela procesada
+    state = Column(JSONPayload, nullable=False)  # Estado serializado de IndicatorSet
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("instrument", "interval", name="uq_indicator_snapshots_instrument_interval"),
+        {"comment": "Estado de indicadores incrementales (EMA, RSI/ATR de Wilder, máximo/mínimo móvil)"},
+    )
+
+
 class DailyAnalysisModel(Base):
     """Modelo de análisis diario guardado"""
     __tablename__ = "daily_analyses"
@@ -62,7 +130,7 @@ class DailyAnalysisModel(Base):
     previous_day_high = Column(Float, nullable=False)
     previous_day_low = Column(Float, nullable=False)
     summary = Column(Text, nullable=True)
-    analysis_data = Column(Text, nullable=True)  # JSON serializado de sesiones
+    analysis_data = Column(JSONPayload, nullable=True)  # Lista de sesiones (JSONB)
     created_at = Column(DateTime, server_default=func.now())
 
     __table_args__ = (
@@ -82,7 +150,7 @@ class TradingModeRecommendationModel(Base):
     confidence = Column(Float, nullable=False)
     summary = Column(Text, nullable=True)
     detailed_explanation = Column(Text, nullable=True)
-    reasons_data = Column(Text, nullable=True)  # JSON serializado de razones
+    reasons_data = Column(JSONPayload, nullable=True)  # Lista de razones (JSONB)
     created_at = Column(DateTime, server_default=func.now())
 
     __table_args__ = (
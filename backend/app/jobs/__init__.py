@@ -0,0 +1,3 @@
+"""
+Tareas programadas (AWS Lambda con eventos Schedule)
+"""
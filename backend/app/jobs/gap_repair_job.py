@@ -0,0 +1,61 @@
+"""
+Job programado de reparación de huecos en market_data
+Punto de entrada de la Lambda GapRepairJob (ver template.yaml)
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config.settings import Settings, get_settings
+from app.db.session import SessionLocal
+from app.models.gap_repair import GapRepairReport
+from app.services.gap_repair_service import GapRepairService
+
+logger = logging.getLogger(__name__)
+
+
+async def run_gap_repair(settings: Settings) -> Optional[GapRepairReport]:
+    """
+    Revisa y repara los huecos de las series configuradas
+    @param settings - Configuración de la aplicación (gap_repair_*)
+    @returns GapRepairReport o None si no hay base de datos configurada
+    """
+    if SessionLocal is None:
+        logger.warning("DATABASE_URL is not configured; skipping gap repair")
+        return None
+
+    instruments = [i.strip() for i in settings.gap_repair_instruments.split(",") if i.strip()]
+    intervals = [i.strip() for i in settings.gap_repair_intervals.split(",") if i.strip()]
+
+    db = SessionLocal()
+    try:
+        service = GapRepairService(settings, db)
+        return await service.repair(
+            instruments,
+            intervals,
+            start=datetime.now() - timedelta(days=settings.gap_repair_lookback_days)
+        )
+    finally:
+        db.close()
+
+
+def handler(event: dict, context: object) -> dict:
+    """
+    Handler de Lambda para el evento programado
+    @param event - Evento de EventBridge (no se usa)
+    @param context - Contexto de Lambda
+    @returns Resumen de la ejecución
+    """
+    report = asyncio.run(run_gap_repair(get_settings()))
+    if report is None:
+        return {"status": "skipped", "reason": "database not configured"}
+
+    return {
+        "status": "ok",
+        "series": len(report.series),
+        "missing_bars": sum(series.missing_bars for series in report.series),
+        "repaired_bars": sum(series.repaired_bars for series in report.series),
+        "requests": sum(series.requests for series in report.series),
+        "errors": sum(len(series.errors) for series in report.series),
+    }
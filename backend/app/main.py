@@ -10,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.db.models import Base
 from app.db.session import engine
 from app.routers import market_briefing
+from app.utils.json_response import FastJSONResponse
 from app.utils.logging_config import setup_logging
 
 # Configurar logging (estructurado en producción, simple en desarrollo)
@@ -76,6 +77,7 @@ Esta API proporciona **análisis probabilístico basado en datos históricos y p
         "name": "MIT License",
         "url": "https://opensource.org/licenses/MIT"
     },
+    default_response_class=FastJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
@@ -0,0 +1,28 @@
+"""
+Modelos para el backfill histórico de velas
+"""
+from pydantic import BaseModel, Field
+
+
+class BackfillSeriesReport(BaseModel):
+    """Resultado del backfill de una serie (instrumento e intervalo)"""
+
+    instrument: str = Field(..., description="Instrumento")
+    interval: str = Field(..., description="Intervalo de las velas")
+    provider: str = Field(..., description="Proveedor de datos")
+    chunks_total: int = Field(0, description="Bloques de fechas del rango pedido")
+    chunks_skipped: int = Field(0, description="Bloques ya completados en una ejecución anterior")
+    chunks_loaded: int = Field(0, description="Bloques descargados y cargados en esta ejecución")
+    chunks_failed: int = Field(0, description="Bloques con error (se reintentan en la siguiente ejecución)")
+    candles_loaded: int = Field(0, description="Velas cargadas con COPY")
+    features_rebuilt: int = Field(0, description="Filas de bar_features recalculadas tras la carga")
+    errors: list[str] = Field(default_factory=list, description="Errores por bloque")
+
+
+class BackfillReport(BaseModel):
+    """Resultado de una ejecución del backfill"""
+
+    start: str = Field(..., description="Inicio del rango (ISO)")
+    end: str = Field(..., description="Fin del rango (ISO)")
+    elapsed_seconds: float = Field(..., description="Duración de la ejecución")
+    series: list[BackfillSeriesReport] = Field(default_factory=list, description="Resultado por serie")
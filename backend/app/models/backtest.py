@@ -0,0 +1,64 @@
+"""
+Modelos para el backtest histórico de las recomendaciones de trading
+"""
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.trading_mode import TradingMode
+from app.models.trading_recommendation import TradeDirection
+
+
+class TradeOutcome(str, Enum):
+    """Resultado de una operación simulada"""
+    TAKE_PROFIT = "take_profit"    # Alcanzó el take profit 1
+    STOP_LOSS = "stop_loss"        # Alcanzó el stop loss
+    TIMEOUT = "timeout"            # Cerrada al cierre de la última vela del periodo máximo
+    NOT_FILLED = "not_filled"      # La entrada no se ejecutó antes de la siguiente recomendación
+    INVALID = "invalid"            # Niveles incoherentes (stop o take profit del lado equivocado)
+
+
+class BacktestTrade(BaseModel):
+    """Operación simulada a partir de la recomendación de un día"""
+
+    signal_date: str = Field(..., description="Día analizado (YYYY-MM-DD); la orden se coloca al cierre")
+    direction: TradeDirection = Field(..., description="Dirección recomendada")
+    confidence: float = Field(..., description="Confianza de la recomendación")
+    entry_price: float = Field(..., description="Precio de entrada (orden límite)")
+    stop_loss: float = Field(..., description="Stop loss")
+    take_profit: float = Field(..., description="Take profit 1")
+    outcome: TradeOutcome = Field(..., description="Resultado de la operación")
+    entry_time: Optional[str] = Field(None, description="Timestamp de la vela de ejecución")
+    exit_time: Optional[str] = Field(None, description="Timestamp de la vela de salida")
+    exit_price: Optional[float] = Field(None, description="Precio de salida")
+    bars_held: int = Field(0, description="Velas desde la ejecución hasta la salida")
+    pnl_points: float = Field(0.0, description="Resultado en puntos")
+    r_multiple: float = Field(0.0, description="Resultado en múltiplos del riesgo inicial (R)")
+    mae_points: float = Field(0.0, description="Máxima excursión adversa en puntos")
+    mfe_points: float = Field(0.0, description="Máxima excursión favorable en puntos")
+
+
+class BacktestReport(BaseModel):
+    """Resumen de un backtest de recomendaciones"""
+
+    instrument: str = Field(..., description="Instrumento")
+    interval: str = Field(..., description="Intervalo de las velas simuladas")
+    start_date: str = Field(..., description="Primer día con recomendación")
+    end_date: str = Field(..., description="Último día con recomendación")
+    trading_mode: TradingMode = Field(..., description="Modo de trading aplicado a todas las recomendaciones")
+    days: int = Field(..., description="Días evaluados")
+    signals: int = Field(..., description="Días con recomendación de compra o venta")
+    wait_days: int = Field(..., description="Días con recomendación de esperar")
+    filled: int = Field(..., description="Operaciones ejecutadas")
+    wins: int = Field(..., description="Operaciones cerradas con resultado positivo")
+    losses: int = Field(..., description="Operaciones cerradas con resultado negativo o nulo")
+    win_rate: float = Field(..., description="Proporción de operaciones ganadoras sobre las ejecutadas")
+    expectancy_r: float = Field(..., description="Resultado medio por operación ejecutada (R)")
+    expectancy_points: float = Field(..., description="Resultado medio por operación ejecutada (puntos)")
+    total_r: float = Field(..., description="Resultado acumulado (R)")
+    max_drawdown_r: float = Field(..., description="Máximo drawdown de la curva acumulada (R)")
+    average_mae_r: float = Field(..., description="MAE medio (R)")
+    average_mfe_r: float = Field(..., description="MFE medio (R)")
+    outcomes: dict[str, int] = Field(default_factory=dict, description="Operaciones por resultado")
+    trades: list[BacktestTrade] = Field(default_factory=list, description="Detalle de operaciones")
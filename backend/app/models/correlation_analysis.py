@@ -0,0 +1,80 @@
+"""
+Modelos de datos para análisis de correlaciones multi-activo
+"""
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class CorrelationMode(str, Enum):
+    """Serie sobre la que se calcula la correlación"""
+    RETURNS = "returns"
+    LEVELS = "levels"
+
+
+class CorrelationRegime(str, Enum):
+    """Régimen de correlación comparando la ventana corta con la larga"""
+    STRENGTHENING = "fortaleciendo"
+    WEAKENING = "debilitando"
+    STABLE = "estable"
+    INVERTED = "invertida"
+
+
+class CorrelationWindowMatrix(BaseModel):
+    """Matriz de correlaciones de una ventana en la última fecha disponible"""
+    window: int = Field(..., description="Tamaño de la ventana (días alineados)")
+    symbols: list[str] = Field(..., description="Símbolos en el orden de filas y columnas")
+    matrix: list[list[Optional[float]]] = Field(..., description="Matriz de correlaciones (None si no hay datos suficientes)")
+
+
+class PairCorrelationTrend(BaseModel):
+    """Evolución de la correlación de un par de activos"""
+    symbol_a: str = Field(..., description="Primer activo del par")
+    symbol_b: str = Field(..., description="Segundo activo del par")
+    by_window: dict[int, Optional[float]] = Field(..., description="Correlación actual por ventana")
+    regime: CorrelationRegime = Field(..., description="Régimen (ventana corta vs larga)")
+    short_window_change: Optional[float] = Field(
+        None,
+        description="Cambio de la correlación de ventana corta en las últimas observaciones"
+    )
+    history: list[Optional[float]] = Field(
+        default_factory=list,
+        description="Correlaciones recientes de la ventana corta (más antigua primero)"
+    )
+
+
+class CorrelationMatrixAnalysis(BaseModel):
+    """Correlaciones móviles multi-ventana entre varios activos"""
+    as_of: str = Field(..., description="Última fecha alineada (YYYY-MM-DD)")
+    mode: CorrelationMode = Field(..., description="Modo de cálculo (retornos o niveles)")
+    symbols: list[str] = Field(..., description="Activos incluidos")
+    observations: int = Field(..., description="Número de fechas alineadas usadas")
+    matrices: list[CorrelationWindowMatrix] = Field(..., description="Matriz actual por ventana")
+    pairs: list[PairCorrelationTrend] = Field(
+        default_factory=list,
+        description="Régimen y tendencia de los pares con el activo principal"
+    )
+
+
+class LeadLagAnalysis(BaseModel):
+    """Correlación cruzada por desfase entre un activo líder candidato y un seguidor"""
+    leader_symbol: str = Field(..., description="Activo evaluado como líder (ej: DXY)")
+    follower_symbol: str = Field(..., description="Activo evaluado como seguidor (ej: XAUUSD)")
+    interval: str = Field(..., description="Intervalo de las velas usadas")
+    observations: int = Field(..., description="Número de retornos alineados usados")
+    max_lag: int = Field(..., description="Desfase máximo evaluado en velas (de -max_lag a +max_lag)")
+    lags: list[int] = Field(..., description="Desfases evaluados (positivo = el líder se adelanta)")
+    correlations: list[float] = Field(..., description="Correlación para cada desfase")
+    dominant_lag: int = Field(..., description="Desfase con mayor correlación absoluta")
+    dominant_correlation: float = Field(..., description="Correlación en el desfase dominante")
+    contemporaneous_correlation: float = Field(..., description="Correlación sin desfase (lag 0)")
+    window_lags: list[int] = Field(
+        default_factory=list,
+        description="Desfase dominante en cada ventana móvil (más antigua primero)"
+    )
+    stability: Optional[float] = Field(
+        None,
+        description="Proporción de ventanas móviles cuyo desfase dominante coincide (±1 vela) con el global"
+    )
+    interpretation: str = Field(..., description="Interpretación legible del resultado")
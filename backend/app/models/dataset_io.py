@@ -0,0 +1,12 @@
+"""
+Modelos para la exportación e importación de datasets (Parquet / Arrow IPC)
+"""
+from pydantic import BaseModel, Field
+
+
+class DatasetImportResponse(BaseModel):
+    """Resultado de la importación de un fichero"""
+
+    dataset: str = Field(..., description="Dataset importado (market_data, daily_analyses, trading_mode_recommendations)")
+    format: str = Field(..., description="Formato del fichero (parquet, arrow)")
+    rows: int = Field(..., description="Filas cargadas (en el historial de análisis se omiten las ya existentes)")
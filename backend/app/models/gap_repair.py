@@ -0,0 +1,39 @@
+"""
+Modelos para la detección y reparación de huecos en market_data
+"""
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class CandleGap(BaseModel):
+    """Rango de velas esperadas que faltan en una serie"""
+
+    start: datetime = Field(..., description="Apertura de la primera vela que falta")
+    end: datetime = Field(..., description="Apertura de la última vela que falta")
+    missing_bars: int = Field(..., description="Velas esperadas que faltan en el rango")
+
+
+class GapRepairSeriesReport(BaseModel):
+    """Resultado del escaneo y reparación de una serie"""
+
+    instrument: str = Field(..., description="Instrumento")
+    interval: str = Field(..., description="Intervalo de las velas")
+    stored_bars: int = Field(0, description="Velas guardadas en el rango revisado")
+    gaps: list[CandleGap] = Field(default_factory=list, description="Huecos pendientes encontrados")
+    missing_bars: int = Field(0, description="Velas que faltan en total")
+    skipped_gaps: int = Field(0, description="Huecos ya pedidos al proveedor sin datos (no se repiten)")
+    requests: int = Field(0, description="Peticiones al proveedor realizadas")
+    repaired_bars: int = Field(0, description="Velas recuperadas y cargadas")
+    features_rebuilt: int = Field(0, description="Filas de bar_features recalculadas tras la reparación")
+    errors: list[str] = Field(default_factory=list, description="Errores por petición")
+
+
+class GapRepairReport(BaseModel):
+    """Resultado de una ejecución del reparador de huecos"""
+
+    start: str = Field(..., description="Inicio del rango revisado (ISO)")
+    end: str = Field(..., description="Fin del rango revisado (ISO)")
+    dry_run: bool = Field(False, description="Si solo se escaneó sin pedir datos")
+    elapsed_seconds: float = Field(..., description="Duración de la ejecución")
+    series: list[GapRepairSeriesReport] = Field(default_factory=list, description="Resultado por serie")
@@ -6,6 +6,7 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from app.models.correlation_analysis import PairCorrelationTrend
 from app.utils.correlation_calculator import CorrelationResult, ImpactProjection
 
 
@@ -48,4 +49,9 @@ class MarketAlignmentAnalysis(BaseModel):
         None,
         description="Proyección de impacto en Gold basado en movimiento DXY"
     )
-
+    
+    # Regímenes de correlación multi-ventana (Gold vs DXY y bono)
+    gold_correlation_regimes: Optional[list[PairCorrelationTrend]] = Field(
+        None,
+        description="Correlación de Gold por ventana (10/30/90/250 días) y su régimen"
+    )
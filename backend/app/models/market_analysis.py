@@ -86,3 +86,62 @@ class DailyMarketAnalysis(BaseModel):
     sessions: list[SessionAnalysis] = Field(..., description="Análisis por sesión")
     summary: str = Field(..., description="Resumen textual del análisis completo")
 
+
+
+class SessionBaseline(BaseModel):
+    """Estadísticas de referencia de una sesión sobre un histórico de N días"""
+    session: SessionType = Field(..., description="Tipo de sesión")
+    days: int = Field(..., description="Días con datos de la sesión")
+    average_range: float = Field(..., description="Rango medio (high - low)")
+    median_range: float = Field(..., description="Rango mediano")
+    average_atr: float = Field(..., description="True range medio de las velas de la sesión")
+    average_change_percent: float = Field(..., description="Cambio porcentual medio de la sesión")
+    bullish_days: int = Field(..., description="Días con sesión alcista")
+    bearish_days: int = Field(..., description="Días con sesión bajista")
+    neutral_days: int = Field(..., description="Días con sesión lateral")
+    broke_previous_high_count: int = Field(..., description="Días en que la sesión rompió el máximo del día anterior")
+    broke_previous_low_count: int = Field(..., description="Días en que la sesión rompió el mínimo del día anterior")
+    last_range: Optional[float] = Field(None, description="Rango de la sesión más reciente")
+    last_range_percentile: Optional[float] = Field(
+        None,
+        description="Percentil (0-100) del último rango frente al histórico"
+    )
+
+
+class SessionStatisticsReport(BaseModel):
+    """Estadísticas multi-día por sesión"""
+    instrument: str = Field(..., description="Instrumento analizado")
+    days: int = Field(..., description="Días de trading incluidos")
+    start_date: str = Field(..., description="Primer día incluido (YYYY-MM-DD)")
+    end_date: str = Field(..., description="Último día incluido (YYYY-MM-DD)")
+    baselines: list[SessionBaseline] = Field(..., description="Estadísticas por sesión")
+
+
+class StoredSessionRange(BaseModel):
+    """Sesión de un análisis diario guardado, proyectada en SQL"""
+    analysis_date: datetime = Field(..., description="Fecha del análisis")
+    session: str = Field(..., description="Sesión (asia, london, new_york)")
+    range_value: Optional[float] = Field(None, description="Rango de la sesión (high - low)")
+    change_percent: Optional[float] = Field(None, description="Cambio porcentual de la sesión")
+    direction: Optional[str] = Field(None, description="Dirección de la sesión")
+
+
+class SessionRangeHistory(BaseModel):
+    """Histórico de rangos por sesión de los análisis diarios guardados"""
+    instrument: str = Field(..., description="Instrumento analizado")
+    days: int = Field(..., description="Días naturales hacia atrás")
+    session: Optional[str] = Field(None, description="Sesión filtrada (todas si es None)")
+    ranges: list[StoredSessionRange] = Field(..., description="Una entrada por sesión y día, en orden cronológico")
+
+
+class PriceZone(BaseModel):
+    """Zona de precio formada por swings agrupados (soporte/resistencia)"""
+    level: float = Field(..., description="Precio central de la zona (ponderado por recencia)")
+    lower: float = Field(..., description="Límite inferior de la zona")
+    upper: float = Field(..., description="Límite superior de la zona")
+    touches: int = Field(..., description="Número de swings dentro de la zona")
+    swing_highs: int = Field(..., description="Swings de máximo dentro de la zona")
+    swing_lows: int = Field(..., description="Swings de mínimo dentro de la zona")
+    weight: float = Field(..., description="Suma de pesos de recencia de los toques")
+    bars_since_touch: int = Field(..., description="Velas desde el toque más reciente")
+    last_touch: datetime = Field(..., description="Timestamp del toque más reciente")
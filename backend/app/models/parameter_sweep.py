@@ -0,0 +1,30 @@
+"""
+Modelos para el barrido de parámetros de los umbrales de análisis técnico
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class SweepResult(BaseModel):
+    """Métricas de una combinación de parámetros evaluada sobre el histórico"""
+
+    rank: int = Field(0, description="Posición en la tabla ordenada (1 = mejor)")
+    parameters: dict[str, float] = Field(..., description="Valor de cada parámetro de la combinación")
+    trend_hit_rate: Optional[float] = Field(
+        None, description="Proporción de velas con tendencia cuyo retorno futuro tiene el mismo signo"
+    )
+    trend_signals: int = Field(0, description="Velas con tendencia alcista o bajista")
+    impulse_hit_rate: Optional[float] = Field(
+        None, description="Proporción de impulsos fuertes que continúan en su dirección"
+    )
+    impulse_signals: int = Field(0, description="Impulsos fuertes detectados")
+    retest_hit_rate: Optional[float] = Field(
+        None, description="Proporción de retesteos de niveles redondos que rebotan"
+    )
+    retest_signals: int = Field(0, description="Retesteos detectados")
+    volatility_hit_rate: Optional[float] = Field(
+        None, description="Proporción de clasificaciones baja/alta/extrema confirmadas por el rango futuro"
+    )
+    volatility_signals: int = Field(0, description="Velas clasificadas con volatilidad distinta de normal")
+    score: float = Field(0.0, description="Media de las tasas de acierto disponibles")
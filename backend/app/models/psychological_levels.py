@@ -114,3 +114,39 @@ class PsychologicalLevelsResponse(BaseModel):
     # Configuración del análisis
     lookback_days: int = Field(default=30, description="Días analizados para histórico")
     max_distance_points: float = Field(default=100.0, description="Distancia máxima considerada en puntos")
+
+
+class TimeframeLevelStats(BaseModel):
+    """Reacciones de un nivel psicológico en una temporalidad"""
+    timeframe: str = Field(..., description="Temporalidad (Weekly, Daily, H4, H1)")
+    strength: float = Field(..., ge=0.0, le=1.0, description="Fuerza del nivel en la temporalidad (0-1)")
+    bounce_count: int = Field(default=0, description="Cantidad de rebotes")
+    break_count: int = Field(default=0, description="Cantidad de rupturas")
+    last_reaction_date: Optional[str] = Field(None, description="Última fecha de reacción (ISO format)")
+    last_reaction_type: Optional[ReactionType] = Field(None, description="Tipo de última reacción")
+
+
+class LevelConfluence(BaseModel):
+    """Nivel psicológico evaluado en todas las temporalidades"""
+    level: float = Field(..., description="Precio del nivel redondo")
+    type: LevelType = Field(..., description="Tipo de nivel (soporte/resistencia/ambos)")
+    distance_from_current: float = Field(..., description="Distancia desde precio actual en puntos")
+    is_round_hundred: bool = Field(default=False, description="Si es un nivel de 100 (ej: 4500, 4600)")
+    by_timeframe: list[TimeframeLevelStats] = Field(..., description="Reacciones por temporalidad")
+    timeframes_with_reactions: int = Field(..., description="Temporalidades con al menos una reacción")
+    confluence_score: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Fuerza combinada ponderada por temporalidad (0-1)"
+    )
+
+
+class LevelConfluenceResponse(BaseModel):
+    """Confluencia de niveles psicológicos entre temporalidades"""
+    instrument: str = Field(..., description="Instrumento analizado")
+    current_price: float = Field(..., description="Precio actual del instrumento")
+    timeframes: list[str] = Field(..., description="Temporalidades evaluadas")
+    levels: list[LevelConfluence] = Field(..., description="Niveles ordenados por precio")
+    strongest_support: Optional[LevelConfluence] = Field(None, description="Soporte con mayor confluencia")
+    strongest_resistance: Optional[LevelConfluence] = Field(None, description="Resistencia con mayor confluencia")
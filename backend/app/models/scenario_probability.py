@@ -47,6 +47,64 @@ class ScenarioProbability(BaseModel):
         }
 
 
+class SimulationMethod(str, Enum):
+    """Métodos de generación de trayectorias Monte Carlo"""
+    BOOTSTRAP = "bootstrap"  # Remuestreo de retornos históricos
+    GBM = "gbm"              # Movimiento browniano geométrico
+
+
+class SimulatedLevel(BaseModel):
+    """Probabilidades empíricas de un nivel dentro del horizonte simulado"""
+    
+    level: float = Field(..., description="Precio del nivel")
+    side: str = Field(..., description="Posición respecto al precio actual (above, below)")
+    touch_probability: float = Field(..., ge=0.0, le=1.0, description="Proporción de trayectorias que tocan el nivel")
+    touch_lower: float = Field(..., ge=0.0, le=1.0, description="Límite inferior del intervalo de confianza (toque)")
+    touch_upper: float = Field(..., ge=0.0, le=1.0, description="Límite superior del intervalo de confianza (toque)")
+    break_probability: float = Field(
+        ..., ge=0.0, le=1.0,
+        description="Proporción de trayectorias que tocan el nivel y terminan el horizonte al otro lado"
+    )
+    break_lower: float = Field(..., ge=0.0, le=1.0, description="Límite inferior del intervalo de confianza (ruptura)")
+    break_upper: float = Field(..., ge=0.0, le=1.0, description="Límite superior del intervalo de confianza (ruptura)")
+    hold_probability: float = Field(
+        ..., ge=0.0, le=1.0,
+        description="Proporción de trayectorias que tocan el nivel sin romperlo (retesteo que aguanta)"
+    )
+
+
+class MonteCarloSimulation(BaseModel):
+    """Resultado de la simulación Monte Carlo de trayectorias de precio"""
+    
+    method: SimulationMethod = Field(..., description="Método de generación de trayectorias")
+    paths: int = Field(..., description="Número de trayectorias simuladas")
+    horizon_bars: int = Field(..., description="Horizonte en velas")
+    current_price: float = Field(..., description="Precio de partida")
+    volatility: float = Field(..., description="Volatilidad por vela (desviación de retornos logarítmicos)")
+    regime_ratio: float = Field(
+        ..., description="Volatilidad reciente / volatilidad de la ventana (régimen aplicado a las trayectorias)"
+    )
+    confidence: float = Field(..., description="Nivel de confianza de los intervalos")
+    levels: list[SimulatedLevel] = Field(default_factory=list, description="Niveles evaluados")
+    range_probability: Optional[float] = Field(
+        None, ge=0.0, le=1.0,
+        description="Proporción de trayectorias que no tocan el soporte ni la resistencia más cercanos"
+    )
+    range_lower: Optional[float] = Field(None, ge=0.0, le=1.0, description="Límite inferior (rango)")
+    range_upper: Optional[float] = Field(None, ge=0.0, le=1.0, description="Límite superior (rango)")
+    
+    def nearest_level(self, side: str) -> Optional[SimulatedLevel]:
+        """
+        Nivel simulado más cercano al precio actual en un lado
+        @param side - above (resistencia) o below (soporte)
+        @returns SimulatedLevel o None si no hay niveles en ese lado
+        """
+        candidates = [level for level in self.levels if level.side == side]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda level: abs(level.level - self.current_price))
+
+
 class ScenarioAnalysis(BaseModel):
     """Análisis completo de escenarios para una operación"""
     
@@ -72,6 +130,9 @@ class ScenarioAnalysis(BaseModel):
     )
     
     summary: str = Field(..., description="Resumen del análisis de escenarios")
+    simulation: Optional[MonteCarloSimulation] = Field(
+        None, description="Simulación Monte Carlo usada para contrastar las probabilidades (opcional)"
+    )
     
     class Config:
         json_schema_extra = {
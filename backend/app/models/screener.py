@@ -0,0 +1,39 @@
+"""
+Modelos para el screener multi-instrumento
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.market_analysis import MarketDirection
+
+
+class ScreenerEntry(BaseModel):
+    """Resultado del escaneo de un instrumento"""
+
+    rank: int = Field(0, description="Posición por calidad del setup (1 = mejor)")
+    instrument: str = Field(..., description="Instrumento")
+    asset_class: Optional[str] = Field(None, description="Grupo de la watchlist (metales, forex, indices)")
+    current_price: Optional[float] = Field(None, description="Último cierre H1 (o H4 si no hay H1)")
+    direction: MarketDirection = Field(MarketDirection.NEUTRAL, description="Dirección de la convergencia")
+    convergence: Optional[str] = Field(None, description="Convergencia de tendencias Daily/H4/H1")
+    alignment: float = Field(0.0, description="Alineación de todas las ventanas de tendencia (0-1)")
+    level: Optional[float] = Field(None, description="Nivel H4 más cercano a favor del setup")
+    level_type: Optional[str] = Field(None, description="support o resistance")
+    level_distance_percent: Optional[float] = Field(None, description="Distancia del precio al nivel (%)")
+    near_level: bool = Field(False, description="Si el precio está junto al nivel")
+    impulse_strong: bool = Field(False, description="Impulso H4 fuerte en la dirección del setup")
+    score: float = Field(0.0, description="Calidad del setup (0-1)")
+    error: Optional[str] = Field(None, description="Motivo si el instrumento no pudo analizarse")
+
+
+class ScreenerResponse(BaseModel):
+    """Respuesta del screener"""
+
+    scan_time: str = Field(..., description="Momento de referencia del escaneo (ISO)")
+    instruments: int = Field(..., description="Instrumentos escaneados")
+    concurrency: int = Field(..., description="Análisis simultáneos máximos")
+    candle_fetches: int = Field(..., description="Descargas de velas realizadas")
+    shared_fetches: int = Field(..., description="Peticiones de velas servidas por una descarga compartida")
+    elapsed_seconds: float = Field(..., description="Duración del escaneo")
+    results: list[ScreenerEntry] = Field(default_factory=list, description="Instrumentos ordenados por score")
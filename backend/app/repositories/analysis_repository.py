@@ -1,13 +1,12 @@
 """
 Repositorio para análisis y recomendaciones
 """
-import json
 import logging
-from datetime import datetime, date
-from typing import List, Optional
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import JSON, and_, func, desc, true, type_coerce
 
 from app.db.models import (
     DailyAnalysisModel,
@@ -54,7 +53,7 @@ class AnalysisRepository:
             )
         ).first()
 
-        sessions_data = json.dumps([s.dict() for s in analysis.sessions])
+        sessions_data = [s.model_dump(mode="json") for s in analysis.sessions]
 
         if existing:
             existing.previous_day_close = analysis.previous_day_close
@@ -109,6 +108,48 @@ class AnalysisRepository:
             )
         ).first()
 
+    def get_session_ranges(
+        self,
+        instrument: str,
+        days: int = 90,
+        session: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Proyecta en SQL los campos de cada sesión guardada en analysis_data (una fila por sesión y día)
+        sin deserializar los análisis completos en Python: jsonb_array_elements en PostgreSQL,
+        json_each en SQLite
+        @param instrument - Símbolo del instrumento
+        @param days - Número de días hacia atrás
+        @param session - Filtrar por sesión (asia, london, new_york) o None para todas
+        @returns Lista de dicts con analysis_date, session, range_value, change_percent y direction
+        """
+        if not self.db:
+            return []
+
+        array_elements = func.json_each if self.db.get_bind().dialect.name == "sqlite" else func.jsonb_array_elements
+        elements = array_elements(DailyAnalysisModel.analysis_data).table_valued("value")
+        fields = type_coerce(elements.c.value, JSON)
+        session_name = fields["session"].as_string()
+
+        cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=days), datetime.min.time())
+        filters = [
+            DailyAnalysisModel.instrument == instrument.upper(),
+            DailyAnalysisModel.analysis_date >= cutoff,
+        ]
+        if session:
+            filters.append(session_name == session)
+
+        rows = self.db.query(
+            DailyAnalysisModel.analysis_date.label("analysis_date"),
+            session_name.label("session"),
+            fields["range_value"].as_float().label("range_value"),
+            fields["change_percent"].as_float().label("change_percent"),
+            fields["direction"].as_string().label("direction"),
+        ).join(elements, true()).filter(
+            and_(*filters)
+        ).order_by(DailyAnalysisModel.analysis_date).all()
+        return [dict(row._mapping) for row in rows]
+
     def save_trading_mode_recommendation(
         self,
         recommendation: TradingModeRecommendation,
@@ -125,7 +166,7 @@ class AnalysisRepository:
         if not self.db:
             return None
         
-        reasons_data = json.dumps([r.dict() for r in recommendation.reasons])
+        reasons_data = [r.model_dump(mode="json") for r in recommendation.reasons]
         recommendation_date = datetime.utcnow().date()
 
         existing = self.db.query(TradingModeRecommendationModel).filter(
@@ -243,4 +284,3 @@ class AnalysisRepository:
             raise
 
         return model
-
@@ -0,0 +1,130 @@
+"""
+Repositorio para los checkpoints del backfill histórico
+"""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+
+from app.db.models import BackfillCheckpointModel
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillCheckpointRepository:
+    """Repositorio para registrar los bloques de fechas ya cargados por el backfill"""
+
+    def __init__(self, db: Optional[Session]):
+        """
+        Inicializa el repositorio
+        @param db - Sesión de base de datos (puede ser None)
+        """
+        self.db = db
+
+    def get_completed_chunks(
+        self,
+        instrument: str,
+        interval: str,
+        provider: str,
+        empty_since: Optional[datetime] = None
+    ) -> set[tuple[datetime, datetime]]:
+        """
+        Obtiene los bloques completados de una serie
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param provider - Proveedor usado en la carga
+        @param empty_since - Si se indica, los bloques sin velas registrados antes de esta fecha se ignoran
+                             (caducan y se vuelven a pedir)
+        @returns Conjunto de tuplas (inicio, fin) de los bloques completados
+        """
+        if not self.db:
+            return set()
+
+        filters = [
+            BackfillCheckpointModel.instrument == instrument.upper(),
+            BackfillCheckpointModel.interval == interval,
+            BackfillCheckpointModel.provider == provider,
+        ]
+        if empty_since is not None:
+            filters.append(or_(
+                BackfillCheckpointModel.rows > 0,
+                BackfillCheckpointModel.completed_at >= empty_since,
+            ))
+
+        rows = self.db.query(
+            BackfillCheckpointModel.chunk_start,
+            BackfillCheckpointModel.chunk_end
+        ).filter(
+            and_(*filters)
+        ).all()
+        return {(row.chunk_start, row.chunk_end) for row in rows}
+
+    def save_checkpoint(
+        self,
+        instrument: str,
+        interval: str,
+        provider: str,
+        chunk_start: datetime,
+        chunk_end: datetime,
+        rows: int
+    ) -> Optional[BackfillCheckpointModel]:
+        """
+        Registra un bloque como completado
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param provider - Proveedor usado en la carga
+        @param chunk_start - Inicio del bloque
+        @param chunk_end - Fin del bloque
+        @param rows - Velas recibidas del proveedor
+        @returns Modelo guardado o None si no hay base de datos
+        """
+        if not self.db:
+            return None
+
+        checkpoint = BackfillCheckpointModel(
+            instrument=instrument.upper(),
+            interval=interval,
+            provider=provider,
+            chunk_start=chunk_start,
+            chunk_end=chunk_end,
+            rows=rows,
+        )
+
+        try:
+            self.db.add(checkpoint)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error saving backfill checkpoint: {str(e)}")
+            raise
+
+        return checkpoint
+
+    def clear_checkpoints(self, instrument: str, interval: str, provider: str) -> int:
+        """
+        Elimina los checkpoints de una serie (para recargarla completa)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param provider - Proveedor usado en la carga
+        @returns Número de checkpoints eliminados
+        """
+        if not self.db:
+            return 0
+
+        try:
+            deleted = self.db.query(BackfillCheckpointModel).filter(
+                and_(
+                    BackfillCheckpointModel.instrument == instrument.upper(),
+                    BackfillCheckpointModel.interval == interval,
+                    BackfillCheckpointModel.provider == provider,
+                )
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error clearing backfill checkpoints: {str(e)}")
+            raise
+
+        return deleted
@@ -0,0 +1,226 @@
+"""
+Repositorio para el feature store de indicadores por vela
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc
+
+from app.db.models import BarFeatureModel, IndicatorSnapshotModel
+
+logger = logging.getLogger(__name__)
+
+
+class BarFeaturesRepository:
+    """Repositorio para gestionar indicadores precalculados (bar_features)"""
+
+    def __init__(self, db: Optional[Session]):
+        """
+        Inicializa el repositorio
+        @param db - Sesión de base de datos (puede ser None)
+        """
+        self.db = db
+
+    def save_features(
+        self,
+        instrument: str,
+        interval: str,
+        rows: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Inserta filas de indicadores en bloque
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param rows - Filas con timestamp, close_price, rsi, ema_*, atr, trend y session
+        @returns Número de filas insertadas
+        """
+        if not self.db or not rows:
+            return 0
+
+        mappings = [
+            {**row, "instrument": instrument.upper(), "interval": interval}
+            for row in rows
+        ]
+
+        try:
+            self.db.bulk_insert_mappings(BarFeatureModel, mappings)
+            self.db.commit()
+            logger.info(f"Saved {len(mappings)} bar features for {instrument} ({interval})")
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error saving bar features: {str(e)}")
+            raise
+
+        return len(mappings)
+
+    def get_latest_feature(
+        self,
+        instrument: str,
+        interval: str
+    ) -> Optional[BarFeatureModel]:
+        """
+        Obtiene la fila de indicadores más reciente
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Última fila o None
+        """
+        if not self.db:
+            return None
+
+        return self.db.query(BarFeatureModel).filter(
+            and_(
+                BarFeatureModel.instrument == instrument.upper(),
+                BarFeatureModel.interval == interval,
+            )
+        ).order_by(desc(BarFeatureModel.timestamp)).first()
+
+    def get_features_after(
+        self,
+        instrument: str,
+        interval: str,
+        after: Optional[datetime] = None
+    ) -> List[BarFeatureModel]:
+        """
+        Obtiene los indicadores posteriores a un timestamp (todos si after es None)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param after - Timestamp exclusivo desde el que buscar (opcional)
+        @returns Lista de filas ordenadas por timestamp
+        """
+        if not self.db:
+            return []
+
+        filters = [
+            BarFeatureModel.instrument == instrument.upper(),
+            BarFeatureModel.interval == interval,
+        ]
+        if after is not None:
+            filters.append(BarFeatureModel.timestamp > after)
+
+        return self.db.query(BarFeatureModel).filter(
+            and_(*filters)
+        ).order_by(BarFeatureModel.timestamp).all()
+
+    def delete_features(
+        self,
+        instrument: str,
+        interval: str,
+        since: Optional[datetime] = None
+    ) -> int:
+        """
+        Elimina los indicadores de un instrumento/intervalo (para reconstruirlos)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param since - Si se indica, solo se eliminan las filas desde ese timestamp (inclusive)
+        @returns Número de filas eliminadas
+        """
+        if not self.db:
+            return 0
+
+        filters = [
+            BarFeatureModel.instrument == instrument.upper(),
+            BarFeatureModel.interval == interval,
+        ]
+        if since is not None:
+            filters.append(BarFeatureModel.timestamp >= since)
+
+        try:
+            deleted = self.db.query(BarFeatureModel).filter(
+                and_(*filters)
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error deleting bar features: {str(e)}")
+            raise
+
+        return deleted
+
+    def get_snapshot(
+        self,
+        instrument: str,
+        interval: str
+    ) -> Optional[IndicatorSnapshotModel]:
+        """
+        Obtiene el snapshot de indicadores incrementales
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Snapshot o None
+        """
+        if not self.db:
+            return None
+
+        return self.db.query(IndicatorSnapshotModel).filter(
+            and_(
+                IndicatorSnapshotModel.instrument == instrument.upper(),
+                IndicatorSnapshotModel.interval == interval,
+            )
+        ).first()
+
+    def delete_snapshot(self, instrument: str, interval: str) -> int:
+        """
+        Elimina el snapshot de indicadores incrementales (para reconstruirlo desde el histórico)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Número de filas eliminadas
+        """
+        if not self.db:
+            return 0
+
+        try:
+            deleted = self.db.query(IndicatorSnapshotModel).filter(
+                and_(
+                    IndicatorSnapshotModel.instrument == instrument.upper(),
+                    IndicatorSnapshotModel.interval == interval,
+                )
+            ).delete(synchronize_session="evaluate")
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error deleting indicator snapshot: {str(e)}")
+            raise
+
+        return deleted
+
+    def save_snapshot(
+        self,
+        instrument: str,
+        interval: str,
+        last_timestamp: datetime,
+        state: Dict[str, Any]
+    ) -> Optional[IndicatorSnapshotModel]:
+        """
+        Guarda (o reemplaza) el snapshot de indicadores incrementales
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param last_timestamp - Última vela procesada
+        @param state - Estado serializado
+        @returns Modelo guardado o None si no hay DB
+        """
+        if not self.db:
+            return None
+
+        existing = self.get_snapshot(instrument, interval)
+        if existing:
+            existing.last_timestamp = last_timestamp
+            existing.state = state
+            model = existing
+        else:
+            model = IndicatorSnapshotModel(
+                instrument=instrument.upper(),
+                interval=interval,
+                last_timestamp=last_timestamp,
+                state=state,
+            )
+            self.db.add(model)
+
+        try:
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error saving indicator snapshot: {str(e)}")
+            raise
+
+        return model
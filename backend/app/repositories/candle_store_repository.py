@@ -0,0 +1,420 @@
+"""
+Almacén local de velas en disco leído con numpy.memmap
+Alternativa a market_data en PostgreSQL con la misma interfaz que MarketDataRepository: un fichero
+binario de registros de tamaño fijo por (instrumento, intervalo), ordenado por timestamp y ampliado
+solo por el final, más un índice JSON con el número de filas confirmadas. Las lecturas por rango son
+vistas sin copia del fichero mapeado localizadas por búsqueda binaria
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Union
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config.settings import Settings, get_settings
+from app.models.market_analysis import PriceCandle
+from app.repositories.market_data_repository import MarketDataRepository
+from app.utils.candle_arrays import CandleArrays
+
+logger = logging.getLogger(__name__)
+
+
+class StoredCandle(NamedTuple):
+    """Fila del almacén con los mismos atributos que MarketDataModel"""
+    instrument: str
+    interval: str
+    timestamp: datetime
+    open_price: float
+    high_price: float
+    low_price: float
+    close_price: float
+    volume: Optional[float]
+
+
+class CandleStoreRepository:
+    """Repositorio de velas sobre ficheros binarios mapeados en memoria"""
+
+    # Registro de 48 bytes por vela; el volumen ausente se guarda como NaN
+    RECORD_DTYPE = np.dtype([
+        ("timestamp", "<M8[s]"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ])
+
+    # Un único escritor por proceso; los lectores no bloquean
+    _write_lock = threading.Lock()
+
+    # Mapas abiertos por fichero de datos: (firma de ficheros, filas, memmap)
+    _maps: dict[Path, tuple[tuple, int, np.memmap]] = {}
+
+    def __init__(self, root: str):
+        """
+        Inicializa el almacén
+        @param root - Directorio raíz (un subdirectorio por instrumento)
+        """
+        self.root = Path(root)
+
+    @property
+    def available(self) -> bool:
+        """Si hay almacenamiento de velas configurado"""
+        return True
+
+    def _paths(self, instrument: str, interval: str) -> tuple[Path, Path]:
+        """
+        Rutas del fichero de datos y del índice de una serie
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Tupla (datos, índice)
+        """
+        directory = self.root / instrument.upper()
+        return directory / f"{interval}.bin", directory / f"{interval}.json"
+
+    def _records(self, instrument: str, interval: str) -> np.ndarray:
+        """
+        Registros confirmados de una serie como vista del fichero mapeado
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Array estructurado RECORD_DTYPE (vacío si la serie no existe)
+        """
+        data_path, index_path = self._paths(instrument, interval)
+        try:
+            data_stat, index_stat = data_path.stat(), index_path.stat()
+        except FileNotFoundError:
+            return np.empty(0, dtype=self.RECORD_DTYPE)
+
+        signature = (data_stat.st_ino, data_stat.st_size, index_stat.st_ino, index_stat.st_mtime_ns)
+        cached = self._maps.get(data_path)
+        if cached is None or cached[0] != signature:
+            rows = json.loads(index_path.read_text())["rows"]
+            mapped = (
+                np.memmap(data_path, dtype=self.RECORD_DTYPE, mode="r", shape=(rows,))
+                if rows else np.empty(0, dtype=self.RECORD_DTYPE)
+            )
+            cached = (signature, rows, mapped)
+            self._maps[data_path] = cached
+        return cached[2]
+
+    def _write_index(self, index_path: Path, rows: int, first: np.datetime64, last: np.datetime64) -> None:
+        """
+        Escribe el índice de forma atómica (las filas no confirmadas en él se ignoran al leer)
+        @param index_path - Ruta del índice
+        @param rows - Registros confirmados
+        @param first - Primer timestamp
+        @param last - Último timestamp
+        """
+        temporary = index_path.with_suffix(".json.tmp")
+        temporary.write_text(json.dumps({"rows": int(rows), "first": str(first), "last": str(last)}))
+        os.replace(temporary, index_path)
+
+    @classmethod
+    def to_records(cls, candles: List[PriceCandle]) -> np.ndarray:
+        """
+        Convierte velas a registros ordenados por timestamp (la última repetida prevalece)
+        @param candles - Velas
+        @returns Array estructurado RECORD_DTYPE
+        """
+        records = np.empty(len(candles), dtype=cls.RECORD_DTYPE)
+        records["timestamp"] = [candle.timestamp for candle in candles]
+        records["open"] = [candle.open for candle in candles]
+        records["high"] = [candle.high for candle in candles]
+        records["low"] = [candle.low for candle in candles]
+        records["close"] = [candle.close for candle in candles]
+        records["volume"] = [np.nan if candle.volume is None else candle.volume for candle in candles]
+        return cls._deduplicate(records)
+
+    @staticmethod
+    def _deduplicate(records: np.ndarray) -> np.ndarray:
+        """
+        Ordena por timestamp conservando el último registro de cada timestamp
+        @param records - Registros en orden de llegada
+        @returns Registros ordenados sin duplicados
+        """
+        order = np.argsort(records["timestamp"], kind="stable")
+        ordered = records[order]
+        keep = np.ones(len(ordered), dtype=bool)
+        keep[:-1] = ordered["timestamp"][1:] != ordered["timestamp"][:-1]
+        return ordered[keep]
+
+    def copy_candles(
+        self,
+        instrument: str,
+        interval: str,
+        candles: List[PriceCandle]
+    ) -> int:
+        """
+        Guarda velas: si todas son posteriores a la última se añaden al final del fichero;
+        si no, se fusionan (sustituyendo timestamps existentes) y se reescribe la serie
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param candles - Velas a guardar
+        @returns Número de velas recibidas
+        """
+        if not candles:
+            return 0
+
+        new_records = self.to_records(candles)
+        data_path, index_path = self._paths(instrument, interval)
+
+        with self._write_lock:
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+            existing = self._records(instrument, interval)
+            try:
+                if not len(existing) or new_records["timestamp"][0] > existing["timestamp"][-1]:
+                    with open(data_path, "ab") as data_file:
+                        # Descartar bytes de una escritura interrumpida que el índice no confirmó
+                        data_file.truncate(len(existing) * self.RECORD_DTYPE.itemsize)
+                        data_file.write(new_records.tobytes())
+                        data_file.flush()
+                        os.fsync(data_file.fileno())
+                    first = existing["timestamp"][0] if len(existing) else new_records["timestamp"][0]
+                    self._write_index(
+                        index_path, len(existing) + len(new_records), first, new_records["timestamp"][-1]
+                    )
+                else:
+                    merged = self._deduplicate(np.concatenate([np.asarray(existing), new_records]))
+                    temporary = data_path.with_suffix(".bin.tmp")
+                    merged.tofile(temporary)
+                    os.replace(temporary, data_path)
+                    self._write_index(index_path, len(merged), merged["timestamp"][0], merged["timestamp"][-1])
+            except Exception as e:
+                logger.error(f"Error writing candle store for {instrument} ({interval}): {str(e)}")
+                raise
+
+        logger.info(f"Stored {len(candles)} candles for {instrument} ({interval}) in candle store")
+        return len(candles)
+
+    def save_candles(
+        self,
+        instrument: str,
+        candles: List[PriceCandle],
+        interval: str = "1h"
+    ) -> List[StoredCandle]:
+        """
+        Guarda velas de mercado (misma firma que MarketDataRepository.save_candles)
+        @param instrument - Símbolo del instrumento
+        @param candles - Lista de velas a guardar
+        @param interval - Intervalo de las velas
+        @returns Filas guardadas
+        """
+        self.copy_candles(instrument, interval, candles)
+        return self._to_rows(instrument, interval, self.to_records(candles))
+
+    def _slice(
+        self,
+        records: np.ndarray,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        after: Optional[datetime] = None
+    ) -> np.ndarray:
+        """
+        Vista de los registros en un rango mediante búsqueda binaria sobre la columna timestamp
+        @param records - Registros de la serie
+        @param start_date - Inicio incluido (opcional)
+        @param end_date - Fin incluido (opcional)
+        @param after - Inicio excluido (opcional)
+        @returns Vista de los registros del rango
+        """
+        timestamps = records["timestamp"]
+        lower, upper = 0, len(records)
+        if start_date is not None:
+            lower = int(timestamps.searchsorted(np.datetime64(start_date, "s"), side="left"))
+        if after is not None:
+            lower = int(timestamps.searchsorted(np.datetime64(after, "s"), side="right"))
+        if end_date is not None:
+            upper = int(timestamps.searchsorted(np.datetime64(end_date, "s"), side="right"))
+        return records[lower:max(lower, upper)]
+
+    @staticmethod
+    def _to_rows(instrument: str, interval: str, records: np.ndarray) -> List[StoredCandle]:
+        """
+        Convierte registros a filas con atributos de MarketDataModel
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param records - Registros
+        @returns Lista de StoredCandle
+        """
+        instrument = instrument.upper()
+        volumes = [None if np.isnan(v) else v for v in records["volume"].tolist()]
+        return [
+            StoredCandle(instrument, interval, *row)
+            for row in zip(
+                records["timestamp"].astype(datetime).tolist(),
+                records["open"].tolist(),
+                records["high"].tolist(),
+                records["low"].tolist(),
+                records["close"].tolist(),
+                volumes,
+            )
+        ]
+
+    def get_candle_arrays(
+        self,
+        instrument: str,
+        start_date: datetime,
+        end_date: datetime,
+        interval: str = "1h"
+    ) -> CandleArrays:
+        """
+        Obtiene un rango de velas como columnas NumPy sin copiar el fichero
+        @param instrument - Símbolo del instrumento
+        @param start_date - Fecha de inicio
+        @param end_date - Fecha de fin
+        @param interval - Intervalo de las velas
+        @returns CandleArrays con vistas sobre el fichero mapeado
+        """
+        records = self._slice(self._records(instrument, interval), start_date, end_date)
+        return CandleArrays(
+            records["timestamp"], records["open"], records["high"],
+            records["low"], records["close"], records["volume"],
+        )
+
+    def get_candles(
+        self,
+        instrument: str,
+        start_date: datetime,
+        end_date: datetime,
+        interval: str = "1h"
+    ) -> List[StoredCandle]:
+        """
+        Obtiene velas de mercado por rango de fechas
+        @param instrument - Símbolo del instrumento
+        @param start_date - Fecha de inicio
+        @param end_date - Fecha de fin
+        @param interval - Intervalo de las velas
+        @returns Lista de velas ordenadas por timestamp
+        """
+        records = self._slice(self._records(instrument, interval), start_date, end_date)
+        return self._to_rows(instrument, interval, records)
+
+    def get_timestamps(
+        self,
+        instrument: str,
+        interval: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> np.ndarray:
+        """
+        Obtiene solo los timestamps de una serie
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param start_date - Fecha de inicio (opcional)
+        @param end_date - Fecha de fin (opcional)
+        @returns Timestamps ordenados (datetime64[s])
+        """
+        return self._slice(self._records(instrument, interval), start_date, end_date)["timestamp"]
+
+    def get_candles_after(
+        self,
+        instrument: str,
+        interval: str,
+        after: Optional[datetime] = None
+    ) -> List[StoredCandle]:
+        """
+        Obtiene las velas posteriores a un timestamp (todas si after es None)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param after - Timestamp exclusivo desde el que buscar (opcional)
+        @returns Lista de velas ordenadas por timestamp
+        """
+        records = self._slice(self._records(instrument, interval), after=after)
+        return self._to_rows(instrument, interval, records)
+
+    def get_recent_candles(
+        self,
+        instrument: str,
+        interval: str,
+        until: datetime,
+        limit: int
+    ) -> List[StoredCandle]:
+        """
+        Obtiene las últimas N velas hasta un timestamp (incluido)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param until - Timestamp máximo (incluido)
+        @param limit - Número máximo de velas
+        @returns Lista de velas ordenadas por timestamp ascendente
+        """
+        records = self._slice(self._records(instrument, interval), end_date=until)
+        return self._to_rows(instrument, interval, records[max(0, len(records) - limit):])
+
+    def get_latest_candle_by_interval(
+        self,
+        instrument: str,
+        interval: str
+    ) -> Optional[StoredCandle]:
+        """
+        Obtiene la vela más reciente de un instrumento para un intervalo específico
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Última vela o None
+        """
+        records = self._records(instrument, interval)
+        return self._to_rows(instrument, interval, records[-1:])[0] if len(records) else None
+
+    def count_candles(self, instrument: str, interval: str) -> int:
+        """
+        Cuenta las velas guardadas de una serie (registros confirmados en el índice)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Número de velas
+        """
+        return len(self._records(instrument, interval))
+
+    def get_latest_price(self, instrument: str) -> Optional[StoredCandle]:
+        """
+        Obtiene el precio más reciente de un instrumento (en cualquier intervalo)
+        @param instrument - Símbolo del instrumento
+        @returns Última vela o None
+        """
+        directory = self.root / instrument.upper()
+        if not directory.is_dir():
+            return None
+        latest = [
+            self.get_latest_candle_by_interval(instrument, index_path.stem)
+            for index_path in directory.glob("*.json")
+        ]
+        latest = [row for row in latest if row is not None]
+        return max(latest, key=lambda row: row.timestamp) if latest else None
+
+    def convert_to_price_candles(self, models: List[StoredCandle]) -> List[PriceCandle]:
+        """
+        Convierte filas del almacén a PriceCandle
+        @param models - Filas del almacén
+        @returns Lista de PriceCandle
+        """
+        return [
+            PriceCandle(
+                timestamp=model.timestamp,
+                open=model.open_price,
+                high=model.high_price,
+                low=model.low_price,
+                close=model.close_price,
+                volume=model.volume
+            )
+            for model in models
+        ]
+
+
+def create_market_data_repository(
+    db: Optional[Session],
+    settings: Optional[Settings] = None
+) -> Union[MarketDataRepository, CandleStoreRepository]:
+    """
+    Crea el repositorio de velas configurado: el almacén en disco si CANDLE_STORE_PATH está
+    definido y, si no, market_data en PostgreSQL
+    @param db - Sesión de base de datos (puede ser None)
+    @param settings - Configuración de la aplicación (por defecto get_settings())
+    @returns Repositorio con la interfaz de MarketDataRepository
+    """
+    settings = settings or get_settings()
+    if settings.candle_store_path:
+        return CandleStoreRepository(settings.candle_store_path)
+    return MarketDataRepository(db)
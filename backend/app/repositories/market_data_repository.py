@@ -1,15 +1,18 @@
 """
 Repositorio para datos de mercado
 """
+import csv
+import io
 import logging
 from datetime import datetime
 from typing import List, Optional
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func, text
 
 from app.db.models import MarketDataModel
 from app.models.market_analysis import PriceCandle
+from app.utils.candle_arrays import CandleArrays
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,11 @@ class MarketDataRepository:
         """
         self.db = db
 
+    @property
+    def available(self) -> bool:
+        """Si hay almacenamiento de velas configurado (sesión de base de datos)"""
+        return self.db is not None
+
     def save_candles(
         self,
         instrument: str,
@@ -82,6 +90,94 @@ class MarketDataRepository:
 
         return saved_models
 
+    # Columnas cargadas por COPY (mismo orden que candles_to_csv)
+    COPY_COLUMNS = (
+        "instrument", "interval", "timestamp",
+        "open_price", "high_price", "low_price", "close_price", "volume",
+    )
+
+    def copy_candles(
+        self,
+        instrument: str,
+        interval: str,
+        candles: List[PriceCandle]
+    ) -> int:
+        """
+        Carga velas en bloque con COPY a una tabla temporal y las fusiona en market_data
+        (inserta las nuevas y actualiza las existentes por instrumento/intervalo/timestamp).
+        Requiere PostgreSQL con psycopg2; es la alternativa a save_candles para históricos grandes
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param candles - Velas a cargar
+        @returns Número de velas enviadas
+        """
+        if not self.db or not candles:
+            return 0
+
+        columns = ", ".join(self.COPY_COLUMNS)
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}" for column in self.COPY_COLUMNS[3:]
+        )
+
+        try:
+            self.db.execute(text(
+                "CREATE TEMP TABLE IF NOT EXISTS market_data_staging "
+                "(LIKE market_data INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            ))
+            cursor = self.db.connection().connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY market_data_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    self.candles_to_csv(instrument, interval, candles)
+                )
+            finally:
+                cursor.close()
+            self.db.execute(text(
+                f"INSERT INTO market_data ({columns}) "
+                f"SELECT DISTINCT ON (instrument, interval, timestamp) {columns} "
+                f"FROM market_data_staging ORDER BY instrument, interval, timestamp "
+                f"ON CONFLICT ON CONSTRAINT uq_market_data_instrument_interval_timestamp "
+                f"DO UPDATE SET {updates}"
+            ))
+            self.db.commit()
+            logger.info(f"Copied {len(candles)} candles for {instrument} ({interval}) to database")
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error copying candles: {str(e)}")
+            raise
+
+        return len(candles)
+
+    @staticmethod
+    def candles_to_csv(
+        instrument: str,
+        interval: str,
+        candles: List[PriceCandle]
+    ) -> io.StringIO:
+        """
+        Serializa velas en CSV para COPY (columnas COPY_COLUMNS, volumen vacío = NULL)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param candles - Velas a serializar
+        @returns Buffer CSV posicionado al inicio
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        instrument = instrument.upper()
+        for candle in candles:
+            writer.writerow((
+                instrument,
+                interval,
+                candle.timestamp.isoformat(sep=" "),
+                repr(candle.open),
+                repr(candle.high),
+                repr(candle.low),
+                repr(candle.close),
+                "" if candle.volume is None else repr(candle.volume),
+            ))
+        buffer.seek(0)
+        return buffer
+
     def get_candles(
         self,
         instrument: str,
@@ -109,6 +205,109 @@ class MarketDataRepository:
             )
         ).order_by(MarketDataModel.timestamp).all()
 
+    def get_candle_arrays(
+        self,
+        instrument: str,
+        start_date: datetime,
+        end_date: datetime,
+        interval: str = "1h"
+    ) -> CandleArrays:
+        """
+        Obtiene velas por rango de fechas como columnas NumPy
+        @param instrument - Símbolo del instrumento
+        @param start_date - Fecha de inicio
+        @param end_date - Fecha de fin
+        @param interval - Intervalo de las velas
+        @returns CandleArrays ordenado por timestamp
+        """
+        return CandleArrays.from_models(self.get_candles(instrument, start_date, end_date, interval))
+
+    def get_timestamps(
+        self,
+        instrument: str,
+        interval: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[datetime]:
+        """
+        Obtiene solo los timestamps de una serie (para escanear huecos sin cargar las velas)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param start_date - Fecha de inicio (opcional)
+        @param end_date - Fecha de fin (opcional)
+        @returns Timestamps ordenados
+        """
+        if not self.db:
+            return []
+
+        filters = [
+            MarketDataModel.instrument == instrument.upper(),
+            MarketDataModel.interval == interval,
+        ]
+        if start_date is not None:
+            filters.append(MarketDataModel.timestamp >= start_date)
+        if end_date is not None:
+            filters.append(MarketDataModel.timestamp <= end_date)
+
+        rows = self.db.query(MarketDataModel.timestamp).filter(
+            and_(*filters)
+        ).order_by(MarketDataModel.timestamp).all()
+        return [row.timestamp for row in rows]
+
+    def get_candles_after(
+        self,
+        instrument: str,
+        interval: str,
+        after: Optional[datetime] = None
+    ) -> List[MarketDataModel]:
+        """
+        Obtiene las velas posteriores a un timestamp (todas si after es None)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param after - Timestamp exclusivo desde el que buscar (opcional)
+        @returns Lista de velas ordenadas por timestamp
+        """
+        if not self.db:
+            return []
+
+        filters = [
+            MarketDataModel.instrument == instrument.upper(),
+            MarketDataModel.interval == interval,
+        ]
+        if after is not None:
+            filters.append(MarketDataModel.timestamp > after)
+
+        return self.db.query(MarketDataModel).filter(
+            and_(*filters)
+        ).order_by(MarketDataModel.timestamp).all()
+
+    def get_recent_candles(
+        self,
+        instrument: str,
+        interval: str,
+        until: datetime,
+        limit: int
+    ) -> List[MarketDataModel]:
+        """
+        Obtiene las últimas N velas hasta un timestamp (incluido)
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param until - Timestamp máximo (incluido)
+        @param limit - Número máximo de velas
+        @returns Lista de velas ordenadas por timestamp ascendente
+        """
+        if not self.db:
+            return []
+
+        models = self.db.query(MarketDataModel).filter(
+            and_(
+                MarketDataModel.instrument == instrument.upper(),
+                MarketDataModel.interval == interval,
+                MarketDataModel.timestamp <= until,
+            )
+        ).order_by(desc(MarketDataModel.timestamp)).limit(limit).all()
+        return list(reversed(models))
+
     def get_latest_price(self, instrument: str) -> Optional[MarketDataModel]:
         """
         Obtiene el precio más reciente de un instrumento
@@ -143,6 +342,23 @@ class MarketDataRepository:
             )
         ).order_by(desc(MarketDataModel.timestamp)).first()
     
+    def count_candles(self, instrument: str, interval: str) -> int:
+        """
+        Cuenta las velas guardadas de una serie
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Número de velas
+        """
+        if not self.db:
+            return 0
+        
+        return self.db.query(func.count(MarketDataModel.id)).filter(
+            and_(
+                MarketDataModel.instrument == instrument.upper(),
+                MarketDataModel.interval == interval
+            )
+        ).scalar()
+    
     def convert_to_price_candles(
         self,
         models: List[MarketDataModel]
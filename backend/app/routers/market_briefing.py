@@ -1,30 +1,43 @@
 """
 Rutas para el servicio de Market Briefing
 """
+import asyncio
 import logging
-from typing import Optional
+import tempfile
+from datetime import datetime
+from typing import Iterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.config.settings import Settings, get_settings
+from app.db import session as db_session
 from app.db.session import get_db
+from app.models.correlation_analysis import CorrelationMatrixAnalysis, CorrelationMode, LeadLagAnalysis
 from app.models.economic_calendar import EventScheduleResponse, HighImpactNewsResponse, UpcomingEventsResponse, ImpactLevel
-from app.models.market_analysis import DailyMarketAnalysis
+from app.models.market_analysis import DailyMarketAnalysis, SessionRangeHistory, SessionStatisticsReport
 from app.models.market_alignment import MarketAlignmentAnalysis
 from app.models.psychological_levels import PsychologicalLevelsResponse
 from app.models.trading_mode import TradingModeRecommendation
 from app.models.trading_recommendation import TradeRecommendation
+from app.models.dataset_io import DatasetImportResponse
 from app.models.daily_summary import DailySummary, MarketContext
 from app.models.market_question import MarketQuestionRequest, MarketQuestionResponse
+from app.models.screener import ScreenerResponse
+from app.services.chart_data_service import ChartDataService
+from app.services.dataset_io_service import DatasetIOService
 from app.services.economic_calendar_service import EconomicCalendarService
 from app.services.market_analysis_service import MarketAnalysisService
 from app.services.market_alignment_service import MarketAlignmentService
 from app.services.psychological_levels_service import PsychologicalLevelsService
+from app.services.screener_service import ScreenerService
 from app.services.trading_mode_service import TradingModeService
 from app.services.trading_advisor_service import TradingAdvisorService
 from app.services.technical_analysis_service import TechnicalAnalysisService
 from app.services.llm_service import LLMService
+from app.utils.candle_encoding import CandleEncoder
+from app.utils.json_response import FastJSONResponse
 from app.utils.validators import CurrencyValidator, InstrumentValidator
 
 logger = logging.getLogger(__name__)
@@ -32,6 +45,17 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/market-briefing", tags=["Market Briefing"])
 
 
+def get_llm_service(
+    settings: Settings = Depends(get_settings)
+) -> LLMService:
+    """
+    Dependency para obtener el servicio LLM
+    @param settings - Configuración de la aplicación
+    @returns Instancia del servicio LLM
+    """
+    return LLMService(settings)
+
+
 def get_economic_calendar_service(
     settings: Settings = Depends(get_settings),
     llm_service: LLMService = Depends(get_llm_service),
@@ -103,6 +127,32 @@ def get_technical_analysis_service(
     return TechnicalAnalysisService(settings, db, psychological_levels_service, llm_service)
 
 
+def get_screener_service(
+    settings: Settings = Depends(get_settings),
+    db: Optional[Session] = Depends(get_db)
+) -> ScreenerService:
+    """
+    Dependency para obtener el servicio de screener multi-instrumento
+    @param settings - Configuración de la aplicación
+    @param db - Sesión de base de datos
+    @returns Instancia del servicio de screener
+    """
+    return ScreenerService(settings, db)
+
+
+def get_chart_data_service(
+    settings: Settings = Depends(get_settings),
+    db: Optional[Session] = Depends(get_db)
+) -> ChartDataService:
+    """
+    Dependency para obtener el servicio de datos del chart
+    @param settings - Configuración de la aplicación
+    @param db - Sesión de base de datos
+    @returns Instancia del servicio de datos del chart
+    """
+    return ChartDataService(settings, db)
+
+
 def get_trading_mode_service(
     settings: Settings = Depends(get_settings),
     economic_calendar_service: EconomicCalendarService = Depends(get_economic_calendar_service),
@@ -162,17 +212,6 @@ def get_trading_advisor_service(
     )
 
 
-def get_llm_service(
-    settings: Settings = Depends(get_settings)
-) -> LLMService:
-    """
-    Dependency para obtener el servicio LLM
-    @param settings - Configuración de la aplicación
-    @returns Instancia del servicio LLM
-    """
-    return LLMService(settings)
-
-
 @router.get(
     "/high-impact-news",
     response_model=HighImpactNewsResponse,
@@ -334,6 +373,90 @@ async def get_yesterday_analysis(
         )
 
 
+@router.get(
+    "/session-statistics",
+    response_model=SessionStatisticsReport,
+    summary="Estadísticas de referencia por sesión de trading",
+    description="Calcula, para los últimos N días, el rango medio, ATR, dirección y rupturas del día anterior de cada sesión (Asia, Londres, Nueva York)."
+)
+async def get_session_statistics(
+    instrument: str = Query(
+        "XAUUSD",
+        description="Símbolo del instrumento a analizar (ej: XAUUSD, EURUSD, NASDAQ)",
+        min_length=3,
+        max_length=10,
+        pattern="^[A-Z0-9]{3,10}$"
+    ),
+    days: int = Query(90, description="Días de trading a incluir", ge=5, le=365),
+    service: MarketAnalysisService = Depends(get_market_analysis_service)
+) -> SessionStatisticsReport:
+    """
+    Endpoint para obtener las estadísticas multi-día por sesión.
+    @param instrument - Símbolo del instrumento.
+    @param days - Días de trading a incluir.
+    @param service - Servicio de análisis de mercado.
+    @returns Estadísticas de referencia por sesión.
+    """
+    try:
+        validated_instrument = InstrumentValidator.validate_instrument(instrument)
+        logger.info(f"Fetching {days}-day session statistics for {validated_instrument}")
+        return await service.get_session_statistics(instrument=validated_instrument, days=days)
+    except ValueError as e:
+        logger.warning(f"Invalid session statistics request for {instrument}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error computing session statistics for {instrument}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno al calcular las estadísticas por sesión"
+        )
+
+
+@router.get(
+    "/session-history",
+    response_model=SessionRangeHistory,
+    summary="Histórico de rangos por sesión de los análisis guardados",
+    description="Devuelve el rango, cambio y dirección de cada sesión de los análisis diarios guardados en los últimos N días. Los campos se proyectan en SQL desde el JSONB de cada análisis, sin cargarlos completos."
+)
+async def get_session_history(
+    instrument: str = Query(
+        "XAUUSD",
+        description="Símbolo del instrumento a analizar (ej: XAUUSD, EURUSD, NASDAQ)",
+        min_length=3,
+        max_length=10,
+        pattern="^[A-Z0-9]{3,10}$"
+    ),
+    days: int = Query(90, description="Días naturales hacia atrás", ge=1, le=3650),
+    session: Optional[str] = Query(None, description="Sesión a filtrar (asia, london, new_york). Por defecto todas."),
+    service: MarketAnalysisService = Depends(get_market_analysis_service)
+) -> SessionRangeHistory:
+    """
+    Endpoint para obtener el histórico de rangos por sesión.
+    @param instrument - Símbolo del instrumento.
+    @param days - Días naturales hacia atrás.
+    @param session - Sesión a filtrar (opcional).
+    @param service - Servicio de análisis de mercado.
+    @returns Histórico de rangos por sesión.
+    """
+    try:
+        validated_instrument = InstrumentValidator.validate_instrument(instrument)
+        logger.info(f"Fetching {days}-day session history for {validated_instrument}")
+        return service.get_session_history(instrument=validated_instrument, days=days, session=session)
+    except ValueError as e:
+        logger.warning(f"Invalid session history request for {instrument}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error fetching session history for {instrument}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno al obtener el histórico de sesiones"
+        )
+
+
 @router.get(
     "/dxy-bond-alignment",
     response_model=MarketAlignmentAnalysis,
@@ -362,6 +485,10 @@ async def get_dxy_bond_alignment(
         ge=7,
         le=90
     ),
+    include_correlation_regimes: bool = Query(
+        False,
+        description="Incluir regímenes de correlación multi-ventana (10/30/90/250 días) de Gold"
+    ),
     service: MarketAlignmentService = Depends(get_market_alignment_service)
 ) -> MarketAlignmentAnalysis:
     """
@@ -370,6 +497,7 @@ async def get_dxy_bond_alignment(
     @param include_gold_correlation - Si incluir correlación Gold-DXY
     @param gold_symbol - Símbolo de Gold
     @param correlation_days - Días para calcular correlación
+    @param include_correlation_regimes - Si incluir regímenes de correlación multi-ventana
     @param service - Servicio de alineación de mercado.
     @returns Análisis de alineación entre DXY y bonos con correlación Gold-DXY.
     """
@@ -383,7 +511,8 @@ async def get_dxy_bond_alignment(
             bond_symbol=validated_bond,
             include_gold_correlation=include_gold_correlation,
             gold_symbol=gold_symbol,
-            correlation_days=correlation_days
+            correlation_days=correlation_days,
+            include_correlation_regimes=include_correlation_regimes
         )
         logger.info(f"Alignment: {result.alignment}, Bias: {result.market_bias}")
         
@@ -407,6 +536,117 @@ async def get_dxy_bond_alignment(
         )
 
 
+@router.get(
+    "/correlation-matrix",
+    response_model=CorrelationMatrixAnalysis,
+    summary="Matriz de correlaciones móviles multi-ventana",
+    description="Calcula las correlaciones entre Gold, DXY, rendimientos de bonos y otros activos en ventanas de 10/30/90/250 días, e indica si cada correlación con el activo principal se fortalece, se debilita o se invierte."
+)
+async def get_correlation_matrix(
+    symbols: Optional[str] = Query(
+        None,
+        description="Activos separados por coma; el primero es el principal (default: XAUUSD,DXY,US02Y,US10Y,US30Y,NASDAQ)"
+    ),
+    windows: Optional[str] = Query(
+        None,
+        description="Ventanas en días separadas por coma (default: 10,30,90,250)"
+    ),
+    mode: CorrelationMode = Query(
+        CorrelationMode.RETURNS,
+        description="Correlacionar retornos diarios (returns) o niveles de precio (levels)"
+    ),
+    service: MarketAlignmentService = Depends(get_market_alignment_service)
+) -> CorrelationMatrixAnalysis:
+    """
+    Endpoint para obtener la matriz de correlaciones móviles.
+    @param symbols - Activos separados por coma
+    @param windows - Ventanas separadas por coma
+    @param mode - Modo de cálculo (retornos o niveles)
+    @param service - Servicio de alineación de mercado.
+    @returns Matrices de correlación por ventana y regímenes por par.
+    """
+    try:
+        symbol_list = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+        window_list = [int(w) for w in windows.split(",") if w.strip()] if windows else None
+        logger.info(f"Fetching correlation matrix (symbols={symbol_list}, windows={window_list}, mode={mode.value})")
+        return await service.get_correlation_matrix(
+            symbols=symbol_list,
+            windows=window_list,
+            mode=mode
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid correlation matrix parameters: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error computing correlation matrix: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno al calcular la matriz de correlaciones"
+        )
+
+
+@router.get(
+    "/lead-lag",
+    response_model=LeadLagAnalysis,
+    summary="Análisis lead-lag entre DXY/bonos y Gold",
+    description="Calcula la correlación cruzada de retornos para desfases de -N a +N velas e indica si el activo líder (ej: DXY) se adelanta a Gold y con qué estabilidad."
+)
+async def get_lead_lag(
+    leader: str = Query(
+        "DXY",
+        description="Activo líder candidato (ej: DXY, US10Y)",
+        min_length=3,
+        max_length=10
+    ),
+    follower: str = Query(
+        "XAUUSD",
+        description="Activo seguidor (ej: XAUUSD)",
+        min_length=3,
+        max_length=10
+    ),
+    interval: str = Query(
+        "1h",
+        description="Intervalo de las velas",
+        pattern="^(5m|15m|30m|1h|4h|1d)$"
+    ),
+    days: int = Query(30, description="Días de histórico", ge=2, le=365),
+    max_lag: int = Query(12, description="Desfase máximo en velas", ge=1, le=96),
+    service: MarketAlignmentService = Depends(get_market_alignment_service)
+) -> LeadLagAnalysis:
+    """
+    Endpoint para obtener el análisis lead-lag entre dos activos.
+    @param leader - Activo líder candidato
+    @param follower - Activo seguidor
+    @param interval - Intervalo de las velas
+    @param days - Días de histórico
+    @param max_lag - Desfase máximo en velas
+    @param service - Servicio de alineación de mercado.
+    @returns Correlación por desfase, desfase dominante y estabilidad.
+    """
+    try:
+        logger.info(f"Fetching lead-lag analysis {leader}->{follower} ({interval}, {days}d, max_lag={max_lag})")
+        return await service.analyze_lead_lag(
+            leader_symbol=leader.upper(),
+            follower_symbol=follower.upper(),
+            interval=interval,
+            days=days,
+            max_lag=max_lag
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid lead-lag parameters: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error computing lead-lag analysis: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno al calcular el análisis lead-lag"
+        )
+
+
 @router.get(
     "/trading-mode",
     response_model=TradingModeRecommendation,
@@ -564,13 +804,24 @@ async def get_technical_analysis(
         description="Idioma para descripción de patrones (es, en)",
         pattern="^(es|en)$"
     ),
+    include_simulation: bool = Query(
+        False,
+        description="Si se debe simular trayectorias Monte Carlo (probabilidad de tocar/romper soporte y resistencia)"
+    ),
+    chart_format: str = Query(
+        "json",
+        description="Formato de chart_candles: json (una entrada por vela) o columnar ({t, o, h, l, c, v} con epoch en segundos)",
+        pattern="^(json|columnar)$"
+    ),
     service: TechnicalAnalysisService = Depends(get_technical_analysis_service)
-) -> dict:
+) -> FastJSONResponse:
     """
     Endpoint para obtener análisis técnico avanzado multi-temporalidad.
     @param instrument - Instrumento a analizar.
     @param include_pattern_detection - Si se debe detectar patrones complejos.
     @param pattern_language - Idioma para descripción de patrones.
+    @param include_simulation - Si se debe incluir la simulación de escenarios.
+    @param chart_format - Formato de las velas del chart.
     @param service - Servicio de análisis técnico.
     @returns Análisis técnico en Daily, H4 y H1, con patrones opcionales.
     """
@@ -580,10 +831,12 @@ async def get_technical_analysis(
         result = await service.analyze_multi_timeframe(
             instrument=validated_instrument,
             include_pattern_detection=include_pattern_detection,
-            pattern_language=pattern_language
+            pattern_language=pattern_language,
+            include_simulation=include_simulation,
+            chart_format=chart_format
         )
         logger.info(f"Technical analysis completed for {validated_instrument}")
-        return result
+        return FastJSONResponse(result)
     except ValueError as e:
         logger.warning(f"Invalid parameter: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -597,6 +850,129 @@ async def get_technical_analysis(
         )
 
 
+@router.get(
+    "/screener",
+    response_model=ScreenerResponse,
+    summary="Escanea una watchlist multi-instrumento y ordena los setups",
+    description="Ejecuta el análisis técnico multi-temporalidad, la proximidad a niveles H4 y la convergencia de tendencias sobre varios instrumentos en paralelo (concurrencia acotada) y los ordena por calidad del setup."
+)
+async def get_screener(
+    instruments: Optional[str] = Query(
+        None,
+        description="Instrumentos separados por comas (ej: XAUUSD,EURUSD,SPX). Por defecto la watchlist configurada."
+    ),
+    concurrency: Optional[int] = Query(
+        None,
+        description="Análisis simultáneos máximos (por defecto el configurado)",
+        ge=1,
+        le=ScreenerService.MAX_CONCURRENCY
+    ),
+    service: ScreenerService = Depends(get_screener_service)
+) -> ScreenerResponse:
+    """
+    Endpoint para escanear varios instrumentos y ordenarlos por calidad del setup.
+    @param instruments - Instrumentos separados por comas (opcional).
+    @param concurrency - Análisis simultáneos máximos (opcional).
+    @param service - Servicio de screener.
+    @returns Instrumentos ordenados por puntuación.
+    """
+    try:
+        symbols = [symbol for symbol in instruments.split(",") if symbol.strip()] if instruments else None
+        logger.info(f"Running screener (instruments={symbols or 'watchlist'}, concurrency={concurrency})")
+        result = await service.scan(instruments=symbols, concurrency=concurrency)
+        logger.info(f"Screener completed: {result.instruments} instruments in {result.elapsed_seconds}s")
+        return result
+    except ValueError as e:
+        logger.warning(f"Invalid parameter: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error running screener: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno al ejecutar el screener"
+        )
+
+
+@router.get(
+    "/chart-candles",
+    response_model=None,
+    summary="Obtiene las velas del chart con negociación de formato",
+    description="Devuelve las velas de un instrumento en un rango como JSON por filas (por defecto), JSON columnar ({t, o, h, l, c, v} con epoch en segundos) o binario (msgpack, Arrow IPC). El formato se elige con el parámetro format o la cabecera Accept (application/msgpack, application/vnd.apache.arrow.stream). Con width, las velas se reducen (OHLC o LTTB) desde una pirámide de resoluciones a como mucho una vela cada 4 píxeles, sea cual sea la amplitud del rango."
+)
+async def get_chart_candles(
+    request: Request,
+    instrument: str = Query(
+        "XAUUSD",
+        description="Instrumento (ej: XAUUSD)",
+        min_length=3,
+        max_length=10,
+        pattern="^[A-Z0-9]{3,10}$"
+    ),
+    interval: str = Query("4h", description="Intervalo de las velas (1h, 4h, 1d, 1w)", pattern="^(1h|4h|1d|1w)$"),
+    start: Optional[datetime] = Query(None, description="Inicio del rango (ISO, UTC). Por defecto 300 velas antes del fin."),
+    end: Optional[datetime] = Query(None, description="Fin del rango (ISO, UTC). Por defecto ahora."),
+    format: Optional[str] = Query(
+        None,
+        description="Formato de la respuesta (json, columnar, msgpack, arrow). Tiene prioridad sobre Accept."
+    ),
+    width: Optional[int] = Query(
+        None,
+        description="Ancho del chart en píxeles; si se indica, las velas se reducen a width / 4 como mucho",
+        ge=ChartDataService.PIXELS_PER_CANDLE,
+        le=ChartDataService.MAX_WIDTH
+    ),
+    method: str = Query(
+        "ohlc",
+        description="Reducción con width: ohlc (velas agregadas, conserva máximos y mínimos) o lttb (selección por forma del cierre)",
+        pattern="^(ohlc|lttb)$"
+    ),
+    service: ChartDataService = Depends(get_chart_data_service)
+) -> Response:
+    """
+    Endpoint para obtener las velas del chart en el formato negociado.
+    @param request - Petición (cabecera Accept).
+    @param instrument - Instrumento.
+    @param interval - Intervalo de las velas.
+    @param start - Inicio del rango (opcional).
+    @param end - Fin del rango (opcional).
+    @param format - Formato de la respuesta (opcional).
+    @param width - Ancho del chart en píxeles (opcional).
+    @param method - Método de reducción.
+    @param service - Servicio de datos del chart.
+    @returns Velas en JSON o binario.
+    """
+    try:
+        fmt = CandleEncoder.negotiate(format, request.headers.get("accept"))
+        validated_instrument = InstrumentValidator.validate_instrument(instrument)
+        metadata = {"instrument": validated_instrument, "interval": interval}
+        if width:
+            arrays, resolution = await service.get_chart(validated_instrument, interval, start, end, width, method)
+            metadata.update({"resolution_seconds": resolution, "method": method})
+        else:
+            arrays = await service.get_candles(validated_instrument, interval, start, end)
+        logger.info(f"Returning {len(arrays)} {interval} chart candles for {validated_instrument} as {fmt}")
+
+        # El formato depende de Accept: las cachés deben distinguir las respuestas por esa cabecera
+        headers = {"Vary": "Accept"}
+        payload = CandleEncoder.encode(arrays, fmt, metadata)
+        if isinstance(payload, bytes):
+            return Response(content=payload, media_type=CandleEncoder.MEDIA_TYPES[fmt], headers=headers)
+        return FastJSONResponse(payload, headers=headers)
+    except ValueError as e:
+        logger.warning(f"Invalid parameter: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error fetching chart candles: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno al obtener las velas del chart"
+        )
+
+
 @router.get(
     "/psychological-levels",
     response_model=PsychologicalLevelsResponse,
@@ -624,7 +1000,7 @@ async def get_psychological_levels(
         le=500.0
     ),
     service: PsychologicalLevelsService = Depends(get_psychological_levels_service)
-) -> PsychologicalLevelsResponse:
+) -> FastJSONResponse:
     """
     Endpoint para obtener análisis de niveles psicológicos de precio.
     @param instrument - Instrumento a analizar.
@@ -648,7 +1024,8 @@ async def get_psychological_levels(
             f"Psychological levels analysis completed for {validated_instrument}: "
             f"{len(result.levels)} levels found"
         )
-        return result
+        # Modelo construido internamente: se serializa sin volver a validarlo
+        return FastJSONResponse(result)
     except ValueError as e:
         logger.warning(f"Invalid parameter: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -950,3 +1327,108 @@ async def get_upcoming_calendar(
         logger.error(f"Unexpected error fetching upcoming calendar: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch upcoming calendar")
 
+
+@router.get(
+    "/datasets/{dataset}/export",
+    summary="Exporta un dataset histórico en Parquet o Arrow IPC",
+    description="Descarga market_data, daily_analyses o trading_mode_recommendations filtrados por instrumento y rango de fechas. El fichero se genera y envía por lotes de filas, sin cargar el dataset completo en memoria."
+)
+async def export_dataset(
+    dataset: str,
+    format: str = Query("parquet", description="Formato del fichero (parquet, arrow)"),
+    instrument: Optional[str] = Query(None, description="Instrumento (ej: XAUUSD). Por defecto todos."),
+    start: Optional[datetime] = Query(None, description="Inicio del rango (ISO, UTC)"),
+    end: Optional[datetime] = Query(None, description="Fin del rango (ISO, UTC)"),
+    interval: Optional[str] = Query(None, description="Intervalo de las velas (solo market_data: 1h, 4h, 1d, 1w)")
+) -> StreamingResponse:
+    """
+    Endpoint para exportar un dataset por lotes.
+    La sesión de base de datos se abre dentro del generador: las dependencias con yield se cierran
+    antes de que se envíe el cuerpo de una respuesta en streaming.
+    @param dataset - Dataset a exportar.
+    @param format - Formato del fichero.
+    @param instrument - Instrumento (opcional).
+    @param start - Inicio del rango (opcional).
+    @param end - Fin del rango (opcional).
+    @param interval - Intervalo de las velas (opcional).
+    @returns Fichero Parquet / Arrow en streaming.
+    """
+    try:
+        fmt = DatasetIOService.resolve_format(format)
+        DatasetIOService.dataset_definition(dataset)
+        if instrument:
+            instrument = InstrumentValidator.validate_instrument(instrument)
+        if interval and dataset != "market_data":
+            raise ValueError("The interval filter only applies to market_data")
+    except ValueError as e:
+        logger.warning(f"Invalid parameter: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def _stream() -> Iterator[bytes]:
+        db = db_session.SessionLocal() if db_session.SessionLocal else None
+        try:
+            yield from DatasetIOService(db).stream(
+                dataset, fmt, instrument=instrument, start=start, end=end, interval=interval
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error exporting {dataset}: {str(e)}", exc_info=True)
+            raise
+        finally:
+            if db:
+                db.close()
+
+    logger.info(f"Exporting {dataset} as {fmt} (instrument={instrument or 'all'}, start={start}, end={end})")
+    suffix = "parquet" if fmt == "parquet" else "arrow"
+    return StreamingResponse(
+        _stream(),
+        media_type=DatasetIOService.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{suffix}"'}
+    )
+
+
+@router.post(
+    "/datasets/{dataset}/import",
+    response_model=DatasetImportResponse,
+    summary="Importa un fichero Parquet o Arrow IPC en un dataset histórico",
+    description="Carga el cuerpo de la petición (fichero Parquet o Arrow IPC en bruto, no multipart) por lotes: velas con COPY + merge por clave única, historial de análisis omitiendo las filas ya existentes."
+)
+async def import_dataset(
+    dataset: str,
+    request: Request,
+    format: str = Query("parquet", description="Formato del fichero (parquet, arrow)"),
+    db: Optional[Session] = Depends(get_db)
+) -> DatasetImportResponse:
+    """
+    Endpoint para importar un fichero en un dataset.
+    El cuerpo se vuelca a un fichero temporal a medida que llega y se lee por lotes.
+    @param dataset - Dataset de destino.
+    @param request - Petición con el fichero en el cuerpo.
+    @param format - Formato del fichero.
+    @param db - Sesión de base de datos.
+    @returns Filas importadas.
+    """
+    try:
+        if db is None:
+            raise HTTPException(status_code=503, detail="Base de datos no configurada")
+        fmt = DatasetIOService.resolve_format(format)
+        DatasetIOService.dataset_definition(dataset)
+
+        with tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024) as upload:
+            async for chunk in request.stream():
+                upload.write(chunk)
+            upload.seek(0)
+            logger.info(f"Importing {dataset} from {fmt} upload")
+            rows = await asyncio.to_thread(DatasetIOService(db).import_file, dataset, upload, fmt)
+
+        return DatasetImportResponse(dataset=dataset, format=fmt, rows=rows)
+    except ValueError as e:
+        logger.warning(f"Invalid parameter: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error importing {dataset}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno al importar el dataset"
+        )
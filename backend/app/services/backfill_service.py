@@ -0,0 +1,347 @@
+"""
+Servicio de backfill histórico de velas
+Descarga años de velas por bloques de fechas (varios en paralelo, dentro de la cuota del proveedor),
+los carga con COPY + merge en market_data y registra cada bloque completado para que una ejecución
+interrumpida continúe donde se quedó
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import Settings
+from app.models.backfill import BackfillReport, BackfillSeriesReport
+from app.models.market_analysis import PriceCandle
+from app.providers.market_data.base_market_provider import MarketDataProvider
+from app.providers.market_data.twelve_data_provider import TwelveDataProvider
+from app.providers.market_data.alpha_vantage_provider import AlphaVantageProvider
+from app.providers.market_data.fred_provider import FredProvider
+from app.providers.market_data.mock_market_provider import MockMarketProvider
+from app.repositories.backfill_checkpoint_repository import BackfillCheckpointRepository
+from app.repositories.candle_store_repository import create_market_data_repository
+from app.services.bar_feature_service import BarFeatureService
+from app.utils.trading_calendar import TradingCalendar
+from app.utils.validators import InstrumentValidator
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillService:
+    """Carga histórica reanudable de velas desde el proveedor de datos de mercado"""
+
+    # Peticiones simultáneas y por minuto de cada proveedor (planes gratuitos; 0 = sin límite)
+    PROVIDER_LIMITS = {
+        "twelvedata": {"concurrency": 2, "requests_per_minute": 8},
+        "alphavantage": {"concurrency": 1, "requests_per_minute": 5},
+        "fred": {"concurrency": 2, "requests_per_minute": 100},
+        "mock": {"concurrency": 4, "requests_per_minute": 0},
+    }
+
+    # Duración de cada intervalo en minutos
+    INTERVAL_MINUTES = {
+        "1m": 1, "5m": 5, "15m": 15, "30m": 30, "1h": 60, "4h": 240, "1d": 1440,
+    }
+
+    # Velas por bloque: por debajo del máximo por petición de Twelve Data (5000)
+    # para que los fines de semana y festivos nunca provoquen truncado
+    CHUNK_BARS = 4500
+
+    # Reintentos de un bloque ante límite de cuota y espera base entre ellos
+    MAX_RETRIES = 3
+    RETRY_BACKOFF_SECONDS = 20.0
+
+    def __init__(
+        self,
+        settings: Settings,
+        db: Optional[Session] = None,
+        provider_name: Optional[str] = None,
+        provider: Optional[MarketDataProvider] = None
+    ):
+        """
+        Inicializa el servicio de backfill
+        @param settings - Configuración de la aplicación
+        @param db - Sesión de base de datos (opcional; sin DB solo se descargan los bloques)
+        @param provider_name - Proveedor (twelvedata, alphavantage, fred, mock); por defecto el configurado
+        @param provider - Instancia del proveedor (opcional, para inyectarla en tests)
+        """
+        self.settings = settings
+        self.db = db
+        self.provider_name = (provider_name or settings.market_data_provider).lower()
+        if self.provider_name not in self.PROVIDER_LIMITS:
+            raise ValueError(
+                f"Unknown backfill provider '{self.provider_name}'. "
+                f"Supported providers: {', '.join(self.PROVIDER_LIMITS)}"
+            )
+        self.provider = provider or self._create_provider(settings, self.provider_name)
+        self.market_data_repo = create_market_data_repository(db, settings)
+        self.checkpoint_repo = BackfillCheckpointRepository(db)
+        self.bar_feature_service = BarFeatureService(db)
+        self._db_lock = asyncio.Lock()
+        self._pace_lock = asyncio.Lock()
+        self._next_request_at = 0.0
+
+    @staticmethod
+    def _create_provider(settings: Settings, provider_name: str) -> MarketDataProvider:
+        """
+        Crea el proveedor de datos de mercado
+        @param settings - Configuración de la aplicación
+        @param provider_name - Nombre del proveedor
+        @returns Instancia del proveedor
+        """
+        if provider_name in ("twelvedata", "alphavantage"):
+            if not settings.market_data_api_key:
+                raise ValueError(
+                    f"{provider_name} provider selected but no API key configured. "
+                    "Please set MARKET_DATA_API_KEY environment variable."
+                )
+            if provider_name == "twelvedata":
+                return TwelveDataProvider(api_key=settings.market_data_api_key)
+            return AlphaVantageProvider(api_key=settings.market_data_api_key)
+        if provider_name == "fred":
+            if not settings.fred_api_key:
+                raise ValueError(
+                    "FRED provider selected but no API key configured. "
+                    "Please set FRED_API_KEY environment variable."
+                )
+            return FredProvider(api_key=settings.fred_api_key)
+        return MockMarketProvider()
+
+    @classmethod
+    def plan_chunks(
+        cls,
+        start: datetime,
+        end: datetime,
+        interval: str
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Divide el rango en bloques de CHUNK_BARS velas alineados a una rejilla fija desde 1970,
+        de modo que los bloques interiores coinciden entre ejecuciones con rangos distintos
+        @param start - Inicio del rango
+        @param end - Fin del rango (inclusive)
+        @param interval - Intervalo de las velas
+        @returns Lista de bloques (inicio, fin) inclusive, recortados al rango
+        """
+        minutes = cls.INTERVAL_MINUTES.get(interval)
+        if minutes is None:
+            raise ValueError(
+                f"Unsupported backfill interval '{interval}'. "
+                f"Supported intervals: {', '.join(cls.INTERVAL_MINUTES)}"
+            )
+        if end < start:
+            raise ValueError(f"End date {end.isoformat()} is before start date {start.isoformat()}")
+
+        span = timedelta(minutes=minutes * cls.CHUNK_BARS)
+        origin = datetime(1970, 1, 1)
+        cell_start = origin + span * ((start - origin) // span)
+
+        chunks = []
+        while cell_start <= end:
+            cell_end = cell_start + span - timedelta(seconds=1)
+            chunks.append((max(cell_start, start), min(cell_end, end)))
+            cell_start += span
+        return chunks
+
+    @staticmethod
+    def is_covered(
+        chunk: tuple[datetime, datetime],
+        completed: set[tuple[datetime, datetime]]
+    ) -> bool:
+        """
+        Indica si algún checkpoint cubre por completo el bloque
+        @param chunk - Bloque (inicio, fin)
+        @param completed - Bloques completados (inicio, fin)
+        @returns True si el bloque ya está cargado
+        """
+        chunk_start, chunk_end = chunk
+        return any(start <= chunk_start and chunk_end <= end for start, end in completed)
+
+    async def run(
+        self,
+        instruments: list[str],
+        intervals: list[str],
+        start: datetime,
+        end: datetime,
+        resume: bool = True,
+        concurrency: Optional[int] = None
+    ) -> BackfillReport:
+        """
+        Ejecuta el backfill de todas las series instrumento x intervalo
+        @param instruments - Instrumentos a cargar
+        @param intervals - Intervalos a cargar
+        @param start - Inicio del rango
+        @param end - Fin del rango (inclusive)
+        @param resume - Si False, borra los checkpoints y recarga todos los bloques
+        @param concurrency - Bloques descargados en paralelo (por defecto el del proveedor)
+        @returns BackfillReport con el resultado por serie
+        """
+        limits = self.PROVIDER_LIMITS[self.provider_name]
+        concurrency = concurrency or limits["concurrency"]
+        if concurrency < 1:
+            raise ValueError(f"Concurrency must be at least 1, got {concurrency}")
+        if self.provider_name == "fred" and any(interval != "1d" for interval in intervals):
+            raise ValueError("FRED only provides daily data; use --interval 1d")
+
+        instruments = [InstrumentValidator.validate_instrument(i) for i in instruments]
+        for interval in intervals:
+            self.plan_chunks(start, end, interval)
+
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(concurrency)
+        series = []
+        for instrument in instruments:
+            for interval in intervals:
+                series.append(await self._backfill_series(instrument, interval, start, end, resume, semaphore))
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Backfill of {len(series)} series finished in {elapsed:.1f}s "
+            f"({sum(s.candles_loaded for s in series)} candles, "
+            f"{sum(s.chunks_failed for s in series)} failed chunks)"
+        )
+        return BackfillReport(
+            start=start.isoformat(),
+            end=end.isoformat(),
+            elapsed_seconds=round(elapsed, 3),
+            series=series,
+        )
+
+    async def _backfill_series(
+        self,
+        instrument: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        resume: bool,
+        semaphore: asyncio.Semaphore
+    ) -> BackfillSeriesReport:
+        """
+        Descarga y carga los bloques pendientes de una serie y recalcula sus indicadores
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas
+        @param start - Inicio del rango
+        @param end - Fin del rango
+        @param resume - Si se respetan los checkpoints existentes
+        @param semaphore - Semáforo de peticiones simultáneas
+        @returns BackfillSeriesReport
+        """
+        report = BackfillSeriesReport(instrument=instrument, interval=interval, provider=self.provider_name)
+        chunks = self.plan_chunks(start, end, interval)
+        report.chunks_total = len(chunks)
+
+        async with self._db_lock:
+            if not resume:
+                await asyncio.to_thread(self.checkpoint_repo.clear_checkpoints, instrument, interval, self.provider_name)
+            completed = await asyncio.to_thread(
+                self.checkpoint_repo.get_completed_chunks, instrument, interval, self.provider_name
+            )
+
+        pending = [chunk for chunk in chunks if not self.is_covered(chunk, completed)]
+        report.chunks_skipped = len(chunks) - len(pending)
+        logger.info(
+            f"Backfill {instrument} ({interval}) from {self.provider_name}: "
+            f"{len(pending)} pending chunks, {report.chunks_skipped} already loaded"
+        )
+
+        async def _process(chunk: tuple[datetime, datetime]) -> None:
+            try:
+                async with semaphore:
+                    candles = await self.fetch_chunk(instrument, interval, chunk)
+                loaded = await self.load_chunk(instrument, interval, chunk, candles)
+                report.chunks_loaded += 1
+                report.candles_loaded += loaded
+            except Exception as e:
+                logger.error(
+                    f"Backfill chunk {chunk[0].isoformat()} - {chunk[1].isoformat()} "
+                    f"for {instrument} ({interval}) failed: {str(e)}"
+                )
+                report.chunks_failed += 1
+                report.errors.append(f"{chunk[0].isoformat()}: {str(e)}")
+
+        await asyncio.gather(*[_process(chunk) for chunk in pending])
+
+        if report.candles_loaded:
+            async with self._db_lock:
+                report.features_rebuilt = await asyncio.to_thread(
+                    self.bar_feature_service.rebuild_features, instrument, interval
+                )
+        return report
+
+    async def fetch_chunk(
+        self,
+        instrument: str,
+        interval: str,
+        chunk: tuple[datetime, datetime]
+    ) -> list[PriceCandle]:
+        """
+        Descarga un bloque respetando el ritmo del proveedor y reintentando ante límite de cuota
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas
+        @param chunk - Bloque (inicio, fin)
+        @returns Velas del bloque
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            await self._wait_for_request_slot()
+            try:
+                return await self.provider.fetch_historical_candles(instrument, chunk[0], chunk[1], interval)
+            except ValueError as e:
+                if "rate limit" not in str(e).lower() or attempt == self.MAX_RETRIES:
+                    raise
+                delay = self.RETRY_BACKOFF_SECONDS * (2 ** attempt)
+                logger.warning(f"Rate limited by {self.provider_name}; retrying chunk in {delay:.0f}s")
+                await asyncio.sleep(delay)
+        raise ValueError(f"Chunk {chunk[0].isoformat()} exhausted its retries")
+
+    async def _wait_for_request_slot(self) -> None:
+        """
+        Espaciado uniforme entre peticiones según requests_per_minute del proveedor
+        """
+        requests_per_minute = self.PROVIDER_LIMITS[self.provider_name]["requests_per_minute"]
+        if not requests_per_minute:
+            return
+        async with self._pace_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + 60.0 / requests_per_minute
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def load_chunk(
+        self,
+        instrument: str,
+        interval: str,
+        chunk: tuple[datetime, datetime],
+        candles: list[PriceCandle],
+        checkpoint_provider: Optional[str] = None,
+        checkpoint_empty: bool = False
+    ) -> int:
+        """
+        Carga un bloque con COPY y lo registra como completado
+        Los bloques que llegan hasta el presente no se registran: aún recibirán velas nuevas. Un bloque
+        sin velas solo se registra si el calendario no espera ninguna en él; si no, puede ser un fallo
+        transitorio del proveedor y se vuelve a pedir al reanudar
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas
+        @param chunk - Bloque (inicio, fin)
+        @param candles - Velas descargadas
+        @param checkpoint_provider - Proveedor con el que se registra el checkpoint (por defecto el del servicio)
+        @param checkpoint_empty - Registrar también los bloques vacíos (el llamador gestiona su reintento)
+        @returns Velas cargadas
+        """
+        candles = [candle for candle in candles if chunk[0] <= candle.timestamp <= chunk[1]]
+        async with self._db_lock:
+            loaded = await asyncio.to_thread(self.market_data_repo.copy_candles, instrument, interval, candles)
+            if not candles and not checkpoint_empty and TradingCalendar.has_expected_bars(chunk[0], chunk[1], interval):
+                logger.warning(
+                    f"Backfill chunk {chunk[0].isoformat()} - {chunk[1].isoformat()} for {instrument} ({interval}) "
+                    f"returned no candles; not checkpointed so it is retried on resume"
+                )
+            elif chunk[1] < datetime.now():
+                await asyncio.to_thread(
+                    self.checkpoint_repo.save_checkpoint,
+                    instrument, interval, checkpoint_provider or self.provider_name,
+                    chunk[0], chunk[1], len(candles)
+                )
+        return loaded
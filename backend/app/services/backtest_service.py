@@ -0,0 +1,472 @@
+"""
+Servicio de backtest histórico de las recomendaciones de TradingAdvisorService
+Reproduce día a día (sin mirar el futuro) la misma lógica de dirección, entrada, stop loss y
+take profit sobre las velas guardadas en market_data y simula las ejecuciones en las velas siguientes
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.backtest import BacktestReport, BacktestTrade, TradeOutcome
+from app.models.market_analysis import DailyMarketAnalysis, MarketDirection, SessionAnalysis
+from app.models.trading_mode import TradingMode, TradingModeRecommendation
+from app.models.trading_recommendation import TradeDirection
+from app.repositories.candle_store_repository import create_market_data_repository
+from app.services.trading_advisor_service import TradingAdvisorService
+from app.utils.candle_arrays import CandleArrays
+from app.utils.market_analyzer import MarketAnalyzer
+from app.utils.session_statistics import SessionStatistics
+from app.utils.trading_sessions import TradingSessions
+
+logger = logging.getLogger(__name__)
+
+
+class BacktestService:
+    """Backtest de recomendaciones sobre arrays OHLC, repartido por bloques de días entre procesos"""
+
+    # Velas máximas que una operación permanece abierta tras ejecutarse (2 días en H1)
+    MAX_HOLDING_BARS = 48
+
+    # Días por bloque enviado a cada proceso
+    CHUNK_DAYS = 60
+
+    # Modo por defecto: el histórico de noticias que decide el modo no se reproduce, y los modos
+    # muy_calma/observar siempre recomiendan esperar
+    DEFAULT_MODE = TradingMode.AGGRESSIVE
+
+    DIRECTIONS = {1: MarketDirection.BULLISH, -1: MarketDirection.BEARISH, 0: MarketDirection.NEUTRAL}
+
+    def __init__(self, db: Optional[Session] = None):
+        """
+        Inicializa el servicio
+        @param db - Sesión de base de datos (opcional)
+        """
+        self.market_data_repo = create_market_data_repository(db)
+
+    def run_backtest(
+        self,
+        instrument: str,
+        start_date: datetime,
+        end_date: datetime,
+        interval: str = "1h",
+        mode: TradingMode = DEFAULT_MODE,
+        workers: Optional[int] = None
+    ) -> BacktestReport:
+        """
+        Ejecuta el backtest sobre las velas guardadas en un rango de fechas
+        @param instrument - Instrumento
+        @param start_date - Inicio del rango
+        @param end_date - Fin del rango
+        @param interval - Intervalo de las velas (intradía)
+        @param mode - Modo de trading aplicado a todas las recomendaciones
+        @param workers - Procesos en paralelo (por defecto, número de CPUs)
+        @returns BacktestReport
+        """
+        arrays = self.market_data_repo.get_candle_arrays(instrument, start_date, end_date, interval)
+        if not len(arrays):
+            raise ValueError(
+                f"No stored market data for {instrument} ({interval}) between {start_date} and {end_date}"
+            )
+
+        logger.info(f"Running backtest for {instrument} over {len(arrays)} {interval} candles (mode={mode.value})")
+        return self.backtest_arrays(arrays, instrument, interval=interval, mode=mode, workers=workers)
+
+    @classmethod
+    def backtest_arrays(
+        cls,
+        arrays: CandleArrays,
+        instrument: str,
+        interval: str = "1h",
+        mode: TradingMode = DEFAULT_MODE,
+        workers: Optional[int] = None,
+        chunk_days: int = CHUNK_DAYS,
+        max_holding_bars: int = MAX_HOLDING_BARS
+    ) -> BacktestReport:
+        """
+        Ejecuta el backtest sobre una serie intradía ordenada
+        Cada día se analiza con sus velas y las del día anterior; la orden se coloca al cierre del día
+        y puede ejecutarse durante el día siguiente
+        @param arrays - Velas intradía ordenadas por timestamp
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas
+        @param mode - Modo de trading aplicado a todas las recomendaciones
+        @param workers - Procesos en paralelo (1 = sin pool; por defecto, número de CPUs)
+        @param chunk_days - Días por bloque
+        @param max_holding_bars - Velas máximas con la operación abierta
+        @returns BacktestReport
+        """
+        inputs = cls.daily_inputs(arrays)
+        day_count = len(inputs["dates"])
+        if day_count < 3:
+            raise ValueError(f"At least 3 days of candles are required for a backtest, got {day_count}")
+        if chunk_days < 1:
+            raise ValueError(f"Chunk size must be at least one day, got {chunk_days}")
+
+        # El primer día no tiene día anterior y el último no tiene día siguiente para ejecutar
+        payloads = [
+            cls._chunk_payload(
+                arrays, inputs, first, min(first + chunk_days, day_count - 1), mode, max_holding_bars
+            )
+            for first in range(1, day_count - 1, chunk_days)
+        ]
+
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(payloads) == 1:
+            results = [cls._run_chunk(payload) for payload in payloads]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(payloads))) as executor:
+                results = list(executor.map(cls._run_chunk, payloads))
+
+        trades = [trade for chunk_trades, _ in results for trade in chunk_trades]
+        wait_days = sum(chunk_waits for _, chunk_waits in results)
+        return cls.summarize(
+            instrument=instrument,
+            interval=interval,
+            mode=mode,
+            start_date=str(inputs["dates"][1]),
+            end_date=str(inputs["dates"][day_count - 2]),
+            days=day_count - 2,
+            wait_days=wait_days,
+            trades=trades,
+        )
+
+    @classmethod
+    def daily_inputs(cls, arrays: CandleArrays) -> dict[str, np.ndarray]:
+        """
+        Resume la serie intradía por día (OHLC, posición de sus velas y métricas por sesión)
+        @param arrays - Velas intradía ordenadas
+        @returns Dict de arrays por día; los campos session_* tienen forma (días, sesiones)
+        """
+        if len(arrays) == 0:
+            return {"dates": np.empty(0, dtype="datetime64[D]")}
+
+        day_of_bar = arrays.timestamps.astype("datetime64[D]")
+        dates, day_index = np.unique(day_of_bar, return_inverse=True)
+        starts = np.flatnonzero(np.diff(day_index, prepend=-1))
+        ends = np.append(starts[1:], len(arrays))
+        cube = SessionStatistics.build_cube(arrays)
+
+        return {
+            "dates": dates,
+            "starts": starts,
+            "ends": ends,
+            "opens": arrays.opens[starts],
+            "closes": arrays.closes[ends - 1],
+            "highs": np.maximum.reduceat(arrays.highs, starts),
+            "lows": np.minimum.reduceat(arrays.lows, starts),
+            "session_open": cube.field("open"),
+            "session_close": cube.field("close"),
+            "session_high": cube.field("high"),
+            "session_low": cube.field("low"),
+            "session_range": cube.field("range"),
+            "session_direction": cube.field("direction"),
+        }
+
+    @classmethod
+    def build_analysis(cls, inputs: dict[str, np.ndarray], day: int) -> DailyMarketAnalysis:
+        """
+        Construye el análisis del día con solo los campos que usa el asesor (sin validación)
+        @param inputs - Resultado de daily_inputs
+        @param day - Índice del día (debe tener día anterior)
+        @returns DailyMarketAnalysis
+        """
+        sessions = [
+            SessionAnalysis.model_construct(
+                session=session,
+                open_price=float(inputs["session_open"][day, column]),
+                close_price=float(inputs["session_close"][day, column]),
+                high=float(inputs["session_high"][day, column]),
+                low=float(inputs["session_low"][day, column]),
+                range_value=float(inputs["session_range"][day, column]),
+                direction=cls.DIRECTIONS[int(inputs["session_direction"][day, column])],
+            )
+            for column, session in enumerate(TradingSessions.SESSION_ORDER)
+            if not np.isnan(inputs["session_range"][day, column])
+        ]
+        open_price = float(inputs["opens"][day])
+        close_price = float(inputs["closes"][day])
+        previous_close = float(inputs["closes"][day - 1])
+
+        return DailyMarketAnalysis.model_construct(
+            date=str(inputs["dates"][day]),
+            previous_day_close=previous_close,
+            current_day_close=close_price,
+            daily_change_percent=(close_price - previous_close) / previous_close * 100 if previous_close else 0.0,
+            daily_direction=MarketAnalyzer.calculate_direction(open_price, close_price),
+            previous_day_high=float(inputs["highs"][day - 1]),
+            previous_day_low=float(inputs["lows"][day - 1]),
+            sessions=sessions,
+        )
+
+    @staticmethod
+    def simulate_trade(
+        highs: np.ndarray,
+        lows: np.ndarray,
+        closes: np.ndarray,
+        is_buy: bool,
+        entry: float,
+        stop: float,
+        target: float,
+        entry_window: int,
+        max_holding_bars: int = MAX_HOLDING_BARS
+    ) -> dict:
+        """
+        Simula una orden límite y su salida sobre las velas posteriores a la señal
+        Si en una misma vela se alcanzan stop y objetivo se asume el stop (criterio conservador)
+        @param highs - Máximos desde la primera vela tras la señal
+        @param lows - Mínimos desde la primera vela tras la señal
+        @param closes - Cierres desde la primera vela tras la señal
+        @param is_buy - True para compra, False para venta
+        @param entry - Precio de entrada
+        @param stop - Stop loss
+        @param target - Take profit
+        @param entry_window - Velas en las que la orden puede ejecutarse
+        @param max_holding_bars - Velas máximas con la operación abierta
+        @returns Dict con outcome, fill_index, exit_index (relativos), exit_price, pnl_points, mae/mfe
+        """
+        # Las ventas se simulan como compras sobre precios negados
+        sign = 1.0 if is_buy else -1.0
+        if is_buy:
+            favorable, adverse = highs, lows
+        else:
+            favorable, adverse = -lows, -highs
+        entry, stop, target = sign * entry, sign * stop, sign * target
+
+        result = {
+            "outcome": TradeOutcome.NOT_FILLED,
+            "fill_index": None,
+            "exit_index": None,
+            "exit_price": None,
+            "pnl_points": 0.0,
+            "mae_points": 0.0,
+            "mfe_points": 0.0,
+        }
+        if not stop < entry < target:
+            result["outcome"] = TradeOutcome.INVALID
+            return result
+
+        fills = np.flatnonzero(adverse[:entry_window] <= entry)
+        if len(fills) == 0:
+            return result
+        fill = int(fills[0])
+
+        end = min(fill + max_holding_bars, len(closes))
+        stop_hits = np.flatnonzero(adverse[fill:end] <= stop)
+        target_hits = np.flatnonzero(favorable[fill:end] >= target)
+        first_stop = fill + int(stop_hits[0]) if len(stop_hits) else end
+        first_target = fill + int(target_hits[0]) if len(target_hits) else end
+
+        if first_stop < end and first_stop <= first_target:
+            outcome, exit_index, exit_price = TradeOutcome.STOP_LOSS, first_stop, stop
+        elif first_target < end:
+            outcome, exit_index, exit_price = TradeOutcome.TAKE_PROFIT, first_target, target
+        else:
+            outcome, exit_index, exit_price = TradeOutcome.TIMEOUT, end - 1, sign * float(closes[end - 1])
+
+        result.update(
+            outcome=outcome,
+            fill_index=fill,
+            exit_index=exit_index,
+            exit_price=sign * exit_price,
+            pnl_points=exit_price - entry,
+            mae_points=max(entry - float(adverse[fill:exit_index + 1].min()), 0.0),
+            mfe_points=max(float(favorable[fill:exit_index + 1].max()) - entry, 0.0),
+        )
+        return result
+
+    @classmethod
+    def summarize(
+        cls,
+        instrument: str,
+        interval: str,
+        mode: TradingMode,
+        start_date: str,
+        end_date: str,
+        days: int,
+        wait_days: int,
+        trades: list[BacktestTrade]
+    ) -> BacktestReport:
+        """
+        Calcula las métricas agregadas del backtest
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas
+        @param mode - Modo de trading aplicado
+        @param start_date - Primer día evaluado
+        @param end_date - Último día evaluado
+        @param days - Días evaluados
+        @param wait_days - Días con recomendación de esperar
+        @param trades - Operaciones en orden cronológico de señal
+        @returns BacktestReport
+        """
+        filled = [
+            trade for trade in trades
+            if trade.outcome not in (TradeOutcome.NOT_FILLED, TradeOutcome.INVALID)
+        ]
+        r_multiples = np.array([trade.r_multiple for trade in filled])
+        points = np.array([trade.pnl_points for trade in filled])
+        risks = np.array([abs(trade.entry_price - trade.stop_loss) for trade in filled])
+
+        equity = np.cumsum(r_multiples)
+        drawdown = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity if len(equity) else equity
+        wins = int((points > 0).sum())
+
+        def _mean(values: np.ndarray) -> float:
+            return round(float(values.mean()), 4) if len(values) else 0.0
+
+        outcomes = {outcome.value: 0 for outcome in TradeOutcome}
+        for trade in trades:
+            outcomes[trade.outcome.value] += 1
+
+        return BacktestReport(
+            instrument=instrument,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+            trading_mode=mode,
+            days=days,
+            signals=len(trades),
+            wait_days=wait_days,
+            filled=len(filled),
+            wins=wins,
+            losses=len(filled) - wins,
+            win_rate=round(wins / len(filled), 4) if filled else 0.0,
+            expectancy_r=_mean(r_multiples),
+            expectancy_points=_mean(points),
+            total_r=round(float(r_multiples.sum()), 4),
+            max_drawdown_r=round(float(drawdown.max()), 4) if len(drawdown) else 0.0,
+            average_mae_r=_mean(np.array([t.mae_points for t in filled]) / risks) if filled else 0.0,
+            average_mfe_r=_mean(np.array([t.mfe_points for t in filled]) / risks) if filled else 0.0,
+            outcomes=outcomes,
+            trades=trades,
+        )
+
+    @classmethod
+    def _chunk_payload(
+        cls,
+        arrays: CandleArrays,
+        inputs: dict[str, np.ndarray],
+        first_day: int,
+        end_day: int,
+        mode: TradingMode,
+        max_holding_bars: int
+    ) -> dict:
+        """
+        Prepara el bloque de días [first_day, end_day) con solo los datos que necesita un proceso
+        @param arrays - Serie intradía completa
+        @param inputs - Resultado de daily_inputs
+        @param first_day - Primer día del bloque (>= 1)
+        @param end_day - Día final exclusivo (<= días - 1)
+        @param mode - Modo de trading
+        @param max_holding_bars - Velas máximas con la operación abierta
+        @returns Payload serializable para _run_chunk
+        """
+        bar_start = int(inputs["ends"][first_day])
+        bar_end = min(int(inputs["ends"][end_day]) + max_holding_bars, len(arrays))
+        return {
+            # Filas del día anterior al primero hasta el siguiente al último
+            "inputs": {name: values[first_day - 1:end_day + 1] for name, values in inputs.items()},
+            "bars": arrays.slice(bar_start, bar_end),
+            "bar_offset": bar_start,
+            "mode": mode,
+            "max_holding_bars": max_holding_bars,
+        }
+
+    @classmethod
+    def _run_chunk(cls, payload: dict) -> tuple[list[BacktestTrade], int]:
+        """
+        Evalúa un bloque de días (se ejecuta en un proceso del pool)
+        @param payload - Resultado de _chunk_payload
+        @returns Tupla (operaciones del bloque, días con recomendación de esperar)
+        """
+        inputs = payload["inputs"]
+        bars: CandleArrays = payload["bars"]
+        offset = payload["bar_offset"]
+        max_holding_bars = payload["max_holding_bars"]
+        trading_mode = TradingModeRecommendation.model_construct(mode=payload["mode"])
+
+        trades: list[BacktestTrade] = []
+        wait_days = 0
+        for day in range(1, len(inputs["dates"]) - 1):
+            analysis = cls.build_analysis(inputs, day)
+            price = analysis.current_day_close
+            support, resistance = TradingAdvisorService._calculate_support_resistance(analysis)
+            direction, confidence = TradingAdvisorService._determine_trade_direction(
+                analysis, None, trading_mode, price, support, resistance
+            )
+            if direction == TradeDirection.WAIT:
+                wait_days += 1
+                continue
+            entry, stop, target, _ = TradingAdvisorService._calculate_price_levels(
+                direction, price, support, resistance, trading_mode, analysis
+            )
+
+            first_bar = int(inputs["ends"][day]) - offset
+            simulation = cls.simulate_trade(
+                bars.highs[first_bar:],
+                bars.lows[first_bar:],
+                bars.closes[first_bar:],
+                is_buy=direction == TradeDirection.BUY,
+                entry=entry,
+                stop=stop,
+                target=target,
+                entry_window=int(inputs["ends"][day + 1] - inputs["ends"][day]),
+                max_holding_bars=max_holding_bars,
+            )
+            trades.append(cls._to_trade(
+                analysis.date, direction, confidence, entry, stop, target, simulation, bars, first_bar
+            ))
+
+        return trades, wait_days
+
+    @staticmethod
+    def _to_trade(
+        signal_date: str,
+        direction: TradeDirection,
+        confidence: float,
+        entry: float,
+        stop: float,
+        target: float,
+        simulation: dict,
+        bars: CandleArrays,
+        first_bar: int
+    ) -> BacktestTrade:
+        """
+        Construye la operación a partir del resultado de simulate_trade
+        @param signal_date - Día de la señal
+        @param direction - Dirección
+        @param confidence - Confianza de la recomendación
+        @param entry - Entrada
+        @param stop - Stop loss
+        @param target - Take profit
+        @param simulation - Resultado de simulate_trade
+        @param bars - Velas del bloque
+        @param first_bar - Posición (en el bloque) de la primera vela tras la señal
+        @returns BacktestTrade
+        """
+        trade = BacktestTrade(
+            signal_date=signal_date,
+            direction=direction,
+            confidence=confidence,
+            entry_price=entry,
+            stop_loss=stop,
+            take_profit=target,
+            outcome=simulation["outcome"],
+        )
+        if simulation["fill_index"] is None:
+            return trade
+
+        risk = abs(entry - stop)
+        trade.entry_time = bars.timestamp_at(first_bar + simulation["fill_index"]).isoformat()
+        trade.exit_time = bars.timestamp_at(first_bar + simulation["exit_index"]).isoformat()
+        trade.exit_price = round(simulation["exit_price"], 2)
+        trade.bars_held = simulation["exit_index"] - simulation["fill_index"]
+        trade.pnl_points = round(simulation["pnl_points"], 2)
+        trade.r_multiple = round(simulation["pnl_points"] / risk, 4)
+        trade.mae_points = round(simulation["mae_points"], 2)
+        trade.mfe_points = round(simulation["mfe_points"], 2)
+        return trade
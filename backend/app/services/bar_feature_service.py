@@ -0,0 +1,283 @@
+"""
+Servicio del feature store: mantiene indicadores precalculados por vela (bar_features)
+Se actualiza de forma incremental cuando llegan velas nuevas a market_data
+"""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.models import BarFeatureModel
+from app.repositories.bar_features_repository import BarFeaturesRepository
+from app.repositories.candle_store_repository import create_market_data_repository
+from app.utils.bar_feature_calculator import BarFeatureCalculator
+from app.utils.candle_arrays import CandleArrays
+from app.utils.streaming_indicators import IndicatorSet
+from app.utils.trading_calendar import TradingCalendar
+from app.utils.volatility_distribution import VolatilityDistribution
+
+logger = logging.getLogger(__name__)
+
+
+class BarFeatureService:
+    """Servicio para calcular y consultar indicadores por vela"""
+
+    # Distribuciones de volatilidad en memoria por (instrumento, intervalo): se construyen una vez
+    # desde bar_features/market_data y después solo se amplían con las velas nuevas
+    _volatility_distributions: dict[tuple[str, str], VolatilityDistribution] = {}
+
+    def __init__(self, db: Optional[Session] = None):
+        """
+        Inicializa el servicio del feature store
+        @param db - Sesión de base de datos (opcional; sin DB el servicio no hace nada)
+        """
+        self.db = db
+        self.market_data_repo = create_market_data_repository(db)
+        self.features_repo = BarFeaturesRepository(db)
+
+    def update_features(
+        self,
+        instrument: str,
+        interval: str,
+        since: Optional[datetime] = None
+    ) -> int:
+        """
+        Calcula e inserta los indicadores de las velas que aún no tienen fila en bar_features
+        Solo procesa las velas nuevas más un contexto fijo de velas previas; las EMAs
+        continúan su recursión desde la última fila guardada
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas (formato de BD: 1h, 4h, 1d, 1w)
+        @param since - Primera vela actualizada en market_data (p. ej. la vela aún en formación): sus
+                       filas y las posteriores se eliminan y se recalculan (opcional)
+        @returns Número de filas insertadas
+        """
+        if not self.db:
+            return 0
+
+        if since is not None:
+            self.features_repo.delete_features(instrument, interval, since)
+            snapshot = self.features_repo.get_snapshot(instrument, interval)
+            if snapshot is not None and snapshot.last_timestamp >= since:
+                # Ha cambiado una vela cerrada ya incluida en el snapshot: se reconstruye desde el histórico
+                self.features_repo.delete_snapshot(instrument, interval)
+            distribution = self._volatility_distributions.get((instrument.upper(), interval))
+            if distribution is not None and distribution.last_timestamp >= since:
+                # La distribución incluye valores de velas que cambian: se reconstruye en la próxima consulta
+                self._volatility_distributions.pop((instrument.upper(), interval), None)
+
+        latest = self.features_repo.get_latest_feature(instrument, interval)
+        latest_timestamp = latest.timestamp if latest else None
+
+        new_models = self.market_data_repo.get_candles_after(instrument, interval, latest_timestamp)
+        if not new_models:
+            return 0
+
+        previous_emas = self._previous_emas(latest)
+        if previous_emas is not None:
+            context_models = self.market_data_repo.get_recent_candles(
+                instrument, interval, latest_timestamp, BarFeatureCalculator.CONTEXT_BARS
+            )
+            if not context_models or context_models[-1].timestamp != latest_timestamp:
+                previous_emas = None
+
+        if previous_emas is None:
+            # Sin estado previo utilizable: recalcular sobre todo el histórico almacenado
+            context_models = self.market_data_repo.get_candles(
+                instrument, datetime.min, latest_timestamp, interval
+            ) if latest_timestamp else []
+
+        arrays = CandleArrays.from_models(context_models + new_models)
+        features = BarFeatureCalculator.compute(
+            arrays,
+            start_index=len(context_models),
+            previous_emas=previous_emas,
+        )
+
+        rows = [
+            {column: values[i] for column, values in features.items()}
+            for i in range(len(new_models))
+        ]
+        inserted = self.features_repo.save_features(instrument, interval, rows)
+        logger.info(f"Bar features for {instrument} ({interval}) updated with {inserted} new rows")
+
+        self._advance_live_indicators(instrument, interval, latest_timestamp, new_models)
+        return inserted
+
+    def rebuild_features(self, instrument: str, interval: str) -> int:
+        """
+        Reconstruye todos los indicadores (por ejemplo tras un backfill de velas antiguas)
+        El snapshot incremental y la distribución de volatilidad en memoria se descartan también:
+        ya apuntan a la última vela y no reproducirían las velas antiguas insertadas
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Número de filas insertadas
+        """
+        if not self.db:
+            return 0
+
+        self.features_repo.delete_features(instrument, interval)
+        self.features_repo.delete_snapshot(instrument, interval)
+        self._volatility_distributions.pop((instrument.upper(), interval), None)
+        return self.update_features(instrument, interval)
+
+    def get_latest_features(
+        self,
+        instrument: str,
+        interval: str,
+        expected_timestamp: Optional[datetime] = None
+    ) -> Optional[BarFeatureModel]:
+        """
+        Obtiene la fila de indicadores más reciente
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param expected_timestamp - Si se indica, solo devuelve la fila si corresponde a esa vela
+        @returns Fila de indicadores o None
+        """
+        latest = self.features_repo.get_latest_feature(instrument, interval)
+        if latest is None:
+            return None
+        if expected_timestamp is not None and latest.timestamp != expected_timestamp:
+            return None
+        return latest
+
+    def get_live_indicators(
+        self,
+        instrument: str,
+        interval: str,
+        expected_timestamp: Optional[datetime] = None
+    ) -> Optional[dict]:
+        """
+        Obtiene los indicadores incrementales (EMA, RSI/ATR de Wilder, máximo/mínimo móvil) de la
+        última vela: el snapshot de velas cerradas avanzado en memoria con las velas posteriores (la
+        vela en formación), sin recorrer el histórico ni guardar ese avance
+        Las EMAs coinciden con las de bar_features; el RSI y el ATR usan el suavizado de Wilder, no la
+        media simple de las últimas N velas de bar_features y TechnicalAnalysis
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param expected_timestamp - Si se indica, solo devuelve valores si corresponden a esa vela
+        @returns Diccionario de valores o None si no hay snapshot
+        """
+        snapshot = self.features_repo.get_snapshot(instrument, interval)
+        if snapshot is None:
+            return None
+
+        indicators = IndicatorSet.restore(snapshot.state)
+        for model in self.market_data_repo.get_candles_after(instrument, interval, snapshot.last_timestamp):
+            indicators.update(model.timestamp, model.high_price, model.low_price, model.close_price)
+        if expected_timestamp is not None and indicators.last_timestamp != expected_timestamp:
+            return None
+        return indicators.values()
+
+    def get_volatility_distribution(
+        self,
+        instrument: str,
+        interval: str
+    ) -> Optional[VolatilityDistribution]:
+        """
+        Obtiene la distribución histórica ordenada de ATR y rango, ampliándola con las velas nuevas
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @returns Distribución o None si no hay histórico almacenado
+        """
+        if not self.db:
+            return None
+
+        key = (instrument.upper(), interval)
+        distribution = self._volatility_distributions.get(key) or VolatilityDistribution()
+
+        new_features = self.features_repo.get_features_after(instrument, interval, distribution.last_timestamp)
+        if new_features:
+            until = new_features[-1].timestamp
+            new_candles = [
+                model
+                for model in self.market_data_repo.get_candles_after(instrument, interval, distribution.last_timestamp)
+                if model.timestamp <= until
+            ]
+            distribution.extend("atr", (row.atr for row in new_features if row.atr is not None))
+            distribution.extend("range", (model.high_price - model.low_price for model in new_candles))
+            distribution.last_timestamp = until
+            self._volatility_distributions[key] = distribution
+            logger.info(
+                f"Volatility distribution for {instrument} ({interval}) extended with "
+                f"{len(new_features)} bars ({len(distribution)} total)"
+            )
+
+        return distribution if len(distribution) else None
+
+    def _advance_live_indicators(
+        self,
+        instrument: str,
+        interval: str,
+        previous_timestamp: Optional[datetime],
+        new_models: list
+    ) -> None:
+        """
+        Avanza el snapshot de indicadores incrementales con las velas nuevas ya cerradas (O(1) por vela)
+        La vela en formación no se guarda en el snapshot: todavía puede cambiar
+        Si el snapshot no existe o no está sincronizado se reconstruye una única vez
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo de las velas
+        @param previous_timestamp - Última vela procesada antes de esta actualización
+        @param new_models - Velas nuevas ordenadas por timestamp
+        """
+        snapshot = self.features_repo.get_snapshot(instrument, interval)
+
+        if snapshot is not None and snapshot.last_timestamp == previous_timestamp:
+            indicators = IndicatorSet.restore(snapshot.state)
+            pending = new_models
+        elif snapshot is not None:
+            indicators = IndicatorSet.restore(snapshot.state)
+            pending = self.market_data_repo.get_candles_after(instrument, interval, snapshot.last_timestamp)
+        else:
+            indicators = IndicatorSet()
+            pending = self.market_data_repo.get_candles_after(instrument, interval, None)
+
+        for model in pending:
+            if not TradingCalendar.is_closed(model.timestamp, interval):
+                break
+            indicators.update(model.timestamp, model.high_price, model.low_price, model.close_price)
+
+        if indicators.last_timestamp is not None and (
+            snapshot is None or indicators.last_timestamp != snapshot.last_timestamp
+        ):
+            self.features_repo.save_snapshot(
+                instrument, interval, indicators.last_timestamp, indicators.snapshot()
+            )
+
+    @staticmethod
+    def to_dict(row: BarFeatureModel) -> dict:
+        """
+        Convierte una fila de indicadores en diccionario serializable
+        @param row - Fila de bar_features
+        @returns Diccionario con valores redondeados a 2 decimales
+        """
+        def _round(value: Optional[float]) -> Optional[float]:
+            return round(value, 2) if value is not None else None
+
+        return {
+            "timestamp": row.timestamp.isoformat(),
+            "close": row.close_price,
+            "rsi": _round(row.rsi),
+            "ema_50": _round(row.ema_50),
+            "ema_100": _round(row.ema_100),
+            "ema_200": _round(row.ema_200),
+            "atr": _round(row.atr),
+            "trend": row.trend,
+            "session": row.session,
+        }
+
+    @staticmethod
+    def _previous_emas(latest: Optional[BarFeatureModel]) -> Optional[dict[int, float]]:
+        """
+        Extrae las EMAs de la última fila si están todas calculadas
+        @param latest - Última fila guardada
+        @returns Diccionario {período: ema} o None si hay que recalcular desde el inicio
+        """
+        if latest is None:
+            return None
+
+        emas = {50: latest.ema_50, 100: latest.ema_100, 200: latest.ema_200}
+        if any(value is None for value in emas.values()):
+            return None
+        return emas
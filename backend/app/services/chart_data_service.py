@@ -0,0 +1,232 @@
+"""
+Servicio de datos del chart
+Sirve las velas de un instrumento en un rango como columnas NumPy, listas para codificarse en el
+formato negociado con el cliente (JSON por filas, JSON columnar, msgpack o Arrow IPC). Con un ancho en
+píxeles, las velas se reducen desde una pirámide de resoluciones precalculada por instrumento, de modo
+que un año de H1 cuesta lo mismo que unas pocas centenas de velas
+"""
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import Settings
+from app.services.technical_analysis_service import TechnicalAnalysisService
+from app.utils.candle_arrays import CandleArrays
+from app.utils.candle_downsampler import CandleDownsampler
+from app.utils.candle_pyramid import CandlePyramid
+from app.utils.trading_calendar import TradingCalendar
+from app.utils.validators import InstrumentValidator
+
+logger = logging.getLogger(__name__)
+
+
+class ChartDataService:
+    """Velas del chart por instrumento, intervalo y rango de fechas"""
+
+    INTERVALS = tuple(TechnicalAnalysisService.PROVIDER_INTERVALS)
+
+    # Velas del rango por defecto (cuando no se indica inicio) y máximo por respuesta
+    DEFAULT_BARS = 300
+    MAX_BARS = 5000
+
+    # Píxeles por vela del chart (1200 px = 300 velas) y ancho máximo aceptado
+    PIXELS_PER_CANDLE = 4
+    MAX_WIDTH = 8000
+
+    # Pirámides en memoria compartidas entre peticiones (LRU por instrumento e intervalo)
+    MAX_CACHED_PYRAMIDS = 32
+    _pyramids: "OrderedDict[tuple[str, str], CandlePyramid]" = OrderedDict()
+
+    def __init__(
+        self,
+        settings: Settings,
+        db: Optional[Session] = None,
+        technical_analysis_service: Optional[TechnicalAnalysisService] = None
+    ):
+        """
+        Inicializa el servicio de datos del chart
+        @param settings - Configuración de la aplicación
+        @param db - Sesión de base de datos (opcional)
+        @param technical_analysis_service - Servicio de análisis técnico que lee y refresca las velas (opcional)
+        """
+        self.settings = settings
+        self.technical_analysis_service = technical_analysis_service or TechnicalAnalysisService(settings, db)
+
+    @classmethod
+    def resolve_range(
+        cls,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> tuple[datetime, datetime]:
+        """
+        Rango efectivo: fin por defecto ahora e inicio por defecto DEFAULT_BARS velas antes
+        Las fechas con zona horaria (p. ej. sufijo Z) se convierten a naive UTC, como las de la BD
+        @param interval - Intervalo de las velas
+        @param start - Inicio pedido (opcional)
+        @param end - Fin pedido (opcional)
+        @returns Tupla (inicio, fin) naive UTC
+        """
+        if interval not in cls.INTERVALS:
+            raise ValueError(f"Unsupported interval '{interval}'. Supported intervals: {', '.join(cls.INTERVALS)}")
+        start = cls._to_naive_utc(start)
+        end = cls._to_naive_utc(end) or TradingCalendar.utc_now()
+        start = start or end - timedelta(seconds=TradingCalendar.interval_seconds(interval) * cls.DEFAULT_BARS)
+        if start >= end:
+            raise ValueError(f"start ({start.isoformat()}) must be before end ({end.isoformat()})")
+        return start, end
+
+    @staticmethod
+    def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+        """
+        Convierte una fecha con zona horaria a naive UTC (las naive se asumen ya en UTC)
+        @param value - Fecha (opcional)
+        @returns Fecha naive UTC o None
+        """
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    async def get_candles(
+        self,
+        instrument: str,
+        interval: str = "4h",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> CandleArrays:
+        """
+        Velas del chart de un rango (las MAX_BARS más recientes si el rango es mayor)
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas (1h, 4h, 1d, 1w)
+        @param start - Inicio del rango (opcional)
+        @param end - Fin del rango (opcional)
+        @returns CandleArrays ordenado por timestamp
+        """
+        instrument = InstrumentValidator.validate_instrument(instrument)
+        start, end = self.resolve_range(interval, start, end)
+
+        arrays = await self.technical_analysis_service.get_candle_arrays(instrument, start, end, interval)
+        if len(arrays) > self.MAX_BARS:
+            logger.info(f"Chart range for {instrument} {interval} has {len(arrays)} candles, keeping last {self.MAX_BARS}")
+            arrays = arrays.slice(len(arrays) - self.MAX_BARS)
+        return arrays
+
+    async def get_chart(
+        self,
+        instrument: str,
+        interval: str = "4h",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        width: int = 1200,
+        method: str = "ohlc"
+    ) -> tuple[CandleArrays, int]:
+        """
+        Velas del chart reducidas al ancho en píxeles (como mucho width / PIXELS_PER_CANDLE velas)
+        @param instrument - Instrumento
+        @param interval - Intervalo de la serie base (1h, 4h, 1d, 1w)
+        @param start - Inicio del rango (opcional)
+        @param end - Fin del rango (opcional)
+        @param width - Ancho del chart en píxeles
+        @param method - Reducción: ohlc (velas agregadas) o lttb (selección por forma del cierre)
+        @returns Tupla (velas, duración en segundos de las velas del nivel servido)
+        """
+        instrument = InstrumentValidator.validate_instrument(instrument)
+        if not self.PIXELS_PER_CANDLE <= width <= self.MAX_WIDTH:
+            raise ValueError(f"Width must be between {self.PIXELS_PER_CANDLE} and {self.MAX_WIDTH} pixels, got {width}")
+        if method not in CandleDownsampler.METHODS:
+            raise ValueError(
+                f"Unsupported downsampling method '{method}'. Supported methods: {', '.join(CandleDownsampler.METHODS)}"
+            )
+        start, end = self.resolve_range(interval, start, end)
+        target = width // self.PIXELS_PER_CANDLE
+
+        pyramid = await self._get_pyramid(instrument, interval, start, end)
+        arrays, resolution = pyramid.select(start, end, target, method)
+        logger.info(
+            f"Chart {instrument} {interval} {start} -> {end}: {len(arrays)} candles "
+            f"at {resolution}s resolution ({method}, width={width})"
+        )
+        return arrays, resolution
+
+    async def _get_pyramid(
+        self,
+        instrument: str,
+        interval: str,
+        start: datetime,
+        end: datetime
+    ) -> CandlePyramid:
+        """
+        Pirámide de la serie: la de la caché, puesta al día con el almacén (ver _refresh_pyramid). Si el
+        almacén no está al día (o no hay almacén) se construye solo con el rango pedido, leído a través del
+        proveedor
+        @param instrument - Instrumento
+        @param interval - Intervalo de la serie base
+        @param start - Inicio del rango
+        @param end - Fin del rango
+        @returns CandlePyramid
+        """
+        step = TradingCalendar.interval_seconds(interval)
+        repository = self.technical_analysis_service.market_data_repo
+        if repository.available:
+            try:
+                latest = repository.get_latest_candle_by_interval(instrument, interval)
+                reference = min(end, TradingCalendar.utc_now())
+                if latest and TradingCalendar.is_fresh(latest.timestamp, interval, reference):
+                    key = (instrument, interval)
+                    pyramid = self._refresh_pyramid(
+                        self._pyramids.get(key), repository, instrument, interval, latest, step
+                    )
+                    self._pyramids[key] = pyramid
+                    self._pyramids.move_to_end(key)
+                    while len(self._pyramids) > self.MAX_CACHED_PYRAMIDS:
+                        self._pyramids.popitem(last=False)
+                    if pyramid.covers(start):
+                        return pyramid
+            except Exception as e:
+                logger.warning(f"Error building chart pyramid for {instrument} {interval} from DB: {str(e)}")
+
+        base = await self.technical_analysis_service.get_candle_arrays(instrument, start, end, interval)
+        return CandlePyramid(base, step)
+
+    @staticmethod
+    def _refresh_pyramid(
+        pyramid: Optional[CandlePyramid],
+        repository,
+        instrument: str,
+        interval: str,
+        latest,
+        step: int
+    ) -> CandlePyramid:
+        """
+        Pone al día la pirámide cacheada con el almacén. Se reutiliza si coinciden la última vela (timestamp
+        y OHLC, que cambia mientras la vela se forma) y el número de velas. Si solo han cambiado o se han
+        añadido velas desde la última cacheada, se extiende con ese tramo; si el número de velas no cuadra
+        (histórico anterior rellenado o borrado) se reconstruye con todo el histórico
+        @param pyramid - Pirámide cacheada (o None)
+        @param repository - Repositorio de velas
+        @param instrument - Instrumento
+        @param interval - Intervalo de la serie base
+        @param latest - Última vela guardada
+        @param step - Duración en segundos de las velas base
+        @returns CandlePyramid al día
+        """
+        count = repository.count_candles(instrument, interval)
+        if pyramid is not None and pyramid.latest is not None:
+            base_count = len(pyramid.levels[0])
+            last_bar = (latest.open_price, latest.high_price, latest.low_price, latest.close_price)
+            if pyramid.latest == latest.timestamp and pyramid.last_bar == last_bar and base_count == count:
+                return pyramid
+            if pyramid.latest <= latest.timestamp:
+                tail = repository.get_candle_arrays(instrument, pyramid.latest, latest.timestamp, interval)
+                if len(tail) and tail.timestamp_at(0) == pyramid.latest and base_count - 1 + len(tail) == count:
+                    pyramid.extend(tail)
+                    logger.info(f"Extended chart pyramid for {instrument} {interval} with {len(tail)} candles")
+                    return pyramid
+
+        base = repository.get_candle_arrays(instrument, datetime(1970, 1, 1), latest.timestamp, interval)
+        pyramid = CandlePyramid(base, step)
+        logger.info(f"Built {len(pyramid)}-level chart pyramid for {instrument} {interval} ({len(base)} candles)")
+        return pyramid
@@ -0,0 +1,399 @@
+"""
+Servicio de exportación e importación de datasets en Parquet / Arrow IPC
+Exporta market_data, daily_analyses y trading_mode_recommendations por instrumento y rango de fechas
+y vuelve a cargar esos ficheros, siempre por lotes de filas para que la memoria no dependa del tamaño
+del dataset
+"""
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Any, BinaryIO, Iterator, Optional, Union
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.db.models import DailyAnalysisModel, MarketDataModel, TradingModeRecommendationModel
+from app.models.market_analysis import PriceCandle
+from app.repositories.candle_store_repository import create_market_data_repository
+from app.services.bar_feature_service import BarFeatureService
+from app.utils.validators import InstrumentValidator
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetIOService:
+    """Exporta e importa tablas históricas en formatos columnares por lotes"""
+
+    # Tablas exportables: modelo, columna temporal del filtro, clave natural de cada fila (para no
+    # duplicar al importar) y tipo de cada columna (time = timestamp, json = payload serializado como texto)
+    DATASETS = {
+        "market_data": {
+            "model": MarketDataModel,
+            "time_column": "timestamp",
+            "key": ("instrument", "interval", "timestamp"),
+            "columns": {
+                "instrument": "string", "interval": "string", "timestamp": "time",
+                "open_price": "float", "high_price": "float", "low_price": "float",
+                "close_price": "float", "volume": "float",
+            },
+        },
+        "daily_analyses": {
+            "model": DailyAnalysisModel,
+            "time_column": "analysis_date",
+            "key": ("instrument", "analysis_date"),
+            "columns": {
+                "instrument": "string", "analysis_date": "time",
+                "previous_day_close": "float", "current_day_close": "float",
+                "daily_change_percent": "float", "daily_direction": "string",
+                "previous_day_high": "float", "previous_day_low": "float",
+                "summary": "string", "analysis_data": "json",
+            },
+        },
+        "trading_mode_recommendations": {
+            "model": TradingModeRecommendationModel,
+            "time_column": "recommendation_date",
+            "key": ("instrument", "bond_symbol", "recommendation_date"),
+            "columns": {
+                "instrument": "string", "bond_symbol": "string", "recommendation_date": "time",
+                "mode": "string", "confidence": "float", "summary": "string",
+                "detailed_explanation": "string", "reasons_data": "json",
+            },
+        },
+    }
+
+    FORMATS = ("parquet", "arrow")
+
+    # Extensiones reconocidas al deducir el formato de un fichero
+    EXTENSIONS = {".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+
+    MEDIA_TYPES = {
+        "parquet": "application/vnd.apache.parquet",
+        "arrow": "application/vnd.apache.arrow.file",
+    }
+
+    # Filas por lote (y por row group en Parquet)
+    BATCH_SIZE = 50_000
+
+    def __init__(self, db: Optional[Session]):
+        """
+        Inicializa el servicio
+        @param db - Sesión de base de datos (puede ser None)
+        """
+        self.db = db
+
+    @classmethod
+    def dataset_definition(cls, dataset: str) -> dict:
+        """
+        Definición de un dataset
+        @param dataset - Nombre del dataset
+        @returns Definición (modelo, columna temporal, columnas)
+        """
+        definition = cls.DATASETS.get(dataset)
+        if definition is None:
+            raise ValueError(f"Unknown dataset '{dataset}'. Supported datasets: {', '.join(cls.DATASETS)}")
+        return definition
+
+    @classmethod
+    def resolve_format(cls, fmt: Optional[str] = None, path: Optional[str] = None) -> str:
+        """
+        Formato pedido o deducido de la extensión del fichero
+        @param fmt - Formato explícito (parquet, arrow)
+        @param path - Ruta del fichero (opcional)
+        @returns Formato normalizado
+        """
+        if fmt is None and path:
+            fmt = next((name for ext, name in cls.EXTENSIONS.items() if path.lower().endswith(ext)), None)
+        if fmt not in cls.FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'. Supported formats: {', '.join(cls.FORMATS)}")
+        return fmt
+
+    @classmethod
+    def arrow_schema(cls, dataset: str) -> pa.Schema:
+        """
+        Esquema Arrow del dataset
+        @param dataset - Nombre del dataset
+        @returns pyarrow.Schema
+        """
+        types = {"string": pa.string(), "float": pa.float64(), "time": pa.timestamp("us"), "json": pa.string()}
+        return pa.schema([
+            (column, types[kind]) for column, kind in cls.dataset_definition(dataset)["columns"].items()
+        ])
+
+    @classmethod
+    def rows_to_columns(cls, dataset: str, rows: list[Any]) -> dict[str, list]:
+        """
+        Convierte filas de la consulta en columnas (los payload JSON se serializan a texto)
+        @param dataset - Nombre del dataset
+        @param rows - Filas con atributos por columna
+        @returns Dict {columna: valores}
+        """
+        columns = {}
+        for column, kind in cls.dataset_definition(dataset)["columns"].items():
+            values = [getattr(row, column) for row in rows]
+            if kind == "json":
+                values = [None if value is None else json.dumps(value) for value in values]
+            columns[column] = values
+        return columns
+
+    @classmethod
+    def columns_to_rows(cls, dataset: str, columns: dict[str, list]) -> list[dict[str, Any]]:
+        """
+        Convierte columnas leídas de un fichero en filas (los payload JSON se deserializan)
+        @param dataset - Nombre del dataset
+        @param columns - Dict {columna: valores}
+        @returns Lista de dicts por fila
+        """
+        definition = cls.dataset_definition(dataset)["columns"]
+        missing = [column for column in definition if column not in columns]
+        if missing:
+            raise ValueError(f"File is missing columns for {dataset}: {', '.join(missing)}")
+
+        decoded = {
+            column: (
+                [None if value is None else json.loads(value) for value in columns[column]]
+                if kind == "json" else columns[column]
+            )
+            for column, kind in definition.items()
+        }
+        return [dict(zip(decoded, values)) for values in zip(*decoded.values())]
+
+    def iter_batches(
+        self,
+        dataset: str,
+        instrument: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        interval: Optional[str] = None
+    ) -> Iterator[dict[str, list]]:
+        """
+        Recorre el dataset filtrado en lotes de BATCH_SIZE filas con un cursor de servidor
+        @param dataset - Nombre del dataset
+        @param instrument - Instrumento (opcional)
+        @param start - Inicio del rango (opcional)
+        @param end - Fin del rango (opcional)
+        @param interval - Intervalo de las velas (solo market_data, opcional)
+        @returns Iterador de lotes {columna: valores}
+        """
+        definition = self.dataset_definition(dataset)
+        if not self.db:
+            return
+
+        model = definition["model"]
+        time_column = getattr(model, definition["time_column"])
+        filters = []
+        if instrument:
+            filters.append(model.instrument == InstrumentValidator.validate_instrument(instrument))
+        if start:
+            filters.append(time_column >= start)
+        if end:
+            filters.append(time_column <= end)
+        if interval:
+            if dataset != "market_data":
+                raise ValueError("The interval filter only applies to market_data")
+            filters.append(model.interval == interval)
+
+        query = self.db.query(*[getattr(model, column) for column in definition["columns"]])
+        if filters:
+            query = query.filter(and_(*filters))
+        query = query.order_by(model.instrument, time_column).yield_per(self.BATCH_SIZE)
+
+        rows = []
+        for row in query:
+            rows.append(row)
+            if len(rows) == self.BATCH_SIZE:
+                yield self.rows_to_columns(dataset, rows)
+                rows = []
+        if rows:
+            yield self.rows_to_columns(dataset, rows)
+
+    def _writer(self, dataset: str, fmt: str, sink: Union[str, BinaryIO]) -> Any:
+        """
+        Crea el escritor del formato pedido
+        @param dataset - Nombre del dataset
+        @param fmt - Formato (parquet, arrow)
+        @param sink - Ruta o fichero binario de destino
+        @returns Escritor con write_batch y close
+        """
+        schema = self.arrow_schema(dataset)
+        if fmt == "parquet":
+            return pq.ParquetWriter(sink, schema, compression="zstd")
+        return pa.ipc.new_file(sink, schema)
+
+    def export(
+        self,
+        dataset: str,
+        sink: Union[str, BinaryIO],
+        fmt: Optional[str] = None,
+        **filters: Any
+    ) -> int:
+        """
+        Exporta el dataset a un fichero, un lote (row group) cada vez
+        @param dataset - Nombre del dataset
+        @param sink - Ruta o fichero binario de destino
+        @param fmt - Formato (por defecto deducido de la ruta)
+        @param filters - instrument, start, end, interval (ver iter_batches)
+        @returns Filas exportadas
+        """
+        fmt = self.resolve_format(fmt, sink if isinstance(sink, str) else None)
+        schema = self.arrow_schema(dataset)
+        writer = self._writer(dataset, fmt, sink)
+        rows = 0
+        try:
+            for columns in self.iter_batches(dataset, **filters):
+                writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+                rows += len(columns["instrument"])
+        finally:
+            writer.close()
+
+        logger.info(f"Exported {rows} {dataset} rows as {fmt}")
+        return rows
+
+    def stream(self, dataset: str, fmt: str, **filters: Any) -> Iterator[bytes]:
+        """
+        Exporta el dataset como flujo de bytes para una respuesta HTTP: cada lote se escribe y se
+        entrega antes de leer el siguiente
+        @param dataset - Nombre del dataset
+        @param fmt - Formato (parquet, arrow)
+        @param filters - instrument, start, end, interval (ver iter_batches)
+        @returns Iterador de fragmentos del fichero
+        """
+        fmt = self.resolve_format(fmt)
+        schema = self.arrow_schema(dataset)
+        buffer = io.BytesIO()
+        writer = self._writer(dataset, fmt, buffer)
+
+        def _drain() -> bytes:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        for columns in self.iter_batches(dataset, **filters):
+            writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+            yield _drain()
+        writer.close()
+        yield _drain()
+
+    def read_batches(self, source: Union[str, BinaryIO], fmt: str) -> Iterator[dict[str, list]]:
+        """
+        Lee un fichero Parquet o Arrow IPC (fichero o stream) por lotes
+        @param source - Ruta o fichero binario
+        @param fmt - Formato (parquet, arrow)
+        @returns Iterador de lotes {columna: valores}
+        """
+        if fmt == "parquet":
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=self.BATCH_SIZE):
+                yield batch.to_pydict()
+            return
+
+        source = pa.memory_map(source) if isinstance(source, str) else source
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            source.seek(0)
+            batches = pa.ipc.open_stream(source)
+        for batch in batches:
+            yield batch.to_pydict()
+
+    def import_file(
+        self,
+        dataset: str,
+        source: Union[str, BinaryIO],
+        fmt: Optional[str] = None
+    ) -> int:
+        """
+        Importa un fichero Parquet / Arrow lote a lote
+        Tras importar velas se reconstruyen los indicadores de cada serie importada: pueden ser
+        anteriores a las ya guardadas
+        @param dataset - Nombre del dataset
+        @param source - Ruta o fichero binario
+        @param fmt - Formato (por defecto deducido de la ruta)
+        @returns Filas importadas
+        """
+        fmt = self.resolve_format(fmt, source if isinstance(source, str) else None)
+        self.dataset_definition(dataset)
+        imported = 0
+        series: set[tuple[str, str]] = set()
+        for columns in self.read_batches(source, fmt):
+            loaded = self.import_columns(dataset, columns)
+            if loaded and dataset == "market_data":
+                series.update(zip(columns["instrument"], columns["interval"]))
+            imported += loaded
+
+        logger.info(f"Imported {imported} {dataset} rows from {fmt}")
+        bar_feature_service = BarFeatureService(self.db)
+        for instrument, interval in sorted(series):
+            bar_feature_service.rebuild_features(instrument, interval)
+        return imported
+
+    def import_columns(self, dataset: str, columns: dict[str, list]) -> int:
+        """
+        Carga un lote: las velas con COPY + merge por serie; el historial de análisis con inserción
+        en bloque, omitiendo las filas cuya clave ya existe. Las filas repetidas dentro del lote se
+        cargan una vez (la última)
+        @param dataset - Nombre del dataset
+        @param columns - Lote {columna: valores}
+        @returns Filas cargadas
+        """
+        definition = self.dataset_definition(dataset)
+        key = definition["key"]
+        rows = list({
+            tuple(row[column] for column in key): row
+            for row in self.columns_to_rows(dataset, columns)
+        }.values())
+        if not rows:
+            return 0
+
+        if dataset == "market_data":
+            repository = create_market_data_repository(self.db)
+            if not repository.available:
+                return 0
+            series: dict[tuple[str, str], list[PriceCandle]] = {}
+            for row in rows:
+                series.setdefault((row["instrument"], row["interval"]), []).append(PriceCandle(
+                    timestamp=row["timestamp"],
+                    open=row["open_price"],
+                    high=row["high_price"],
+                    low=row["low_price"],
+                    close=row["close_price"],
+                    volume=row["volume"],
+                ))
+            return sum(
+                repository.copy_candles(instrument, interval, candles)
+                for (instrument, interval), candles in series.items()
+            )
+
+        if not self.db:
+            return 0
+
+        model = definition["model"]
+        time_name = definition["time_column"]
+        time_column = getattr(model, time_name)
+        times = [row[time_name] for row in rows]
+        existing = {
+            tuple(values)
+            for values in self.db.query(*(getattr(model, column) for column in key)).filter(
+                and_(
+                    model.instrument.in_({row["instrument"] for row in rows}),
+                    time_column >= min(times),
+                    time_column <= max(times),
+                )
+            )
+        }
+        new_rows = [row for row in rows if tuple(row[column] for column in key) not in existing]
+
+        try:
+            self.db.bulk_insert_mappings(model, new_rows)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error importing {dataset}: {str(e)}")
+            raise
+
+        if len(new_rows) < len(rows):
+            logger.info(f"Skipped {len(rows) - len(new_rows)} {dataset} rows that already exist")
+        return len(new_rows)
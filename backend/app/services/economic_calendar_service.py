@@ -21,6 +21,7 @@ from app.providers.base_provider import EconomicCalendarProvider
 from app.providers.mock_provider import MockProvider
 from app.providers.tradingeconomics_provider import TradingEconomicsProvider
 from app.repositories.economic_events_repository import EconomicEventsRepository
+from app.services.llm_service import LLMService
 from app.utils.schedule_formatter import ScheduleFormatter
 from app.utils.xauusd_filter import XAUUSDFilter
 from app.utils.business_days import BusinessDays
@@ -0,0 +1,201 @@
+"""
+Servicio de detección y reparación de huecos en market_data
+Escanea cada serie contra la rejilla esperada del intervalo y vuelve a pedir al proveedor solo los
+rangos que faltan (agrupando huecos cercanos en una petición), en lugar de refrescar el histórico
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import Settings
+from app.models.gap_repair import CandleGap, GapRepairReport, GapRepairSeriesReport
+from app.providers.market_data.base_market_provider import MarketDataProvider
+from app.services.backfill_service import BackfillService
+from app.utils.gap_scanner import GapScanner
+from app.utils.trading_calendar import TradingCalendar
+from app.utils.validators import InstrumentValidator
+
+logger = logging.getLogger(__name__)
+
+
+class GapRepairService:
+    """Busca huecos en las series guardadas y los rellena con peticiones mínimas al proveedor"""
+
+    # Días revisados por defecto hacia atrás desde ahora
+    DEFAULT_LOOKBACK_DAYS = 30
+
+    # Huecos separados por menos velas guardadas que esto se piden en una sola petición
+    MERGE_GAP_BARS = 24
+
+    # Sufijo del proveedor en backfill_checkpoints para los rangos de huecos ya pedidos
+    CHECKPOINT_SUFFIX = "-gaps"
+
+    # Horas tras las que un rango pedido sin resultado se vuelve a pedir (cortes o límites de cuota
+    # transitorios del proveedor); los rangos con velas no caducan
+    EMPTY_RETRY_HOURS = 24
+
+    def __init__(
+        self,
+        settings: Settings,
+        db: Optional[Session] = None,
+        provider_name: Optional[str] = None,
+        provider: Optional[MarketDataProvider] = None
+    ):
+        """
+        Inicializa el servicio de reparación de huecos
+        @param settings - Configuración de la aplicación
+        @param db - Sesión de base de datos (opcional; sin DB no hay series que revisar)
+        @param provider_name - Proveedor (twelvedata, alphavantage, fred, mock); por defecto el configurado
+        @param provider - Instancia del proveedor (opcional, para inyectarla en tests)
+        """
+        self.settings = settings
+        # Reutiliza la descarga con ritmo/reintentos, la carga COPY y los checkpoints del backfill
+        self.backfill_service = BackfillService(settings, db, provider_name=provider_name, provider=provider)
+        self.provider_name = self.backfill_service.provider_name
+        self.market_data_repo = self.backfill_service.market_data_repo
+        self.checkpoint_repo = self.backfill_service.checkpoint_repo
+        self.bar_feature_service = self.backfill_service.bar_feature_service
+
+    @classmethod
+    def plan_requests(cls, gaps: list[CandleGap], interval: str) -> list[tuple[datetime, datetime]]:
+        """
+        Agrupa huecos cercanos en rangos de petición sin superar el tamaño de bloque del backfill
+        @param gaps - Huecos ordenados
+        @param interval - Intervalo de las velas
+        @returns Lista de rangos (inicio, fin) inclusive
+        """
+        step = timedelta(seconds=TradingCalendar.interval_seconds(interval))
+        max_span = step * (BackfillService.CHUNK_BARS - 1)
+        requests: list[tuple[datetime, datetime]] = []
+        for gap in gaps:
+            if requests:
+                request_start, request_end = requests[-1]
+                if gap.start - request_end <= step * cls.MERGE_GAP_BARS and gap.end - request_start <= max_span:
+                    requests[-1] = (request_start, gap.end)
+                    continue
+            requests.append((gap.start, gap.end))
+        return requests
+
+    def scan_series(
+        self,
+        instrument: str,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> GapRepairSeriesReport:
+        """
+        Escanea una serie y descarta los huecos ya pedidos al proveedor sin resultado en las últimas
+        EMPTY_RETRY_HOURS horas. El escaneo termina en la última vela guardada: lo posterior es frescura, no huecos
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas
+        @param start - Inicio del rango (opcional)
+        @param end - Fin del rango (opcional)
+        @returns GapRepairSeriesReport con los huecos pendientes
+        """
+        timestamps = self.market_data_repo.get_timestamps(instrument, interval, start, end)
+        gaps = GapScanner.find_gaps(timestamps, interval, start)
+        attempted = self.checkpoint_repo.get_completed_chunks(
+            instrument, interval, self.provider_name + self.CHECKPOINT_SUFFIX,
+            empty_since=datetime.now() - timedelta(hours=self.EMPTY_RETRY_HOURS)
+        )
+        pending = [
+            gap for gap in gaps if not BackfillService.is_covered((gap.start, gap.end), attempted)
+        ]
+        return GapRepairSeriesReport(
+            instrument=instrument,
+            interval=interval,
+            stored_bars=len(timestamps),
+            gaps=pending,
+            missing_bars=sum(gap.missing_bars for gap in pending),
+            skipped_gaps=len(gaps) - len(pending),
+        )
+
+    async def repair(
+        self,
+        instruments: list[str],
+        intervals: list[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        dry_run: bool = False
+    ) -> GapRepairReport:
+        """
+        Escanea y repara los huecos de todas las series instrumento x intervalo
+        @param instruments - Instrumentos a revisar
+        @param intervals - Intervalos a revisar
+        @param start - Inicio del rango (por defecto DEFAULT_LOOKBACK_DAYS atrás)
+        @param end - Fin del rango (por defecto ahora)
+        @param dry_run - Si True solo escanea, sin peticiones al proveedor
+        @returns GapRepairReport con el resultado por serie
+        """
+        end = end or datetime.now()
+        start = start or end - timedelta(days=self.DEFAULT_LOOKBACK_DAYS)
+        instruments = [InstrumentValidator.validate_instrument(i) for i in instruments]
+        for interval in intervals:
+            TradingCalendar.interval_seconds(interval)
+
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(BackfillService.PROVIDER_LIMITS[self.provider_name]["concurrency"])
+        series = []
+        for instrument in instruments:
+            for interval in intervals:
+                report = self.scan_series(instrument, interval, start, end)
+                if report.gaps and not dry_run:
+                    await self._repair_series(report, semaphore)
+                series.append(report)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Gap repair over {len(series)} series finished in {elapsed:.1f}s "
+            f"({sum(s.missing_bars for s in series)} missing bars, "
+            f"{sum(s.repaired_bars for s in series)} repaired, {sum(s.requests for s in series)} requests)"
+        )
+        return GapRepairReport(
+            start=start.isoformat(),
+            end=end.isoformat(),
+            dry_run=dry_run,
+            elapsed_seconds=round(elapsed, 3),
+            series=series,
+        )
+
+    async def _repair_series(self, report: GapRepairSeriesReport, semaphore: asyncio.Semaphore) -> None:
+        """
+        Pide al proveedor los rangos que faltan de una serie, los carga y recalcula sus indicadores
+        @param report - Resultado del escaneo (se completa con el resultado de la reparación)
+        @param semaphore - Semáforo de peticiones simultáneas
+        """
+        instrument, interval = report.instrument, report.interval
+
+        async def _repair_range(request: tuple[datetime, datetime]) -> None:
+            try:
+                async with semaphore:
+                    candles = await self.backfill_service.fetch_chunk(instrument, interval, request)
+                report.requests += 1
+                # El checkpoint evita volver a pedir huecos que el proveedor no tiene (festivos, cortes);
+                # si llegó vacío caduca a las EMPTY_RETRY_HOURS horas
+                loaded = await self.backfill_service.load_chunk(
+                    instrument, interval, request, candles,
+                    checkpoint_provider=self.provider_name + self.CHECKPOINT_SUFFIX,
+                    checkpoint_empty=True
+                )
+                report.repaired_bars += loaded
+            except Exception as e:
+                logger.error(
+                    f"Gap repair {request[0].isoformat()} - {request[1].isoformat()} "
+                    f"for {instrument} ({interval}) failed: {str(e)}"
+                )
+                report.errors.append(f"{request[0].isoformat()}: {str(e)}")
+
+        await asyncio.gather(*[_repair_range(request) for request in self.plan_requests(report.gaps, interval)])
+
+        if report.repaired_bars:
+            report.features_rebuilt = await asyncio.to_thread(
+                self.bar_feature_service.rebuild_features, instrument, interval
+            )
+        logger.info(
+            f"Repaired {report.repaired_bars}/{report.missing_bars} missing bars for {instrument} ({interval}) "
+            f"with {report.requests} requests"
+        )
@@ -1,14 +1,18 @@
 """
 Servicio para analizar alineación entre DXY y bonos
 """
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
 from sqlalchemy.orm import Session
 
 from app.config.settings import Settings
+from app.models.correlation_analysis import CorrelationMatrixAnalysis, CorrelationMode, LeadLagAnalysis
 from app.models.market_alignment import MarketAlignmentAnalysis
+from app.models.market_analysis import PriceCandle
 from app.providers.market_data.base_market_provider import MarketDataProvider
 from app.providers.market_data.alpha_vantage_provider import AlphaVantageProvider
 from app.providers.market_data.twelve_data_provider import TwelveDataProvider
@@ -17,6 +21,8 @@ from app.providers.market_data.mock_market_provider import MockMarketProvider
 from app.utils.alignment_analyzer import AlignmentAnalyzer
 from app.utils.business_days import BusinessDays
 from app.utils.correlation_calculator import CorrelationCalculator
+from app.utils.rolling_correlation import RollingCorrelationEngine
+from app.utils.series_aligner import SeriesAligner
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +30,13 @@ logger = logging.getLogger(__name__)
 class MarketAlignmentService:
     """Servicio para analizar alineación de mercado"""
     
+    # Activos por defecto de la matriz de correlaciones móviles
+    CORRELATION_SYMBOLS = ["XAUUSD", "DXY", "US02Y", "US10Y", "US30Y", "NASDAQ"]
+    
+    # Caché de matrices por día de trading: {(símbolos, ventanas, modo, día): análisis}
+    _correlation_cache: dict[tuple, CorrelationMatrixAnalysis] = {}
+    CORRELATION_CACHE_SIZE = 16
+    
     def __init__(self, settings: Settings, db: Optional[Session] = None):
         """
         Inicializa el servicio de alineación de mercado
@@ -74,7 +87,8 @@ class MarketAlignmentService:
         bond_symbol: str = "US10Y",
         include_gold_correlation: bool = True,
         gold_symbol: str = "XAUUSD",
-        correlation_days: int = 30
+        correlation_days: int = 30,
+        include_correlation_regimes: bool = False
     ) -> MarketAlignmentAnalysis:
         """
         Analiza la alineación entre DXY y un bono
@@ -82,6 +96,7 @@ class MarketAlignmentService:
         @param include_gold_correlation - Si incluir análisis de correlación Gold-DXY
         @param gold_symbol - Símbolo de Gold a usar
         @param correlation_days - Días históricos para calcular correlación
+        @param include_correlation_regimes - Si incluir regímenes de correlación multi-ventana de Gold
         @returns Análisis de alineación
         """
         # Usar días hábiles (la Fed solo opera en días hábiles)
@@ -107,7 +122,9 @@ class MarketAlignmentService:
         
         # FRED solo tiene datos en días hábiles, buscar un rango amplio y tomar los últimos disponibles
         # Buscar datos de los últimos 30 días para encontrar los días hábiles más recientes
-        range_start = today - timedelta(days=30)
+        # (o más, si la correlación con Gold necesita un histórico mayor: así DXY se descarga una sola vez)
+        lookback_days = max(30, correlation_days + 10) if include_gold_correlation else 30
+        range_start = today - timedelta(days=lookback_days)
         range_end = today
         
         range_start_dt = datetime.combine(range_start, datetime.min.time())
@@ -187,7 +204,8 @@ class MarketAlignmentService:
                 correlation_result, projection = await self._calculate_gold_dxy_correlation(
                     gold_symbol=gold_symbol,
                     correlation_days=correlation_days,
-                    dxy_current=dxy_current
+                    dxy_current=dxy_current,
+                    dxy_candles=dxy_all_candles
                 )
                 analysis.gold_dxy_correlation = correlation_result
                 analysis.gold_impact_projection = projection
@@ -199,6 +217,16 @@ class MarketAlignmentService:
             except Exception as e:
                 logger.warning(f"Could not calculate Gold-DXY correlation: {str(e)}")
         
+        # Regímenes de correlación de Gold frente a DXY y el bono (ventanas 10/30/90/250)
+        if include_correlation_regimes:
+            try:
+                matrix = await self.get_correlation_matrix(
+                    symbols=[gold_symbol, "DXY", bond_symbol]
+                )
+                analysis.gold_correlation_regimes = matrix.pairs
+            except Exception as e:
+                logger.warning(f"Could not calculate correlation regimes: {str(e)}")
+        
         logger.info(
             f"Alignment analysis: {analysis.alignment.value}, "
             f"bias: {analysis.market_bias.value}"
@@ -206,6 +234,135 @@ class MarketAlignmentService:
         
         return analysis
     
+    async def get_correlation_matrix(
+        self,
+        symbols: Optional[list[str]] = None,
+        windows: Optional[list[int]] = None,
+        mode: CorrelationMode = CorrelationMode.RETURNS
+    ) -> CorrelationMatrixAnalysis:
+        """
+        Calcula correlaciones móviles multi-ventana entre varios activos (cacheado por día de trading)
+        @param symbols - Activos a incluir; el primero es el principal (default: CORRELATION_SYMBOLS)
+        @param windows - Ventanas en días alineados (default: 10, 30, 90, 250)
+        @param mode - Correlacionar retornos o niveles
+        @returns Análisis con matrices por ventana y regímenes de los pares con el activo principal
+        """
+        selected_symbols = [s.upper() for s in symbols] if symbols else list(self.CORRELATION_SYMBOLS)
+        selected_windows = sorted(set(windows)) if windows else list(RollingCorrelationEngine.DEFAULT_WINDOWS)
+        if len(selected_symbols) < 2:
+            raise ValueError("At least two symbols are required for a correlation matrix")
+        if min(selected_windows) < 2:
+            raise ValueError("Correlation windows must be at least 2 days")
+        
+        trading_day = BusinessDays.get_last_business_day(datetime.now().date())
+        cache_key = (tuple(selected_symbols), tuple(selected_windows), mode.value, trading_day)
+        cached = self._correlation_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached correlation matrix for {trading_day}")
+            return cached
+        
+        # ~5 días hábiles por cada 7 naturales, con margen para festivos y el retorno inicial
+        lookback_days = int(max(selected_windows) * 7 / 5) + 30
+        range_end = datetime.combine(trading_day, datetime.max.time())
+        range_start = datetime.combine(trading_day - timedelta(days=lookback_days), datetime.min.time())
+        
+        series = await asyncio.gather(*[
+            self._fetch_candles(symbol, range_start, range_end, "1d")
+            for symbol in selected_symbols
+        ])
+        for symbol, candles in zip(selected_symbols, series):
+            if not candles:
+                raise ValueError(f"No daily data available for {symbol}")
+        
+        aligned = SeriesAligner.align(dict(zip(selected_symbols, series)), how="inner", resolution="D")
+        analysis = RollingCorrelationEngine.analyze(
+            aligned, selected_windows, mode, primary=selected_symbols[0]
+        )
+        
+        if len(self._correlation_cache) >= self.CORRELATION_CACHE_SIZE:
+            self._correlation_cache.pop(next(iter(self._correlation_cache)))
+        self._correlation_cache[cache_key] = analysis
+        
+        logger.info(
+            f"Correlation matrix computed for {selected_symbols} "
+            f"({len(aligned)} aligned days, windows={selected_windows}, mode={mode.value})"
+        )
+        return analysis
+    
+    async def analyze_lead_lag(
+        self,
+        leader_symbol: str = "DXY",
+        follower_symbol: str = "XAUUSD",
+        interval: str = "1h",
+        days: int = 30,
+        max_lag: int = 12,
+        window: Optional[int] = None
+    ) -> LeadLagAnalysis:
+        """
+        Analiza si los movimientos de un activo (DXY/yields) se adelantan a Gold
+        @param leader_symbol - Activo líder candidato
+        @param follower_symbol - Activo seguidor
+        @param interval - Intervalo de las velas (1h, 15m, 1d, ...)
+        @param days - Días naturales de histórico
+        @param max_lag - Desfase máximo en velas
+        @param window - Velas por ventana móvil para medir estabilidad (default: 1/4 del histórico)
+        @returns Análisis lead-lag
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+
+        leader_candles, follower_candles = await asyncio.gather(
+            self._fetch_candles(leader_symbol, start_date, end_date, interval),
+            self._fetch_candles(follower_symbol, start_date, end_date, interval),
+        )
+        for symbol, candles in ((leader_symbol, leader_candles), (follower_symbol, follower_candles)):
+            if not candles:
+                raise ValueError(f"No {interval} data available for {symbol}")
+
+        # Diario: unir por fecha (fuentes con horas distintas); intradía: por minuto exacto
+        aligned = SeriesAligner.align(
+            {leader_symbol: leader_candles, follower_symbol: follower_candles},
+            how="inner",
+            resolution="D" if interval.lower() in ("1d", "1day") else "m"
+        )
+
+        rolling_window = window or max(len(aligned) // 4, 4 * max_lag + 2)
+        analysis = CorrelationCalculator.calculate_lead_lag(
+            aligned,
+            leader_symbol,
+            follower_symbol,
+            max_lag=max_lag,
+            window=rolling_window,
+            interval=interval
+        )
+        logger.info(
+            f"Lead-lag {leader_symbol}->{follower_symbol} ({interval}): "
+            f"lag={analysis.dominant_lag}, corr={analysis.dominant_correlation:.2f}, "
+            f"stability={analysis.stability}"
+        )
+        return analysis
+    
+    async def _fetch_candles(
+        self,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        interval: str
+    ) -> list[PriceCandle]:
+        """
+        Descarga velas usando FRED para DXY/bonos diarios (si está configurado) y el proveedor principal para el resto
+        @param symbol - Símbolo del activo
+        @param start_date - Fecha de inicio
+        @param end_date - Fecha de fin
+        @param interval - Intervalo de las velas
+        @returns Lista de velas
+        """
+        if interval == "1d" and self.settings.fred_api_key and symbol in FredProvider.SERIES_MAPPING:
+            provider = self._get_dxy_bond_provider()
+        else:
+            provider = self.provider
+        return await provider.fetch_historical_candles(symbol, start_date, end_date, interval)
+    
     def _get_dxy_bond_provider(self) -> MarketDataProvider:
         """
         Obtiene el proveedor adecuado para DXY y bonos
@@ -228,13 +385,15 @@ class MarketAlignmentService:
         self,
         gold_symbol: str,
         correlation_days: int,
-        dxy_current: float
+        dxy_current: float,
+        dxy_candles: Optional[list[PriceCandle]] = None
     ) -> tuple:
         """
-        Calcula correlación entre Gold y DXY
+        Calcula correlación entre Gold y DXY sobre días alineados por fecha
         @param gold_symbol - Símbolo de Gold
         @param correlation_days - Días de historial
         @param dxy_current - Precio actual de DXY
+        @param dxy_candles - Velas diarias de DXY ya descargadas (opcional, evita otra llamada)
         @returns Tupla (CorrelationResult, ImpactProjection)
         """
         range_start = datetime.now() - timedelta(days=correlation_days + 10)
@@ -245,43 +404,41 @@ class MarketAlignmentService:
             gold_symbol, range_start, range_end, "1d"
         )
         
-        dxy_provider = self._get_dxy_bond_provider()
-        dxy_candles = await dxy_provider.fetch_historical_candles(
-            "DXY", range_start, range_end, "1d"
-        )
+        if dxy_candles is None:
+            dxy_provider = self._get_dxy_bond_provider()
+            dxy_candles = await dxy_provider.fetch_historical_candles(
+                "DXY", range_start, range_end, "1d"
+            )
         
         if not gold_candles or not dxy_candles:
             raise ValueError("Insufficient historical data for correlation")
         
-        if len(gold_candles) < correlation_days or len(dxy_candles) < correlation_days:
+        # Emparejar por fecha (no por posición): FRED omite festivos que otras fuentes publican
+        aligned = SeriesAligner.align(
+            {gold_symbol: gold_candles, "DXY": dxy_candles},
+            how="inner",
+            resolution="D"
+        )
+        
+        if len(aligned) < correlation_days:
             raise ValueError(
-                f"Need at least {correlation_days} days of data. "
-                f"Got gold={len(gold_candles)}, dxy={len(dxy_candles)}"
+                f"Need at least {correlation_days} days of aligned data. "
+                f"Got gold={len(gold_candles)}, dxy={len(dxy_candles)}, aligned={len(aligned)}"
             )
         
-        # Tomar últimos N días
-        gold_prices = [c.close for c in gold_candles[-correlation_days:]]
-        dxy_prices = [c.close for c in dxy_candles[-correlation_days:]]
-        
-        # Calcular correlación
-        correlation_result = CorrelationCalculator.calculate_correlation(
-            gold_prices, dxy_prices
+        # Calcular correlación sobre los últimos N días alineados
+        correlation_result = CorrelationCalculator.calculate_aligned_correlation(
+            aligned, gold_symbol, "DXY", window=correlation_days
         )
         
-        # Calcular volatilidad histórica de Gold (desviación estándar de retornos)
-        gold_closes = [c.close for c in gold_candles]
-        gold_returns = []
-        for i in range(1, len(gold_closes)):
-            daily_return = ((gold_closes[i] - gold_closes[i-1]) / gold_closes[i-1]) * 100
-            gold_returns.append(daily_return)
-        
-        # Volatilidad = desviación estándar de retornos diarios
-        import statistics
-        historical_volatility = statistics.stdev(gold_returns) if len(gold_returns) > 1 else 0.5
+        # Volatilidad histórica de Gold = desviación estándar de retornos diarios
+        gold_closes = np.array([c.close for c in sorted(gold_candles, key=lambda c: c.timestamp)])
+        gold_returns = np.diff(gold_closes) / gold_closes[:-1] * 100
+        historical_volatility = float(np.std(gold_returns, ddof=1)) if len(gold_returns) > 1 else 0.5
         
         # Proyectar impacto (asumir movimiento DXY de 1% para ejemplo)
         dxy_change_percent = 1.0
-        current_gold_price = gold_candles[-1].close
+        current_gold_price = float(gold_closes[-1])
         
         projection = CorrelationCalculator.project_gold_impact(
             correlation_coefficient=correlation_result.coefficient,
@@ -5,15 +5,27 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
 from sqlalchemy.orm import Session
 
 from app.config.settings import Settings
-from app.models.market_analysis import DailyMarketAnalysis, PriceCandle, SessionType
+from app.models.market_analysis import (
+    DailyMarketAnalysis,
+    PriceCandle,
+    SessionRangeHistory,
+    SessionStatisticsReport,
+    SessionType,
+)
 from app.providers.market_data.base_market_provider import MarketDataProvider
 from app.providers.market_data.alpha_vantage_provider import AlphaVantageProvider
 from app.providers.market_data.twelve_data_provider import TwelveDataProvider
 from app.providers.market_data.mock_market_provider import MockMarketProvider
+from app.repositories.analysis_repository import AnalysisRepository
+from app.repositories.candle_store_repository import create_market_data_repository
+from app.services.bar_feature_service import BarFeatureService
+from app.utils.candle_arrays import CandleArrays
 from app.utils.market_analyzer import MarketAnalyzer
+from app.utils.session_statistics import SessionStatistics
 from app.utils.trading_sessions import TradingSessions
 from app.utils.business_days import BusinessDays
 
@@ -32,6 +44,8 @@ class MarketAnalysisService:
         self.settings = settings
         self.provider = self._create_provider(settings)
         self.db = db
+        self.market_data_repo = create_market_data_repository(db, settings)
+        self.bar_feature_service = BarFeatureService(db)
     
     def _create_provider(self, settings: Settings) -> MarketDataProvider:
         """
@@ -171,22 +185,26 @@ class MarketAnalysisService:
         previous_day_high = max(c.high for c in day_before_candles) if day_before_candles else None
         previous_day_low = min(c.low for c in day_before_candles) if day_before_candles else None
         
-        # Obtener datos históricos para análisis de volatilidad (últimos 30 días)
-        historical_start = yesterday_start - timedelta(days=30)
+        # Distribución histórica de ATR (feature store); si no existe, comparar con los últimos 30 días
+        volatility_distribution = self.bar_feature_service.get_volatility_distribution(instrument, "1h")
         historical_candles: list[PriceCandle] = []
-        try:
-            historical_candles = await self.provider.fetch_historical_candles(
-                instrument, historical_start, yesterday_end, "1h"
-            )
-            logger.info(f"Obtained {len(historical_candles)} historical candles for volatility analysis")
-        except Exception as e:
-            logger.warning(f"Could not fetch historical data for volatility: {str(e)}")
+        if volatility_distribution is None:
+            historical_start = yesterday_start - timedelta(days=30)
+            try:
+                historical_candles = await self.provider.fetch_historical_candles(
+                    instrument, historical_start, yesterday_end, "1h"
+                )
+                logger.info(f"Obtained {len(historical_candles)} historical candles for volatility analysis")
+            except Exception as e:
+                logger.warning(f"Could not fetch historical data for volatility: {str(e)}")
         
         # Agrupar velas por sesión
         sessions_analysis = []
         
+        candles_by_session = self._group_candles_by_session(yesterday_candles)
+        
         for session_type in [SessionType.ASIA, SessionType.LONDON, SessionType.NEW_YORK]:
-            session_candles = self._filter_candles_by_session(yesterday_candles, session_type)
+            session_candles = candles_by_session[session_type]
             
             if session_candles:
                 session_analysis = MarketAnalyzer.analyze_session(
@@ -194,7 +212,8 @@ class MarketAnalysisService:
                     session_candles,
                     previous_day_high,
                     previous_day_low,
-                    historical_candles  # Pasar datos históricos para volatilidad
+                    historical_candles,  # Pasar datos históricos para volatilidad
+                    volatility_distribution
                 )
                 sessions_analysis.append(session_analysis)
         
@@ -231,23 +250,85 @@ class MarketAnalysisService:
             summary=summary
         )
     
-    def _filter_candles_by_session(
+    async def get_session_statistics(
+        self,
+        instrument: str = "XAUUSD",
+        days: int = 90
+    ) -> SessionStatisticsReport:
+        """
+        Calcula estadísticas de referencia por sesión (rango, ATR, dirección, rupturas) sobre N días
+        Usa las velas horarias de la BD y, si no hay, las del proveedor
+        @param instrument - Símbolo del instrumento
+        @param days - Días de trading a incluir
+        @returns Estadísticas por sesión
+        """
+        last_day = BusinessDays.get_last_business_day(datetime.now().date())
+        end_date = datetime.combine(last_day, datetime.max.time())
+        # ~5 días hábiles por cada 7 naturales, más margen para festivos y el día anterior al primero
+        start_date = datetime.combine(last_day - timedelta(days=int(days * 7 / 5) + 7), datetime.min.time())
+        
+        arrays = self.market_data_repo.get_candle_arrays(instrument, start_date, end_date, "1h")
+        if len(arrays):
+            logger.info(f"Using {len(arrays)} stored hourly candles for session statistics")
+        else:
+            candles = await self.provider.fetch_historical_candles(instrument, start_date, end_date, "1h")
+            if not candles:
+                raise ValueError(f"No hourly data available for {instrument} to compute session statistics")
+            arrays = CandleArrays.from_candles(candles)
+        
+        cube = SessionStatistics.build_cube(arrays, days=days)
+        if len(cube) == 0:
+            raise ValueError(f"No hourly data available for {instrument} to compute session statistics")
+        
+        return SessionStatisticsReport(
+            instrument=instrument,
+            days=len(cube),
+            start_date=str(cube.dates[0]),
+            end_date=str(cube.dates[-1]),
+            baselines=SessionStatistics.baselines(cube)
+        )
+    
+    def get_session_history(
+        self,
+        instrument: str = "XAUUSD",
+        days: int = 90,
+        session: Optional[str] = None
+    ) -> SessionRangeHistory:
+        """
+        Histórico de rangos por sesión de los análisis diarios guardados, proyectado en SQL desde
+        analysis_data sin cargar los análisis completos
+        @param instrument - Símbolo del instrumento
+        @param days - Días naturales hacia atrás
+        @param session - Sesión a filtrar (asia, london, new_york) o None para todas
+        @returns Histórico de rangos (vacío sin base de datos)
+        """
+        if session is not None:
+            session = SessionType(session).value
+        ranges = AnalysisRepository(self.db).get_session_ranges(instrument, days=days, session=session)
+        logger.info(f"Projected {len(ranges)} stored session ranges for {instrument} over {days} days")
+        return SessionRangeHistory(instrument=instrument, days=days, session=session, ranges=ranges)
+    
+    def _group_candles_by_session(
         self,
-        candles: list[PriceCandle],
-        session: SessionType
-    ) -> list[PriceCandle]:
+        candles: list[PriceCandle]
+    ) -> dict[SessionType, list[PriceCandle]]:
         """
-        Filtra velas que pertenecen a una sesión específica
+        Agrupa las velas por sesión etiquetando todos los timestamps en una sola pasada
         @param candles - Lista de velas
-        @param session - Tipo de sesión
-        @returns Velas filtradas por sesión
+        @returns Velas de cada sesión (listas vacías si la sesión no tiene velas)
         """
-        session_candles: list[PriceCandle] = []
+        grouped: dict[SessionType, list[PriceCandle]] = {
+            session: [] for session in TradingSessions.SESSION_ORDER
+        }
+        if not candles:
+            return grouped
         
-        for candle in candles:
-            candle_session = TradingSessions.get_session_for_time(candle.timestamp)
-            if candle_session == session:
-                session_candles.append(candle)
+        timestamps = np.array([candle.timestamp for candle in candles], dtype="datetime64[s]")
+        codes = TradingSessions.label_sessions(timestamps)
+        for candle, code in zip(candles, codes.tolist()):
+            session = TradingSessions.session_from_code(code)
+            if session is not None:
+                grouped[session].append(candle)
         
-        return session_candles
+        return grouped
 
@@ -11,6 +11,7 @@ from app.config.settings import Settings
 from app.db.models import PsychologicalLevelHistoryModel
 from app.models.market_analysis import PriceCandle
 from app.models.psychological_levels import (
+    LevelConfluenceResponse,
     LevelType,
     PsychologicalLevel,
     PsychologicalLevelsResponse,
@@ -19,8 +20,14 @@ from app.models.psychological_levels import (
 from app.providers.market_data.base_market_provider import MarketDataProvider
 from app.providers.market_data.twelve_data_provider import TwelveDataProvider
 from app.providers.market_data.mock_market_provider import MockMarketProvider
+from app.services.bar_feature_service import BarFeatureService
 
+from app.utils.candle_arrays import CandleArrays
+from app.utils.level_confluence import LevelConfluenceEngine
 from app.utils.reaction_history_builder import ReactionHistoryBuilder
+from app.utils.volatility_distribution import VolatilityDistribution
+
+logger = logging.getLogger(__name__)
 
 
 class PsychologicalLevelsService:
@@ -35,6 +42,7 @@ class PsychologicalLevelsService:
         self.settings = settings
         self.provider = self._create_provider(settings)
         self.db = db
+        self.bar_feature_service = BarFeatureService(db)
 
     def _create_provider(self, settings: Settings) -> MarketDataProvider:
         """Crea el proveedor de datos de mercado"""
@@ -82,7 +90,8 @@ class PsychologicalLevelsService:
             current_price=current_price,
             candles=historical_candles,
             max_distance_points=max_distance_points,
-            lookback_days=lookback_days
+            lookback_days=lookback_days,
+            volatility_distribution=self.bar_feature_service.get_volatility_distribution(instrument, "1h")
         )
 
     def analyze_levels_from_candles(
@@ -91,7 +100,8 @@ class PsychologicalLevelsService:
         current_price: float,
         candles: list[PriceCandle],
         max_distance_points: float = 100.0,
-        lookback_days: int = 30
+        lookback_days: int = 30,
+        volatility_distribution: Optional[VolatilityDistribution] = None
     ) -> PsychologicalLevelsResponse:
         """
         Analiza niveles psicológicos a partir de velas ya obtenidas
@@ -100,6 +110,7 @@ class PsychologicalLevelsService:
         @param candles - Velas históricas
         @param max_distance_points - Distancia máxima
         @param lookback_days - Días de histórico (referencia)
+        @param volatility_distribution - Distribución histórica de ATR para clasificar reacciones (opcional)
         @returns Respuesta formateada
         """
         # 1. Generar niveles redondos cercanos
@@ -110,26 +121,13 @@ class PsychologicalLevelsService:
         analyzed_levels: list[PsychologicalLevel] = []
         for level_price in round_levels:
             level_analysis = self._analyze_level(
-                level_price, current_price, candles
+                level_price, current_price, candles, volatility_distribution
             )
             analyzed_levels.append(level_analysis)
 
         # 3. Identificar niveles más fuertes y cercanos
-        supports = [l for l in analyzed_levels if l.type in [LevelType.SUPPORT, LevelType.BOTH]]
-        resistances = [l for l in analyzed_levels if l.type in [LevelType.RESISTANCE, LevelType.BOTH]]
-
-        strongest_support = max(supports, key=lambda x: x.strength) if supports else None
-        strongest_resistance = max(resistances, key=lambda x: x.strength) if resistances else None
-
-        nearest_support = min(
-            [l for l in supports if l.level < current_price],
-            key=lambda x: abs(x.distance_from_current),
-            default=None
-        )
-        nearest_resistance = min(
-            [l for l in resistances if l.level > current_price],
-            key=lambda x: abs(x.distance_from_current),
-            default=None
+        nearest_support, nearest_resistance, strongest_support, strongest_resistance = (
+            self.select_key_levels(analyzed_levels, current_price)
         )
 
         # 4. Generar resumen
@@ -137,7 +135,7 @@ class PsychologicalLevelsService:
             current_price, nearest_support, nearest_resistance, strongest_support, strongest_resistance
         )
 
-        return PsychologicalLevelsResponse(
+        return PsychologicalLevelsResponse.model_construct(
             instrument=instrument,
             current_price=current_price,
             analysis_datetime=datetime.now().isoformat(),
@@ -151,6 +149,120 @@ class PsychologicalLevelsService:
             max_distance_points=max_distance_points,
         )
 
+    def analyze_confluence(
+        self,
+        instrument: str,
+        current_price: float,
+        candles_by_timeframe: dict[str, list[PriceCandle]],
+        max_distance_points: float = 100.0
+    ) -> LevelConfluenceResponse:
+        """
+        Evalúa los niveles redondos cercanos en todas las temporalidades en una sola pasada
+        La rejilla de niveles se genera una vez y las reacciones de todas las series se cuentan
+        sobre una única matriz (LevelConfluenceEngine)
+        @param instrument - Instrumento
+        @param current_price - Precio actual
+        @param candles_by_timeframe - Dict {temporalidad: velas}
+        @param max_distance_points - Distancia máxima de los niveles al precio
+        @returns Confluencia por nivel con fuerza por temporalidad y puntuación combinada
+        """
+        round_levels = self._generate_round_levels(current_price, max_distance_points)
+        series_by_timeframe = {
+            timeframe: CandleArrays.from_candles(candles)
+            for timeframe, candles in candles_by_timeframe.items()
+            if candles
+        }
+        levels = LevelConfluenceEngine.analyze(series_by_timeframe, round_levels, current_price)
+        logger.info(
+            f"Evaluated {len(round_levels)} round levels on {len(series_by_timeframe)} timeframes"
+        )
+
+        supports = [l for l in levels if l.type in [LevelType.SUPPORT, LevelType.BOTH]]
+        resistances = [l for l in levels if l.type in [LevelType.RESISTANCE, LevelType.BOTH]]
+
+        return LevelConfluenceResponse(
+            instrument=instrument,
+            current_price=current_price,
+            timeframes=list(series_by_timeframe),
+            levels=levels,
+            strongest_support=max(supports, key=lambda x: x.confluence_score, default=None),
+            strongest_resistance=max(resistances, key=lambda x: x.confluence_score, default=None),
+        )
+
+    def levels_for_timeframe(
+        self,
+        confluence: LevelConfluenceResponse,
+        timeframe: str,
+        current_price: float,
+        max_distance_points: float = 100.0
+    ) -> list[PsychologicalLevel]:
+        """
+        Niveles de una temporalidad a partir del análisis de confluencia (sin volver a recorrer velas)
+        No incluye reaction_history; el detalle de cada reacción lo da analyze_levels_from_candles
+        @param confluence - Resultado de analyze_confluence
+        @param timeframe - Temporalidad
+        @param current_price - Precio actual de la temporalidad
+        @param max_distance_points - Distancia máxima de los niveles al precio
+        @returns Lista de PsychologicalLevel
+        """
+        levels: list[PsychologicalLevel] = []
+        for level_confluence in confluence.levels:
+            stats = next((s for s in level_confluence.by_timeframe if s.timeframe == timeframe), None)
+            level = level_confluence.level
+            if stats is None or abs(level - current_price) > max_distance_points:
+                continue
+
+            distance_from_current = level - current_price
+            levels.append(PsychologicalLevel.model_construct(
+                level=level,
+                distance_from_current=round(distance_from_current, 2),
+                distance_percent=round(distance_from_current / current_price * 100, 4),
+                strength=stats.strength,
+                reaction_count=stats.bounce_count + stats.break_count,
+                last_reaction_date=stats.last_reaction_date,
+                last_reaction_type=stats.last_reaction_type,
+                type=LevelConfluenceEngine.level_type(level, current_price),
+                bounce_count=stats.bounce_count,
+                break_count=stats.break_count,
+                is_round_hundred=level % 100 == 0,
+                is_round_fifty=level % 50 == 0 and level % 100 != 0,
+            ))
+        return levels
+
+    @staticmethod
+    def select_key_levels(
+        levels: list[PsychologicalLevel],
+        current_price: float
+    ) -> tuple[
+        Optional[PsychologicalLevel],
+        Optional[PsychologicalLevel],
+        Optional[PsychologicalLevel],
+        Optional[PsychologicalLevel],
+    ]:
+        """
+        Selecciona los soportes/resistencias más cercanos y más fuertes
+        @param levels - Niveles analizados
+        @param current_price - Precio actual
+        @returns Tupla (soporte cercano, resistencia cercana, soporte fuerte, resistencia fuerte)
+        """
+        supports = [l for l in levels if l.type in [LevelType.SUPPORT, LevelType.BOTH]]
+        resistances = [l for l in levels if l.type in [LevelType.RESISTANCE, LevelType.BOTH]]
+
+        strongest_support = max(supports, key=lambda x: x.strength) if supports else None
+        strongest_resistance = max(resistances, key=lambda x: x.strength) if resistances else None
+
+        nearest_support = min(
+            [l for l in supports if l.level < current_price],
+            key=lambda x: abs(x.distance_from_current),
+            default=None
+        )
+        nearest_resistance = min(
+            [l for l in resistances if l.level > current_price],
+            key=lambda x: abs(x.distance_from_current),
+            default=None
+        )
+        return nearest_support, nearest_resistance, strongest_support, strongest_resistance
+
     async def _get_current_price(self, instrument: str) -> float:
         """Obtiene el precio actual del instrumento"""
         # Obtener última vela de 1h
@@ -191,13 +303,18 @@ class PsychologicalLevelsService:
         return sorted(levels)
 
     def _analyze_level(
-        self, level: float, current_price: float, candles: list[PriceCandle]
+        self,
+        level: float,
+        current_price: float,
+        candles: list[PriceCandle],
+        volatility_distribution: Optional[VolatilityDistribution] = None
     ) -> PsychologicalLevel:
         """
         Analiza un nivel psicológico específico
         @param level - Precio del nivel
         @param current_price - Precio actual
         @param candles - Velas históricas
+        @param volatility_distribution - Distribución histórica de ATR (opcional)
         @returns Análisis del nivel
         """
         # Tolerancia para considerar que el precio tocó el nivel (0.5 puntos)
@@ -225,7 +342,7 @@ class PsychologicalLevelsService:
                     
                     # Construir reacción detallada
                     reaction = ReactionHistoryBuilder.build_reaction(
-                        level, candles, i, reaction_type
+                        level, candles, i, reaction_type, volatility_distribution
                     )
                     if reaction:
                         reaction_history.append(reaction)
@@ -239,7 +356,7 @@ class PsychologicalLevelsService:
                     
                     # Construir reacción detallada
                     reaction = ReactionHistoryBuilder.build_reaction(
-                        level, candles, i, reaction_type
+                        level, candles, i, reaction_type, volatility_distribution
                     )
                     if reaction:
                         reaction_history.append(reaction)
@@ -259,7 +376,7 @@ class PsychologicalLevelsService:
                             
                             # Construir reacción detallada
                             reaction = ReactionHistoryBuilder.build_reaction(
-                                level, candles, i, reaction_type
+                                level, candles, i, reaction_type, volatility_distribution
                             )
                             if reaction:
                                 reaction_history.append(reaction)
@@ -285,7 +402,7 @@ class PsychologicalLevelsService:
         is_round_hundred = (level % 100 == 0)
         is_round_fifty = (level % 50 == 0) and not is_round_hundred
 
-        return PsychologicalLevel(
+        return PsychologicalLevel.model_construct(
             level=level,
             distance_from_current=round(distance_from_current, 2),
             distance_percent=round(distance_percent, 4),
@@ -0,0 +1,257 @@
+"""
+Servicio de screener multi-instrumento
+Ejecuta el análisis técnico multi-temporalidad de una watchlist con concurrencia acotada, comparte
+las velas descargadas dentro del escaneo (H4 y H1 salen de una sola descarga H1) y ordena los instrumentos por calidad del setup
+(convergencia de tendencias, proximidad a un nivel a favor e impulso)
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config.settings import Settings
+from app.models.market_analysis import MarketDirection
+from app.models.screener import ScreenerEntry, ScreenerResponse
+from app.services.technical_analysis_service import TechnicalAnalysisService
+from app.utils.candle_fetch_cache import CandleFetchCache
+from app.utils.multi_tf_analyzer import MultiTimeframeAnalyzer, TimeframeConvergence
+from app.utils.technical_analysis import TechnicalAnalysis
+from app.utils.validators import InstrumentValidator
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenerService:
+    """Escanea una watchlist y ordena los instrumentos por calidad del setup"""
+
+    # Watchlist por defecto agrupada por clase de activo
+    DEFAULT_WATCHLIST = {
+        "metales": ["XAUUSD", "XAGUSD"],
+        "forex": ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD", "USDCHF", "NZDUSD"],
+        "indices": ["SPX", "NASDAQ", "DJI", "DAX"],
+    }
+
+    # Máximo de instrumentos por escaneo y de análisis simultáneos
+    MAX_INSTRUMENTS = 30
+    MAX_CONCURRENCY = 10
+
+    # Timeframes cuya convergencia de tendencias se evalúa
+    CONVERGENCE_TIMEFRAMES = ("daily", "h4", "h1")
+
+    # Distancia (%) a partir de la cual un nivel ya no aporta a la puntuación
+    PROXIMITY_PERCENT = 1.0
+
+    # Peso de cada componente en la puntuación
+    SCORE_WEIGHTS = {"trend": 0.5, "level": 0.35, "impulse": 0.15}
+
+    DIRECTIONS = {
+        TimeframeConvergence.FULL_BULLISH: MarketDirection.BULLISH,
+        TimeframeConvergence.PARTIAL_BULLISH: MarketDirection.BULLISH,
+        TimeframeConvergence.FULL_BEARISH: MarketDirection.BEARISH,
+        TimeframeConvergence.PARTIAL_BEARISH: MarketDirection.BEARISH,
+    }
+
+    def __init__(
+        self,
+        settings: Settings,
+        db: Optional[Session] = None,
+        technical_analysis_service: Optional[TechnicalAnalysisService] = None
+    ):
+        """
+        Inicializa el servicio de screener
+        @param settings - Configuración de la aplicación
+        @param db - Sesión de base de datos (opcional)
+        @param technical_analysis_service - Servicio de análisis técnico (opcional; por defecto sin
+                                            niveles psicológicos ni LLM, que dependen del instrumento)
+        """
+        self.settings = settings
+        self.technical_analysis_service = technical_analysis_service or TechnicalAnalysisService(settings, db)
+
+    def default_watchlist(self) -> dict[str, Optional[str]]:
+        """
+        Watchlist configurada (settings.screener_watchlist) o la de por defecto
+        @returns Dict {instrumento: clase de activo}
+        """
+        if self.settings.screener_watchlist:
+            return {
+                InstrumentValidator.validate_instrument(symbol): None
+                for symbol in self.settings.screener_watchlist.split(",")
+                if symbol.strip()
+            }
+        return {
+            symbol: asset_class
+            for asset_class, symbols in self.DEFAULT_WATCHLIST.items()
+            for symbol in symbols
+        }
+
+    async def scan(
+        self,
+        instruments: Optional[list[str]] = None,
+        concurrency: Optional[int] = None
+    ) -> ScreenerResponse:
+        """
+        Escanea la watchlist y ordena los instrumentos por puntuación
+        @param instruments - Instrumentos a escanear (por defecto la watchlist configurada)
+        @param concurrency - Análisis simultáneos (por defecto settings.screener_concurrency)
+        @returns ScreenerResponse con los resultados ordenados
+        """
+        watchlist = self.default_watchlist()
+        if instruments:
+            watchlist = {
+                symbol: watchlist.get(symbol)
+                for symbol in (InstrumentValidator.validate_instrument(i) for i in instruments)
+            }
+        if len(watchlist) > self.MAX_INSTRUMENTS:
+            raise ValueError(f"At most {self.MAX_INSTRUMENTS} instruments can be scanned, got {len(watchlist)}")
+
+        concurrency = concurrency or self.settings.screener_concurrency
+        if not 1 <= concurrency <= self.MAX_CONCURRENCY:
+            raise ValueError(f"Concurrency must be between 1 and {self.MAX_CONCURRENCY}, got {concurrency}")
+
+        started = time.perf_counter()
+        scan_time = datetime.now()
+        candle_cache = CandleFetchCache()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _scan_instrument(instrument: str, asset_class: Optional[str]) -> ScreenerEntry:
+            async with semaphore:
+                try:
+                    analysis = await self.technical_analysis_service.analyze_multi_timeframe(
+                        instrument=instrument, as_of=scan_time, candle_cache=candle_cache
+                    )
+                    return self.score_analysis(instrument, analysis, asset_class)
+                except Exception as e:
+                    logger.error(f"Error scanning {instrument}: {str(e)}", exc_info=True)
+                    return ScreenerEntry(instrument=instrument, asset_class=asset_class, error=str(e))
+
+        entries = await asyncio.gather(*[
+            _scan_instrument(instrument, asset_class) for instrument, asset_class in watchlist.items()
+        ])
+        ranked = self.rank(list(entries))
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Screener scanned {len(ranked)} instruments in {elapsed:.2f}s "
+            f"(concurrency={concurrency}, fetches={candle_cache.fetches}, shared={candle_cache.shared})"
+        )
+        return ScreenerResponse(
+            scan_time=scan_time.isoformat(),
+            instruments=len(ranked),
+            concurrency=concurrency,
+            candle_fetches=candle_cache.fetches,
+            shared_fetches=candle_cache.shared,
+            elapsed_seconds=round(elapsed, 3),
+            results=ranked,
+        )
+
+    @classmethod
+    def score_analysis(
+        cls,
+        instrument: str,
+        analysis: dict,
+        asset_class: Optional[str] = None
+    ) -> ScreenerEntry:
+        """
+        Puntúa el setup de un instrumento a partir de su análisis multi-temporalidad
+        Tendencia: alineación de las ventanas Daily/H4/H1 si convergen en una dirección.
+        Nivel: proximidad al soporte (alcista) o resistencia (bajista) H4 más cercano, incluidas
+        las zonas de swing. Impulso: último impulso H4 fuerte en la dirección del setup
+        @param instrument - Instrumento
+        @param analysis - Resultado de TechnicalAnalysisService.analyze_multi_timeframe
+        @param asset_class - Clase de activo (opcional)
+        @returns ScreenerEntry sin posición asignada
+        """
+        h4 = analysis.get("h4") or {}
+        h1 = analysis.get("h1") or {}
+        current_price = h1.get("current_price") or h4.get("current_price")
+        if "error" in h4 or current_price is None:
+            return ScreenerEntry(
+                instrument=instrument,
+                asset_class=asset_class,
+                error=h4.get("error") or "No data available",
+            )
+
+        trend_matrices = {
+            timeframe: np.array(list(analysis[timeframe]["trend_history"].values()))
+            for timeframe in cls.CONVERGENCE_TIMEFRAMES
+            if (analysis.get(timeframe) or {}).get("trend_history")
+        }
+        convergence, alignment = MultiTimeframeAnalyzer.score_trend_matrices(trend_matrices)
+        direction = cls.DIRECTIONS.get(convergence, MarketDirection.NEUTRAL)
+
+        level, level_type = cls._nearest_level(h4, current_price, direction)
+        distance_percent = abs(current_price - level) / current_price * 100 if level else None
+
+        trend_score = alignment if direction != MarketDirection.NEUTRAL else 0.0
+        level_score = max(0.0, 1 - distance_percent / cls.PROXIMITY_PERCENT) if level else 0.0
+        impulse_strong = bool(
+            direction != MarketDirection.NEUTRAL
+            and h4.get("impulse_strong")
+            and h4.get("impulse_direction") == direction.value
+        )
+        score = (
+            cls.SCORE_WEIGHTS["trend"] * trend_score
+            + cls.SCORE_WEIGHTS["level"] * level_score
+            + cls.SCORE_WEIGHTS["impulse"] * float(impulse_strong)
+        )
+
+        return ScreenerEntry(
+            instrument=instrument,
+            asset_class=asset_class,
+            current_price=current_price,
+            direction=direction,
+            convergence=convergence.value,
+            alignment=alignment,
+            level=level,
+            level_type=level_type,
+            level_distance_percent=round(distance_percent, 4) if distance_percent is not None else None,
+            near_level=TechnicalAnalysis.is_price_near_level(current_price, level) if level else False,
+            impulse_strong=impulse_strong,
+            score=round(score, 4),
+        )
+
+    @staticmethod
+    def rank(entries: list[ScreenerEntry]) -> list[ScreenerEntry]:
+        """
+        Ordena por puntuación (los instrumentos con error al final) y asigna posiciones
+        @param entries - Resultados sin ordenar
+        @returns Lista ordenada con rank asignado
+        """
+        ranked = sorted(entries, key=lambda entry: (entry.error is not None, -entry.score))
+        for position, entry in enumerate(ranked, start=1):
+            entry.rank = position
+        return ranked
+
+    @staticmethod
+    def _nearest_level(
+        h4_analysis: dict,
+        current_price: float,
+        direction: MarketDirection
+    ) -> tuple[Optional[float], Optional[str]]:
+        """
+        Nivel H4 más cercano del lado del setup (soporte si alcista, resistencia si bajista, ambos si lateral)
+        @param h4_analysis - Análisis H4
+        @param current_price - Precio actual
+        @param direction - Dirección del setup
+        @returns Tupla (nivel, tipo) o (None, None)
+        """
+        levels = [h4_analysis.get("support"), h4_analysis.get("resistance")]
+        levels += [zone["level"] for zone in h4_analysis.get("swing_zones") or []]
+        candidates = []
+        for level in levels:
+            if not level:
+                continue
+            level_type = "support" if level < current_price else "resistance"
+            if direction == MarketDirection.BULLISH and level_type != "support":
+                continue
+            if direction == MarketDirection.BEARISH and level_type != "resistance":
+                continue
+            candidates.append((abs(current_price - level), level, level_type))
+        if not candidates:
+            return None, None
+        _, level, level_type = min(candidates)
+        return level, level_type
@@ -6,19 +6,32 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
 from sqlalchemy.orm import Session
 
 from app.config.settings import Settings
 from app.models.market_analysis import MarketDirection, PriceCandle
+from app.models.psychological_levels import LevelConfluenceResponse
+from app.models.scenario_probability import MonteCarloSimulation
 from app.providers.market_data.base_market_provider import MarketDataProvider
 from app.providers.market_data.twelve_data_provider import TwelveDataProvider
 from app.providers.market_data.alpha_vantage_provider import AlphaVantageProvider
 from app.providers.market_data.mock_market_provider import MockMarketProvider
-from app.repositories.market_data_repository import MarketDataRepository
+from app.repositories.candle_store_repository import create_market_data_repository
+from app.services.bar_feature_service import BarFeatureService
 from app.services.psychological_levels_service import PsychologicalLevelsService
 from app.services.llm_service import LLMService
+from app.utils.bar_feature_calculator import BarFeatureCalculator
 from app.utils.business_days import BusinessDays
+from app.utils.candle_arrays import CandleArrays
+from app.utils.candle_downsampler import CandleDownsampler
+from app.utils.candle_encoding import CandleEncoder
+from app.utils.candle_fetch_cache import CandleFetchCache
+from app.utils.monte_carlo_simulator import MonteCarloSimulator
+from app.utils.retest_detector import RetestDetector
+from app.utils.swing_detector import SwingDetector
 from app.utils.technical_analysis import TechnicalAnalysis
+from app.utils.trading_calendar import TradingCalendar
 from app.utils.multi_tf_analyzer import MultiTimeframeAnalyzer, TimeframeConvergence
 
 logger = logging.getLogger(__name__)
@@ -27,6 +40,42 @@ logger = logging.getLogger(__name__)
 class TechnicalAnalysisService:
     """Servicio de análisis técnico avanzado"""
     
+    # Intervalo en BD de cada timeframe (para leer el feature store)
+    TIMEFRAME_INTERVALS = {
+        "Weekly": "1w",
+        "Daily": "1d",
+        "H4": "4h",
+        "H1": "1h"
+    }
+    
+    # Intervalo del proveedor para cada intervalo en BD
+    PROVIDER_INTERVALS = {
+        "1w": "1week",
+        "1d": "1day",
+        "4h": "4h",
+        "1h": "1h"
+    }
+    
+    # Formatos de chart_candles dentro del análisis (filas con timestamp ISO o columnas con epoch)
+    CHART_FORMATS = ("json", "columnar")
+    
+    # Zonas de swing (por peso de recencia) incluidas en el análisis de cada timeframe
+    MAX_SWING_ZONES = 5
+    
+    # Velas del histórico de tendencia por ventana (mismas que el chart H4)
+    TREND_HISTORY_BARS = 50
+    
+    # Distancia máxima (puntos) de los niveles psicológicos por timeframe (50 por defecto)
+    PSYCHOLOGICAL_MAX_DISTANCE = {"H4": 100.0}
+    # Rejilla común de la confluencia: cubre la mayor distancia y la diferencia entre los
+    # últimos cierres de cada timeframe
+    CONFLUENCE_MAX_DISTANCE = 150.0
+    
+    # Simulación de escenarios sobre H1: horizonte de un día y trayectorias acotadas
+    # para mantener el endpoint dentro de su presupuesto de latencia
+    SIMULATION_HORIZON_BARS = 24
+    SIMULATION_PATHS = 2000
+    
     def __init__(
         self,
         settings: Settings,
@@ -44,7 +93,8 @@ class TechnicalAnalysisService:
         self.settings = settings
         self.provider = self._create_provider(settings)
         self.db = db
-        self.market_data_repo = MarketDataRepository(db)
+        self.market_data_repo = create_market_data_repository(db, settings)
+        self.bar_feature_service = BarFeatureService(db)
         self.psychological_levels_service = psychological_levels_service
         self.llm_service = llm_service
     
@@ -85,19 +135,35 @@ class TechnicalAnalysisService:
         self,
         instrument: str = "XAUUSD",
         include_pattern_detection: bool = False,
-        pattern_language: str = "es"
+        pattern_language: str = "es",
+        include_simulation: bool = False,
+        as_of: Optional[datetime] = None,
+        candle_cache: Optional[CandleFetchCache] = None,
+        chart_format: str = "json"
     ) -> dict:
         """
         Realiza análisis técnico en múltiples temporalidades (Daily, H4, H1)
         @param instrument - Instrumento a analizar
         @param include_pattern_detection - Si se debe detectar patrones complejos con LLM
         @param pattern_language - Idioma para descripción de patrones (es, en)
+        @param include_simulation - Si se debe simular trayectorias Monte Carlo sobre soporte/resistencia
+        @param as_of - Momento de referencia de los rangos (por defecto ahora; fijo en un escaneo)
+        @param candle_cache - Caché de velas compartida entre análisis de un mismo escaneo (opcional; con ella
+                              H4 se agrega desde la descarga H1 en buckets alineados a UTC, que no
+                              coinciden con las velas H4 del proveedor, así que para H4 no se leen los
+                              indicadores guardados en bar_features ni el snapshot incremental)
+        @param chart_format - Formato de chart_candles: json (una entrada por vela) o columnar ({t, o, h, l, c, v})
         @returns Diccionario con análisis de cada timeframe
         """
+        if chart_format not in self.CHART_FORMATS:
+            raise ValueError(
+                f"Unsupported chart format '{chart_format}'. Supported formats: {', '.join(self.CHART_FORMATS)}"
+            )
         logger.info(f"Starting multi-timeframe analysis for {instrument} (patterns={include_pattern_detection})")
         
         # Obtener último día hábil
-        today = datetime.now().date()
+        now = as_of or datetime.now()
+        today = now.date()
         last_business_day = BusinessDays.get_last_business_day(today)
         
         # Calcular rangos de fechas para cada timeframe
@@ -111,24 +177,35 @@ class TechnicalAnalysisService:
         
         # H4: últimos 20 días (para tener suficientes velas H4)
         h4_start = datetime.combine(last_business_day - timedelta(days=20), datetime.min.time())
-        h4_end = datetime.now()
+        h4_end = now
         
         # H1: últimos 7 días (para tener suficientes velas H1)
         h1_start = datetime.combine(last_business_day - timedelta(days=7), datetime.min.time())
-        h1_end = datetime.now()
+        h1_end = now
         
         # Obtener datos de cada timeframe (primero de BD, luego de API si es necesario)
         weekly_candles = await self._get_candles_with_cache(
-            instrument, weekly_start, weekly_end, "1week", "Weekly"
+            instrument, weekly_start, weekly_end, "1week", "Weekly", candle_cache
         )
         daily_candles = await self._get_candles_with_cache(
-            instrument, daily_start, daily_end, "1day", "Daily"
-        )
-        h4_candles = await self._get_candles_with_cache(
-            instrument, h4_start, h4_end, "4h", "H4"
+            instrument, daily_start, daily_end, "1day", "Daily", candle_cache
         )
+        if candle_cache is not None:
+            # En un escaneo se descarga una sola serie H1 con el rango de H4: las velas H4 se agregan
+            # desde ella y el rango H1 se sirve recortando esa misma descarga
+            h1_source = await self._get_candles_with_cache(
+                instrument, h4_start, h4_end, "1h", "H1", candle_cache
+            )
+            h4_candles = CandleDownsampler.aggregate_by_time(
+                CandleArrays.from_candles(sorted(h1_source, key=lambda c: c.timestamp)),
+                TradingCalendar.interval_seconds("4h")
+            ).to_candles()
+        else:
+            h4_candles = await self._get_candles_with_cache(
+                instrument, h4_start, h4_end, "4h", "H4", candle_cache
+            )
         h1_candles = await self._get_candles_with_cache(
-            instrument, h1_start, h1_end, "1h", "H1"
+            instrument, h1_start, h1_end, "1h", "H1", candle_cache
         )
         
         logger.info(
@@ -136,10 +213,16 @@ class TechnicalAnalysisService:
             f"H4={len(h4_candles)}, H1={len(h1_candles)}"
         )
         
+        # Niveles psicológicos: una rejilla y una pasada para todos los timeframes
+        psychological_confluence = self._analyze_psychological_confluence(
+            instrument,
+            {"Weekly": weekly_candles, "Daily": daily_candles, "H4": h4_candles, "H1": h1_candles}
+        )
+        
         # Análisis Weekly (contexto de largo plazo)
         try:
             weekly_analysis = self._analyze_timeframe(
-                weekly_candles, "Weekly", instrument
+                weekly_candles, "Weekly", instrument, confluence=psychological_confluence
             )
         except Exception as e:
             logger.error(f"Error analyzing Weekly timeframe: {str(e)}", exc_info=True)
@@ -148,7 +231,7 @@ class TechnicalAnalysisService:
         # Análisis Daily
         try:
             daily_analysis = self._analyze_timeframe(
-                daily_candles, "Daily", instrument
+                daily_candles, "Daily", instrument, confluence=psychological_confluence
             )
         except Exception as e:
             logger.error(f"Error analyzing Daily timeframe: {str(e)}", exc_info=True)
@@ -157,7 +240,8 @@ class TechnicalAnalysisService:
         # Análisis H4
         try:
             h4_analysis = self._analyze_timeframe(
-                h4_candles, "H4", instrument, rsi_zones=[55, 50, 45]
+                h4_candles, "H4", instrument, rsi_zones=[55, 50, 45], confluence=psychological_confluence,
+                stored_indicators=candle_cache is None
             )
         except Exception as e:
             logger.error(f"Error analyzing H4 timeframe: {str(e)}", exc_info=True)
@@ -166,7 +250,7 @@ class TechnicalAnalysisService:
         # Análisis H1 (confirmación)
         try:
             h1_analysis = self._analyze_timeframe(
-                h1_candles, "H1", instrument
+                h1_candles, "H1", instrument, confluence=psychological_confluence
             )
         except Exception as e:
             logger.error(f"Error analyzing H1 timeframe: {str(e)}", exc_info=True)
@@ -178,6 +262,11 @@ class TechnicalAnalysisService:
             logger.error(f"Error generating summary: {str(e)}")
             summary = "Error generating summary"
         
+        # Simulación Monte Carlo de toque/ruptura de soporte y resistencia (opcional)
+        scenario_simulation = None
+        if include_simulation:
+            scenario_simulation = self._simulate_scenarios(h1_candles, h4_analysis, psychological_confluence)
+        
         # Obtener últimas velas para el chart (priorizar H4, luego H1, luego Daily)
         chart_candles_source = []
         if h4_candles and len(h4_candles) > 0:
@@ -195,19 +284,22 @@ class TechnicalAnalysisService:
         else:
             logger.warning(f"No candles available for chart. H4={len(h4_candles)}, H1={len(h1_candles)}, Daily={len(daily_candles)}")
         
-        chart_candles_data = [
-            {
-                "timestamp": c.timestamp.isoformat(),
-                "open": c.open,
-                "high": c.high,
-                "low": c.low,
-                "close": c.close,
-                "volume": c.volume
-            }
-            for c in chart_candles_source
-        ]
+        if chart_format == "columnar":
+            chart_candles_data = CandleEncoder.to_columnar(CandleArrays.from_candles(chart_candles_source))
+        else:
+            chart_candles_data = [
+                {
+                    "timestamp": c.timestamp.isoformat(),
+                    "open": c.open,
+                    "high": c.high,
+                    "low": c.low,
+                    "close": c.close,
+                    "volume": c.volume
+                }
+                for c in chart_candles_source
+            ]
         
-        logger.info(f"Returning {len(chart_candles_data)} chart candles")
+        logger.info(f"Returning {len(chart_candles_source)} chart candles ({chart_format})")
         
         # Detección de patrones complejos con LLM (opcional)
         pattern_analysis = None
@@ -279,16 +371,125 @@ class TechnicalAnalysisService:
             "h1": h1_analysis,
             "summary": summary,
             "chart_candles": chart_candles_data,
-            "pattern_analysis": pattern_analysis
+            "pattern_analysis": pattern_analysis,
+            "psychological_confluence": (
+                psychological_confluence.model_dump(mode="json") if psychological_confluence else None
+            ),
+            "scenario_simulation": (
+                scenario_simulation.model_dump(mode="json") if scenario_simulation else None
+            )
         }
     
+    def _simulate_scenarios(
+        self,
+        candles: list[PriceCandle],
+        h4_analysis: dict,
+        confluence: Optional[LevelConfluenceResponse] = None
+    ) -> Optional[MonteCarloSimulation]:
+        """
+        Simula trayectorias H1 y mide la probabilidad de tocar/romper los niveles clave
+        @param candles - Velas H1
+        @param h4_analysis - Análisis H4 (soporte y resistencia)
+        @param confluence - Confluencia de niveles psicológicos (opcional)
+        @returns MonteCarloSimulation o None si no hay niveles, datos suficientes o falla
+        """
+        levels = {h4_analysis.get("support"), h4_analysis.get("resistance")}
+        if confluence:
+            for level in (confluence.strongest_support, confluence.strongest_resistance):
+                if level:
+                    levels.add(level.level)
+        levels.discard(None)
+        if not candles or not levels:
+            return None
+        
+        try:
+            arrays = CandleArrays.from_candles(candles)
+            return MonteCarloSimulator.simulate(
+                arrays.closes,
+                sorted(levels),
+                horizon=self.SIMULATION_HORIZON_BARS,
+                paths=self.SIMULATION_PATHS
+            )
+        except ValueError as e:
+            logger.warning(f"Skipping scenario simulation: {str(e)}")
+            return None
+    
+    def _analyze_psychological_confluence(
+        self,
+        instrument: str,
+        candles_by_timeframe: dict[str, list[PriceCandle]]
+    ) -> Optional[LevelConfluenceResponse]:
+        """
+        Evalúa los niveles psicológicos en todos los timeframes en una sola pasada
+        @param instrument - Instrumento analizado
+        @param candles_by_timeframe - Dict {timeframe: velas}
+        @returns Confluencia de niveles o None si no hay servicio, datos o falla el análisis
+        """
+        if not self.psychological_levels_service:
+            return None
+        
+        latest_candle = max(
+            (candle for candles in candles_by_timeframe.values() for candle in candles),
+            key=lambda c: c.timestamp,
+            default=None
+        )
+        if latest_candle is None:
+            return None
+        
+        try:
+            return self.psychological_levels_service.analyze_confluence(
+                instrument=instrument,
+                current_price=latest_candle.close,
+                candles_by_timeframe=candles_by_timeframe,
+                max_distance_points=self.CONFLUENCE_MAX_DISTANCE
+            )
+        except Exception as e:
+            logger.warning(f"Error analyzing psychological level confluence: {str(e)}")
+            return None
+    
+    async def get_candle_arrays(
+        self,
+        instrument: str,
+        start_date: datetime,
+        end_date: datetime,
+        interval: str = "1h"
+    ) -> CandleArrays:
+        """
+        Obtiene velas de un rango como columnas NumPy: directamente del almacén si la serie está al día
+        en el rango pedido, si no a través del proveedor (que además actualiza el almacén)
+        @param instrument - Instrumento
+        @param start_date - Fecha de inicio (naive UTC)
+        @param end_date - Fecha de fin (naive UTC)
+        @param interval - Intervalo de las velas (formato de BD: 1h, 4h, 1d, 1w)
+        @returns CandleArrays ordenado por timestamp
+        """
+        if interval not in self.PROVIDER_INTERVALS:
+            raise ValueError(
+                f"Unsupported interval '{interval}'. Supported intervals: {', '.join(self.PROVIDER_INTERVALS)}"
+            )
+
+        if self.market_data_repo.available:
+            try:
+                arrays = self.market_data_repo.get_candle_arrays(instrument, start_date, end_date, interval)
+                reference = min(end_date, TradingCalendar.utc_now())
+                if len(arrays) and TradingCalendar.is_fresh(arrays.timestamp_at(-1), interval, reference):
+                    return arrays
+            except Exception as e:
+                logger.warning(f"Error retrieving {interval} candle arrays from DB: {str(e)}")
+
+        candles = await self._get_candles_with_cache(
+            instrument, start_date, end_date, self.PROVIDER_INTERVALS[interval], interval.upper()
+        )
+        return CandleArrays.from_candles(candles)
+    
     async def _get_candles_with_cache(
         self,
         instrument: str,
         start_date: datetime,
         end_date: datetime,
         interval: str,
-        timeframe_name: str
+        timeframe_name: str,
+        candle_cache: Optional[CandleFetchCache] = None
     ) -> list[PriceCandle]:
         """
         Obtiene velas desde BD o API, usando BD como caché
@@ -297,8 +498,18 @@ class TechnicalAnalysisService:
         @param end_date - Fecha de fin
         @param interval - Intervalo de las velas
         @param timeframe_name - Nombre del timeframe para logging
+        @param candle_cache - Caché del escaneo; si cubre el rango se reutiliza su descarga (opcional)
         @returns Lista de velas
         """
+        if candle_cache is not None:
+            return await candle_cache.get(
+                instrument,
+                interval,
+                start_date,
+                end_date,
+                lambda: self._get_candles_with_cache(instrument, start_date, end_date, interval, timeframe_name)
+            )
+        
         # Mapear intervalos para BD (usar formato estándar)
         interval_mapping = {
             "1week": "1w",
@@ -311,13 +522,15 @@ class TechnicalAnalysisService:
         
         # Intentar obtener de BD primero
         db_candles = []
-        if self.db:
+        if self.market_data_repo.available:
             try:
                 db_models = self.market_data_repo.get_candles(
                     instrument, start_date, end_date, db_interval
                 )
                 db_candles = self.market_data_repo.convert_to_price_candles(db_models)
                 logger.info(f"Retrieved {len(db_candles)} {timeframe_name} candles from database")
+                if db_candles:
+                    self.bar_feature_service.update_features(instrument, db_interval)
             except Exception as e:
                 logger.warning(f"Error retrieving {timeframe_name} candles from DB: {str(e)}")
         
@@ -327,26 +540,15 @@ class TechnicalAnalysisService:
             needs_update = True
             logger.info(f"No {timeframe_name} candles in DB, will fetch from API")
         else:
-            # Verificar si la última vela es reciente
+            # La serie está al día si ya tiene la última vela cerrada que el calendario de negociación
+            # permite (fines de semana y festivos no producen velas nuevas, así que no se refresca)
             latest_candle = max(db_candles, key=lambda c: c.timestamp)
-            time_since_last = datetime.now() - latest_candle.timestamp
-            
-            # Para H4, actualizar si la última vela tiene más de 5 horas
-            # Para H1, actualizar si la última vela tiene más de 2 horas
-            # Para Daily, actualizar si la última vela tiene más de 1 día
-            update_thresholds = {
-                "Weekly": timedelta(days=7),
-                "Daily": timedelta(days=1),
-                "H4": timedelta(hours=5),
-                "H1": timedelta(hours=2)
-            }
-            threshold = update_thresholds.get(timeframe_name, timedelta(hours=4))
-            
-            if time_since_last > threshold:
+
+            if not TradingCalendar.is_fresh(latest_candle.timestamp, db_interval):
                 needs_update = True
                 logger.info(
-                    f"{timeframe_name} candles are {time_since_last} old, "
-                    f"updating from API (threshold: {threshold})"
+                    f"{timeframe_name} candles end at {latest_candle.timestamp}, "
+                    f"missing closed bars, updating from API"
                 )
         
         # Si necesitamos actualizar, obtener de API y guardar en BD
@@ -358,12 +560,15 @@ class TechnicalAnalysisService:
                 logger.info(f"Fetched {len(api_candles)} {timeframe_name} candles from API")
                 
                 # Guardar en BD
-                if self.db and api_candles:
+                if self.market_data_repo.available and api_candles:
                     try:
                         self.market_data_repo.save_candles(
                             instrument, api_candles, db_interval
                         )
                         logger.info(f"Saved {len(api_candles)} {timeframe_name} candles to database")
+                        self.bar_feature_service.update_features(
+                            instrument, db_interval, since=self._first_changed_timestamp(db_candles, api_candles)
+                        )
                     except Exception as e:
                         logger.warning(f"Error saving {timeframe_name} candles to DB: {str(e)}")
                 
@@ -379,12 +584,38 @@ class TechnicalAnalysisService:
         # Usar datos de BD
         return db_candles
     
+    @staticmethod
+    def _first_changed_timestamp(
+        stored: list[PriceCandle],
+        fetched: list[PriceCandle]
+    ) -> Optional[datetime]:
+        """
+        Primera vela ya guardada que el proveedor devuelve con otros valores (p. ej. la vela que
+        seguía en formación); sus indicadores y los posteriores deben recalcularse
+        @param stored - Velas leídas de BD antes de refrescar
+        @param fetched - Velas devueltas por el proveedor
+        @returns Timestamp de la primera vela modificada o None si solo hay velas nuevas
+        """
+        previous = {
+            candle.timestamp: (candle.open, candle.high, candle.low, candle.close, candle.volume)
+            for candle in stored
+        }
+        changed = [
+            candle.timestamp
+            for candle in fetched
+            if candle.timestamp in previous
+            and previous[candle.timestamp] != (candle.open, candle.high, candle.low, candle.close, candle.volume)
+        ]
+        return min(changed) if changed else None
+
     def _analyze_timeframe(
         self,
         candles: list[PriceCandle],
         timeframe: str,
         instrument: str,
-        rsi_zones: Optional[list[float]] = None
+        rsi_zones: Optional[list[float]] = None,
+        confluence: Optional[LevelConfluenceResponse] = None,
+        stored_indicators: bool = True
     ) -> dict:
         """
         Analiza un timeframe específico
@@ -392,6 +623,10 @@ class TechnicalAnalysisService:
         @param timeframe - Nombre del timeframe (Daily, H4, H1)
         @param instrument - Instrumento analizado
         @param rsi_zones - Zonas objetivo de RSI (opcional)
+        @param confluence - Confluencia de niveles psicológicos de todos los timeframes (opcional)
+        @param stored_indicators - Si se usan los indicadores guardados de la serie del proveedor (bar_features
+                                   y snapshot); False para velas agregadas localmente, cuyos timestamps no
+                                   corresponden a las velas guardadas
         @returns Diccionario con análisis del timeframe
         """
         if not candles:
@@ -403,19 +638,47 @@ class TechnicalAnalysisService:
         sorted_candles = sorted(candles, key=lambda c: c.timestamp)
         current_price = sorted_candles[-1].close
         
-        # Identificar tendencia
-        trend = TechnicalAnalysis.identify_trend(sorted_candles)
+        # Usar los indicadores precalculados si el feature store tiene la última vela
+        features = (
+            self._get_stored_features(instrument, timeframe, sorted_candles[-1].timestamp)
+            if stored_indicators else None
+        )
+        
+        arrays = CandleArrays.from_candles(sorted_candles)
+        
+        # Tendencia de cada vela para varias ventanas en una sola pasada
+        lookbacks = BarFeatureCalculator.TREND_LOOKBACKS
+        trend_matrix = BarFeatureCalculator.trend_matrix(arrays.highs, arrays.lows, arrays.closes, lookbacks)
+        
+        # Identificar tendencia (ventana estándar, misma regla que TechnicalAnalysis.identify_trend)
+        if features:
+            trend = MarketDirection(features["trend"])
+        else:
+            trend = BarFeatureCalculator.trend_direction(
+                trend_matrix[lookbacks.index(BarFeatureCalculator.TREND_LOOKBACK), -1]
+            )
         
         # Calcular RSI (solo para H4 según requerimientos)
         rsi = None
         rsi_zone = None
         if timeframe == "H4" and rsi_zones:
-            rsi = TechnicalAnalysis.calculate_rsi(sorted_candles)
+            if features:
+                rsi = features["rsi"]
+            else:
+                rsi = TechnicalAnalysis.calculate_rsi(sorted_candles)
             if rsi is not None:
                 rsi_zone = TechnicalAnalysis.check_rsi_zone(rsi, rsi_zones)
         
-        # Calcular EMAs (50, 100, 200) para todos los timeframes
-        emas = TechnicalAnalysis.calculate_emas(sorted_candles, periods=[50, 100, 200])
+        # Calcular EMAs (50, 100, 200) para todos los timeframes; sin fila en el feature store se avanza
+        # el snapshot incremental con la última vela en lugar de recorrer la serie
+        if features:
+            emas = {50: features["ema_50"], 100: features["ema_100"], 200: features["ema_200"]}
+        else:
+            live_emas = (
+                self._get_live_emas(instrument, timeframe, sorted_candles[-1].timestamp)
+                if stored_indicators else None
+            )
+            emas = live_emas or TechnicalAnalysis.calculate_emas(sorted_candles, periods=[50, 100, 200])
         
         # Análisis de impulso (solo para H4)
         impulse_direction = None
@@ -429,6 +692,9 @@ class TechnicalAnalysisService:
         # Soporte y resistencia
         support, resistance = TechnicalAnalysis.find_support_resistance(sorted_candles)
         
+        # Zonas de soporte/resistencia a partir de swings agrupados sobre toda la serie
+        swing_zones = SwingDetector.detect_zones(arrays)[:self.MAX_SWING_ZONES]
+        
         # Verificar proximidad a niveles
         near_support = False
         near_resistance = False
@@ -437,37 +703,38 @@ class TechnicalAnalysisService:
         if resistance:
             near_resistance = TechnicalAnalysis.is_price_near_level(current_price, resistance)
             
-        # Análisis de niveles psicológicos (si el servicio está disponible)
+        # Análisis de niveles psicológicos (a partir de la confluencia calculada una vez para todos los TF)
         psychological_context = None
         retests = []
-        if self.psychological_levels_service:
+        if self.psychological_levels_service and confluence:
             try:
-                # Usar las velas ya obtenidas para analizar niveles
-                # Convertir PriceCandle a formato esperado si es necesario
-                # Nota: analyze_levels_from_candles espera list[PriceCandle]
-                psych_analysis = self.psychological_levels_service.analyze_levels_from_candles(
-                    instrument=instrument,
-                    current_price=current_price,
-                    candles=sorted_candles,  # Usar velas ordenadas
-                    max_distance_points=100.0 if timeframe == "H4" else 50.0  # Ajustar distancia por TF
+                levels = self.psychological_levels_service.levels_for_timeframe(
+                    confluence,
+                    timeframe,
+                    current_price,
+                    max_distance_points=self.PSYCHOLOGICAL_MAX_DISTANCE.get(timeframe, 50.0)
+                )
+                nearest_support, nearest_resistance, strongest_support, strongest_resistance = (
+                    PsychologicalLevelsService.select_key_levels(levels, current_price)
                 )
                 
                 # Convertir a dict para serialización JSON
                 psychological_context = {
-                    "nearest_support": psych_analysis.nearest_support.dict() if psych_analysis.nearest_support else None,
-                    "nearest_resistance": psych_analysis.nearest_resistance.dict() if psych_analysis.nearest_resistance else None,
-                    "strongest_support": psych_analysis.strongest_support.dict() if psych_analysis.strongest_support else None,
-                    "strongest_resistance": psych_analysis.strongest_resistance.dict() if psych_analysis.strongest_resistance else None
+                    "nearest_support": nearest_support.model_dump() if nearest_support else None,
+                    "nearest_resistance": nearest_resistance.model_dump() if nearest_resistance else None,
+                    "strongest_support": strongest_support.model_dump() if strongest_support else None,
+                    "strongest_resistance": strongest_resistance.model_dump() if strongest_resistance else None
                 }
                 
                 # Detectar retesteos
                 levels_to_check = []
-                if psych_analysis.nearest_support:
-                    levels_to_check.append(psych_analysis.nearest_support.level)
-                if psych_analysis.nearest_resistance:
-                    levels_to_check.append(psych_analysis.nearest_resistance.level)
+                if nearest_support:
+                    levels_to_check.append(nearest_support.level)
+                if nearest_resistance:
+                    levels_to_check.append(nearest_resistance.level)
                 
-                retests = self._detect_retests(sorted_candles, levels_to_check)
+                pattern_codes = RetestDetector.classify_patterns_cached(instrument, timeframe, arrays)
+                retests = self._detect_retests(sorted_candles, levels_to_check, pattern_codes=pattern_codes)
                 
             except Exception as e:
                 logger.warning(f"Error analyzing psychological levels for {timeframe}: {str(e)}")
@@ -476,6 +743,14 @@ class TechnicalAnalysisService:
             "timeframe": timeframe,
             "current_price": round(current_price, 2),
             "trend": trend.value,
+            "trend_by_lookback": {
+                str(lookback): BarFeatureCalculator.trend_direction(codes[-1]).value
+                for lookback, codes in zip(lookbacks, trend_matrix)
+            },
+            "trend_history": {
+                str(lookback): codes[-self.TREND_HISTORY_BARS:].tolist()
+                for lookback, codes in zip(lookbacks, trend_matrix)
+            },
             "rsi": rsi,
             "rsi_zone": rsi_zone,
             "impulse_direction": impulse_direction.value if impulse_direction else None,
@@ -485,36 +760,101 @@ class TechnicalAnalysisService:
             "resistance": resistance,
             "near_support": near_support,
             "near_resistance": near_resistance,
+            "swing_zones": [zone.model_dump(mode="json") for zone in swing_zones],
             "psychological_context": psychological_context,
             "retests": retests,
             "ema_50": emas.get(50),
             "ema_100": emas.get(100),
             "ema_200": emas.get(200),
+            "atr": features["atr"] if features else None,
             "candles_count": len(sorted_candles),
             "last_candle_time": sorted_candles[-1].timestamp.isoformat() if sorted_candles else None
         }
 
+    def _get_stored_features(
+        self,
+        instrument: str,
+        timeframe: str,
+        last_candle_time: datetime
+    ) -> Optional[dict]:
+        """
+        Lee del feature store los indicadores de la última vela del timeframe
+        @param instrument - Instrumento analizado
+        @param timeframe - Nombre del timeframe (Weekly, Daily, H4, H1)
+        @param last_candle_time - Timestamp de la última vela disponible
+        @returns Diccionario de indicadores o None si no hay fila para esa vela
+        """
+        interval = self.TIMEFRAME_INTERVALS.get(timeframe)
+        if not self.db or not interval:
+            return None
+        
+        try:
+            row = self.bar_feature_service.get_latest_features(
+                instrument, interval, expected_timestamp=last_candle_time
+            )
+        except Exception as e:
+            logger.warning(f"Error reading bar features for {timeframe}: {str(e)}")
+            return None
+        
+        return BarFeatureService.to_dict(row) if row else None
+
+    def _get_live_emas(
+        self,
+        instrument: str,
+        timeframe: str,
+        last_candle_time: datetime
+    ) -> Optional[dict[int, float]]:
+        """
+        EMAs de la última vela desde el snapshot de indicadores incrementales (misma semántica que
+        bar_features; el RSI y el ATR del snapshot son de Wilder y no se usan aquí)
+        @param instrument - Instrumento analizado
+        @param timeframe - Nombre del timeframe (Weekly, Daily, H4, H1)
+        @param last_candle_time - Timestamp de la última vela disponible
+        @returns Diccionario {período: ema} o None si el snapshot no llega a esa vela
+        """
+        interval = self.TIMEFRAME_INTERVALS.get(timeframe)
+        if not self.db or not interval:
+            return None
+
+        try:
+            live = self.bar_feature_service.get_live_indicators(
+                instrument, interval, expected_timestamp=last_candle_time
+            )
+        except Exception as e:
+            logger.warning(f"Error reading live indicators for {timeframe}: {str(e)}")
+            return None
+
+        if live is None:
+            return None
+        emas = {period: live[f"ema_{period}"] for period in BarFeatureCalculator.EMA_PERIODS}
+        return emas if all(value is not None for value in emas.values()) else None
+
     def _detect_retests(
         self,
         candles: list[PriceCandle],
         levels: list[float],
-        lookback: int = 5
+        lookback: int = 5,
+        pattern_codes: Optional[np.ndarray] = None,
+        tolerance: float = RetestDetector.RETEST_TOLERANCE
     ) -> list[dict]:
         """
         Detecta retesteos recientes de niveles clave con análisis de patrones
         @param candles - Velas ordenadas
         @param levels - Niveles a verificar
         @param lookback - Cuántas velas atrás mirar
+        @param pattern_codes - Patrones ya clasificados de todas las velas (RetestDetector.classify_patterns)
+        @param tolerance - Tolerancia en puntos para considerar que la vela tocó el nivel
         @returns Lista de retesteos detectados con probabilidades
         """
-        from app.utils.retest_detector import RetestDetector
-        
         retests = []
         if not candles or not levels:
             return retests
+        
+        if pattern_codes is None or len(pattern_codes) != len(candles):
+            pattern_codes = RetestDetector.classify_patterns(CandleArrays.from_candles(candles))
             
         recent_candles = candles[-lookback:]
-        tolerance = 5.0  # Tolerancia en puntos
+        offset = len(candles) - len(recent_candles)
         
         for level in levels:
             for i, candle in enumerate(recent_candles):
@@ -522,9 +862,8 @@ class TechnicalAnalysisService:
                 touched = (candle.low - tolerance <= level <= candle.high + tolerance)
                 
                 if touched:
-                    # Detectar patrón de vela
-                    previous_candle = recent_candles[i - 1] if i > 0 else None
-                    pattern = RetestDetector.detect_candle_pattern(candle, previous_candle)
+                    # Patrón de vela (clasificado en bloque para toda la serie)
+                    pattern = RetestDetector.pattern_from_code(pattern_codes[offset + i])
                     
                     # Determinar tipo de nivel
                     is_support_retest = candle.close > level and candle.low <= level + tolerance
@@ -684,6 +1023,16 @@ class TechnicalAnalysisService:
                 conv_text = "parcial alcista" if convergence == TimeframeConvergence.PARTIAL_BULLISH else "parcial bajista"
                 parts.append(f"Convergencia {conv_text}")
         
+        # Alineación de todas las ventanas de tendencia de todos los timeframes
+        trend_matrices = {
+            analysis["timeframe"]: np.array(list(analysis["trend_history"].values()))
+            for analysis in (weekly_analysis, daily_analysis, h4_analysis, h1_analysis)
+            if analysis.get("trend_history")
+        }
+        if trend_matrices:
+            _, alignment = MultiTimeframeAnalyzer.score_trend_matrices(trend_matrices)
+            parts.append(f"Alineación de tendencias: {alignment * 100:.0f}%")
+        
         if not parts:
             return "Análisis multi-temporalidad completado"
         
@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 from app.config.settings import Settings
 from app.models.market_alignment import MarketAlignmentAnalysis
 from app.models.market_analysis import DailyMarketAnalysis, PriceCandle
+from app.models.scenario_probability import MonteCarloSimulation
 from app.models.trading_mode import TradingMode, TradingModeRecommendation
 from app.models.trading_recommendation import (
     TradeDirection, 
@@ -119,7 +120,9 @@ class TradingAdvisorService:
         technical_analysis = None
         if self.technical_analysis_service:
             try:
-                technical_analysis = await self.technical_analysis_service.analyze_multi_timeframe(instrument)
+                technical_analysis = await self.technical_analysis_service.analyze_multi_timeframe(
+                    instrument, include_simulation=True
+                )
                 logger.info("Advanced technical analysis completed")
             except Exception as e:
                 logger.warning(f"Could not perform advanced technical analysis: {str(e)}")
@@ -317,12 +320,14 @@ Estructura: {'Cerca de soporte' if price_near_support else 'Cerca de resistencia
         if technical_analysis and "weekly" in technical_analysis and "daily" in technical_analysis and "h4" in technical_analysis:
             try:
                 logger.info("Calculating scenario probabilities...")
+                simulation_data = technical_analysis.get("scenario_simulation")
                 scenario_analysis = ScenarioProbabilityCalculator.analyze_scenarios(
                     instrument=instrument,
                     current_price=current_price,
                     weekly_analysis=technical_analysis["weekly"],
                     daily_analysis=technical_analysis["daily"],
-                    h4_analysis=technical_analysis["h4"]
+                    h4_analysis=technical_analysis["h4"],
+                    simulation=MonteCarloSimulation.model_validate(simulation_data) if simulation_data else None
                 )
                 
                 # Convertir a dict para serialización
@@ -384,8 +389,8 @@ Estructura: {'Cerca de soporte' if price_near_support else 'Cerca de resistencia
             invalidation_level=invalid_level
         )
     
+    @staticmethod
     def _calculate_support_resistance(
-        self,
         analysis: DailyMarketAnalysis
     ) -> tuple[Optional[float], Optional[float]]:
         """
@@ -420,10 +425,10 @@ Estructura: {'Cerca de soporte' if price_near_support else 'Cerca de resistencia
         
         return support, resistance
     
+    @staticmethod
     def _determine_trade_direction(
-        self,
         analysis: DailyMarketAnalysis,
-        alignment: MarketAlignmentAnalysis,
+        alignment: Optional[MarketAlignmentAnalysis],
         trading_mode: TradingModeRecommendation,
         current_price: float,
         support: Optional[float],
@@ -432,7 +437,7 @@ Estructura: {'Cerca de soporte' if price_near_support else 'Cerca de resistencia
         """
         Determina la dirección de trading recomendada
         @param analysis - Análisis del día anterior
-        @param alignment - Análisis de alineación
+        @param alignment - Análisis de alineación (None si no hay datos de DXY/bonos, p. ej. en backtest)
         @param trading_mode - Recomendación de modo de trading
         @param current_price - Precio actual
         @param support - Nivel de soporte
@@ -457,7 +462,7 @@ Estructura: {'Cerca de soporte' if price_near_support else 'Cerca de resistencia
             direction_score -= 0.3
         
         # Señal 2: Alineación DXY-Bonos (correlación inversa con XAUUSD)
-        if alignment.alignment.value == "alineados":
+        if alignment and alignment.alignment.value == "alineados":
             if alignment.market_bias.value == "risk-off":
                 # DXY y bonos suben → XAUUSD tiende a bajar
                 sell_signals += 1
@@ -508,8 +513,8 @@ Estructura: {'Cerca de soporte' if price_near_support else 'Cerca de resistencia
         
         return direction, round(confidence, 2)
     
+    @staticmethod
     def _calculate_price_levels(
-        self,
         direction: TradeDirection,
         current_price: float,
         support: Optional[float],
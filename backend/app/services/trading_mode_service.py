@@ -21,7 +21,9 @@ from app.models.trading_mode import (
 from app.services.economic_calendar_service import EconomicCalendarService
 from app.services.market_alignment_service import MarketAlignmentService
 from app.services.market_analysis_service import MarketAnalysisService
+from app.utils.candle_arrays import CandleArrays
 from app.utils.psychological_level_detector import PsychologicalLevelDetector
+from app.utils.swing_detector import SwingDetector
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,9 @@ logger = logging.getLogger(__name__)
 class TradingModeService:
     """Servicio para determinar el modo de trading recomendado"""
     
+    # Distancia máxima (en puntos) de los niveles operativos al precio actual
+    OPERATIONAL_LEVELS_MAX_DISTANCE = 200.0
+    
     def __init__(
         self,
         settings: Settings,
@@ -333,18 +338,15 @@ class TradingModeService:
         
         # Obtener datos históricos para detectar niveles
         try:
-            from app.providers.market_data.mock_market_provider import MockMarketDataProvider
-            provider = MockMarketDataProvider()
-            
             # Obtener últimos 30 días de datos
             end_date = datetime.now()
             start_date = end_date - timedelta(days=30)
             
-            historical_data = await provider.get_historical_data(
-                symbol=instrument,
-                interval="1h",
-                start_date=start_date,
-                end_date=end_date
+            historical_data = await self.market_analysis_service.provider.fetch_historical_candles(
+                instrument,
+                start_date,
+                end_date,
+                "1h"
             )
             
             if not historical_data:
@@ -356,26 +358,34 @@ class TradingModeService:
             return []
         
         # Detectar niveles psicológicos cercanos
-        levels_info = self.level_detector.detect_nearby_levels(
-            current_price=current_price,
-            max_distance_points=200.0
+        levels_info = self.level_detector.generate_psychological_levels(
+            min_price=current_price - self.OPERATIONAL_LEVELS_MAX_DISTANCE,
+            max_price=current_price + self.OPERATIONAL_LEVELS_MAX_DISTANCE
         )
         
         if not levels_info:
             return []
         
+        # Zonas de swing del histórico (detector compartido con el análisis técnico)
+        swing_zones = SwingDetector.detect_zones(CandleArrays.from_candles(historical_data))
+        zone_tolerance = current_price * SwingDetector.ZONE_TOLERANCE_PERCENT / 100
+        
         # Calcular fuerza de niveles basada en reacciones históricas
         levels_with_strength = []
         for level_price in levels_info:
-            # Detectar rupturas en el histórico para calcular fuerza
-            breaks = self.level_detector.detect_level_breaks(
-                candles=historical_data,
-                level=level_price
-            )
+            # Los swings agrupados en la zona del nivel son sus tests históricos
+            zone = SwingDetector.zone_containing(swing_zones, level_price, zone_tolerance)
+            total_tests = zone.touches if zone else 0
+            
+            # Reacciones: swings de mínimo en un soporte, swings de máximo en una resistencia
+            if not zone:
+                bounce_count = 0
+            elif level_price < current_price:
+                bounce_count = zone.swing_lows
+            else:
+                bounce_count = zone.swing_highs
             
             # Calcular fuerza: más reacciones = más fuerte
-            bounce_count = sum(1 for b in breaks if b.break_type == "bounce")
-            total_tests = len(breaks)
             strength = min(1.0, bounce_count / max(1, total_tests))
             
             levels_with_strength.append({
@@ -0,0 +1,257 @@
+"""
+Cálculo vectorizado de indicadores por vela para el feature store (bar_features)
+Reproduce la semántica de TechnicalAnalysis y VolatilityCalculator, pero para todas las velas de una serie
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from app.models.market_analysis import MarketDirection
+from app.utils.candle_arrays import CandleArrays
+from app.utils.trading_sessions import TradingSessions
+
+
+class BarFeatureCalculator:
+    """Calcula RSI, EMAs, ATR, tendencia y sesión para cada vela de una serie"""
+
+    RSI_PERIOD = 14
+    ATR_PERIOD = 14
+    TREND_LOOKBACK = 20
+    TREND_LOOKBACKS = (10, 20, 50)
+    TREND_THRESHOLD_PERCENT = 0.5
+    EMA_PERIODS = (50, 100, 200)
+
+    # Velas previas necesarias para calcular RSI, ATR y tendencia de la primera vela nueva
+    CONTEXT_BARS = max(RSI_PERIOD + 1, ATR_PERIOD + 1, TREND_LOOKBACK)
+
+    @classmethod
+    def compute(
+        cls,
+        arrays: CandleArrays,
+        start_index: int = 0,
+        previous_emas: Optional[dict[int, Optional[float]]] = None
+    ) -> dict[str, list]:
+        """
+        Calcula los indicadores de las velas desde start_index en adelante
+        @param arrays - Serie completa (contexto + velas nuevas) ordenada por timestamp
+        @param start_index - Primera vela para la que se devuelven indicadores
+        @param previous_emas - EMAs de la vela start_index - 1 para continuar la recursión
+                               sin recalcular desde el inicio (opcional)
+        @returns Diccionario de columnas (listas) alineadas con arrays[start_index:]
+        """
+        closes = arrays.closes
+        timestamps = [arrays.timestamp_at(i) for i in range(start_index, len(arrays))]
+        features: dict[str, list] = {
+            "timestamp": timestamps,
+            "close_price": closes[start_index:].tolist(),
+            "rsi": cls._to_optional_list(cls.rsi_series(closes)[start_index:]),
+            "atr": cls._to_optional_list(cls.atr_series(arrays.highs, arrays.lows, closes)[start_index:]),
+            "trend": [
+                cls._trend_value(code)
+                for code in cls.trend_series(arrays.highs, arrays.lows, closes)[start_index:]
+            ],
+            "session": [
+                session.value if session else None
+                for session in map(
+                    TradingSessions.session_from_code,
+                    TradingSessions.label_sessions(arrays.timestamps[start_index:]).tolist()
+                )
+            ],
+        }
+
+        for period in cls.EMA_PERIODS:
+            seed = previous_emas.get(period) if previous_emas else None
+            if seed is not None and start_index > 0:
+                ema = cls.continue_ema(closes[start_index:], period, seed)
+            else:
+                ema = cls.ema_series(closes, period)[start_index:]
+            features[f"ema_{period}"] = cls._to_optional_list(ema)
+
+        return features
+
+    @classmethod
+    def rsi_series(cls, closes: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+        """
+        RSI de cada vela con promedio simple de las últimas N variaciones (igual que calculate_rsi)
+        @param closes - Precios de cierre
+        @param period - Período del RSI
+        @returns Array con RSI por vela (NaN si no hay suficientes datos)
+        """
+        result = np.full(len(closes), np.nan)
+        if len(closes) < period + 1:
+            return result
+
+        changes = np.diff(closes)
+        avg_gain = sliding_window_view(np.clip(changes, 0, None), period).sum(axis=1) / period
+        avg_loss = sliding_window_view(np.clip(-changes, 0, None), period).sum(axis=1) / period
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi[avg_loss == 0] = 100.0
+
+        result[period:] = rsi
+        return result
+
+    @classmethod
+    def atr_series(
+        cls,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        closes: np.ndarray,
+        period: int = ATR_PERIOD
+    ) -> np.ndarray:
+        """
+        ATR de cada vela como media de los últimos N true ranges (igual que VolatilityCalculator)
+        @param highs - Precios máximos
+        @param lows - Precios mínimos
+        @param closes - Precios de cierre
+        @param period - Período del ATR
+        @returns Array con ATR por vela (NaN en la primera vela)
+        """
+        n = len(closes)
+        result = np.full(n, np.nan)
+        if n < 2:
+            return result
+
+        true_ranges = np.maximum.reduce([
+            highs[1:] - lows[1:],
+            np.abs(highs[1:] - closes[:-1]),
+            np.abs(lows[1:] - closes[:-1]),
+        ])
+        cumulative = np.concatenate(([0.0], np.cumsum(true_ranges)))
+
+        # La vela i dispone de i true ranges; se promedian los últimos min(period, i)
+        counts = np.minimum(np.arange(1, n), period)
+        ends = np.arange(1, n)
+        result[1:] = (cumulative[ends] - cumulative[ends - counts]) / counts
+        return result
+
+    @classmethod
+    def trend_series(
+        cls,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        closes: np.ndarray,
+        lookback: int = TREND_LOOKBACK,
+        threshold_percent: float = TREND_THRESHOLD_PERCENT
+    ) -> np.ndarray:
+        """
+        Tendencia de cada vela con la misma regla que TechnicalAnalysis.identify_trend
+        @param highs - Precios máximos
+        @param lows - Precios mínimos
+        @param closes - Precios de cierre
+        @param lookback - Velas de la ventana (se acorta al inicio de la serie)
+        @param threshold_percent - Cambio porcentual mínimo para considerar tendencia
+        @returns Array de códigos: 1 alcista, -1 bajista, 0 lateral
+        """
+        return cls.trend_matrix(highs, lows, closes, (lookback,), threshold_percent)[0]
+
+    @classmethod
+    def trend_matrix(
+        cls,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        closes: np.ndarray,
+        lookbacks: Sequence[int] = TREND_LOOKBACKS,
+        threshold_percent: float = TREND_THRESHOLD_PERCENT
+    ) -> np.ndarray:
+        """
+        Tendencia de cada vela para varias ventanas a la vez
+        Los conteos de máximos/mínimos crecientes y decrecientes se acumulan una sola vez y cada
+        ventana es una resta de sumas acumuladas (coste O(n) por ventana, sin recorrer velas)
+        @param highs - Precios máximos
+        @param lows - Precios mínimos
+        @param closes - Precios de cierre
+        @param lookbacks - Velas de cada ventana (se acortan al inicio de la serie)
+        @param threshold_percent - Cambio porcentual mínimo para considerar tendencia
+        @returns Matriz (ventanas x velas) de códigos: 1 alcista, -1 bajista, 0 lateral
+        """
+        n = len(closes)
+        codes = np.zeros((len(lookbacks), n), dtype=np.int8)
+        if n < 2 or not len(lookbacks):
+            return codes
+
+        def _cumulative(condition: np.ndarray) -> np.ndarray:
+            return np.concatenate(([0], np.cumsum(condition)))
+
+        higher_highs = _cumulative(highs[1:] > highs[:-1])
+        lower_highs = _cumulative(highs[1:] < highs[:-1])
+        higher_lows = _cumulative(lows[1:] > lows[:-1])
+        lower_lows = _cumulative(lows[1:] < lows[:-1])
+
+        ends = np.arange(n)
+        starts = np.maximum(ends[None, :] - np.asarray(lookbacks)[:, None] + 1, 0)
+
+        hh = higher_highs[ends] - higher_highs[starts]
+        lh = lower_highs[ends] - lower_highs[starts]
+        hl = higher_lows[ends] - higher_lows[starts]
+        ll = lower_lows[ends] - lower_lows[starts]
+        change_percent = (closes[ends] - closes[starts]) / closes[starts] * 100
+
+        bullish = (hh > lh) & (hl > ll) & (change_percent > threshold_percent)
+        bearish = (ll > hl) & (lh > hh) & (change_percent < -threshold_percent)
+
+        codes[bullish] = 1
+        codes[bearish & ~bullish] = -1
+        codes[ends - starts + 1 < 2] = 0
+        return codes
+
+    @classmethod
+    def ema_series(cls, closes: np.ndarray, period: int) -> np.ndarray:
+        """
+        EMA de cada vela con semilla SMA (igual que TechnicalAnalysis.calculate_ema)
+        @param closes - Precios de cierre
+        @param period - Período de la EMA
+        @returns Array con EMA por vela (NaN hasta tener 'period' velas)
+        """
+        result = np.full(len(closes), np.nan)
+        if len(closes) < period:
+            return result
+
+        seed = closes[:period].mean()
+        result[period - 1] = seed
+        result[period:] = cls.continue_ema(closes[period:], period, seed)
+        return result
+
+    @classmethod
+    def continue_ema(cls, closes: np.ndarray, period: int, previous_ema: float) -> np.ndarray:
+        """
+        Continúa la recursión de la EMA a partir del valor de la vela anterior
+        @param closes - Cierres de las velas nuevas
+        @param period - Período de la EMA
+        @param previous_ema - EMA de la vela inmediatamente anterior
+        @returns Array con la EMA de cada vela nueva
+        """
+        if len(closes) == 0:
+            return np.array([], dtype=np.float64)
+
+        multiplier = 2.0 / (period + 1)
+        decay = 1 - multiplier
+        ema, _ = lfilter([multiplier], [1, -decay], closes, zi=[decay * previous_ema])
+        return ema
+
+    @staticmethod
+    def trend_direction(code: int) -> MarketDirection:
+        """
+        Convierte un código de tendencia (trend_series/trend_matrix) en MarketDirection
+        @param code - 1 alcista, -1 bajista, 0 lateral
+        @returns Dirección del mercado
+        """
+        if code > 0:
+            return MarketDirection.BULLISH
+        if code < 0:
+            return MarketDirection.BEARISH
+        return MarketDirection.NEUTRAL
+
+    @classmethod
+    def _trend_value(cls, code: int) -> str:
+        """Convierte el código de tendencia en el valor de MarketDirection"""
+        return cls.trend_direction(code).value
+
+    @staticmethod
+    def _to_optional_list(values: np.ndarray) -> list[Optional[float]]:
+        """Convierte un array con NaN en lista con None"""
+        return [None if np.isnan(v) else float(v) for v in values]
+
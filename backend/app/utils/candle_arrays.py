@@ -0,0 +1,136 @@
+"""
+Representación columnar (NumPy) de series de velas
+Permite a los cálculos vectorizados trabajar sobre arrays en lugar de listas de PriceCandle
+"""
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from app.models.market_analysis import PriceCandle
+
+
+class CandleArrays:
+    """Serie de velas OHLCV en columnas NumPy, ordenada por timestamp"""
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        opens: np.ndarray,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        closes: np.ndarray,
+        volumes: Optional[np.ndarray] = None
+    ):
+        """
+        Inicializa la serie columnar
+        @param timestamps - Timestamps como datetime64[s]
+        @param opens - Precios de apertura
+        @param highs - Precios máximos
+        @param lows - Precios mínimos
+        @param closes - Precios de cierre
+        @param volumes - Volúmenes (NaN si no hay dato)
+        """
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+        self.opens = np.asarray(opens, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.closes = np.asarray(closes, dtype=np.float64)
+        self.volumes = (
+            np.asarray(volumes, dtype=np.float64)
+            if volumes is not None
+            else np.full(len(self.closes), np.nan)
+        )
+
+    def __len__(self) -> int:
+        return len(self.closes)
+
+    @classmethod
+    def from_candles(cls, candles: Sequence[PriceCandle]) -> "CandleArrays":
+        """
+        Construye la serie a partir de velas (las ordena por timestamp)
+        @param candles - Lista de PriceCandle
+        @returns CandleArrays ordenado cronológicamente
+        """
+        sorted_candles = sorted(candles, key=lambda c: c.timestamp)
+        return cls(
+            timestamps=np.array([c.timestamp for c in sorted_candles], dtype="datetime64[s]"),
+            opens=[c.open for c in sorted_candles],
+            highs=[c.high for c in sorted_candles],
+            lows=[c.low for c in sorted_candles],
+            closes=[c.close for c in sorted_candles],
+            volumes=[c.volume if c.volume is not None else np.nan for c in sorted_candles],
+        )
+
+    @classmethod
+    def from_models(cls, models: Sequence[Any]) -> "CandleArrays":
+        """
+        Construye la serie a partir de modelos MarketDataModel (ya ordenados por timestamp)
+        @param models - Filas de market_data
+        @returns CandleArrays
+        """
+        return cls(
+            timestamps=np.array([m.timestamp for m in models], dtype="datetime64[s]"),
+            opens=[m.open_price for m in models],
+            highs=[m.high_price for m in models],
+            lows=[m.low_price for m in models],
+            closes=[m.close_price for m in models],
+            volumes=[m.volume if m.volume is not None else np.nan for m in models],
+        )
+
+    def slice(self, start: int, end: Optional[int] = None) -> "CandleArrays":
+        """
+        Devuelve una vista de la serie entre dos posiciones
+        @param start - Índice inicial (incluido)
+        @param end - Índice final (excluido) o None hasta el final
+        @returns CandleArrays que comparte memoria con la serie original
+        """
+        return CandleArrays(
+            self.timestamps[start:end],
+            self.opens[start:end],
+            self.highs[start:end],
+            self.lows[start:end],
+            self.closes[start:end],
+            self.volumes[start:end],
+        )
+
+    def concat(self, other: "CandleArrays") -> "CandleArrays":
+        """
+        Devuelve una serie nueva con las velas de otra serie a continuación
+        @param other - Velas posteriores a las de esta serie
+        @returns CandleArrays con ambas series
+        """
+        return CandleArrays(
+            np.concatenate([self.timestamps, other.timestamps]),
+            np.concatenate([self.opens, other.opens]),
+            np.concatenate([self.highs, other.highs]),
+            np.concatenate([self.lows, other.lows]),
+            np.concatenate([self.closes, other.closes]),
+            np.concatenate([self.volumes, other.volumes]),
+        )
+
+    def timestamp_at(self, index: int) -> datetime:
+        """
+        Obtiene el timestamp de una posición como datetime
+        @param index - Índice de la vela
+        @returns Timestamp como datetime (naive, UTC)
+        """
+        return self.timestamps[index].astype("datetime64[s]").astype(datetime)
+
+    def to_candles(self) -> list[PriceCandle]:
+        """
+        Convierte la serie de vuelta a PriceCandle
+        @returns Lista de PriceCandle
+        """
+        timestamps = self.timestamps.astype("datetime64[s]").astype(datetime)
+        return [
+            PriceCandle(
+                timestamp=timestamps[i],
+                open=float(self.opens[i]),
+                high=float(self.highs[i]),
+                low=float(self.lows[i]),
+                close=float(self.closes[i]),
+                volume=None if np.isnan(self.volumes[i]) else float(self.volumes[i]),
+            )
+            for i in range(len(self))
+        ]
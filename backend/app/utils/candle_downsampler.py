@@ -0,0 +1,139 @@
+"""
+Reducción de series de velas para el chart
+Dos métodos sobre CandleArrays: agregación OHLC por buckets (conserva apertura, máximos, mínimos y cierre
+de cada tramo, para gráficos de velas) y largest-triangle-three-buckets sobre el cierre (conserva la
+forma visual de la línea, para gráficos de línea)
+"""
+import numpy as np
+
+from app.utils.candle_arrays import CandleArrays
+
+
+class CandleDownsampler:
+    """Reduce series de velas a un número máximo de puntos"""
+
+    METHODS = ("ohlc", "lttb")
+
+    @staticmethod
+    def aggregate(arrays: CandleArrays, starts: np.ndarray) -> CandleArrays:
+        """
+        Agrega tramos consecutivos de velas en una vela por tramo
+        @param arrays - Serie de velas
+        @param starts - Índice inicial de cada tramo (creciente, empezando en 0)
+        @returns Serie con la apertura del primer tramo, máximo, mínimo, cierre del último y volumen sumado
+        """
+        if len(arrays) == 0:
+            return arrays
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.append(starts[1:], len(arrays)) - 1
+
+        present = ~np.isnan(arrays.volumes)
+        volume_sums = np.add.reduceat(np.where(present, arrays.volumes, 0.0), starts)
+        volume_counts = np.add.reduceat(present.astype(np.int64), starts)
+
+        return CandleArrays(
+            arrays.timestamps[starts],
+            arrays.opens[starts],
+            np.maximum.reduceat(arrays.highs, starts),
+            np.minimum.reduceat(arrays.lows, starts),
+            arrays.closes[ends],
+            np.where(volume_counts > 0, volume_sums, np.nan),
+        )
+
+    @classmethod
+    def aggregate_by_time(cls, arrays: CandleArrays, step_seconds: int) -> CandleArrays:
+        """
+        Agrega las velas en buckets de tiempo alineados a epoch (los huecos de fin de semana no generan buckets)
+        @param arrays - Serie de velas
+        @param step_seconds - Duración de cada bucket
+        @returns Serie con una vela por bucket, con timestamp en el inicio del bucket
+        """
+        if len(arrays) == 0:
+            return arrays
+        buckets = arrays.timestamps.astype("datetime64[s]").astype(np.int64) // step_seconds
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        aggregated = cls.aggregate(arrays, starts)
+        aggregated.timestamps = (buckets[starts] * step_seconds).astype("datetime64[s]")
+        return aggregated
+
+    @classmethod
+    def ohlc_buckets(cls, arrays: CandleArrays, target: int) -> CandleArrays:
+        """
+        Reduce a como mucho target velas agregando tramos de igual número de velas
+        @param arrays - Serie de velas
+        @param target - Velas máximas
+        @returns Serie reducida (la original si ya cabe)
+        """
+        if len(arrays) <= target:
+            return arrays
+        starts = np.unique(np.linspace(0, len(arrays), target, endpoint=False).astype(np.int64))
+        return cls.aggregate(arrays, starts)
+
+    @staticmethod
+    def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+        """
+        Largest-triangle-three-buckets: conserva el primer y último punto y, en cada bucket intermedio,
+        el punto que forma el triángulo de mayor área con el punto elegido antes y la media del bucket siguiente
+        @param x - Coordenadas x (crecientes)
+        @param y - Valores
+        @param threshold - Puntos a conservar (>= 3)
+        @returns Índices de los puntos conservados
+        """
+        n = len(y)
+        if threshold >= n or threshold < 3:
+            return np.arange(n)
+
+        edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+        selected = np.empty(threshold, dtype=np.int64)
+        selected[0], selected[-1] = 0, n - 1
+        previous = 0
+        for bucket in range(threshold - 2):
+            start, end = edges[bucket], edges[bucket + 1]
+            next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+            next_x = x[end:next_end].mean()
+            next_y = y[end:next_end].mean()
+            areas = np.abs(
+                (x[previous] - next_x) * (y[start:end] - y[previous])
+                - (x[previous] - x[start:end]) * (next_y - y[previous])
+            )
+            previous = start + int(np.argmax(areas))
+            selected[bucket + 1] = previous
+        return selected
+
+    @classmethod
+    def lttb(cls, arrays: CandleArrays, target: int) -> CandleArrays:
+        """
+        Reduce a target velas eligiendo por LTTB sobre el cierre las velas que conservan la forma de la línea
+        @param arrays - Serie de velas
+        @param target - Velas máximas
+        @returns Velas seleccionadas (sin agregar)
+        """
+        if len(arrays) <= target:
+            return arrays
+        x = arrays.timestamps.astype("datetime64[s]").astype(np.float64)
+        indices = cls.lttb_indices(x, arrays.closes, target)
+        return CandleArrays(
+            arrays.timestamps[indices],
+            arrays.opens[indices],
+            arrays.highs[indices],
+            arrays.lows[indices],
+            arrays.closes[indices],
+            arrays.volumes[indices],
+        )
+
+    @classmethod
+    def downsample(cls, arrays: CandleArrays, target: int, method: str = "ohlc") -> CandleArrays:
+        """
+        Reduce la serie con el método pedido
+        @param arrays - Serie de velas
+        @param target - Velas máximas
+        @param method - ohlc (buckets que conservan extremos) o lttb (selección por forma del cierre)
+        @returns Serie reducida
+        """
+        if method not in cls.METHODS:
+            raise ValueError(f"Unsupported downsampling method '{method}'. Supported methods: {', '.join(cls.METHODS)}")
+        if target < 1:
+            raise ValueError(f"Target must be at least 1, got {target}")
+        if method == "lttb" and target >= 3:
+            return cls.lttb(arrays, target)
+        return cls.ohlc_buckets(arrays, target)
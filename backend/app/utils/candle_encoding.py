@@ -0,0 +1,167 @@
+"""
+Codificación de velas para el chart
+Convierte una serie CandleArrays en el formato negociado con el cliente: filas JSON (formato histórico),
+JSON columnar con timestamps epoch o binario (msgpack / Arrow IPC) generado directamente desde las
+columnas NumPy, sin construir un dict por vela
+"""
+from typing import Any, Optional, Union
+
+import msgpack
+import numpy as np
+import pyarrow as pa
+
+from app.utils.candle_arrays import CandleArrays
+
+
+class CandleEncoder:
+    """Codifica series de velas en JSON por filas, JSON columnar, msgpack o Arrow IPC"""
+
+    FORMATS = ("json", "columnar", "msgpack", "arrow")
+
+    MEDIA_TYPES = {
+        "json": "application/json",
+        "columnar": "application/json",
+        "msgpack": "application/msgpack",
+        "arrow": "application/vnd.apache.arrow.stream",
+    }
+
+    # Media types aceptados en la cabecera Accept para cada formato binario
+    ACCEPT_FORMATS = {
+        "application/msgpack": "msgpack",
+        "application/x-msgpack": "msgpack",
+        "application/vnd.apache.arrow.stream": "arrow",
+        "application/vnd.apache.arrow.file": "arrow",
+        "application/json": "json",
+    }
+
+    @classmethod
+    def negotiate(cls, fmt: Optional[str] = None, accept: Optional[str] = None) -> str:
+        """
+        Elige el formato de respuesta: el parámetro explícito manda; si no, la cabecera Accept
+        (por orden de calidad) y por defecto JSON por filas
+        @param fmt - Formato pedido en la query (opcional)
+        @param accept - Cabecera Accept (opcional)
+        @returns Formato elegido
+        """
+        if fmt:
+            fmt = fmt.lower()
+            if fmt not in cls.FORMATS:
+                raise ValueError(f"Unsupported candle format '{fmt}'. Supported formats: {', '.join(cls.FORMATS)}")
+            return fmt
+
+        ranked = []
+        for position, part in enumerate((accept or "").split(",")):
+            media_type, _, params = part.strip().partition(";")
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            candidate = cls.ACCEPT_FORMATS.get(media_type.strip().lower())
+            if candidate and quality > 0:
+                ranked.append((-quality, position, candidate))
+        return min(ranked)[2] if ranked else "json"
+
+    @staticmethod
+    def to_rows(arrays: CandleArrays) -> list[dict[str, Any]]:
+        """
+        Formato histórico: una entrada por vela con timestamp ISO-8601
+        @param arrays - Serie de velas
+        @returns Lista de dicts timestamp/open/high/low/close/volume
+        """
+        timestamps = arrays.timestamps.astype("datetime64[s]").astype(object)
+        volumes = np.where(np.isnan(arrays.volumes), None, arrays.volumes).tolist()
+        return [
+            {
+                "timestamp": timestamp.isoformat(),
+                "open": open_price,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume,
+            }
+            for timestamp, open_price, high, low, close, volume in zip(
+                timestamps, arrays.opens.tolist(), arrays.highs.tolist(),
+                arrays.lows.tolist(), arrays.closes.tolist(), volumes
+            )
+        ]
+
+    @staticmethod
+    def to_columnar(arrays: CandleArrays) -> dict[str, list]:
+        """
+        Formato columnar: una lista por campo, timestamps en segundos Unix
+        @param arrays - Serie de velas
+        @returns Dict {t, o, h, l, c, v} (v con None donde no hay volumen)
+        """
+        return {
+            "t": arrays.timestamps.astype("datetime64[s]").astype(np.int64).tolist(),
+            "o": arrays.opens.tolist(),
+            "h": arrays.highs.tolist(),
+            "l": arrays.lows.tolist(),
+            "c": arrays.closes.tolist(),
+            "v": np.where(np.isnan(arrays.volumes), None, arrays.volumes).tolist(),
+        }
+
+    @classmethod
+    def to_msgpack(cls, arrays: CandleArrays, metadata: Optional[dict[str, Any]] = None) -> bytes:
+        """
+        Formato columnar serializado con msgpack
+        @param arrays - Serie de velas
+        @param metadata - Campos adicionales del mensaje (instrumento, intervalo...)
+        @returns Bytes msgpack
+        """
+        return msgpack.packb({**(metadata or {}), **cls.to_columnar(arrays)})
+
+    @staticmethod
+    def to_arrow(arrays: CandleArrays, metadata: Optional[dict[str, Any]] = None) -> bytes:
+        """
+        Stream Arrow IPC con un record batch construido desde las columnas NumPy
+        (volumen nulo donde no hay dato)
+        @param arrays - Serie de velas
+        @param metadata - Metadatos del esquema (instrumento, intervalo...)
+        @returns Bytes del stream Arrow IPC
+        """
+        batch = pa.record_batch(
+            [
+                pa.array(arrays.timestamps.astype("datetime64[s]")),
+                pa.array(arrays.opens),
+                pa.array(arrays.highs),
+                pa.array(arrays.lows),
+                pa.array(arrays.closes),
+                pa.array(arrays.volumes, from_pandas=True),
+            ],
+            names=["t", "o", "h", "l", "c", "v"],
+        )
+        if metadata:
+            batch = batch.replace_schema_metadata({key: str(value) for key, value in metadata.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    @classmethod
+    def encode(
+        cls,
+        arrays: CandleArrays,
+        fmt: str,
+        metadata: Optional[dict[str, Any]] = None
+    ) -> Union[dict[str, Any], bytes]:
+        """
+        Codifica la serie en el formato pedido
+        @param arrays - Serie de velas
+        @param fmt - Formato (json, columnar, msgpack, arrow)
+        @param metadata - Campos que acompañan a las velas (instrumento, intervalo...)
+        @returns Dict serializable a JSON (json, columnar) o bytes (msgpack, arrow)
+        """
+        if fmt == "json":
+            return {**(metadata or {}), "candles": cls.to_rows(arrays)}
+        if fmt == "columnar":
+            return {**(metadata or {}), **cls.to_columnar(arrays)}
+        if fmt == "msgpack":
+            return cls.to_msgpack(arrays, metadata)
+        if fmt == "arrow":
+            return cls.to_arrow(arrays, metadata)
+        raise ValueError(f"Unsupported candle format '{fmt}'. Supported formats: {', '.join(cls.FORMATS)}")
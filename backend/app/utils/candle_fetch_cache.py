@@ -0,0 +1,55 @@
+"""
+Caché de velas con alcance de un escaneo
+Comparte las descargas entre análisis que piden el mismo instrumento e intervalo: una petición cuyo
+rango está contenido en otro ya pedido (aunque siga en curso) espera esa misma descarga y recorta
+las velas, en lugar de lanzar una nueva. El análisis multi-temporalidad pide la serie H1 con el rango
+de H4 (de la que agrega las velas H4), así que el rango H1 de cada análisis sale de esa descarga
+"""
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from app.models.market_analysis import PriceCandle
+
+
+class CandleFetchCache:
+    """Descargas de velas compartidas por (instrumento, intervalo) durante un escaneo"""
+
+    def __init__(self):
+        """
+        Inicializa la caché vacía
+        """
+        self._entries: dict[tuple[str, str], list[tuple[datetime, datetime, asyncio.Future]]] = {}
+        self.fetches = 0
+        self.shared = 0
+
+    async def get(
+        self,
+        instrument: str,
+        interval: str,
+        start_date: datetime,
+        end_date: datetime,
+        fetch: Callable[[], Awaitable[list[PriceCandle]]]
+    ) -> list[PriceCandle]:
+        """
+        Devuelve las velas del rango, reutilizando una descarga que lo cubra
+        @param instrument - Instrumento
+        @param interval - Intervalo de las velas
+        @param start_date - Inicio del rango
+        @param end_date - Fin del rango
+        @param fetch - Corrutina que descarga el rango si no hay ninguna que lo cubra
+        @returns Lista de velas del rango
+        """
+        entries = self._entries.setdefault((instrument, interval), [])
+        for cached_start, cached_end, future in entries:
+            if cached_start <= start_date and end_date <= cached_end:
+                self.shared += 1
+                candles = await future
+                if (cached_start, cached_end) == (start_date, end_date):
+                    return candles
+                return [c for c in candles if start_date <= c.timestamp <= end_date]
+
+        future = asyncio.ensure_future(fetch())
+        entries.append((start_date, end_date, future))
+        self.fetches += 1
+        return await future
@@ -0,0 +1,146 @@
+"""
+Pirámide de resoluciones de una serie de velas
+Precalcula, a partir de la serie base, niveles agregados en buckets de tiempo que doblan su duración en
+cada nivel. Una consulta de chart elige el nivel más fino cuyo número de velas en el rango se acerca al
+presupuesto de puntos, de modo que el coste no depende de la amplitud del rango
+"""
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from app.utils.candle_arrays import CandleArrays
+from app.utils.candle_downsampler import CandleDownsampler
+
+
+class CandlePyramid:
+    """Niveles de resolución de una serie de velas"""
+
+    # Cada nivel agrega buckets del doble de duración que el anterior
+    FACTOR = 2
+
+    # No se generan niveles por debajo de estas velas ni más de estos niveles
+    MIN_LEVEL_BARS = 32
+    MAX_LEVELS = 16
+
+    def __init__(self, base: CandleArrays, interval_seconds: int):
+        """
+        Construye la pirámide
+        @param base - Serie base ordenada por timestamp
+        @param interval_seconds - Duración de las velas base
+        """
+        self.steps = [interval_seconds]
+        self.levels = [base]
+        self._seconds = [self._to_seconds(base)]
+        self._add_levels()
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    @staticmethod
+    def _to_seconds(arrays: CandleArrays) -> np.ndarray:
+        """
+        Timestamps de una serie en segundos Unix
+        @param arrays - Serie de velas
+        @returns Array int64
+        """
+        return arrays.timestamps.astype("datetime64[s]").astype(np.int64)
+
+    def _add_levels(self) -> None:
+        """Añade niveles agregados sobre el último mientras tenga velas suficientes"""
+        while len(self.levels[-1]) > self.MIN_LEVEL_BARS and len(self.levels) < self.MAX_LEVELS:
+            step = self.steps[-1] * self.FACTOR
+            level = CandleDownsampler.aggregate_by_time(self.levels[-1], step)
+            if len(level) == len(self.levels[-1]):
+                break
+            self.steps.append(step)
+            self.levels.append(level)
+            self._seconds.append(self._to_seconds(level))
+
+    @property
+    def latest(self) -> Optional[datetime]:
+        """Timestamp de la última vela base (None si la serie está vacía)"""
+        return self.levels[0].timestamp_at(-1) if len(self.levels[0]) else None
+
+    @property
+    def last_bar(self) -> Optional[tuple[float, float, float, float]]:
+        """OHLC de la última vela base (None si la serie está vacía)"""
+        base = self.levels[0]
+        if not len(base):
+            return None
+        return float(base.opens[-1]), float(base.highs[-1]), float(base.lows[-1]), float(base.closes[-1])
+
+    def extend(self, tail: CandleArrays) -> None:
+        """
+        Sustituye las velas base desde la primera del tramo (la última vela puede haber cambiado) y
+        recalcula en cada nivel solo los buckets que empiezan en o después del bucket de esa vela
+        Los buckets de cada nivel contienen exactamente los del nivel anterior (duración doble, alineados a epoch)
+        @param tail - Velas desde la primera modificada en adelante, ordenadas por timestamp
+        """
+        if len(tail) == 0:
+            return
+
+        first_seconds = int(self._to_seconds(tail)[0])
+        for level in range(len(self.levels)):
+            if level == 0:
+                bucket_start = first_seconds
+                replacement = tail
+            else:
+                step = self.steps[level]
+                bucket_start = first_seconds // step * step
+                source_first = int(np.searchsorted(self._seconds[level - 1], bucket_start, side="left"))
+                replacement = CandleDownsampler.aggregate_by_time(self.levels[level - 1].slice(source_first), step)
+            keep = int(np.searchsorted(self._seconds[level], bucket_start, side="left"))
+            self.levels[level] = self.levels[level].slice(0, keep).concat(replacement)
+            self._seconds[level] = self._to_seconds(self.levels[level])
+        self._add_levels()
+
+    def covers(self, start: datetime) -> bool:
+        """
+        Indica si la serie base empieza antes del inicio pedido
+        @param start - Inicio del rango
+        @returns True si la pirámide contiene el rango desde su inicio
+        """
+        return len(self.levels[0]) > 0 and self.levels[0].timestamp_at(0) <= start
+
+    def _window(self, level: int, start: datetime, end: datetime) -> tuple[int, int]:
+        """
+        Posiciones de las velas de un nivel que solapan el rango
+        @param level - Nivel
+        @param start - Inicio del rango
+        @param end - Fin del rango
+        @returns Tupla (inicio incluido, fin excluido)
+        """
+        seconds = self._seconds[level]
+        start_s = int((np.datetime64(start, "s") - np.datetime64(0, "s")).astype(np.int64))
+        end_s = int((np.datetime64(end, "s") - np.datetime64(0, "s")).astype(np.int64))
+        first = int(np.searchsorted(seconds, start_s - self.steps[level], side="right"))
+        last = int(np.searchsorted(seconds, end_s, side="right"))
+        return first, last
+
+    def select(
+        self,
+        start: datetime,
+        end: datetime,
+        target: int,
+        method: str = "ohlc"
+    ) -> tuple[CandleArrays, int]:
+        """
+        Velas del rango con como mucho target puntos: se toma el nivel más fino con menos de
+        FACTOR * target velas en el rango y se reduce con el método pedido
+        @param start - Inicio del rango
+        @param end - Fin del rango
+        @param target - Velas máximas
+        @param method - Método de reducción final (ohlc, lttb)
+        @returns Tupla (velas, duración en segundos de las velas del nivel elegido)
+        """
+        level = len(self.levels) - 1
+        for candidate in range(len(self.levels)):
+            first, last = self._window(candidate, start, end)
+            if last - first <= self.FACTOR * target:
+                level = candidate
+                break
+
+        first, last = self._window(level, start, end)
+        window = self.levels[level].slice(first, last)
+        return CandleDownsampler.downsample(window, target, method), self.steps[level]
@@ -1,11 +1,17 @@
 """
 Calculador de correlaciones entre Gold y otros activos (DXY, Yields)
 """
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from enum import Enum
+import numpy as np
 from scipy.stats import pearsonr
 from pydantic import BaseModel
 
+from app.models.correlation_analysis import LeadLagAnalysis
+
+if TYPE_CHECKING:
+    from app.utils.series_aligner import AlignedSeries
+
 
 class CorrelationStrength(str, Enum):
     """
@@ -62,6 +68,11 @@ class CorrelationCalculator:
     # Significancia estadística
     SIGNIFICANCE_LEVEL = 0.05
     
+    # Lead-lag: tolerancia (en velas) para considerar estable el desfase dominante entre ventanas
+    LEAD_LAG_TOLERANCE = 1
+    # Diferencia mínima frente al lag 0 para atribuir liderazgo a un desfase distinto de cero
+    LEAD_LAG_MIN_IMPROVEMENT = 0.05
+    
     @classmethod
     def calculate_correlation(
         cls,
@@ -106,6 +117,189 @@ class CorrelationCalculator:
             interpretation=interpretation
         )
     
+    @classmethod
+    def calculate_aligned_correlation(
+        cls,
+        aligned: "AlignedSeries",
+        gold_symbol: str,
+        other_symbol: str,
+        window: Optional[int] = None,
+        use_returns: bool = False
+    ) -> CorrelationResult:
+        """
+        Calcula la correlación sobre una serie ya alineada por timestamp
+        @param aligned - Serie alineada (SeriesAligner.align)
+        @param gold_symbol - Símbolo de Gold en la serie
+        @param other_symbol - Símbolo del otro activo
+        @param window - Usar solo las últimas N filas alineadas (opcional)
+        @param use_returns - Correlacionar retornos en lugar de niveles
+        @returns Resultado con coeficiente, p-value y clasificación
+        """
+        series = aligned.tail(window + (1 if use_returns else 0)) if window else aligned
+        if use_returns:
+            gold_values = series.returns(gold_symbol)
+            other_values = series.returns(other_symbol)
+        else:
+            gold_values = series.column(gold_symbol)
+            other_values = series.column(other_symbol)
+
+        return cls.calculate_correlation(gold_values, other_values)
+
+    @staticmethod
+    def cross_correlation(
+        leader: np.ndarray,
+        follower: np.ndarray,
+        max_lag: int
+    ) -> np.ndarray:
+        """
+        Correlación cruzada normalizada para desfases de -max_lag a +max_lag usando FFT (O(n log n))
+        El valor en el desfase k es corr(leader[t], follower[t + k]): k > 0 significa que el líder se adelanta
+        @param leader - Serie del activo líder candidato
+        @param follower - Serie del activo seguidor (misma longitud)
+        @param max_lag - Desfase máximo en velas
+        @returns Array de longitud 2 * max_lag + 1 (índice max_lag = lag 0)
+        """
+        n = len(leader)
+        if n != len(follower):
+            raise ValueError(f"Series lengths do not match: leader={n}, follower={len(follower)}")
+        if max_lag < 0 or max_lag >= n:
+            raise ValueError(f"max_lag must be between 0 and {n - 1}, received: {max_lag}")
+
+        leader_std = np.std(leader)
+        follower_std = np.std(follower)
+        if leader_std == 0 or follower_std == 0:
+            return np.zeros(2 * max_lag + 1)
+
+        x = (leader - np.mean(leader)) / leader_std
+        y = (follower - np.mean(follower)) / follower_std
+
+        # Relleno con ceros hasta una potencia de 2 >= 2n - 1 para evitar solapamiento circular
+        size = 1 << int(2 * n - 1).bit_length()
+        spectrum = np.conj(np.fft.rfft(x, size)) * np.fft.rfft(y, size)
+        circular = np.fft.irfft(spectrum, size)
+
+        # circular[k] = sum_t x[t] * y[t + k]; los desfases negativos quedan al final del buffer
+        lags = np.concatenate([circular[size - max_lag:], circular[:max_lag + 1]]) if max_lag else circular[:1]
+        return np.clip(lags / n, -1.0, 1.0)
+
+    @classmethod
+    def calculate_lead_lag(
+        cls,
+        aligned: "AlignedSeries",
+        leader_symbol: str,
+        follower_symbol: str,
+        max_lag: int = 12,
+        window: Optional[int] = None,
+        step: Optional[int] = None,
+        interval: str = "1h"
+    ) -> LeadLagAnalysis:
+        """
+        Analiza si un activo se adelanta a otro usando la correlación cruzada de retornos
+        @param aligned - Serie alineada por timestamp (SeriesAligner.align)
+        @param leader_symbol - Activo líder candidato (ej: DXY)
+        @param follower_symbol - Activo seguidor (ej: XAUUSD)
+        @param max_lag - Desfase máximo en velas
+        @param window - Tamaño de las ventanas móviles para medir estabilidad (opcional)
+        @param step - Paso entre ventanas móviles (default: window // 2)
+        @param interval - Intervalo de las velas (informativo)
+        @returns Análisis lead-lag con desfase dominante y su estabilidad
+        """
+        leader = aligned.returns(leader_symbol)
+        follower = aligned.returns(follower_symbol)
+        if len(leader) < 2 * max_lag + 2:
+            raise ValueError(
+                f"Need at least {2 * max_lag + 3} aligned bars for max_lag={max_lag}, "
+                f"got {len(leader) + 1}"
+            )
+
+        correlations = cls.cross_correlation(leader, follower, max_lag)
+        dominant_index = cls._dominant_lag_index(correlations, max_lag)
+        dominant_lag = dominant_index - max_lag
+
+        window_lags: list[int] = []
+        stability = None
+        if window and window > 2 * max_lag + 1 and len(leader) >= window:
+            stride = step or max(window // 2, 1)
+            for end in range(len(leader), window - 1, -stride):
+                window_corr = cls.cross_correlation(
+                    leader[end - window:end], follower[end - window:end], max_lag
+                )
+                window_lags.append(cls._dominant_lag_index(window_corr, max_lag) - max_lag)
+            window_lags.reverse()
+            matching = sum(1 for lag in window_lags if abs(lag - dominant_lag) <= cls.LEAD_LAG_TOLERANCE)
+            stability = round(matching / len(window_lags), 2)
+
+        dominant_correlation = float(correlations[dominant_index])
+        contemporaneous = float(correlations[max_lag])
+
+        return LeadLagAnalysis(
+            leader_symbol=leader_symbol,
+            follower_symbol=follower_symbol,
+            interval=interval,
+            observations=len(leader),
+            max_lag=max_lag,
+            lags=list(range(-max_lag, max_lag + 1)),
+            correlations=[round(float(value), 4) for value in correlations],
+            dominant_lag=dominant_lag,
+            dominant_correlation=round(dominant_correlation, 4),
+            contemporaneous_correlation=round(contemporaneous, 4),
+            window_lags=window_lags,
+            stability=stability,
+            interpretation=cls._generate_lead_lag_interpretation(
+                leader_symbol, follower_symbol, dominant_lag, dominant_correlation, stability, interval
+            )
+        )
+
+    @classmethod
+    def _dominant_lag_index(cls, correlations: np.ndarray, max_lag: int) -> int:
+        """
+        Índice del desfase dominante; se prefiere el lag 0 salvo que otro lo supere claramente
+        @param correlations - Correlaciones por desfase
+        @param max_lag - Desfase máximo (índice del lag 0)
+        @returns Índice en el array de correlaciones
+        """
+        best_index = int(np.argmax(np.abs(correlations)))
+        if abs(correlations[best_index]) - abs(correlations[max_lag]) < cls.LEAD_LAG_MIN_IMPROVEMENT:
+            return max_lag
+        return best_index
+
+    @staticmethod
+    def _generate_lead_lag_interpretation(
+        leader_symbol: str,
+        follower_symbol: str,
+        dominant_lag: int,
+        dominant_correlation: float,
+        stability: Optional[float],
+        interval: str
+    ) -> str:
+        """
+        Genera interpretación textual del análisis lead-lag
+        @param leader_symbol - Activo líder candidato
+        @param follower_symbol - Activo seguidor
+        @param dominant_lag - Desfase dominante en velas
+        @param dominant_correlation - Correlación en ese desfase
+        @param stability - Estabilidad entre ventanas (opcional)
+        @param interval - Intervalo de las velas
+        @returns Interpretación legible
+        """
+        if dominant_lag == 0:
+            text = (
+                f"{leader_symbol} y {follower_symbol} se mueven de forma simultánea "
+                f"(correlación {dominant_correlation:.2f} sin desfase)"
+            )
+        else:
+            first, second = (
+                (leader_symbol, follower_symbol) if dominant_lag > 0 else (follower_symbol, leader_symbol)
+            )
+            text = (
+                f"{first} se adelanta a {second} en {abs(dominant_lag)} vela(s) de {interval} "
+                f"(correlación {dominant_correlation:.2f})"
+            )
+
+        if stability is not None:
+            text += f"; desfase estable en el {stability * 100:.0f}% de las ventanas móviles"
+        return text
+
     @classmethod
     def _classify_strength(cls, abs_coefficient: float) -> CorrelationStrength:
         """
@@ -0,0 +1,68 @@
+"""
+Detección de huecos en series de velas almacenadas
+Compara los timestamps guardados con la rejilla esperada del intervalo (descontando cierres de
+fin de semana, pausas diarias y festivos del calendario de negociación) con una única diferencia
+de conjuntos vectorizada por serie
+"""
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from app.models.gap_repair import CandleGap
+from app.utils.trading_calendar import TradingCalendar
+
+
+class GapScanner:
+    """Huecos de una serie: rangos de velas esperadas que no están en market_data"""
+
+    @classmethod
+    def find_gaps(
+        cls,
+        timestamps: np.ndarray,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> list[CandleGap]:
+        """
+        Busca los huecos de una serie
+        La rejilla esperada toma la fase de la primera vela guardada (las velas H4 o diarias de cada
+        proveedor no empiezan necesariamente a medianoche) y cubre [start, end] o, por defecto,
+        desde la primera hasta la última vela guardada. Las velas que faltan consecutivas en la
+        rejilla (aunque las separe un fin de semana) forman un único hueco
+        @param timestamps - Timestamps guardados (datetime64 o datetime), ordenados
+        @param interval - Intervalo de las velas
+        @param start - Inicio del rango a revisar (opcional)
+        @param end - Fin del rango a revisar (opcional)
+        @returns Lista de huecos ordenados
+        """
+        step = TradingCalendar.interval_seconds(interval)
+        stored = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+        if len(stored) == 0:
+            return []
+
+        first = stored[0]
+        lower = int(np.datetime64(start, "s").astype(np.int64)) if start else first
+        upper = int(np.datetime64(end, "s").astype(np.int64)) if end else stored[-1]
+        if upper < lower:
+            raise ValueError("Gap scan end is before its start")
+
+        # Rejilla alineada a la fase de la primera vela guardada
+        grid_start = first + -(-(lower - first) // step) * step
+        grid = np.arange(grid_start, upper + 1, step, dtype=np.int64)
+        expected = grid[TradingCalendar.expected_bar_mask(grid, interval)]
+
+        missing_positions = np.flatnonzero(~np.isin(expected, stored, assume_unique=True))
+        if len(missing_positions) == 0:
+            return []
+
+        breaks = np.flatnonzero(np.diff(missing_positions) > 1) + 1
+        run_starts = np.concatenate(([0], breaks))
+        run_ends = np.concatenate((breaks, [len(missing_positions)])) - 1
+
+        starts = expected[missing_positions[run_starts]].astype("datetime64[s]").astype(datetime)
+        ends = expected[missing_positions[run_ends]].astype("datetime64[s]").astype(datetime)
+        return [
+            CandleGap(start=gap_start, end=gap_end, missing_bars=int(count))
+            for gap_start, gap_end, count in zip(starts, ends, run_ends - run_starts + 1)
+        ]
@@ -0,0 +1,44 @@
+"""
+Respuesta JSON serializada con orjson
+Clase de respuesta por defecto de la API. Los endpoints que devuelven datos generados internamente
+(modelos construidos con model_construct o dicts del análisis técnico) la devuelven directamente:
+FastAPI no vuelve a validar el contenido contra response_model ni lo recorre con jsonable_encoder,
+y la codificación la hace pydantic-core (modelos) u orjson (dicts)
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+class FastJSONResponse(ORJSONResponse):
+    """Respuesta JSON que serializa modelos pydantic y dicts con numpy sin pasos intermedios"""
+
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def render(self, content: Any) -> bytes:
+        """
+        Serializa el contenido
+        @param content - Modelo pydantic, dict/lista (puede contener modelos, enums, datetimes o numpy)
+        @returns Cuerpo JSON
+        """
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return orjson.dumps(content, default=self._default, option=self.OPTIONS)
+
+    @staticmethod
+    def _default(value: Any) -> Any:
+        """
+        Convierte los tipos que orjson no serializa de forma nativa
+        @param value - Valor no serializable
+        @returns Valor serializable
+        """
+        if isinstance(value, BaseModel):
+            return value.model_dump(mode="json")
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        if isinstance(value, Decimal):
+            return float(value)
+        raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
@@ -0,0 +1,189 @@
+"""
+Motor de confluencia de niveles psicológicos entre temporalidades
+Evalúa la rejilla de niveles sobre todas las temporalidades en una sola matriz niveles x velas
+(las series se concatenan y los conteos se reducen por segmento) en lugar de un barrido por nivel,
+vela y temporalidad
+"""
+from typing import Optional
+
+import numpy as np
+
+from app.models.psychological_levels import (
+    LevelConfluence,
+    LevelType,
+    ReactionType,
+    TimeframeLevelStats,
+)
+from app.utils.candle_arrays import CandleArrays
+
+
+class LevelConfluenceEngine:
+    """Reacciones de niveles redondos por temporalidad y puntuación de confluencia"""
+
+    # Tolerancia en puntos para considerar que una vela tocó el nivel
+    TOUCH_TOLERANCE = 0.5
+
+    # Rebotes con los que un nivel alcanza fuerza 1 en una temporalidad
+    BOUNCES_FOR_FULL_STRENGTH = 5.0
+
+    # Peso de cada temporalidad en la puntuación de confluencia (las mayores pesan más)
+    TIMEFRAME_WEIGHTS = {
+        "Weekly": 4.0,
+        "Daily": 3.0,
+        "H4": 2.0,
+        "H1": 1.0,
+    }
+    DEFAULT_TIMEFRAME_WEIGHT = 1.0
+
+    @classmethod
+    def reaction_counts(
+        cls,
+        series: list[CandleArrays],
+        levels: np.ndarray,
+        tolerance: float = TOUCH_TOLERANCE
+    ) -> dict[str, np.ndarray]:
+        """
+        Cuenta rebotes y rupturas de cada nivel en cada serie con una sola matriz niveles x velas
+        Misma regla que PsychologicalLevelsService._analyze_level: una vela que toca el nivel es rebote
+        si cierra del lado del que vino la mecha; si no, es ruptura cuando la vela siguiente (de la misma
+        serie) cierra del otro lado del nivel
+        @param series - Series de velas ordenadas (una por temporalidad, no vacías)
+        @param levels - Niveles a evaluar
+        @param tolerance - Tolerancia en puntos
+        @returns Dict con matrices (niveles x series): bounces, breaks, last_index (-1 si no hay
+                 reacción, índice local en la serie) y last_is_break
+        """
+        shape = (len(levels), len(series))
+        result = {
+            "bounces": np.zeros(shape, dtype=np.int64),
+            "breaks": np.zeros(shape, dtype=np.int64),
+            "last_index": np.full(shape, -1, dtype=np.int64),
+            "last_is_break": np.zeros(shape, dtype=bool),
+        }
+        if not len(levels) or not series:
+            return result
+
+        lengths = np.array([len(arrays) for arrays in series])
+        if (lengths == 0).any():
+            raise ValueError("Every series must contain at least one candle")
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        highs = np.concatenate([arrays.highs for arrays in series])
+        lows = np.concatenate([arrays.lows for arrays in series])
+        closes = np.concatenate([arrays.closes for arrays in series])
+
+        # Cierre de la vela siguiente; la última vela de cada serie no tiene siguiente
+        next_closes = np.append(closes[1:], np.nan)
+        next_closes[starts + lengths - 1] = np.nan
+
+        level_column = np.asarray(levels, dtype=np.float64)[:, None]
+        touched = (lows - tolerance <= level_column) & (level_column <= highs + tolerance)
+        bounce_up = touched & (closes > level_column) & (lows <= level_column + tolerance)
+        bounce_down = touched & ~bounce_up & (closes < level_column) & (highs >= level_column - tolerance)
+        bounces = bounce_up | bounce_down
+        breaks = touched & ~bounces & (
+            ((closes < level_column) & (level_column < next_closes))
+            | ((closes > level_column) & (level_column > next_closes))
+        )
+
+        result["bounces"] = np.add.reduceat(bounces, starts, axis=1)
+        result["breaks"] = np.add.reduceat(breaks, starts, axis=1)
+
+        positions = np.where(bounces | breaks, np.arange(len(closes)), -1)
+        last_global = np.maximum.reduceat(positions, starts, axis=1)
+        has_reaction = last_global >= 0
+        result["last_index"] = np.where(has_reaction, last_global - starts, -1)
+        result["last_is_break"] = has_reaction & np.take_along_axis(
+            breaks, np.maximum(last_global, 0), axis=1
+        )
+        return result
+
+    @classmethod
+    def analyze(
+        cls,
+        series_by_timeframe: dict[str, CandleArrays],
+        levels: list[float],
+        current_price: float
+    ) -> list[LevelConfluence]:
+        """
+        Evalúa la rejilla de niveles en todas las temporalidades y puntúa la confluencia
+        @param series_by_timeframe - Dict {temporalidad: serie de velas}; las series vacías se omiten
+        @param levels - Niveles redondos a evaluar (generados una sola vez)
+        @param current_price - Precio actual
+        @returns Lista de LevelConfluence en el orden de los niveles
+        """
+        timeframes = [timeframe for timeframe, arrays in series_by_timeframe.items() if len(arrays)]
+        series = [series_by_timeframe[timeframe] for timeframe in timeframes]
+        counts = cls.reaction_counts(series, np.asarray(levels, dtype=np.float64))
+
+        strengths = np.minimum(counts["bounces"] / cls.BOUNCES_FOR_FULL_STRENGTH, 1.0)
+        weights = np.array([
+            cls.TIMEFRAME_WEIGHTS.get(timeframe, cls.DEFAULT_TIMEFRAME_WEIGHT) for timeframe in timeframes
+        ])
+        scores = strengths @ weights / weights.sum() if len(weights) else np.zeros(len(levels))
+
+        results: list[LevelConfluence] = []
+        for row, level in enumerate(levels):
+            by_timeframe = [
+                cls._timeframe_stats(timeframe, series[column], counts, strengths, row, column)
+                for column, timeframe in enumerate(timeframes)
+            ]
+            results.append(LevelConfluence(
+                level=level,
+                type=cls.level_type(level, current_price),
+                distance_from_current=round(level - current_price, 2),
+                is_round_hundred=level % 100 == 0,
+                by_timeframe=by_timeframe,
+                timeframes_with_reactions=int(((counts["bounces"][row] + counts["breaks"][row]) > 0).sum()),
+                confluence_score=round(float(scores[row]), 2),
+            ))
+        return results
+
+    @staticmethod
+    def level_type(level: float, current_price: float) -> LevelType:
+        """
+        Tipo de nivel según su posición respecto al precio actual
+        @param level - Precio del nivel
+        @param current_price - Precio actual
+        @returns Soporte, resistencia o ambos
+        """
+        if level < current_price:
+            return LevelType.SUPPORT
+        if level > current_price:
+            return LevelType.RESISTANCE
+        return LevelType.BOTH
+
+    @staticmethod
+    def _timeframe_stats(
+        timeframe: str,
+        arrays: CandleArrays,
+        counts: dict[str, np.ndarray],
+        strengths: np.ndarray,
+        row: int,
+        column: int
+    ) -> TimeframeLevelStats:
+        """
+        Construye las estadísticas de un nivel en una temporalidad a partir de las matrices de conteo
+        @param timeframe - Temporalidad
+        @param arrays - Serie de la temporalidad
+        @param counts - Resultado de reaction_counts
+        @param strengths - Fuerza por nivel y temporalidad
+        @param row - Fila del nivel
+        @param column - Columna de la temporalidad
+        @returns TimeframeLevelStats
+        """
+        last_index = int(counts["last_index"][row, column])
+        last_reaction_date: Optional[str] = None
+        last_reaction_type: Optional[ReactionType] = None
+        if last_index >= 0:
+            last_reaction_date = arrays.timestamp_at(last_index).isoformat()
+            last_reaction_type = ReactionType.BREAK if counts["last_is_break"][row, column] else ReactionType.BOUNCE
+
+        return TimeframeLevelStats(
+            timeframe=timeframe,
+            strength=round(float(strengths[row, column]), 2),
+            bounce_count=int(counts["bounces"][row, column]),
+            break_count=int(counts["breaks"][row, column]),
+            last_reaction_date=last_reaction_date,
+            last_reaction_type=last_reaction_type,
+        )
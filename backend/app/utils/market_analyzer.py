@@ -12,6 +12,7 @@ from app.models.market_analysis import (
 )
 from app.utils.trading_sessions import TradingSessions
 from app.utils.volatility_calculator import VolatilityCalculator
+from app.utils.volatility_distribution import VolatilityDistribution
 from app.utils.psychological_level_detector import PsychologicalLevelDetector
 
 
@@ -51,7 +52,8 @@ class MarketAnalyzer:
         candles: list[PriceCandle],
         previous_day_high: Optional[float] = None,
         previous_day_low: Optional[float] = None,
-        historical_candles: Optional[list[PriceCandle]] = None
+        historical_candles: Optional[list[PriceCandle]] = None,
+        volatility_distribution: Optional[VolatilityDistribution] = None
     ) -> SessionAnalysis:
         """
         Analiza una sesión de trading
@@ -60,6 +62,7 @@ class MarketAnalyzer:
         @param previous_day_high - Máximo del día anterior (opcional)
         @param previous_day_low - Mínimo del día anterior (opcional)
         @param historical_candles - Velas históricas para análisis de volatilidad (opcional)
+        @param volatility_distribution - Distribución histórica de ATR para clasificar por percentil (opcional)
         @returns Análisis de la sesión
         """
         if not candles:
@@ -91,7 +94,8 @@ class MarketAnalyzer:
         # Calcular volatilidad de la sesión
         volatility = VolatilityCalculator.analyze_session_volatility(
             session_candles=sorted_candles,
-            historical_candles=historical_candles
+            historical_candles=historical_candles,
+            distribution=volatility_distribution
         )
         
         # Detectar rupturas de niveles psicológicos
@@ -0,0 +1,202 @@
+"""
+Simulador Monte Carlo de trayectorias de precio
+Genera todas las trayectorias en una sola matriz (trayectorias x velas) a partir de los retornos
+recientes, por remuestreo (bootstrap) o GBM, y mide la proporción de trayectorias que tocan o
+rompen cada nivel dentro del horizonte, con intervalos de confianza de Wilson
+"""
+from typing import Optional
+
+import numpy as np
+
+from app.models.scenario_probability import (
+    MonteCarloSimulation,
+    SimulatedLevel,
+    SimulationMethod,
+)
+
+
+class MonteCarloSimulator:
+    """Probabilidades empíricas de toque/ruptura de niveles por simulación vectorizada"""
+
+    # Trayectorias por defecto y máximo (acotan memoria y tiempo: trayectorias x horizonte floats)
+    DEFAULT_PATHS = 2000
+    MAX_PATHS = 10000
+
+    # Horizonte por defecto y máximo en velas
+    DEFAULT_HORIZON = 24
+    MAX_HORIZON = 240
+
+    # Retornos usados para estimar la distribución (ventana) y el régimen de volatilidad
+    RETURNS_WINDOW = 500
+    REGIME_WINDOW = 20
+    MIN_RETURNS = 30
+
+    # z de los intervalos de confianza (95%)
+    CONFIDENCE = 0.95
+    CONFIDENCE_Z = 1.96
+
+    @classmethod
+    def log_returns(cls, closes: np.ndarray) -> np.ndarray:
+        """
+        Retornos logarítmicos de la ventana reciente
+        @param closes - Precios de cierre ordenados
+        @returns Últimos RETURNS_WINDOW retornos logarítmicos
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        returns = np.diff(np.log(closes[closes > 0]))
+        return returns[-cls.RETURNS_WINDOW:]
+
+    @classmethod
+    def regime_ratio(cls, returns: np.ndarray) -> float:
+        """
+        Relación entre la volatilidad de las últimas REGIME_WINDOW velas y la de toda la ventana
+        @param returns - Retornos logarítmicos
+        @returns Ratio (1.0 si la ventana no tiene volatilidad)
+        """
+        window_std = float(np.std(returns))
+        if window_std == 0:
+            return 1.0
+        return float(np.std(returns[-cls.REGIME_WINDOW:])) / window_std
+
+    @classmethod
+    def simulate_paths(
+        cls,
+        returns: np.ndarray,
+        paths: int,
+        horizon: int,
+        method: SimulationMethod = SimulationMethod.BOOTSTRAP,
+        regime_ratio: float = 1.0,
+        seed: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Genera trayectorias de log-precio relativas al precio actual (0 = precio actual)
+        Bootstrap remuestrea los retornos históricos reescalados al régimen de volatilidad actual;
+        GBM usa incrementos normales con la media de la ventana y la volatilidad del régimen
+        @param returns - Retornos logarítmicos históricos
+        @param paths - Número de trayectorias
+        @param horizon - Velas por trayectoria
+        @param method - Método de generación
+        @param regime_ratio - Factor aplicado a la dispersión de los retornos
+        @param seed - Semilla del generador (opcional, para reproducibilidad)
+        @returns Matriz (paths x horizon) de log-precios acumulados
+        """
+        rng = np.random.default_rng(seed)
+        mean = float(np.mean(returns))
+        if method == SimulationMethod.GBM:
+            sigma = float(np.std(returns)) * regime_ratio
+            increments = rng.normal(mean, sigma, size=(paths, horizon))
+        else:
+            scaled = mean + (returns - mean) * regime_ratio
+            increments = rng.choice(scaled, size=(paths, horizon))
+        return np.cumsum(increments, axis=1)
+
+    @classmethod
+    def wilson_interval(cls, hits: np.ndarray, total: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Intervalo de confianza de Wilson para proporciones
+        @param hits - Número de éxitos (escalar o array)
+        @param total - Número de ensayos
+        @returns Tupla (límite inferior, límite superior)
+        """
+        z = cls.CONFIDENCE_Z
+        p = np.asarray(hits, dtype=np.float64) / total
+        denominator = 1 + z ** 2 / total
+        center = (p + z ** 2 / (2 * total)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / total + z ** 2 / (4 * total ** 2)) / denominator
+        return np.clip(center - margin, 0.0, 1.0), np.clip(center + margin, 0.0, 1.0)
+
+    @classmethod
+    def simulate(
+        cls,
+        closes: np.ndarray,
+        levels: list[float],
+        current_price: Optional[float] = None,
+        horizon: int = DEFAULT_HORIZON,
+        paths: int = DEFAULT_PATHS,
+        method: SimulationMethod = SimulationMethod.BOOTSTRAP,
+        seed: Optional[int] = None
+    ) -> MonteCarloSimulation:
+        """
+        Simula trayectorias y calcula la probabilidad de tocar y romper cada nivel en el horizonte
+        Un nivel se toca si el extremo de la trayectoria lo alcanza y se rompe si además la
+        trayectoria termina al otro lado. Las trayectorias son de cierres, por lo que los toques
+        intravela no se cuentan (probabilidades conservadoras)
+        @param closes - Cierres históricos ordenados (se usan los últimos RETURNS_WINDOW retornos)
+        @param levels - Niveles a evaluar
+        @param current_price - Precio de partida (por defecto el último cierre)
+        @param horizon - Velas a simular (1..MAX_HORIZON)
+        @param paths - Trayectorias (se acota a MAX_PATHS)
+        @param method - Bootstrap o GBM
+        @param seed - Semilla del generador (opcional)
+        @returns MonteCarloSimulation con probabilidades e intervalos por nivel
+        """
+        if not 1 <= horizon <= cls.MAX_HORIZON:
+            raise ValueError(f"Horizon must be between 1 and {cls.MAX_HORIZON} bars, got {horizon}")
+        if paths < 1:
+            raise ValueError(f"Number of paths must be positive, got {paths}")
+
+        returns = cls.log_returns(closes)
+        if len(returns) < cls.MIN_RETURNS:
+            raise ValueError(
+                f"At least {cls.MIN_RETURNS} returns are required for simulation, got {len(returns)}"
+            )
+
+        paths = min(paths, cls.MAX_PATHS)
+        if current_price is None:
+            current_price = float(np.asarray(closes, dtype=np.float64)[-1])
+        regime_ratio = cls.regime_ratio(returns)
+
+        log_paths = cls.simulate_paths(returns, paths, horizon, method, regime_ratio, seed)
+        # El extremo incluye el punto de partida (log-precio 0)
+        path_max = current_price * np.exp(np.maximum(log_paths.max(axis=1), 0.0))
+        path_min = current_price * np.exp(np.minimum(log_paths.min(axis=1), 0.0))
+        terminal = current_price * np.exp(log_paths[:, -1])
+
+        level_column = np.asarray(levels, dtype=np.float64)[:, None]
+        above = level_column >= current_price
+        touched = np.where(above, path_max >= level_column, path_min <= level_column)
+        broken = touched & np.where(above, terminal > level_column, terminal < level_column)
+
+        touch_hits = touched.sum(axis=1)
+        break_hits = broken.sum(axis=1)
+        touch_lower, touch_upper = cls.wilson_interval(touch_hits, paths)
+        break_lower, break_upper = cls.wilson_interval(break_hits, paths)
+
+        simulated_levels = [
+            SimulatedLevel(
+                level=float(level),
+                side="above" if above[k, 0] else "below",
+                touch_probability=round(float(touch_hits[k] / paths), 4),
+                touch_lower=round(float(touch_lower[k]), 4),
+                touch_upper=round(float(touch_upper[k]), 4),
+                break_probability=round(float(break_hits[k] / paths), 4),
+                break_lower=round(float(break_lower[k]), 4),
+                break_upper=round(float(break_upper[k]), 4),
+                hold_probability=round(float((touch_hits[k] - break_hits[k]) / paths), 4),
+            )
+            for k, level in enumerate(levels)
+        ]
+
+        simulation = MonteCarloSimulation(
+            method=method,
+            paths=paths,
+            horizon_bars=horizon,
+            current_price=current_price,
+            volatility=round(float(np.std(returns)) * regime_ratio, 6),
+            regime_ratio=round(regime_ratio, 4),
+            confidence=cls.CONFIDENCE,
+            levels=simulated_levels,
+        )
+
+        # Rango: trayectorias que no tocan ni el soporte ni la resistencia más cercanos
+        resistance = simulation.nearest_level("above")
+        support = simulation.nearest_level("below")
+        if resistance and support:
+            inside = (path_max < resistance.level) & (path_min > support.level)
+            range_hits = int(inside.sum())
+            range_lower, range_upper = cls.wilson_interval(range_hits, paths)
+            simulation.range_probability = round(range_hits / paths, 4)
+            simulation.range_lower = round(float(range_lower), 4)
+            simulation.range_upper = round(float(range_upper), 4)
+
+        return simulation
@@ -2,11 +2,15 @@
 Utilidad para análisis multi-temporalidad
 Detecta convergencias/divergencias entre timeframes y zonas calientes
 """
-from typing import Optional
+from bisect import bisect_left
 from datetime import datetime, timedelta
 from enum import Enum
 
+import numpy as np
+
 from app.models.market_analysis import PriceCandle, MarketDirection
+from app.utils.bar_feature_calculator import BarFeatureCalculator
+from app.utils.candle_arrays import CandleArrays
 
 
 class TimeframeConvergence(str, Enum):
@@ -98,6 +102,34 @@ class MultiTimeframeAnalyzer:
         
         return TimeframeConvergence.NEUTRAL
     
+    @classmethod
+    def score_trend_matrices(
+        cls,
+        trend_matrices: dict[str, np.ndarray]
+    ) -> tuple[TimeframeConvergence, float]:
+        """
+        Convergencia y grado de alineación a partir de las tendencias multi-ventana de cada timeframe
+        Cada timeframe toma la dirección mayoritaria de sus ventanas en la última vela; la alineación
+        es el valor absoluto de la media de todos los códigos (1 = todas las ventanas coinciden)
+        @param trend_matrices - Dict con {timeframe: matriz ventanas x velas de códigos 1/-1/0}
+        @returns Tupla (convergencia, alineación 0-1)
+        """
+        current = {
+            timeframe: np.asarray(matrix)[:, -1]
+            for timeframe, matrix in trend_matrices.items()
+            if np.asarray(matrix).size
+        }
+        if not current:
+            return TimeframeConvergence.NEUTRAL, 0.0
+        
+        directions = {
+            timeframe: BarFeatureCalculator.trend_direction(int(np.sign(codes.sum())))
+            for timeframe, codes in current.items()
+        }
+        
+        alignment = abs(float(np.concatenate(list(current.values())).mean()))
+        return cls.detect_convergence(directions), round(alignment, 2)
+    
     @classmethod
     def detect_hot_zones(
         cls,
@@ -115,43 +147,38 @@ class MultiTimeframeAnalyzer:
         if not candles or len(candles) < 3:
             return []
         
-        hot_zones: list[HotZone] = []
-        now = datetime.now()
-        cutoff_time = now - timedelta(minutes=lookback_minutes)
+        sorted_candles = sorted(candles, key=lambda c: c.timestamp)
+        cutoff_time = datetime.now() - timedelta(minutes=lookback_minutes)
         
-        # Analizar últimas velas buscando reacciones significativas
-        for i in range(1, len(candles) - 1):
-            candle = candles[i]
-            prev_candle = candles[i - 1]
-            next_candle = candles[i + 1]
-            
-            # Filtrar por tiempo
-            if candle.timestamp < cutoff_time:
-                continue
-            
-            # Detectar bounce (rebote en low)
-            bounce = cls._detect_bounce(candle, prev_candle, next_candle)
-            if bounce:
+        # Solo se evalúan las velas dentro de la ventana (necesitan vecina anterior y siguiente)
+        first = max(1, bisect_left(sorted_candles, cutoff_time, key=lambda c: c.timestamp))
+        if first >= len(sorted_candles) - 1:
+            return []
+        
+        window = CandleArrays.from_candles(sorted_candles[first - 1:])
+        bounces, rejections = cls._reaction_strengths(window)
+        
+        hot_zones: list[HotZone] = []
+        for position in np.flatnonzero(~np.isnan(bounces) | ~np.isnan(rejections)).tolist():
+            candle = sorted_candles[first - 1 + position]
+            if not np.isnan(bounces[position]):
                 hot_zones.append(
                     HotZone(
                         price_level=candle.low,
                         timeframe=timeframe,
                         reaction_type="bounce",
                         timestamp=candle.timestamp,
-                        strength=bounce
+                        strength=float(bounces[position])
                     )
                 )
-            
-            # Detectar rejection (rechazo en high)
-            rejection = cls._detect_rejection(candle, prev_candle, next_candle)
-            if rejection:
+            if not np.isnan(rejections[position]):
                 hot_zones.append(
                     HotZone(
                         price_level=candle.high,
                         timeframe=timeframe,
                         reaction_type="rejection",
                         timestamp=candle.timestamp,
-                        strength=rejection
+                        strength=float(rejections[position])
                     )
                 )
         
@@ -161,95 +188,51 @@ class MultiTimeframeAnalyzer:
         # Retornar top 5 más relevantes
         return hot_zones[:5]
     
-    @classmethod
-    def _detect_bounce(
-        cls,
-        candle: PriceCandle,
-        prev_candle: PriceCandle,
-        next_candle: PriceCandle
-    ) -> Optional[float]:
+    @staticmethod
+    def _reaction_strengths(arrays: CandleArrays) -> tuple[np.ndarray, np.ndarray]:
         """
-        Detecta un rebote (precio baja y luego sube)
-        @param candle - Vela actual
-        @param prev_candle - Vela anterior
-        @param next_candle - Vela siguiente
-        @returns Fuerza del rebote (0-1) o None
+        Fuerza de rebote y de rechazo (0-1) de cada vela con vecina anterior y siguiente
+        Rebote: low menor que el anterior, vela alcista y la siguiente cierra más arriba
+        Rechazo: high mayor que el anterior, vela bajista y la siguiente cierra más abajo
+        La fuerza es el promedio del ratio de mecha y la recuperación/caída; por debajo de 0.3 se descarta
+        @param arrays - Serie de velas ordenada
+        @returns Tupla (rebotes, rechazos) con NaN donde no hay reacción (primera y última vela incluidas)
         """
-        # Condiciones para bounce:
-        # 1. Vela actual tiene low menor que prev
-        # 2. Vela actual es alcista (close > open)
-        # 3. Vela siguiente continúa al alza
+        bounces = np.full(len(arrays), np.nan)
+        rejections = np.full(len(arrays), np.nan)
+        if len(arrays) < 3:
+            return bounces, rejections
         
-        if candle.low >= prev_candle.low:
-            return None
+        opens, highs, lows, closes = arrays.opens, arrays.highs, arrays.lows, arrays.closes
+        current = slice(1, -1)
+        body = np.abs(closes[current] - opens[current])
+        candle_range = highs[current] - lows[current]
+        safe_range = np.where(candle_range > 0, candle_range, 1.0)
         
-        is_bullish = candle.close > candle.open
-        next_continues = next_candle.close > candle.close
-        
-        if not is_bullish or not next_continues:
-            return None
-        
-        # Calcular fuerza basada en:
-        # - Tamaño del wick inferior
-        # - Recuperación de precio
-        lower_wick = min(candle.open, candle.close) - candle.low
-        body_size = abs(candle.close - candle.open)
-        
-        if body_size == 0:
-            return None
-        
-        wick_ratio = lower_wick / (lower_wick + body_size)
-        recovery = (next_candle.close - candle.low) / (candle.high - candle.low) if candle.high > candle.low else 0
-        
-        # Fuerza = promedio de wick ratio y recovery
-        strength = (wick_ratio + recovery) / 2
-        
-        return min(strength, 1.0) if strength > 0.3 else None
-    
-    @classmethod
-    def _detect_rejection(
-        cls,
-        candle: PriceCandle,
-        prev_candle: PriceCandle,
-        next_candle: PriceCandle
-    ) -> Optional[float]:
-        """
-        Detecta un rechazo (precio sube y luego baja)
-        @param candle - Vela actual
-        @param prev_candle - Vela anterior
-        @param next_candle - Vela siguiente
-        @returns Fuerza del rechazo (0-1) o None
-        """
-        # Condiciones para rejection:
-        # 1. Vela actual tiene high mayor que prev
-        # 2. Vela actual es bajista (close < open)
-        # 3. Vela siguiente continúa a la baja
-        
-        if candle.high <= prev_candle.high:
-            return None
-        
-        is_bearish = candle.close < candle.open
-        next_continues = next_candle.close < candle.close
-        
-        if not is_bearish or not next_continues:
-            return None
-        
-        # Calcular fuerza basada en:
-        # - Tamaño del wick superior
-        # - Caída de precio
-        upper_wick = candle.high - max(candle.open, candle.close)
-        body_size = abs(candle.close - candle.open)
-        
-        if body_size == 0:
-            return None
-        
-        wick_ratio = upper_wick / (upper_wick + body_size)
-        fall = (candle.high - next_candle.close) / (candle.high - candle.low) if candle.high > candle.low else 0
-        
-        # Fuerza = promedio de wick ratio y fall
-        strength = (wick_ratio + fall) / 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lower_wick = np.minimum(opens[current], closes[current]) - lows[current]
+            recovery = np.where(candle_range > 0, (closes[2:] - lows[current]) / safe_range, 0.0)
+            bounce = (lower_wick / (lower_wick + body) + recovery) / 2
+            is_bounce = (
+                (lows[current] < lows[:-2])
+                & (closes[current] > opens[current])
+                & (closes[2:] > closes[current])
+                & (bounce > 0.3)
+            )
+            
+            upper_wick = highs[current] - np.maximum(opens[current], closes[current])
+            fall = np.where(candle_range > 0, (highs[current] - closes[2:]) / safe_range, 0.0)
+            rejection = (upper_wick / (upper_wick + body) + fall) / 2
+            is_rejection = (
+                (highs[current] > highs[:-2])
+                & (closes[current] < opens[current])
+                & (closes[2:] < closes[current])
+                & (rejection > 0.3)
+            )
         
-        return min(strength, 1.0) if strength > 0.3 else None
+        bounces[current] = np.where(is_bounce, np.minimum(bounce, 1.0), np.nan)
+        rejections[current] = np.where(is_rejection, np.minimum(rejection, 1.0), np.nan)
+        return bounces, rejections
     
     @classmethod
     def calculate_convergence_strength(
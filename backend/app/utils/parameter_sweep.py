@@ -0,0 +1,337 @@
+"""
+Barrido de parámetros de los umbrales de análisis técnico sobre datos históricos
+Evalúa el producto cartesiano de una rejilla de umbrales (tendencia, impulso, tolerancia de
+retesteo y ratios de volatilidad) contra los retornos futuros de la serie. Las columnas que no
+dependen de los parámetros se calculan una sola vez y se comparten con los procesos del pool en
+un bloque de memoria compartida de solo lectura (sin copiar la serie a cada proceso)
+"""
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from app.models.market_analysis import VolatilityLevel
+from app.models.parameter_sweep import SweepResult
+from app.utils.bar_feature_calculator import BarFeatureCalculator
+from app.utils.candle_arrays import CandleArrays
+from app.utils.retest_detector import RetestDetector
+from app.utils.technical_analysis import TechnicalAnalysis
+from app.utils.volatility_calculator import VolatilityCalculator
+
+logger = logging.getLogger(__name__)
+
+# Bloque compartido adjuntado por cada proceso del pool (ver ParameterSweep._attach_block)
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+_worker_block: Optional[np.ndarray] = None
+
+
+class ParameterSweep:
+    """Evalúa rejillas de umbrales en paralelo y devuelve una tabla ordenada de resultados"""
+
+    # Parámetros barribles y sus valores actuales en el código de análisis
+    DEFAULT_PARAMETERS = {
+        "trend_threshold_percent": TechnicalAnalysis.TREND_THRESHOLD_PERCENT,
+        "impulse_strong_percent": TechnicalAnalysis.IMPULSE_STRONG_PERCENT,
+        "retest_tolerance": RetestDetector.RETEST_TOLERANCE,
+        "volatility_extreme_ratio": VolatilityCalculator.RATIO_THRESHOLDS[VolatilityLevel.EXTREME],
+        "volatility_high_ratio": VolatilityCalculator.RATIO_THRESHOLDS[VolatilityLevel.HIGH],
+        "volatility_normal_ratio": VolatilityCalculator.RATIO_THRESHOLDS[VolatilityLevel.NORMAL],
+    }
+
+    # Métricas por las que se puede ordenar la tabla
+    SORT_METRICS = ("score", "trend_hit_rate", "impulse_hit_rate", "retest_hit_rate", "volatility_hit_rate")
+
+    # Velas hacia delante con las que se valida cada señal
+    FORWARD_BARS = 12
+
+    # Separación de los niveles redondos usados como soportes/resistencias en los retesteos
+    LEVEL_STEP = 10.0
+
+    # Velas de la media de ATR con la que se calcula el ratio de volatilidad
+    VOLATILITY_WINDOW = 100
+
+    # Filas del bloque compartido (columnas precalculadas independientes de los parámetros)
+    ROWS = ("high", "low", "close", "forward_change", "impulse_percent", "atr_ratio", "forward_atr_ratio")
+
+    # Combinaciones por tarea enviada al pool (por proceso)
+    TASKS_PER_WORKER = 4
+
+    @classmethod
+    def run(
+        cls,
+        arrays: CandleArrays,
+        grid: Optional[dict[str, list[float]]] = None,
+        forward_bars: int = FORWARD_BARS,
+        level_step: float = LEVEL_STEP,
+        workers: Optional[int] = None,
+        sort_by: str = "score"
+    ) -> list[SweepResult]:
+        """
+        Evalúa todas las combinaciones de la rejilla sobre una serie histórica
+        @param arrays - Velas ordenadas por timestamp
+        @param grid - Valores a probar por parámetro (los omitidos usan su valor actual)
+        @param forward_bars - Velas hacia delante para validar cada señal
+        @param level_step - Separación de los niveles redondos de los retesteos
+        @param workers - Procesos en paralelo (1 = sin pool; por defecto, número de CPUs)
+        @param sort_by - Métrica de ordenación (SORT_METRICS)
+        @returns Lista de SweepResult ordenada de mejor a peor
+        """
+        if sort_by not in cls.SORT_METRICS:
+            raise ValueError(f"Unknown sort metric '{sort_by}', expected one of {', '.join(cls.SORT_METRICS)}")
+        if forward_bars < 1:
+            raise ValueError(f"Forward bars must be positive, got {forward_bars}")
+        if level_step <= 0:
+            raise ValueError(f"Level step must be positive, got {level_step}")
+        minimum_bars = BarFeatureCalculator.TREND_LOOKBACK + forward_bars + 1
+        if len(arrays) < minimum_bars:
+            raise ValueError(f"At least {minimum_bars} candles are required for a sweep, got {len(arrays)}")
+
+        combinations = cls.expand_grid(grid or {})
+        block = cls.prepare(arrays, forward_bars)
+
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(combinations) == 1:
+            metrics = cls._evaluate_many(block, combinations, level_step)
+        else:
+            metrics = cls._evaluate_shared(block, combinations, level_step, workers)
+
+        logger.info(f"Evaluated {len(combinations)} parameter combinations over {len(arrays)} candles")
+        return cls.rank(metrics, sort_by)
+
+    @classmethod
+    def expand_grid(cls, grid: dict[str, list[float]]) -> list[dict[str, float]]:
+        """
+        Producto cartesiano de la rejilla, descartando ratios de volatilidad no ordenados
+        @param grid - Valores a probar por parámetro
+        @returns Lista de combinaciones (todas con los parámetros de DEFAULT_PARAMETERS)
+        """
+        unknown = set(grid) - set(cls.DEFAULT_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+        empty = [name for name, values in grid.items() if not len(values)]
+        if empty:
+            raise ValueError(f"Sweep parameters without values: {', '.join(empty)}")
+
+        names = list(cls.DEFAULT_PARAMETERS)
+        values = [[float(value) for value in grid.get(name, [cls.DEFAULT_PARAMETERS[name]])] for name in names]
+        combinations = [
+            combination
+            for combination in (dict(zip(names, product)) for product in itertools.product(*values))
+            if combination["volatility_extreme_ratio"]
+            >= combination["volatility_high_ratio"]
+            >= combination["volatility_normal_ratio"]
+        ]
+        if not combinations:
+            raise ValueError("No valid combinations: volatility ratios must satisfy extreme >= high >= normal")
+        return combinations
+
+    @classmethod
+    def prepare(cls, arrays: CandleArrays, forward_bars: int = FORWARD_BARS) -> np.ndarray:
+        """
+        Calcula las columnas que no dependen de los parámetros
+        @param arrays - Velas ordenadas por timestamp
+        @param forward_bars - Velas hacia delante para validar cada señal
+        @returns Matriz (ROWS x velas) en float64; NaN donde la columna no está definida
+        """
+        highs, lows, closes = arrays.highs, arrays.lows, arrays.closes
+        n = len(closes)
+        block = np.full((len(cls.ROWS), n), np.nan)
+        block[0], block[1], block[2] = highs, lows, closes
+
+        # Cambio de precio en las velas siguientes (la señal de la vela i se valida con i + N)
+        block[3, :n - forward_bars] = closes[forward_bars:] - closes[:-forward_bars]
+
+        # Distancia porcentual con signo entre cierres consecutivos (regla de analyze_impulse_strength)
+        block[4, 1:] = (closes[1:] - closes[:-1]) / closes[:-1] * 100
+
+        # ATR actual frente a su media móvil (entrada de classify_volatility)
+        atr = BarFeatureCalculator.atr_series(highs, lows, closes)
+        cumulative_atr = np.concatenate(([0.0], np.cumsum(np.nan_to_num(atr))))
+        ends = np.arange(1, n)
+        counts = np.minimum(ends, cls.VOLATILITY_WINDOW)
+        average_atr = np.full(n, np.nan)
+        average_atr[1:] = (cumulative_atr[ends + 1] - cumulative_atr[ends + 1 - counts]) / counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            block[5] = atr / average_atr
+
+            # Rango verdadero medio de las velas siguientes frente a la media de ATR de la vela
+            true_ranges = np.zeros(n)
+            true_ranges[1:] = np.maximum.reduce([
+                highs[1:] - lows[1:],
+                np.abs(highs[1:] - closes[:-1]),
+                np.abs(lows[1:] - closes[:-1]),
+            ])
+            cumulative_ranges = np.cumsum(true_ranges)
+            forward_mean = (cumulative_ranges[forward_bars:] - cumulative_ranges[:-forward_bars]) / forward_bars
+            block[6, :n - forward_bars] = forward_mean / average_atr[:n - forward_bars]
+
+        ratios = block[5:]
+        ratios[~np.isfinite(ratios)] = np.nan
+        return block
+
+    @classmethod
+    def evaluate(cls, block: np.ndarray, parameters: dict[str, float], level_step: float = LEVEL_STEP) -> SweepResult:
+        """
+        Evalúa una combinación de parámetros sobre las columnas precalculadas
+        @param block - Resultado de prepare
+        @param parameters - Combinación completa de parámetros
+        @param level_step - Separación de los niveles redondos de los retesteos
+        @returns SweepResult sin posición asignada
+        """
+        highs, lows, closes, forward_change, impulse_percent, atr_ratio, forward_atr_ratio = block
+        validated = ~np.isnan(forward_change)
+        forward_sign = np.sign(forward_change)
+
+        # Tendencia: misma regla que identify_trend con el umbral de la combinación
+        codes = BarFeatureCalculator.trend_series(
+            highs, lows, closes, threshold_percent=parameters["trend_threshold_percent"]
+        )
+        trend = validated & (codes != 0)
+        trend_hits = forward_sign[trend] == codes[trend]
+
+        # Impulso: un impulso fuerte acierta si el precio continúa en su dirección
+        impulse = validated & (np.abs(np.nan_to_num(impulse_percent)) > parameters["impulse_strong_percent"])
+        impulse_hits = forward_sign[impulse] == np.sign(impulse_percent[impulse])
+
+        # Retesteo: misma regla que _detect_retests sobre el nivel redondo inferior/superior al cierre
+        tolerance = parameters["retest_tolerance"]
+        support = np.floor(closes / level_step) * level_step
+        resistance = np.ceil(closes / level_step) * level_step
+        support_retest = validated & (closes > support) & (lows <= support + tolerance)
+        resistance_retest = validated & (closes < resistance) & (highs >= resistance - tolerance)
+        retest_hits = np.concatenate([
+            forward_change[support_retest] > 0,
+            forward_change[resistance_retest] < 0,
+        ])
+
+        # Volatilidad: baja acierta si el rango futuro queda bajo la media; alta si la supera y extrema
+        # si el rango futuro sigue por encima del umbral de volatilidad alta
+        classified = np.isfinite(atr_ratio) & np.isfinite(forward_atr_ratio)
+        extreme = classified & (atr_ratio >= parameters["volatility_extreme_ratio"])
+        high = classified & ~extreme & (atr_ratio >= parameters["volatility_high_ratio"])
+        low = classified & (atr_ratio < parameters["volatility_normal_ratio"])
+        volatility_hits = np.concatenate([
+            forward_atr_ratio[extreme] >= parameters["volatility_high_ratio"],
+            forward_atr_ratio[high] >= 1,
+            forward_atr_ratio[low] < 1,
+        ])
+
+        rates = {
+            "trend_hit_rate": cls._rate(trend_hits),
+            "impulse_hit_rate": cls._rate(impulse_hits),
+            "retest_hit_rate": cls._rate(retest_hits),
+            "volatility_hit_rate": cls._rate(volatility_hits),
+        }
+        available = [rate for rate in rates.values() if rate is not None]
+        return SweepResult(
+            parameters=parameters,
+            trend_signals=int(trend.sum()),
+            impulse_signals=int(impulse.sum()),
+            retest_signals=len(retest_hits),
+            volatility_signals=len(volatility_hits),
+            score=round(float(np.mean(available)), 4) if available else 0.0,
+            **rates,
+        )
+
+    @classmethod
+    def rank(cls, results: list[SweepResult], sort_by: str = "score") -> list[SweepResult]:
+        """
+        Ordena los resultados de mejor a peor (empates en el orden de la rejilla) y asigna posiciones
+        @param results - Resultados sin ordenar
+        @param sort_by - Métrica de ordenación (SORT_METRICS)
+        @returns Lista ordenada con rank asignado
+        """
+        def _key(result: SweepResult) -> float:
+            value = getattr(result, sort_by)
+            return -1.0 if value is None else value
+
+        ranked = sorted(results, key=_key, reverse=True)
+        for position, result in enumerate(ranked, start=1):
+            result.rank = position
+        return ranked
+
+    @staticmethod
+    def _rate(hits: np.ndarray) -> Optional[float]:
+        """
+        Tasa de acierto de un array booleano
+        @param hits - Aciertos por señal
+        @returns Proporción redondeada o None si no hay señales
+        """
+        return round(float(hits.mean()), 4) if len(hits) else None
+
+    @classmethod
+    def _evaluate_many(
+        cls,
+        block: np.ndarray,
+        combinations: list[dict[str, float]],
+        level_step: float
+    ) -> list[SweepResult]:
+        """
+        Evalúa una lista de combinaciones sobre el mismo bloque
+        @param block - Columnas precalculadas
+        @param combinations - Combinaciones de parámetros
+        @param level_step - Separación de los niveles redondos
+        @returns Resultados en el orden de las combinaciones
+        """
+        return [cls.evaluate(block, parameters, level_step) for parameters in combinations]
+
+    @classmethod
+    def _evaluate_shared(
+        cls,
+        block: np.ndarray,
+        combinations: list[dict[str, float]],
+        level_step: float,
+        workers: int
+    ) -> list[SweepResult]:
+        """
+        Copia el bloque una vez a memoria compartida y reparte las combinaciones entre procesos
+        @param block - Columnas precalculadas
+        @param combinations - Combinaciones de parámetros
+        @param level_step - Separación de los niveles redondos
+        @param workers - Procesos del pool
+        @returns Resultados en el orden de las combinaciones
+        """
+        task_size = max(1, -(-len(combinations) // (workers * cls.TASKS_PER_WORKER)))
+        tasks = [combinations[i:i + task_size] for i in range(0, len(combinations), task_size)]
+
+        memory = shared_memory.SharedMemory(create=True, size=block.nbytes)
+        try:
+            shared = np.ndarray(block.shape, dtype=block.dtype, buffer=memory.buf)
+            shared[:] = block
+            del shared
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(tasks)),
+                initializer=cls._attach_block,
+                initargs=(memory.name, block.shape),
+            ) as executor:
+                results = executor.map(cls._evaluate_task, tasks, itertools.repeat(level_step))
+                return [result for task_results in results for result in task_results]
+        finally:
+            memory.close()
+            memory.unlink()
+
+    @staticmethod
+    def _attach_block(name: str, shape: tuple[int, int]) -> None:
+        """
+        Adjunta el bloque compartido en un proceso del pool como vista de solo lectura
+        @param name - Nombre del segmento de memoria compartida
+        @param shape - Forma del bloque (ROWS x velas)
+        """
+        global _worker_memory, _worker_block
+        _worker_memory = shared_memory.SharedMemory(name=name)
+        _worker_block = np.ndarray(shape, dtype=np.float64, buffer=_worker_memory.buf)
+        _worker_block.setflags(write=False)
+
+    @classmethod
+    def _evaluate_task(cls, combinations: list[dict[str, float]], level_step: float) -> list[SweepResult]:
+        """
+        Evalúa un lote de combinaciones sobre el bloque adjuntado (se ejecuta en un proceso del pool)
+        @param combinations - Combinaciones del lote
+        @param level_step - Separación de los niveles redondos
+        @returns Resultados del lote
+        """
+        return cls._evaluate_many(_worker_block, combinations, level_step)
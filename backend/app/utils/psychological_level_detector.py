@@ -1,7 +1,7 @@
 """
 Utilidades para detectar y analizar rupturas de niveles psicológicos
 """
-from typing import Optional
+import numpy as np
 
 from app.models.market_analysis import PriceCandle, PsychologicalBreak
 
@@ -9,6 +9,9 @@ from app.models.market_analysis import PriceCandle, PsychologicalBreak
 class PsychologicalLevelDetector:
     """Detector de niveles psicológicos y rupturas"""
     
+    # Velas posteriores a la ruptura usadas para confirmarla
+    CONFIRMATION_CANDLES = 3
+    
     @classmethod
     def generate_psychological_levels(
         cls,
@@ -77,117 +80,80 @@ class PsychologicalLevelDetector:
             include_fifties=True
         )
         
-        # Detectar rupturas de cada nivel
-        for level in psychological_levels:
-            break_info = cls._detect_level_break(sorted_candles, level, tolerance)
-            if break_info:
-                breaks.append(break_info)
-        
-        return breaks
-    
-    @classmethod
-    def _detect_level_break(
-        cls,
-        candles: list[PriceCandle],
-        level: float,
-        tolerance: float
-    ) -> Optional[PsychologicalBreak]:
-        """
-        Detecta si un nivel específico fue roto en las velas
-        @param candles - Velas ordenadas cronológicamente
-        @param level - Nivel psicológico a verificar
-        @param tolerance - Tolerancia en puntos
-        @returns Información de ruptura o None si no hubo ruptura
-        """
-        if not candles:
-            return None
-        
-        # Verificar si el precio estuvo por debajo y luego rompió al alza
-        below_level = False
-        above_level = False
-        break_candle: Optional[PriceCandle] = None
-        break_type: Optional[str] = None
-        
-        for candle in candles:
-            # Verificar si estuvo por debajo del nivel
-            if candle.close < level - tolerance:
-                below_level = True
-            
-            # Verificar si rompió al alza
-            if below_level and candle.close > level + tolerance:
-                above_level = True
-                break_candle = candle
-                break_type = "alcista"
-                break
-        
-        # Si no rompió al alza, verificar ruptura a la baja
-        if not above_level:
-            below_level = False
-            above_level = False
-            
-            for candle in candles:
-                # Verificar si estuvo por encima del nivel
-                if candle.close > level + tolerance:
-                    above_level = True
-                
-                # Verificar si rompió a la baja
-                if above_level and candle.close < level - tolerance:
-                    below_level = True
-                    break_candle = candle
-                    break_type = "bajista"
-                    break
-        
-        # Si se detectó ruptura, crear objeto
-        if break_candle and break_type:
-            # Verificar confirmación: si el precio cerró consistentemente más allá del nivel
-            confirmed = cls._is_break_confirmed(
-                candles[candles.index(break_candle):],
-                level,
-                break_type,
-                tolerance
-            )
-            
-            return PsychologicalBreak(
+        # Detectar rupturas de todos los niveles contra todos los cierres en una sola operación
+        levels = np.array(psychological_levels, dtype=np.float64)
+        closes = np.array([c.close for c in sorted_candles], dtype=np.float64)
+        break_indices, directions, confirmed = cls.detect_crossings(closes, levels, tolerance)
+        
+        for level, index, direction, is_confirmed in zip(
+            levels.tolist(), break_indices.tolist(), directions.tolist(), confirmed.tolist()
+        ):
+            if direction == 0:
+                continue
+            breaks.append(PsychologicalBreak(
                 level=level,
-                break_type=break_type,
-                break_price=break_candle.close,
-                confirmed=confirmed
-            )
+                break_type="alcista" if direction > 0 else "bajista",
+                break_price=sorted_candles[index].close,
+                confirmed=is_confirmed
+            ))
         
-        return None
+        return breaks
     
     @classmethod
-    def _is_break_confirmed(
+    def detect_crossings(
         cls,
-        candles_after_break: list[PriceCandle],
-        level: float,
-        break_type: str,
+        closes: np.ndarray,
+        levels: np.ndarray,
         tolerance: float
-    ) -> bool:
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Verifica si una ruptura fue confirmada
-        @param candles_after_break - Velas después de la ruptura
-        @param level - Nivel roto
-        @param break_type - Tipo de ruptura ('alcista' o 'bajista')
+        Detecta la primera ruptura de cada nivel con una matriz niveles x cierres
+        Ruptura alcista: primer cierre > nivel + tolerancia tras algún cierre < nivel - tolerancia
+        (la bajista es la simétrica y solo se evalúa si no hubo alcista)
+        Confirmada si al menos la mitad de los (hasta) 3 cierres siguientes quedan del lado roto
+        @param closes - Cierres ordenados cronológicamente
+        @param levels - Niveles a evaluar
         @param tolerance - Tolerancia en puntos
-        @returns True si la ruptura fue confirmada
+        @returns Tupla (índice de la vela de ruptura o -1, dirección 1/-1/0, confirmada)
         """
-        if len(candles_after_break) < 2:
-            # No hay suficientes velas para confirmar
-            return False
-        
-        # Tomar las siguientes 2-3 velas para confirmación
-        confirmation_candles = candles_after_break[1:min(4, len(candles_after_break))]
-        
-        if break_type == "alcista":
-            # Confirmar si la mayoría de cierres están por encima del nivel
-            above_count = sum(1 for c in confirmation_candles if c.close > level)
-            return above_count >= len(confirmation_candles) * 0.5
-        
-        else:  # bajista
-            # Confirmar si la mayoría de cierres están por debajo del nivel
-            below_count = sum(1 for c in confirmation_candles if c.close < level)
-            return below_count >= len(confirmation_candles) * 0.5
+        level_count = len(levels)
+        break_indices = np.full(level_count, -1, dtype=np.int64)
+        directions = np.zeros(level_count, dtype=np.int8)
+        confirmed = np.zeros(level_count, dtype=bool)
+        if len(closes) == 0 or level_count == 0:
+            return break_indices, directions, confirmed
+        
+        # Distancia firmada de cada cierre a cada nivel (niveles x velas)
+        distance = closes[None, :] - levels[:, None]
+        below = distance < -tolerance
+        above = distance > tolerance
+        
+        # Una vela no puede estar a la vez por encima y por debajo, así que basta con "ya estuvo del otro lado"
+        bullish = above & (np.cumsum(below, axis=1) > 0)
+        bearish = below & (np.cumsum(above, axis=1) > 0)
+        has_bullish = bullish.any(axis=1)
+        has_bearish = bearish.any(axis=1) & ~has_bullish
+        
+        break_indices[has_bullish] = bullish[has_bullish].argmax(axis=1)
+        break_indices[has_bearish] = bearish[has_bearish].argmax(axis=1)
+        directions[has_bullish] = 1
+        directions[has_bearish] = -1
+        
+        # Confirmación: cierres del lado roto entre las 3 velas posteriores (sumas acumuladas por fila)
+        broken = directions != 0
+        rows = np.flatnonzero(broken)
+        start = break_indices[rows] + 1
+        end = np.minimum(break_indices[rows] + cls.CONFIRMATION_CANDLES + 1, len(closes))
+        window = end - start
+        
+        side = np.where(directions[rows, None] > 0, distance[rows] > 0, distance[rows] < 0)
+        side_counts = np.zeros((len(rows), len(closes) + 1), dtype=np.int64)
+        side_counts[:, 1:] = np.cumsum(side, axis=1)
+        row_positions = np.arange(len(rows))
+        on_side = side_counts[row_positions, end] - side_counts[row_positions, start]
+        
+        confirmed[rows] = (window > 0) & (on_side >= window * 0.5)
+        return break_indices, directions, confirmed
     
     @classmethod
     def format_breaks_description(
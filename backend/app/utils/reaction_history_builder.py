@@ -4,13 +4,15 @@ Utilidad para construir histórico detallado de reacciones en niveles psicológi
 from datetime import datetime
 from typing import Optional
 
-from app.models.market_analysis import PriceCandle
+from app.models.market_analysis import PriceCandle, SessionType
 from app.models.psychological_levels import (
     LevelReaction,
     ReactionType,
     TradingSession,
     VolatilityLevel
 )
+from app.utils.trading_sessions import TradingSessions
+from app.utils.volatility_distribution import VolatilityDistribution
 
 
 class ReactionHistoryBuilder:
@@ -23,30 +25,32 @@ class ReactionHistoryBuilder:
         @param timestamp - Timestamp en UTC
         @returns Sesión de trading
         """
-        hour = timestamp.hour
-        
-        # Sesiones en UTC:
-        # Asia: 23:00 - 08:00 UTC
-        # Londres: 08:00 - 16:00 UTC
-        # Nueva York: 13:00 - 22:00 UTC
-        
-        if 23 <= hour or hour < 8:
-            return TradingSession.ASIA
-        elif 8 <= hour < 13:
-            return TradingSession.LONDON
-        elif 13 <= hour < 23:
-            return TradingSession.NEW_YORK
-        else:
-            return TradingSession.UNKNOWN
+        # Ventanas extendidas de TradingSessions (Asia 23-08, Londres 08-13, NY 13-23 UTC)
+        session = TradingSessions.get_extended_session_for_time(timestamp)
+        return {
+            SessionType.ASIA: TradingSession.ASIA,
+            SessionType.LONDON: TradingSession.LONDON,
+            SessionType.NEW_YORK: TradingSession.NEW_YORK,
+        }.get(session, TradingSession.UNKNOWN)
     
     @staticmethod
-    def classify_volatility(atr: float, price: float) -> VolatilityLevel:
+    def classify_volatility(
+        atr: float,
+        price: float,
+        distribution: Optional[VolatilityDistribution] = None
+    ) -> VolatilityLevel:
         """
         Clasifica el nivel de volatilidad basado en ATR
+        Con distribución histórica se usa el percentil del ATR; sin ella, umbrales fijos sobre el precio
         @param atr - Average True Range
         @param price - Precio actual
+        @param distribution - Distribución histórica de ATR del instrumento (opcional)
         @returns Nivel de volatilidad
         """
+        percentile_level = distribution.classify("atr", atr) if distribution else None
+        if percentile_level is not None:
+            return VolatilityLevel(percentile_level.value)
+        
         atr_percentage = (atr / price) * 100
         
         if atr_percentage < 0.3:
@@ -126,7 +130,8 @@ class ReactionHistoryBuilder:
         level: float,
         candles: list[PriceCandle],
         reaction_index: int,
-        reaction_type: ReactionType
+        reaction_type: ReactionType,
+        volatility_distribution: Optional[VolatilityDistribution] = None
     ) -> Optional[LevelReaction]:
         """
         Construye un objeto LevelReaction con todos los detalles
@@ -134,6 +139,7 @@ class ReactionHistoryBuilder:
         @param candles - Lista de velas históricas
         @param reaction_index - Índice de la vela de reacción
         @param reaction_type - Tipo de reacción
+        @param volatility_distribution - Distribución histórica de ATR (opcional)
         @returns LevelReaction o None si no se puede construir
         """
         if reaction_index >= len(candles):
@@ -152,7 +158,7 @@ class ReactionHistoryBuilder:
         atr = cls.calculate_atr(candles[:reaction_index + 1])
         
         # Clasificar volatilidad
-        volatility = cls.classify_volatility(atr, price)
+        volatility = cls.classify_volatility(atr, price, volatility_distribution)
         
         # Calcular magnitud de la reacción
         if reaction_type == ReactionType.BOUNCE:
@@ -199,7 +205,7 @@ class ReactionHistoryBuilder:
             reaction_type, session, volatility, magnitude_points, was_confirmed
         )
         
-        return LevelReaction(
+        return LevelReaction.model_construct(
             date=date,
             price=price,
             type=reaction_type,
@@ -1,10 +1,14 @@
 """
 Utilidades para detectar patrones de velas y retesteos
 """
+from collections import OrderedDict
 from typing import Optional
 from enum import Enum
 
+import numpy as np
+
 from app.models.market_analysis import PriceCandle
+from app.utils.candle_arrays import CandleArrays
 
 
 class CandlePattern(str, Enum):
@@ -22,6 +26,16 @@ class CandlePattern(str, Enum):
 class RetestDetector:
     """Detector de retesteos y patrones de velas"""
     
+    # Orden de los códigos devueltos por classify_patterns (índice = código)
+    PATTERN_ORDER = tuple(CandlePattern)
+    
+    # Tolerancia en puntos para considerar que una vela retestea un nivel
+    RETEST_TOLERANCE = 5.0
+    
+    # Caché de patrones por (instrumento, intervalo, última vela, nº de velas)
+    _pattern_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+    PATTERN_CACHE_SIZE = 32
+    
     @classmethod
     def detect_candle_pattern(
         cls,
@@ -71,6 +85,103 @@ class RetestDetector:
         
         return CandlePattern.NONE
     
+    @classmethod
+    def classify_patterns(cls, arrays: CandleArrays) -> np.ndarray:
+        """
+        Clasifica todas las velas de la serie en una pasada vectorizada
+        Aplica las mismas reglas y prioridades que detect_candle_pattern (la vela anterior es la previa de la serie)
+        @param arrays - Serie de velas
+        @returns Array int8 con el código de patrón de cada vela (índice en PATTERN_ORDER)
+        """
+        opens, highs, lows, closes = arrays.opens, arrays.highs, arrays.lows, arrays.closes
+        body = np.abs(closes - opens)
+        total_range = highs - lows
+        upper_wick = highs - np.maximum(opens, closes)
+        lower_wick = np.minimum(opens, closes) - lows
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            body_ratio = np.where(total_range > 0, body / total_range, 0.0)
+        pin_bar = (body_ratio < 0.33) & ((lower_wick > body * 2) | (upper_wick > body * 2))
+        hammer = (lower_wick > body * 2) & (upper_wick < body * 0.5)
+        shooting_star = (upper_wick > body * 2) & (lower_wick < body * 0.5)
+        
+        previous_open = np.concatenate([[np.nan], opens[:-1]])
+        previous_close = np.concatenate([[np.nan], closes[:-1]])
+        bullish_engulfing = (
+            (closes > opens) & (previous_close < previous_open)
+            & (opens <= previous_close) & (closes >= previous_open)
+        )
+        bearish_engulfing = (
+            (closes < opens) & (previous_close > previous_open)
+            & (opens >= previous_close) & (closes <= previous_open)
+        )
+        
+        # Condiciones en el orden de prioridad de detect_candle_pattern (gana la primera que se cumple)
+        rules = [
+            (total_range == 0, CandlePattern.DOJI),
+            (pin_bar & (lower_wick > upper_wick * 2), CandlePattern.PIN_BAR_BULLISH),
+            (pin_bar & (upper_wick > lower_wick * 2), CandlePattern.PIN_BAR_BEARISH),
+            (hammer, CandlePattern.HAMMER),
+            (shooting_star, CandlePattern.SHOOTING_STAR),
+            (body < total_range * 0.1, CandlePattern.DOJI),
+            (bullish_engulfing, CandlePattern.ENGULFING_BULLISH),
+            (bearish_engulfing, CandlePattern.ENGULFING_BEARISH),
+        ]
+        codes = np.select(
+            [condition for condition, _ in rules],
+            [cls.PATTERN_ORDER.index(pattern) for _, pattern in rules],
+            default=cls.PATTERN_ORDER.index(CandlePattern.NONE)
+        )
+        return codes.astype(np.int8)
+    
+    @classmethod
+    def classify_patterns_cached(
+        cls,
+        instrument: str,
+        interval: str,
+        arrays: CandleArrays
+    ) -> np.ndarray:
+        """
+        Igual que classify_patterns pero cacheado por (instrumento, intervalo, última vela)
+        La clave incluye el OHLC de las dos últimas velas: la última puede seguir en formación y
+        cambiar sin cambiar su timestamp, y su patrón envolvente depende de la anterior
+        @param instrument - Símbolo del instrumento
+        @param interval - Intervalo o timeframe de las velas
+        @param arrays - Serie de velas
+        @returns Array de códigos de patrón
+        """
+        last_bar = arrays.timestamps[-1] if len(arrays) else None
+        tail = np.concatenate([arrays.opens[-2:], arrays.highs[-2:], arrays.lows[-2:], arrays.closes[-2:]])
+        key = (instrument.upper(), interval, last_bar, len(arrays), tail.tobytes())
+        cached = cls._pattern_cache.get(key)
+        if cached is not None:
+            cls._pattern_cache.move_to_end(key)
+            return cached
+        
+        codes = cls.classify_patterns(arrays)
+        cls._pattern_cache[key] = codes
+        if len(cls._pattern_cache) > cls.PATTERN_CACHE_SIZE:
+            cls._pattern_cache.popitem(last=False)
+        return codes
+    
+    @classmethod
+    def pattern_masks(cls, codes: np.ndarray) -> dict[CandlePattern, np.ndarray]:
+        """
+        Convierte los códigos en máscaras booleanas por patrón
+        @param codes - Códigos devueltos por classify_patterns
+        @returns {patrón: máscara booleana por vela}
+        """
+        return {pattern: codes == code for code, pattern in enumerate(cls.PATTERN_ORDER)}
+    
+    @classmethod
+    def pattern_from_code(cls, code: int) -> CandlePattern:
+        """
+        Convierte un código de classify_patterns en CandlePattern
+        @param code - Código de patrón
+        @returns Patrón de vela
+        """
+        return cls.PATTERN_ORDER[code]
+    
     @classmethod
     def _is_pin_bar(
         cls,
@@ -0,0 +1,210 @@
+"""
+Motor de correlaciones móviles multi-ventana sobre una matriz de activos
+Calcula todas las ventanas y todos los pares en una pasada con sumas acumuladas
+(en lugar de una llamada a scipy por par y ventana)
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.models.correlation_analysis import (
+    CorrelationMatrixAnalysis,
+    CorrelationMode,
+    CorrelationRegime,
+    CorrelationWindowMatrix,
+    PairCorrelationTrend,
+)
+from app.utils.series_aligner import AlignedSeries
+
+
+class RollingCorrelationEngine:
+    """Correlaciones de Pearson móviles para varias ventanas y N activos"""
+
+    DEFAULT_WINDOWS = (10, 30, 90, 250)
+
+    # Diferencia mínima |corta| - |larga| para hablar de fortalecimiento/debilitamiento
+    REGIME_THRESHOLD = 0.15
+    # Magnitud mínima de ambas ventanas para considerar una inversión de signo
+    INVERSION_MIN_ABS = 0.2
+    # Observaciones usadas para la tendencia y el histórico de la ventana corta
+    TREND_LOOKBACK = 5
+    HISTORY_LENGTH = 20
+
+    @classmethod
+    def rolling_correlations(
+        cls,
+        values: np.ndarray,
+        windows: Sequence[int]
+    ) -> dict[int, np.ndarray]:
+        """
+        Correlaciones móviles de todas las columnas entre sí para cada ventana
+        Las sumas acumuladas (de x y de x·xᵀ) se calculan una vez y se reutilizan en todas las ventanas
+        @param values - Matriz T x N (filas = fechas, columnas = activos)
+        @param windows - Tamaños de ventana
+        @returns {ventana: array T x N x N} con NaN donde la ventana no está completa
+        """
+        rows, assets = values.shape
+        # Centrar por columna reduce la cancelación numérica con precios de niveles altos
+        centered = values - values.mean(axis=0) if rows else values
+
+        cumulative = np.zeros((rows + 1, assets))
+        cumulative[1:] = np.cumsum(centered, axis=0)
+        cumulative_products = np.zeros((rows + 1, assets, assets))
+        cumulative_products[1:] = np.cumsum(centered[:, :, None] * centered[:, None, :], axis=0)
+
+        results: dict[int, np.ndarray] = {}
+        for window in windows:
+            correlations = np.full((rows, assets, assets), np.nan)
+            if window >= 2 and rows >= window:
+                sums = cumulative[window:] - cumulative[:-window]
+                products = cumulative_products[window:] - cumulative_products[:-window]
+                covariance = products - sums[:, :, None] * sums[:, None, :] / window
+                variance = np.diagonal(covariance, axis1=1, axis2=2)
+                denominator = np.sqrt(np.clip(variance[:, :, None] * variance[:, None, :], 0, None))
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    window_corr = np.where(denominator > 1e-12, covariance / denominator, np.nan)
+                correlations[window - 1:] = np.clip(window_corr, -1.0, 1.0)
+            results[window] = correlations
+        return results
+
+    @classmethod
+    def analyze(
+        cls,
+        aligned: AlignedSeries,
+        windows: Sequence[int] = DEFAULT_WINDOWS,
+        mode: CorrelationMode = CorrelationMode.RETURNS,
+        primary: Optional[str] = None
+    ) -> CorrelationMatrixAnalysis:
+        """
+        Construye el análisis de correlaciones multi-ventana de una serie alineada
+        @param aligned - Serie alineada por fecha (SeriesAligner.align)
+        @param windows - Tamaños de ventana (en filas alineadas)
+        @param mode - Correlacionar retornos o niveles
+        @param primary - Activo principal para el análisis de pares (por defecto el primero)
+        @returns CorrelationMatrixAnalysis con matrices actuales y regímenes por par
+        """
+        if len(aligned) == 0:
+            raise ValueError("Aligned series is empty, cannot compute correlations")
+
+        symbols = aligned.symbols
+        primary_symbol = primary or symbols[0]
+        if primary_symbol not in symbols:
+            raise ValueError(f"Primary symbol {primary_symbol} is not among {symbols}")
+
+        values = aligned.matrix()
+        if mode == CorrelationMode.RETURNS:
+            values = np.diff(values, axis=0) / values[:-1] * 100
+
+        sorted_windows = sorted(set(windows))
+        rolling = cls.rolling_correlations(values, sorted_windows)
+
+        matrices = [
+            CorrelationWindowMatrix(
+                window=window,
+                symbols=symbols,
+                matrix=cls._to_optional_matrix(rolling[window][-1]) if len(values) else [],
+            )
+            for window in sorted_windows
+        ]
+
+        primary_index = symbols.index(primary_symbol)
+        pairs = [
+            cls._pair_trend(rolling, sorted_windows, primary_index, other_index, symbols)
+            for other_index in range(len(symbols))
+            if other_index != primary_index and len(values)
+        ]
+
+        return CorrelationMatrixAnalysis(
+            as_of=str(aligned.timestamps[-1].astype("datetime64[D]")),
+            mode=mode,
+            symbols=symbols,
+            observations=len(aligned),
+            matrices=matrices,
+            pairs=pairs,
+        )
+
+    @classmethod
+    def classify_regime(cls, short: Optional[float], long: Optional[float]) -> CorrelationRegime:
+        """
+        Clasifica el régimen comparando la correlación de ventana corta con la larga
+        @param short - Correlación de la ventana corta
+        @param long - Correlación de la ventana larga
+        @returns Régimen de correlación
+        """
+        if short is None or long is None:
+            return CorrelationRegime.STABLE
+
+        if (
+            np.sign(short) != np.sign(long)
+            and abs(short) >= cls.INVERSION_MIN_ABS
+            and abs(long) >= cls.INVERSION_MIN_ABS
+        ):
+            return CorrelationRegime.INVERTED
+
+        difference = abs(short) - abs(long)
+        if difference > cls.REGIME_THRESHOLD:
+            return CorrelationRegime.STRENGTHENING
+        if difference < -cls.REGIME_THRESHOLD:
+            return CorrelationRegime.WEAKENING
+        return CorrelationRegime.STABLE
+
+    @classmethod
+    def _pair_trend(
+        cls,
+        rolling: dict[int, np.ndarray],
+        windows: list[int],
+        index_a: int,
+        index_b: int,
+        symbols: list[str]
+    ) -> PairCorrelationTrend:
+        """
+        Resume la correlación de un par: valor por ventana, régimen y tendencia de la ventana corta
+        @param rolling - Correlaciones móviles por ventana
+        @param windows - Ventanas ordenadas de menor a mayor
+        @param index_a - Columna del primer activo
+        @param index_b - Columna del segundo activo
+        @param symbols - Símbolos de las columnas
+        @returns PairCorrelationTrend
+        """
+        by_window = {
+            window: cls._optional(rolling[window][-1, index_a, index_b])
+            for window in windows
+        }
+        available = [window for window in windows if by_window[window] is not None]
+
+        short_window = available[0] if available else windows[0]
+        long_window = available[-1] if available else windows[-1]
+        regime = (
+            cls.classify_regime(by_window[short_window], by_window[long_window])
+            if len(available) >= 2
+            else CorrelationRegime.STABLE
+        )
+
+        short_series = rolling[short_window][:, index_a, index_b]
+        history = [cls._optional(value) for value in short_series[-cls.HISTORY_LENGTH:]]
+
+        change = None
+        if len(short_series) > cls.TREND_LOOKBACK:
+            current = short_series[-1]
+            previous = short_series[-1 - cls.TREND_LOOKBACK]
+            if not np.isnan(current) and not np.isnan(previous):
+                change = round(float(current - previous), 4)
+
+        return PairCorrelationTrend(
+            symbol_a=symbols[index_a],
+            symbol_b=symbols[index_b],
+            by_window=by_window,
+            regime=regime,
+            short_window_change=change,
+            history=history,
+        )
+
+    @staticmethod
+    def _optional(value: float) -> Optional[float]:
+        """Convierte NaN en None y redondea a 4 decimales"""
+        return None if np.isnan(value) else round(float(value), 4)
+
+    @classmethod
+    def _to_optional_matrix(cls, matrix: np.ndarray) -> list[list[Optional[float]]]:
+        """Convierte una matriz con NaN en listas con None"""
+        return [[cls._optional(value) for value in row] for row in matrix]
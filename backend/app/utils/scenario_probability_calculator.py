@@ -7,6 +7,7 @@ from typing import Optional
 from datetime import datetime
 
 from app.models.scenario_probability import (
+    MonteCarloSimulation,
     ScenarioType,
     ScenarioProbability,
     ScenarioAnalysis,
@@ -32,6 +33,9 @@ class ScenarioProbabilityCalculator:
         ScenarioType.TREND_REVERSAL: 0.35
     }
     
+    # Peso de la probabilidad simulada (Monte Carlo) frente a la de reglas cuando está disponible
+    SIMULATION_WEIGHT = 0.5
+    
     @classmethod
     def calculate_breakout_probability(
         cls,
@@ -41,7 +45,8 @@ class ScenarioProbabilityCalculator:
         h4_trend: MarketDirection,
         level_strength: float,
         convergence: TimeframeConvergence,
-        pattern_quality: Optional[float] = None
+        pattern_quality: Optional[float] = None,
+        simulated_probability: Optional[float] = None
     ) -> ScenarioProbability:
         """
         Calcula probabilidad de breakout (alcista o bajista)
@@ -52,6 +57,7 @@ class ScenarioProbabilityCalculator:
         @param level_strength - Fortaleza del nivel (0-1)
         @param convergence - Convergencia multi-TF
         @param pattern_quality - Calidad del patrón (0-1, opcional)
+        @param simulated_probability - Probabilidad de ruptura simulada (0-1, opcional)
         @returns ScenarioProbability
         """
         scenario_type = ScenarioType.BREAKOUT_BULLISH if direction == MarketDirection.BULLISH else ScenarioType.BREAKOUT_BEARISH
@@ -106,6 +112,9 @@ class ScenarioProbabilityCalculator:
             pattern_factor = pattern_quality * 0.07  # Máximo 7%
         factors["pattern_quality"] = pattern_factor
         
+        # Factor 7: Contraste con la simulación (opcional)
+        cls._apply_simulation_factor(factors, base_prob, simulated_probability)
+        
         # Calcular probabilidad final
         probability = base_prob + sum(factors.values())
         probability = max(0.0, min(1.0, probability))  # Clamp entre 0-1
@@ -132,7 +141,8 @@ class ScenarioProbabilityCalculator:
         h4_trend: MarketDirection,
         level_strength: float,
         recent_reactions: int = 0,
-        pattern_quality: Optional[float] = None
+        pattern_quality: Optional[float] = None,
+        simulated_probability: Optional[float] = None
     ) -> ScenarioProbability:
         """
         Calcula probabilidad de retesteo exitoso (rebote en soporte o rechazo en resistencia)
@@ -143,6 +153,7 @@ class ScenarioProbabilityCalculator:
         @param level_strength - Fortaleza del nivel (0-1)
         @param recent_reactions - Número de reacciones recientes en el nivel
         @param pattern_quality - Calidad del patrón (0-1, opcional)
+        @param simulated_probability - Probabilidad simulada de tocar el nivel sin romperlo (0-1, opcional)
         @returns ScenarioProbability
         """
         scenario_type = ScenarioType.RETEST_SUPPORT if level_type == "support" else ScenarioType.RETEST_RESISTANCE
@@ -189,6 +200,9 @@ class ScenarioProbabilityCalculator:
             pattern_factor = pattern_quality * 0.08
         factors["pattern_quality"] = pattern_factor
         
+        # Factor 7: Contraste con la simulación (opcional)
+        cls._apply_simulation_factor(factors, base_prob, simulated_probability)
+        
         # Calcular probabilidad final
         probability = base_prob + sum(factors.values())
         probability = max(0.0, min(1.0, probability))
@@ -213,7 +227,8 @@ class ScenarioProbabilityCalculator:
         daily_trend: MarketDirection,
         h4_trend: MarketDirection,
         price_range_pct: float,
-        volatility_level: str = "normal"
+        volatility_level: str = "normal",
+        simulated_probability: Optional[float] = None
     ) -> ScenarioProbability:
         """
         Calcula probabilidad de consolidación/lateral
@@ -222,6 +237,7 @@ class ScenarioProbabilityCalculator:
         @param h4_trend - Tendencia H4
         @param price_range_pct - Rango de precio reciente (%)
         @param volatility_level - Nivel de volatilidad (low, normal, high)
+        @param simulated_probability - Probabilidad simulada de no tocar soporte ni resistencia (0-1, opcional)
         @returns ScenarioProbability
         """
         base_prob = cls.BASE_PROBABILITIES[ScenarioType.CONSOLIDATION]
@@ -260,6 +276,9 @@ class ScenarioProbabilityCalculator:
             divergence_factor = 0.08
         factors["divergence"] = divergence_factor
         
+        # Factor 5: Contraste con la simulación (opcional)
+        cls._apply_simulation_factor(factors, base_prob, simulated_probability)
+        
         # Calcular probabilidad final
         probability = base_prob + sum(factors.values())
         probability = max(0.0, min(1.0, probability))
@@ -282,7 +301,8 @@ class ScenarioProbabilityCalculator:
         weekly_analysis: dict,
         daily_analysis: dict,
         h4_analysis: dict,
-        psychological_levels: Optional[dict] = None
+        psychological_levels: Optional[dict] = None,
+        simulation: Optional[MonteCarloSimulation] = None
     ) -> ScenarioAnalysis:
         """
         Analiza todos los escenarios posibles y retorna el análisis completo
@@ -292,6 +312,8 @@ class ScenarioProbabilityCalculator:
         @param daily_analysis - Análisis diario
         @param h4_analysis - Análisis H4
         @param psychological_levels - Niveles psicológicos (opcional)
+        @param simulation - Simulación Monte Carlo sobre soporte/resistencia (opcional); si se
+                            indica, las probabilidades de reglas se contrastan con las empíricas
         @returns ScenarioAnalysis completo
         """
         # Extraer tendencias
@@ -308,6 +330,10 @@ class ScenarioProbabilityCalculator:
         convergence = MultiTimeframeAnalyzer.detect_convergence(trends)
         convergence_strength = MultiTimeframeAnalyzer.calculate_convergence_strength(convergence, 3)
         
+        # Probabilidades empíricas de la simulación (None si no hay simulación o nivel en ese lado)
+        resistance = simulation.nearest_level("above") if simulation else None
+        support = simulation.nearest_level("below") if simulation else None
+        
         # Calcular escenarios
         scenarios: list[ScenarioProbability] = []
         
@@ -319,7 +345,8 @@ class ScenarioProbabilityCalculator:
                 daily_trend,
                 h4_trend,
                 0.7,  # Level strength placeholder
-                convergence
+                convergence,
+                simulated_probability=resistance.break_probability if resistance else None
             )
         )
         
@@ -331,7 +358,8 @@ class ScenarioProbabilityCalculator:
                 daily_trend,
                 h4_trend,
                 0.7,
-                convergence
+                convergence,
+                simulated_probability=support.break_probability if support else None
             )
         )
         
@@ -343,7 +371,8 @@ class ScenarioProbabilityCalculator:
                 daily_trend,
                 h4_trend,
                 0.75,
-                recent_reactions=3
+                recent_reactions=3,
+                simulated_probability=support.hold_probability if support else None
             )
         )
         
@@ -355,7 +384,8 @@ class ScenarioProbabilityCalculator:
                 daily_trend,
                 h4_trend,
                 0.75,
-                recent_reactions=3
+                recent_reactions=3,
+                simulated_probability=resistance.hold_probability if resistance else None
             )
         )
         
@@ -366,7 +396,8 @@ class ScenarioProbabilityCalculator:
                 daily_trend,
                 h4_trend,
                 1.5,  # Price range placeholder
-                "normal"
+                "normal",
+                simulated_probability=simulation.range_probability if simulation else None
             )
         )
         
@@ -384,6 +415,10 @@ class ScenarioProbabilityCalculator:
             "convergence": convergence.value,
             "convergence_strength": convergence_strength
         }
+        if simulation:
+            market_context["simulation_method"] = simulation.method.value
+            market_context["simulation_paths"] = simulation.paths
+            market_context["simulation_horizon_bars"] = simulation.horizon_bars
         
         # Resumen
         summary = (
@@ -400,9 +435,29 @@ class ScenarioProbabilityCalculator:
             alternative_scenarios=alternative_scenarios,
             convergence_strength=convergence_strength,
             market_context=market_context,
-            summary=summary
+            summary=summary,
+            simulation=simulation
         )
     
+    @classmethod
+    def _apply_simulation_factor(
+        cls,
+        factors: dict[str, float],
+        base_prob: float,
+        simulated_probability: Optional[float]
+    ) -> None:
+        """
+        Añade el factor de simulación: desplaza la probabilidad de reglas hacia la empírica
+        en proporción SIMULATION_WEIGHT
+        @param factors - Factores ya calculados (se modifica)
+        @param base_prob - Probabilidad base del escenario
+        @param simulated_probability - Probabilidad simulada (None = sin factor)
+        """
+        if simulated_probability is None:
+            return
+        rule_probability = max(0.0, min(1.0, base_prob + sum(factors.values())))
+        factors["simulation"] = cls.SIMULATION_WEIGHT * (simulated_probability - rule_probability)
+    
     @classmethod
     def _generate_breakout_explanation(
         cls,
@@ -0,0 +1,246 @@
+"""
+Alineación por timestamp de series de varios activos (join vectorizado)
+Evita emparejar velas por posición cuando las fuentes tienen calendarios distintos
+(por ejemplo FRED omite festivos que Twelve Data sí publica)
+"""
+from datetime import timedelta
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from app.models.market_analysis import PriceCandle
+from app.utils.candle_arrays import CandleArrays
+
+
+class AlignedSeries:
+    """Resultado de una alineación: un eje de timestamps común y una columna por activo"""
+
+    def __init__(self, timestamps: np.ndarray, columns: dict[str, np.ndarray]):
+        """
+        Inicializa la serie alineada
+        @param timestamps - Timestamps comunes (datetime64)
+        @param columns - Valores por símbolo, alineados con timestamps
+        """
+        self.timestamps = timestamps
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def symbols(self) -> list[str]:
+        """@returns Símbolos en el orden de las columnas"""
+        return list(self.columns.keys())
+
+    def column(self, symbol: str) -> np.ndarray:
+        """
+        Obtiene la columna de un símbolo
+        @param symbol - Símbolo del activo
+        @returns Array de valores alineados
+        """
+        if symbol not in self.columns:
+            raise ValueError(f"Symbol {symbol} is not part of the aligned series: {self.symbols}")
+        return self.columns[symbol]
+
+    def tail(self, count: int) -> "AlignedSeries":
+        """
+        Últimas N filas alineadas
+        @param count - Número de filas
+        @returns Nueva serie alineada (vistas sobre los mismos arrays)
+        """
+        start = max(len(self) - count, 0)
+        return AlignedSeries(
+            self.timestamps[start:],
+            {symbol: values[start:] for symbol, values in self.columns.items()}
+        )
+
+    def matrix(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Matriz (filas = timestamps, columnas = símbolos)
+        @param symbols - Subconjunto y orden de símbolos (opcional)
+        @returns Array 2D float64
+        """
+        selected = list(symbols) if symbols else self.symbols
+        return np.column_stack([self.column(symbol) for symbol in selected])
+
+    def returns(self, symbol: str) -> np.ndarray:
+        """
+        Retornos porcentuales de un símbolo entre filas consecutivas
+        @param symbol - Símbolo del activo
+        @returns Array de longitud len - 1
+        """
+        values = self.column(symbol)
+        return np.diff(values) / values[:-1] * 100
+
+
+class SeriesAligner:
+    """Join por timestamp de N series de velas (inner, as-of u outer con forward-fill)"""
+
+    JOIN_MODES = ("inner", "asof", "outer")
+    FILL_POLICIES = ("ffill", "none")
+    FIELDS = ("open", "high", "low", "close")
+
+    @classmethod
+    def align(
+        cls,
+        series: dict[str, Union[CandleArrays, list[PriceCandle]]],
+        how: str = "inner",
+        field: str = "close",
+        resolution: Optional[str] = "D",
+        reference: Optional[str] = None,
+        fill: str = "ffill",
+        max_staleness: Optional[timedelta] = None
+    ) -> AlignedSeries:
+        """
+        Alinea varias series por timestamp
+        - inner: solo timestamps presentes en todas las series
+        - asof: eje del activo de referencia; el resto toma su último valor conocido <= timestamp
+        - outer: unión de timestamps; los huecos se rellenan según la política de relleno
+        @param series - Series por símbolo (CandleArrays o listas de PriceCandle)
+        @param how - Tipo de join (inner, asof, outer)
+        @param field - Campo de precio a alinear (open, high, low, close)
+        @param resolution - Unidad datetime64 a la que se truncan los timestamps antes de unir
+                            ("D" para series diarias de distintas fuentes, None para no truncar)
+        @param reference - Símbolo cuyo eje se usa en el join asof (por defecto el primero)
+        @param fill - Política de relleno para outer: ffill o none
+        @param max_staleness - Antigüedad máxima de un valor rellenado/as-of (opcional)
+        @returns Serie alineada sin filas incompletas
+        """
+        if how not in cls.JOIN_MODES:
+            raise ValueError(f"Unknown join mode '{how}'. Supported: {', '.join(cls.JOIN_MODES)}")
+        if fill not in cls.FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy '{fill}'. Supported: {', '.join(cls.FILL_POLICIES)}")
+        if field not in cls.FIELDS:
+            raise ValueError(f"Unknown field '{field}'. Supported: {', '.join(cls.FIELDS)}")
+        if not series:
+            raise ValueError("At least one series is required for alignment")
+
+        prepared = {
+            symbol: cls._prepare(data, field, resolution)
+            for symbol, data in series.items()
+        }
+
+        staleness = np.timedelta64(int(max_staleness.total_seconds()), "s") if max_staleness else None
+
+        if how == "inner":
+            timeline = prepared[next(iter(prepared))][0]
+            for timestamps, _ in prepared.values():
+                timeline = np.intersect1d(timeline, timestamps, assume_unique=True)
+            columns = {
+                symbol: values[np.searchsorted(timestamps, timeline)]
+                for symbol, (timestamps, values) in prepared.items()
+            }
+            return AlignedSeries(timeline, columns)
+
+        if how == "asof":
+            reference_symbol = reference or next(iter(prepared))
+            if reference_symbol not in prepared:
+                raise ValueError(f"Reference symbol {reference_symbol} is not among the series")
+            timeline = prepared[reference_symbol][0]
+        else:
+            timeline = np.unique(np.concatenate([timestamps for timestamps, _ in prepared.values()]))
+
+        columns = {}
+        for symbol, (timestamps, values) in prepared.items():
+            if how == "outer" and fill == "none":
+                columns[symbol] = cls._exact_values(timestamps, values, timeline)
+            else:
+                columns[symbol] = cls._asof_values(timestamps, values, timeline, staleness)
+
+        complete = np.ones(len(timeline), dtype=bool)
+        for values in columns.values():
+            complete &= ~np.isnan(values)
+
+        return AlignedSeries(
+            timeline[complete],
+            {symbol: values[complete] for symbol, values in columns.items()}
+        )
+
+    @classmethod
+    def _prepare(
+        cls,
+        data: Union[CandleArrays, list[PriceCandle]],
+        field: str,
+        resolution: Optional[str]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Convierte una serie en (timestamps únicos ordenados, valores)
+        Si varios timestamps caen en el mismo bucket de resolución se conserva el último
+        @param data - Serie de velas
+        @param field - Campo de precio
+        @param resolution - Unidad de truncado (opcional)
+        @returns Tupla (timestamps, valores)
+        """
+        arrays = data if isinstance(data, CandleArrays) else CandleArrays.from_candles(data)
+        values = {
+            "open": arrays.opens,
+            "high": arrays.highs,
+            "low": arrays.lows,
+            "close": arrays.closes,
+        }[field]
+
+        timestamps = arrays.timestamps
+        if resolution:
+            timestamps = timestamps.astype(f"datetime64[{resolution}]").astype("datetime64[s]")
+
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        values = values[order]
+
+        # Último valor por timestamp: buscar la última aparición de cada valor único
+        reversed_unique, reversed_index = np.unique(timestamps[::-1], return_index=True)
+        last_positions = len(timestamps) - 1 - reversed_index
+        return reversed_unique, values[last_positions]
+
+    @staticmethod
+    def _asof_values(
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        timeline: np.ndarray,
+        max_staleness: Optional[np.timedelta64]
+    ) -> np.ndarray:
+        """
+        Último valor conocido en o antes de cada timestamp del eje
+        @param timestamps - Timestamps ordenados de la serie
+        @param values - Valores de la serie
+        @param timeline - Eje objetivo
+        @param max_staleness - Antigüedad máxima permitida (opcional)
+        @returns Array alineado con NaN donde no hay valor válido
+        """
+        result = np.full(len(timeline), np.nan)
+        if len(timestamps) == 0:
+            return result
+
+        positions = np.searchsorted(timestamps, timeline, side="right") - 1
+        valid = positions >= 0
+        result[valid] = values[positions[valid]]
+
+        if max_staleness is not None:
+            stale = np.zeros(len(timeline), dtype=bool)
+            stale[valid] = (timeline[valid] - timestamps[positions[valid]]) > max_staleness
+            result[stale] = np.nan
+
+        return result
+
+    @staticmethod
+    def _exact_values(
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        timeline: np.ndarray
+    ) -> np.ndarray:
+        """
+        Valores solo en timestamps exactos (sin relleno)
+        @param timestamps - Timestamps ordenados de la serie
+        @param values - Valores de la serie
+        @param timeline - Eje objetivo
+        @returns Array alineado con NaN donde la serie no tiene dato
+        """
+        result = np.full(len(timeline), np.nan)
+        if len(timestamps) == 0:
+            return result
+
+        positions = np.searchsorted(timestamps, timeline)
+        clipped = np.minimum(positions, len(timestamps) - 1)
+        matches = (positions < len(timestamps)) & (timestamps[clipped] == timeline)
+        result[matches] = values[clipped[matches]]
+        return result
@@ -0,0 +1,178 @@
+"""
+Cubo de estadísticas por sesión y día (rango, ATR, dirección, rupturas)
+Se construye en una sola pasada vectorizada sobre todas las velas del histórico
+"""
+from typing import Optional
+
+import numpy as np
+
+from app.models.market_analysis import SessionBaseline
+from app.utils.candle_arrays import CandleArrays
+from app.utils.trading_sessions import TradingSessions
+
+
+class SessionCube:
+    """Métricas por (día, sesión): cada campo es un array D x S con NaN donde la sesión no tiene velas"""
+
+    def __init__(self, dates: np.ndarray, fields: dict[str, np.ndarray]):
+        """
+        Inicializa el cubo
+        @param dates - Días incluidos (datetime64[D])
+        @param fields - Métricas por nombre, arrays de forma (días, sesiones)
+        """
+        self.dates = dates
+        self.fields = fields
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def field(self, name: str) -> np.ndarray:
+        """
+        Obtiene una métrica del cubo
+        @param name - Nombre de la métrica (ver SessionStatistics.FIELDS)
+        @returns Array días x sesiones
+        """
+        if name not in self.fields:
+            raise ValueError(f"Unknown session cube field '{name}'. Available: {', '.join(self.fields)}")
+        return self.fields[name]
+
+
+class SessionStatistics:
+    """Constructor del cubo de sesiones y de las estadísticas de referencia por sesión"""
+
+    FIELDS = (
+        "open", "high", "low", "close", "range", "atr",
+        "change_percent", "direction", "broke_high", "broke_low", "bars",
+    )
+
+    # Mismo umbral por defecto que MarketAnalyzer.calculate_direction (en %)
+    DIRECTION_THRESHOLD = 0.001
+
+    @classmethod
+    def build_cube(cls, arrays: CandleArrays, days: Optional[int] = None) -> SessionCube:
+        """
+        Construye el cubo (día x sesión) etiquetando todas las velas en una pasada
+        @param arrays - Velas intradía ordenadas por timestamp
+        @param days - Conservar solo los últimos N días con datos (opcional)
+        @returns Cubo de métricas por sesión
+        """
+        session_count = len(TradingSessions.SESSION_ORDER)
+        day_of_bar = arrays.timestamps.astype("datetime64[D]")
+        dates, day_index = np.unique(day_of_bar, return_inverse=True)
+
+        cube = {name: np.full((len(dates), session_count), np.nan) for name in cls.FIELDS}
+        if len(arrays) == 0:
+            return SessionCube(dates, cube)
+
+        highs, lows, closes = arrays.highs, arrays.lows, arrays.closes
+        previous_closes = np.concatenate([[closes[0]], closes[:-1]])
+        true_ranges = np.maximum.reduce([
+            highs - lows,
+            np.abs(highs - previous_closes),
+            np.abs(lows - previous_closes),
+        ])
+        true_ranges[0] = highs[0] - lows[0]
+
+        # Máximo/mínimo de cada día completo (para las rupturas del día anterior)
+        day_starts = np.flatnonzero(np.diff(day_index, prepend=-1))
+        day_highs = np.maximum.reduceat(highs, day_starts)
+        day_lows = np.minimum.reduceat(lows, day_starts)
+        previous_day_highs = np.concatenate([[np.nan], day_highs[:-1]])
+        previous_day_lows = np.concatenate([[np.nan], day_lows[:-1]])
+
+        # Grupos (día, sesión): dentro de un día las sesiones son cronológicas, así que la clave es monótona
+        codes = TradingSessions.label_sessions(arrays.timestamps)
+        in_session = np.flatnonzero(codes != TradingSessions.NO_SESSION)
+        if len(in_session) == 0:
+            return cls._trim(SessionCube(dates, cube), days)
+
+        keys = day_index[in_session] * session_count + codes[in_session]
+        group_starts = np.flatnonzero(np.diff(keys, prepend=-1))
+        group_ends = np.append(group_starts[1:], len(keys)) - 1
+        group_keys = keys[group_starts]
+        group_days = group_keys // session_count
+        bars = np.diff(np.append(group_starts, len(keys)))
+
+        open_prices = arrays.opens[in_session][group_starts]
+        close_prices = closes[in_session][group_ends]
+        session_highs = np.maximum.reduceat(highs[in_session], group_starts)
+        session_lows = np.minimum.reduceat(lows[in_session], group_starts)
+        change_percent = np.where(open_prices != 0, (close_prices - open_prices) / open_prices * 100, 0.0)
+        direction = np.where(
+            change_percent > cls.DIRECTION_THRESHOLD, 1.0,
+            np.where(change_percent < -cls.DIRECTION_THRESHOLD, -1.0, 0.0)
+        )
+
+        previous_high = previous_day_highs[group_days]
+        previous_low = previous_day_lows[group_days]
+        with np.errstate(invalid="ignore"):
+            broke_high = np.where(np.isnan(previous_high), np.nan, (session_highs > previous_high).astype(float))
+            broke_low = np.where(np.isnan(previous_low), np.nan, (session_lows < previous_low).astype(float))
+
+        values = {
+            "open": open_prices,
+            "high": session_highs,
+            "low": session_lows,
+            "close": close_prices,
+            "range": session_highs - session_lows,
+            "atr": np.add.reduceat(true_ranges[in_session], group_starts) / bars,
+            "change_percent": change_percent,
+            "direction": direction,
+            "broke_high": broke_high,
+            "broke_low": broke_low,
+            "bars": bars.astype(float),
+        }
+        for name, group_values in values.items():
+            cube[name].reshape(-1)[group_keys] = group_values
+
+        # El recorte se hace al final para que el primer día conservado tenga su día anterior
+        return cls._trim(SessionCube(dates, cube), days)
+
+    @staticmethod
+    def _trim(cube: SessionCube, days: Optional[int]) -> SessionCube:
+        """
+        Conserva los últimos N días del cubo
+        @param cube - Cubo completo
+        @param days - Número de días (None para no recortar)
+        @returns Cubo recortado
+        """
+        if days is None or len(cube) <= days:
+            return cube
+        return SessionCube(cube.dates[-days:], {name: values[-days:] for name, values in cube.fields.items()})
+
+    @classmethod
+    def baselines(cls, cube: SessionCube) -> list[SessionBaseline]:
+        """
+        Resume el cubo en estadísticas de referencia por sesión
+        @param cube - Cubo de sesiones
+        @returns Lista de SessionBaseline (solo sesiones con datos)
+        """
+        ranges = cube.field("range")
+        result: list[SessionBaseline] = []
+
+        for code, session in enumerate(TradingSessions.SESSION_ORDER):
+            valid = ~np.isnan(ranges[:, code])
+            if not valid.any():
+                continue
+
+            session_ranges = ranges[valid, code]
+            directions = cube.field("direction")[valid, code]
+            last_range = float(session_ranges[-1])
+
+            result.append(SessionBaseline(
+                session=session,
+                days=int(valid.sum()),
+                average_range=round(float(session_ranges.mean()), 2),
+                median_range=round(float(np.median(session_ranges)), 2),
+                average_atr=round(float(cube.field("atr")[valid, code].mean()), 2),
+                average_change_percent=round(float(cube.field("change_percent")[valid, code].mean()), 3),
+                bullish_days=int((directions == 1).sum()),
+                bearish_days=int((directions == -1).sum()),
+                neutral_days=int((directions == 0).sum()),
+                broke_previous_high_count=int(np.nansum(cube.field("broke_high")[valid, code])),
+                broke_previous_low_count=int(np.nansum(cube.field("broke_low")[valid, code])),
+                last_range=round(last_range, 2),
+                last_range_percentile=round(float((session_ranges <= last_range).mean() * 100), 1),
+            ))
+
+        return result
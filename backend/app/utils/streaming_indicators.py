@@ -0,0 +1,374 @@
+"""
+Indicadores incrementales (streaming) con actualización O(1) por vela
+Cada indicador guarda su estado mínimo, se avanza vela a vela y puede serializarse
+(snapshot) y restaurarse por (instrumento, intervalo) sin recorrer el histórico
+"""
+from collections import deque
+from datetime import datetime
+from typing import Any, Optional
+
+
+class StreamingEMA:
+    """EMA incremental con semilla SMA (misma semántica que TechnicalAnalysis.calculate_ema)"""
+
+    def __init__(self, period: int):
+        """
+        Inicializa la EMA
+        @param period - Período de la EMA
+        """
+        self.period = period
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        """
+        Avanza la EMA con un nuevo cierre
+        @param close - Precio de cierre de la nueva vela
+        @returns EMA actual o None si aún no hay 'period' velas
+        """
+        self.count += 1
+        if self.count <= self.period:
+            self.seed_sum += close
+            if self.count == self.period:
+                self.value = self.seed_sum / self.period
+            return self.value
+
+        multiplier = 2.0 / (self.period + 1)
+        self.value = (close * multiplier) + (self.value * (1 - multiplier))
+        return self.value
+
+    def to_state(self) -> dict[str, Any]:
+        """@returns Estado serializable"""
+        return {"period": self.period, "count": self.count, "seed_sum": self.seed_sum, "value": self.value}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "StreamingEMA":
+        """
+        Restaura la EMA desde un snapshot
+        @param state - Estado generado por to_state
+        @returns Instancia restaurada
+        """
+        ema = cls(state["period"])
+        ema.count = state["count"]
+        ema.seed_sum = state["seed_sum"]
+        ema.value = state["value"]
+        return ema
+
+
+class StreamingRSI:
+    """RSI de Wilder incremental"""
+
+    def __init__(self, period: int = 14):
+        """
+        Inicializa el RSI
+        @param period - Período del RSI
+        """
+        self.period = period
+        self.previous_close: Optional[float] = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    @property
+    def value(self) -> Optional[float]:
+        """@returns RSI actual (0-100) o None si no hay suficientes variaciones"""
+        if self.count < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        rs = self.avg_gain / self.avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def update(self, close: float) -> Optional[float]:
+        """
+        Avanza el RSI con un nuevo cierre
+        @param close - Precio de cierre de la nueva vela
+        @returns RSI actual o None
+        """
+        if self.previous_close is None:
+            self.previous_close = close
+            return None
+
+        change = close - self.previous_close
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        self.previous_close = close
+        self.count += 1
+
+        if self.count <= self.period:
+            # Acumular las primeras N variaciones; al completarlas se convierten en promedio simple
+            self.avg_gain += gain
+            self.avg_loss += loss
+            if self.count == self.period:
+                self.avg_gain /= self.period
+                self.avg_loss /= self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        return self.value
+
+    def to_state(self) -> dict[str, Any]:
+        """@returns Estado serializable"""
+        return {
+            "period": self.period,
+            "previous_close": self.previous_close,
+            "count": self.count,
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "StreamingRSI":
+        """
+        Restaura el RSI desde un snapshot
+        @param state - Estado generado por to_state
+        @returns Instancia restaurada
+        """
+        rsi = cls(state["period"])
+        rsi.previous_close = state["previous_close"]
+        rsi.count = state["count"]
+        rsi.avg_gain = state["avg_gain"]
+        rsi.avg_loss = state["avg_loss"]
+        return rsi
+
+
+class StreamingATR:
+    """ATR incremental con suavizado de Wilder"""
+
+    def __init__(self, period: int = 14):
+        """
+        Inicializa el ATR
+        @param period - Período del ATR
+        """
+        self.period = period
+        self.previous_close: Optional[float] = None
+        self.count = 0
+        self.value: Optional[float] = None
+        self._seed_sum = 0.0
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        """
+        Avanza el ATR con una nueva vela
+        @param high - Máximo de la vela
+        @param low - Mínimo de la vela
+        @param close - Cierre de la vela
+        @returns ATR actual o None si aún no hay 'period' velas
+        """
+        if self.previous_close is None:
+            true_range = high - low
+        else:
+            true_range = max(
+                high - low,
+                abs(high - self.previous_close),
+                abs(low - self.previous_close)
+            )
+        self.previous_close = close
+        self.count += 1
+
+        if self.count <= self.period:
+            self._seed_sum += true_range
+            if self.count == self.period:
+                self.value = self._seed_sum / self.period
+            return self.value
+
+        self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+    def to_state(self) -> dict[str, Any]:
+        """@returns Estado serializable"""
+        return {
+            "period": self.period,
+            "previous_close": self.previous_close,
+            "count": self.count,
+            "value": self.value,
+            "seed_sum": self._seed_sum,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "StreamingATR":
+        """
+        Restaura el ATR desde un snapshot
+        @param state - Estado generado por to_state
+        @returns Instancia restaurada
+        """
+        atr = cls(state["period"])
+        atr.previous_close = state["previous_close"]
+        atr.count = state["count"]
+        atr.value = state["value"]
+        atr._seed_sum = state["seed_sum"]
+        return atr
+
+
+class RollingHighLow:
+    """Máximo y mínimo de las últimas N velas con colas monótonas (O(1) amortizado)"""
+
+    def __init__(self, window: int = 20):
+        """
+        Inicializa la ventana
+        @param window - Número de velas de la ventana
+        """
+        self.window = window
+        self.index = -1
+        self._highs: deque[tuple[int, float]] = deque()
+        self._lows: deque[tuple[int, float]] = deque()
+
+    @property
+    def highest(self) -> Optional[float]:
+        """@returns Máximo de la ventana o None si está vacía"""
+        return self._highs[0][1] if self._highs else None
+
+    @property
+    def lowest(self) -> Optional[float]:
+        """@returns Mínimo de la ventana o None si está vacía"""
+        return self._lows[0][1] if self._lows else None
+
+    def update(self, high: float, low: float) -> tuple[Optional[float], Optional[float]]:
+        """
+        Avanza la ventana con una nueva vela
+        @param high - Máximo de la vela
+        @param low - Mínimo de la vela
+        @returns Tupla (máximo, mínimo) de la ventana
+        """
+        self.index += 1
+
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((self.index, high))
+
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((self.index, low))
+
+        oldest_allowed = self.index - self.window + 1
+        while self._highs[0][0] < oldest_allowed:
+            self._highs.popleft()
+        while self._lows[0][0] < oldest_allowed:
+            self._lows.popleft()
+
+        return self.highest, self.lowest
+
+    def to_state(self) -> dict[str, Any]:
+        """@returns Estado serializable"""
+        return {
+            "window": self.window,
+            "index": self.index,
+            "highs": [list(item) for item in self._highs],
+            "lows": [list(item) for item in self._lows],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "RollingHighLow":
+        """
+        Restaura la ventana desde un snapshot
+        @param state - Estado generado por to_state
+        @returns Instancia restaurada
+        """
+        rolling = cls(state["window"])
+        rolling.index = state["index"]
+        rolling._highs = deque((int(i), float(v)) for i, v in state["highs"])
+        rolling._lows = deque((int(i), float(v)) for i, v in state["lows"])
+        return rolling
+
+
+class IndicatorSet:
+    """Conjunto de indicadores incrementales de un (instrumento, intervalo)"""
+
+    EMA_PERIODS = (50, 100, 200)
+
+    def __init__(
+        self,
+        rsi_period: int = 14,
+        atr_period: int = 14,
+        range_window: int = 20
+    ):
+        """
+        Inicializa los indicadores vacíos
+        @param rsi_period - Período del RSI de Wilder
+        @param atr_period - Período del ATR de Wilder
+        @param range_window - Ventana del máximo/mínimo móvil
+        """
+        self.emas = {period: StreamingEMA(period) for period in self.EMA_PERIODS}
+        self.rsi = StreamingRSI(rsi_period)
+        self.atr = StreamingATR(atr_period)
+        self.range = RollingHighLow(range_window)
+        self.last_timestamp: Optional[datetime] = None
+
+    def update(
+        self,
+        timestamp: datetime,
+        high: float,
+        low: float,
+        close: float
+    ) -> dict[str, Any]:
+        """
+        Avanza todos los indicadores con una nueva vela
+        @param timestamp - Timestamp de la vela (debe ser posterior a la última procesada)
+        @param high - Máximo de la vela
+        @param low - Mínimo de la vela
+        @param close - Cierre de la vela
+        @returns Valores actuales de los indicadores
+        @raises ValueError si la vela no es posterior a la última procesada
+        """
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            raise ValueError(
+                f"Candle at {timestamp.isoformat()} is not newer than last processed "
+                f"candle {self.last_timestamp.isoformat()}"
+            )
+
+        for ema in self.emas.values():
+            ema.update(close)
+        self.rsi.update(close)
+        self.atr.update(high, low, close)
+        self.range.update(high, low)
+        self.last_timestamp = timestamp
+        return self.values()
+
+    def values(self) -> dict[str, Any]:
+        """
+        Valores actuales de los indicadores
+        @returns Diccionario con rsi, atr, ema_*, rolling_high, rolling_low y timestamp
+        """
+        result: dict[str, Any] = {
+            "timestamp": self.last_timestamp.isoformat() if self.last_timestamp else None,
+            "rsi": self.rsi.value,
+            "atr": self.atr.value,
+            "rolling_high": self.range.highest,
+            "rolling_low": self.range.lowest,
+        }
+        for period, ema in self.emas.items():
+            result[f"ema_{period}"] = ema.value
+        return result
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Serializa el estado completo (JSON compatible)
+        @returns Snapshot del conjunto de indicadores
+        """
+        return {
+            "last_timestamp": self.last_timestamp.isoformat() if self.last_timestamp else None,
+            "emas": {str(period): ema.to_state() for period, ema in self.emas.items()},
+            "rsi": self.rsi.to_state(),
+            "atr": self.atr.to_state(),
+            "range": self.range.to_state(),
+        }
+
+    @classmethod
+    def restore(cls, snapshot: dict[str, Any]) -> "IndicatorSet":
+        """
+        Restaura el conjunto desde un snapshot
+        @param snapshot - Snapshot generado por snapshot()
+        @returns Conjunto de indicadores listo para seguir avanzando
+        """
+        indicators = cls()
+        indicators.emas = {
+            int(period): StreamingEMA.from_state(state)
+            for period, state in snapshot["emas"].items()
+        }
+        indicators.rsi = StreamingRSI.from_state(snapshot["rsi"])
+        indicators.atr = StreamingATR.from_state(snapshot["atr"])
+        indicators.range = RollingHighLow.from_state(snapshot["range"])
+        last_timestamp = snapshot.get("last_timestamp")
+        indicators.last_timestamp = datetime.fromisoformat(last_timestamp) if last_timestamp else None
+        return indicators
@@ -0,0 +1,224 @@
+"""
+Detector de swings (fractales de ancho configurable) y agrupación de swings en zonas
+Los máximos/mínimos deslizantes se calculan con una cola monótona en O(n) independiente
+del ancho, y las zonas se forman ordenando precios y barriendo una sola vez
+"""
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from app.models.market_analysis import PriceZone
+from app.utils.candle_arrays import CandleArrays
+
+
+class SwingDetector:
+    """Swings de máximo/mínimo y zonas de soporte/resistencia sobre CandleArrays"""
+
+    # Velas a cada lado que el swing debe superar
+    DEFAULT_WIDTH = 2
+
+    # Ancho máximo de una zona como porcentaje del precio mediano
+    ZONE_TOLERANCE_PERCENT = 0.15
+
+    # Velas para que el peso de un toque se reduzca a la mitad
+    RECENCY_HALF_LIFE = 50
+
+    @staticmethod
+    def sliding_max(values: np.ndarray, window: int) -> np.ndarray:
+        """
+        Máximo de las últimas `window` posiciones (incluida la actual) con una cola monótona
+        Cada índice entra y sale de la cola una sola vez, por lo que el coste es O(n)
+        @param values - Serie de valores
+        @param window - Tamaño de la ventana (las primeras posiciones usan ventana parcial)
+        @returns Array con el máximo deslizante
+        """
+        data = np.asarray(values, dtype=np.float64).tolist()
+        candidates: deque[int] = deque()
+        result: list[float] = []
+        for i, value in enumerate(data):
+            while candidates and data[candidates[-1]] <= value:
+                candidates.pop()
+            candidates.append(i)
+            if candidates[0] <= i - window:
+                candidates.popleft()
+            result.append(data[candidates[0]])
+        return np.array(result, dtype=np.float64)
+
+    @classmethod
+    def sliding_min(cls, values: np.ndarray, window: int) -> np.ndarray:
+        """
+        Mínimo de las últimas `window` posiciones (incluida la actual)
+        @param values - Serie de valores
+        @param window - Tamaño de la ventana
+        @returns Array con el mínimo deslizante
+        """
+        return -cls.sliding_max(-np.asarray(values, dtype=np.float64), window)
+
+    @classmethod
+    def find_swings(
+        cls,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        width: int = DEFAULT_WIDTH
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Índices de swings: máximos (mínimos) estrictamente mayores (menores) que las `width` velas
+        a cada lado. Con width=1 equivale al máximo/mínimo local de 3 velas
+        @param highs - Precios máximos
+        @param lows - Precios mínimos
+        @param width - Velas a cada lado
+        @returns Tupla (índices de swing high, índices de swing low)
+        """
+        if width < 1:
+            raise ValueError(f"Swing width must be at least 1, got {width}")
+
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        empty = np.empty(0, dtype=np.int64)
+        if len(highs) < 2 * width + 1:
+            return empty, empty
+
+        # Con una ventana trailing de `width` velas: el lado izquierdo de i es la ventana que
+        # termina en i-1 y el derecho la que termina en i+width
+        center = np.arange(width, len(highs) - width)
+        trailing_max = cls.sliding_max(highs, width)
+        trailing_min = cls.sliding_min(lows, width)
+
+        is_high = (highs[center] > trailing_max[center - 1]) & (highs[center] > trailing_max[center + width])
+        is_low = (lows[center] < trailing_min[center - 1]) & (lows[center] < trailing_min[center + width])
+        return center[is_high], center[is_low]
+
+    @classmethod
+    def cluster_zones(
+        cls,
+        prices: np.ndarray,
+        indices: np.ndarray,
+        is_high: np.ndarray,
+        tolerance: float,
+        last_index: int,
+        half_life: float = RECENCY_HALF_LIFE
+    ) -> list[dict]:
+        """
+        Agrupa precios de swing en zonas: se ordenan y se abre una zona nueva cuando el precio se
+        aleja más de `tolerance` del primer precio de la zona actual (el ancho queda acotado)
+        @param prices - Precios de los swings
+        @param indices - Posición de cada swing en la serie
+        @param is_high - True si el swing es un máximo
+        @param tolerance - Ancho máximo de una zona en puntos
+        @param last_index - Posición de la última vela (referencia de recencia)
+        @param half_life - Velas para que el peso de un toque se reduzca a la mitad
+        @returns Lista de zonas (dict) ordenadas por peso descendente
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) == 0:
+            return []
+
+        order = np.argsort(prices, kind="stable")
+        sorted_prices = prices[order]
+        sorted_indices = np.asarray(indices, dtype=np.int64)[order]
+        sorted_highs = np.asarray(is_high, dtype=bool)[order]
+        weights = 0.5 ** ((last_index - sorted_indices) / half_life)
+
+        starts = [0]
+        anchor = sorted_prices[0]
+        for position, price in enumerate(sorted_prices.tolist()):
+            if price - anchor > tolerance:
+                starts.append(position)
+                anchor = price
+        boundaries = np.array(starts)
+
+        weight_sums = np.add.reduceat(weights, boundaries)
+        centers = np.add.reduceat(sorted_prices * weights, boundaries) / weight_sums
+        touches = np.diff(np.append(boundaries, len(sorted_prices)))
+        high_counts = np.add.reduceat(sorted_highs.astype(np.int64), boundaries)
+        uppers = np.maximum.reduceat(sorted_prices, boundaries)
+        last_touches = np.maximum.reduceat(sorted_indices, boundaries)
+
+        zones = [
+            {
+                "level": round(float(centers[k]), 2),
+                "lower": round(float(sorted_prices[boundaries[k]]), 2),
+                "upper": round(float(uppers[k]), 2),
+                "touches": int(touches[k]),
+                "swing_highs": int(high_counts[k]),
+                "swing_lows": int(touches[k] - high_counts[k]),
+                "weight": round(float(weight_sums[k]), 4),
+                "last_index": int(last_touches[k]),
+            }
+            for k in range(len(boundaries))
+        ]
+        zones.sort(key=lambda zone: zone["weight"], reverse=True)
+        return zones
+
+    @classmethod
+    def detect_zones(
+        cls,
+        arrays: CandleArrays,
+        width: int = DEFAULT_WIDTH,
+        tolerance: Optional[float] = None,
+        half_life: float = RECENCY_HALF_LIFE,
+        min_touches: int = 1
+    ) -> list[PriceZone]:
+        """
+        Detecta swings y los agrupa en zonas de soporte/resistencia
+        @param arrays - Serie de velas ordenada
+        @param width - Velas a cada lado de un swing
+        @param tolerance - Ancho máximo de zona en puntos (por defecto ZONE_TOLERANCE_PERCENT del precio mediano)
+        @param half_life - Velas para que el peso de un toque se reduzca a la mitad
+        @param min_touches - Toques mínimos para devolver una zona
+        @returns Zonas ordenadas por peso (toques ponderados por recencia) descendente
+        """
+        high_indices, low_indices = cls.find_swings(arrays.highs, arrays.lows, width)
+        if len(high_indices) == 0 and len(low_indices) == 0:
+            return []
+
+        if tolerance is None:
+            tolerance = float(np.median(arrays.closes)) * cls.ZONE_TOLERANCE_PERCENT / 100
+
+        last_index = len(arrays) - 1
+        zones = cls.cluster_zones(
+            prices=np.concatenate([arrays.highs[high_indices], arrays.lows[low_indices]]),
+            indices=np.concatenate([high_indices, low_indices]),
+            is_high=np.concatenate([
+                np.ones(len(high_indices), dtype=bool),
+                np.zeros(len(low_indices), dtype=bool),
+            ]),
+            tolerance=tolerance,
+            last_index=last_index,
+            half_life=half_life,
+        )
+
+        return [
+            PriceZone(
+                level=zone["level"],
+                lower=zone["lower"],
+                upper=zone["upper"],
+                touches=zone["touches"],
+                swing_highs=zone["swing_highs"],
+                swing_lows=zone["swing_lows"],
+                weight=zone["weight"],
+                bars_since_touch=last_index - zone["last_index"],
+                last_touch=arrays.timestamp_at(zone["last_index"]),
+            )
+            for zone in zones
+            if zone["touches"] >= min_touches
+        ]
+
+    @staticmethod
+    def zone_containing(
+        zones: list[PriceZone],
+        price: float,
+        tolerance: float = 0.0
+    ) -> Optional[PriceZone]:
+        """
+        Zona de mayor peso que contiene un precio
+        @param zones - Zonas ordenadas por peso descendente
+        @param price - Precio a buscar
+        @param tolerance - Margen en puntos alrededor de cada zona
+        @returns Zona encontrada o None
+        """
+        for zone in zones:
+            if zone.lower - tolerance <= price <= zone.upper + tolerance:
+                return zone
+        return None
@@ -6,7 +6,11 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
+
 from app.models.market_analysis import MarketDirection, PriceCandle
+from app.utils.candle_arrays import CandleArrays
+from app.utils.swing_detector import SwingDetector
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +18,12 @@ logger = logging.getLogger(__name__)
 class TechnicalAnalysis:
     """Utilidades para análisis técnico"""
     
+    # Cambio porcentual mínimo de la ventana para considerar tendencia
+    TREND_THRESHOLD_PERCENT = 0.5
+    
+    # Distancia porcentual entre cierres a partir de la cual un impulso es fuerte
+    IMPULSE_STRONG_PERCENT = 0.3
+    
     @staticmethod
     def calculate_rsi(candles: list[PriceCandle], period: int = 14) -> Optional[float]:
         """
@@ -57,11 +67,16 @@ class TechnicalAnalysis:
         return round(rsi, 2)
     
     @staticmethod
-    def identify_trend(candles: list[PriceCandle], lookback_periods: int = 20) -> MarketDirection:
+    def identify_trend(
+        candles: list[PriceCandle],
+        lookback_periods: int = 20,
+        threshold_percent: float = TREND_THRESHOLD_PERCENT
+    ) -> MarketDirection:
         """
         Identifica la tendencia en un timeframe
         @param candles - Lista de velas ordenadas por timestamp
         @param lookback_periods - Número de períodos a analizar
+        @param threshold_percent - Cambio porcentual mínimo para considerar tendencia
         @returns Dirección de la tendencia (alcista, bajista, lateral)
         """
         if len(candles) < lookback_periods:
@@ -100,11 +115,9 @@ class TechnicalAnalysis:
         price_change_percent = ((last_close - first_close) / first_close) * 100
         
         # Determinar tendencia
-        threshold = 0.5  # 0.5% mínimo para considerar tendencia
-        
-        if higher_highs > lower_highs and higher_lows > lower_lows and price_change_percent > threshold:
+        if higher_highs > lower_highs and higher_lows > lower_lows and price_change_percent > threshold_percent:
             return MarketDirection.BULLISH
-        elif lower_lows > higher_lows and lower_highs > higher_highs and price_change_percent < -threshold:
+        elif lower_lows > higher_lows and lower_highs > higher_highs and price_change_percent < -threshold_percent:
             return MarketDirection.BEARISH
         else:
             return MarketDirection.NEUTRAL
@@ -112,12 +125,14 @@ class TechnicalAnalysis:
     @staticmethod
     def analyze_impulse_strength(
         candles: list[PriceCandle],
-        lookback: int = 2
+        lookback: int = 2,
+        strong_percent: float = IMPULSE_STRONG_PERCENT
     ) -> tuple[Optional[MarketDirection], float, bool]:
         """
         Analiza la fuerza del último impulso dominante
         @param candles - Lista de velas ordenadas
         @param lookback - Número de velas a analizar (último cierre vs penúltimo)
+        @param strong_percent - Distancia porcentual mínima para considerar el impulso fuerte
         @returns Tupla (dirección, distancia_percent, es_fuerte)
         """
         if len(candles) < lookback + 1:
@@ -139,61 +154,42 @@ class TechnicalAnalysis:
         else:
             direction = MarketDirection.NEUTRAL
         
-        # Considerar fuerte si la distancia es > 0.3% (ajustable según instrumento)
-        is_strong = distance_percent > 0.3
+        # Considerar fuerte si la distancia supera el umbral (ajustable según instrumento)
+        is_strong = distance_percent > strong_percent
         
         return direction, round(distance_percent, 2), is_strong
     
     @staticmethod
     def find_support_resistance(
         candles: list[PriceCandle],
-        lookback_periods: int = 50
+        lookback_periods: int = 50,
+        swing_width: int = 1
     ) -> tuple[Optional[float], Optional[float]]:
         """
         Encuentra niveles de soporte y resistencia basados en máximos y mínimos locales
         @param candles - Lista de velas ordenadas
         @param lookback_periods - Períodos a analizar
+        @param swing_width - Velas a cada lado de un máximo/mínimo local (1 = fractal de 3 velas)
         @returns Tupla (soporte, resistencia)
         """
         if len(candles) < 10:
             return None, None
         
-        sorted_candles = sorted(candles, key=lambda c: c.timestamp)
-        recent_candles = sorted_candles[-lookback_periods:] if len(sorted_candles) > lookback_periods else sorted_candles
+        arrays = CandleArrays.from_candles(candles)
+        recent = arrays.slice(max(0, len(arrays) - lookback_periods))
         
         # Encontrar máximos y mínimos locales
-        highs: list[float] = []
-        lows: list[float] = []
-        
-        for i in range(1, len(recent_candles) - 1):
-            # Máximo local: mayor que vecinos
-            if (recent_candles[i].high > recent_candles[i-1].high and 
-                recent_candles[i].high > recent_candles[i+1].high):
-                highs.append(recent_candles[i].high)
-            
-            # Mínimo local: menor que vecinos
-            if (recent_candles[i].low < recent_candles[i-1].low and 
-                recent_candles[i].low < recent_candles[i+1].low):
-                lows.append(recent_candles[i].low)
-        
-        # También considerar el máximo y mínimo absolutos del período
-        all_highs = [c.high for c in recent_candles]
-        all_lows = [c.low for c in recent_candles]
-        
-        if not highs:
-            highs = [max(all_highs)]
-        if not lows:
-            lows = [min(all_lows)]
-        
-        # Calcular resistencia como promedio de máximos locales más altos
-        # Tomar los 3 máximos más altos
-        top_highs = sorted(highs, reverse=True)[:3]
-        resistance = sum(top_highs) / len(top_highs) if top_highs else max(all_highs)
-        
-        # Calcular soporte como promedio de mínimos locales más bajos
-        # Tomar los 3 mínimos más bajos
-        bottom_lows = sorted(lows)[:3]
-        support = sum(bottom_lows) / len(bottom_lows) if bottom_lows else min(all_lows)
+        high_indices, low_indices = SwingDetector.find_swings(recent.highs, recent.lows, swing_width)
+        
+        # Si no hay extremos locales, considerar el máximo y mínimo absolutos del período
+        highs = recent.highs[high_indices] if len(high_indices) else recent.highs.max(keepdims=True)
+        lows = recent.lows[low_indices] if len(low_indices) else recent.lows.min(keepdims=True)
+        
+        # Resistencia como promedio de los 3 máximos locales más altos
+        resistance = float(np.sort(highs)[::-1][:3].mean())
+        
+        # Soporte como promedio de los 3 mínimos locales más bajos
+        support = float(np.sort(lows)[:3].mean())
         
         return round(support, 2), round(resistance, 2)
     
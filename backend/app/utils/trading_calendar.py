@@ -0,0 +1,301 @@
+"""
+Calendario de negociación del oro (CME Globex, metales)
+Extiende BusinessDays con los festivos de cierre completo y el horario de sesión
+(domingo a viernes de 18:00 a 17:00 ET con pausa diaria de una hora) para saber qué velas
+deben existir y cuál es la última vela cerrada esperada de cada intervalo.
+Todos los timestamps son naive en UTC, como en market_data
+"""
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.utils.business_days import BusinessDays
+
+logger = logging.getLogger(__name__)
+
+
+class TradingCalendar(BusinessDays):
+    """Horario de mercado, festivos y última vela esperada por intervalo"""
+
+    EXCHANGE_TIMEZONE = ZoneInfo("America/New_York")
+
+    # Hora ET a la que cierra la sesión; la siguiente abre una hora después y pertenece al día siguiente
+    SESSION_CLOSE_HOUR = 17
+    SESSION_OPEN_HOUR = 18
+
+    # Duración de cada intervalo en segundos (formato de BD)
+    INTERVAL_SECONDS = {
+        "1m": 60, "5m": 300, "15m": 900, "30m": 1800,
+        "1h": 3600, "4h": 14400, "1d": 86400, "1w": 604800,
+    }
+
+    # Ventana hacia atrás en la que se busca la última vela esperada (cubre fin de semana + festivo)
+    LOOKBACK_DAYS = 10
+
+    _holidays: dict[int, frozenset[date]] = {}
+
+    @staticmethod
+    def easter_sunday(year: int) -> date:
+        """
+        Domingo de Pascua (algoritmo gregoriano anónimo)
+        @param year - Año
+        @returns Fecha del domingo de Pascua
+        """
+        a = year % 19
+        b, c = divmod(year, 100)
+        d, e = divmod(b, 4)
+        f = (b + 8) // 25
+        g = (b - f + 1) // 3
+        h = (19 * a + b - d - g + 15) % 30
+        i, k = divmod(c, 4)
+        l = (32 + 2 * e + 2 * i - h - k) % 7
+        m = (a + 11 * h + 22 * l) // 451
+        month, day = divmod(h + l - 7 * m + 114, 31)
+        return date(year, month, day + 1)
+
+    @staticmethod
+    def _observed(holiday: date, saturday_to_friday: bool = True) -> date:
+        """
+        Día en que se observa un festivo que cae en fin de semana (sábado -> viernes, domingo -> lunes)
+        @param holiday - Fecha del festivo
+        @param saturday_to_friday - Si el festivo en sábado se adelanta al viernes
+        @returns Fecha observada
+        """
+        if holiday.weekday() == 5 and saturday_to_friday:
+            return holiday - timedelta(days=1)
+        if holiday.weekday() == 6:
+            return holiday + timedelta(days=1)
+        return holiday
+
+    @classmethod
+    def holidays(cls, year: int) -> frozenset[date]:
+        """
+        Festivos con cierre completo de los metales: Año Nuevo, Viernes Santo y Navidad
+        (el resto de festivos de EE.UU. solo acortan la sesión). Año Nuevo en sábado no
+        se adelanta: el 31 de diciembre hay sesión
+        @param year - Año
+        @returns Conjunto de fechas de sesión sin negociación
+        """
+        if year not in cls._holidays:
+            cls._holidays[year] = frozenset({
+                cls._observed(date(year, 1, 1), saturday_to_friday=False),
+                cls.easter_sunday(year) - timedelta(days=2),
+                cls._observed(date(year, 12, 25)),
+            })
+        return cls._holidays[year]
+
+    @classmethod
+    def is_holiday(cls, check_date: date) -> bool:
+        """
+        Verifica si una fecha es festivo de mercado
+        @param check_date - Fecha a verificar
+        @returns True si no hay sesión por festivo
+        """
+        return check_date in cls.holidays(check_date.year)
+
+    @classmethod
+    def is_trading_day(cls, check_date: date) -> bool:
+        """
+        Verifica si una fecha tiene sesión (día hábil y no festivo)
+        @param check_date - Fecha a verificar
+        @returns True si hay sesión
+        """
+        return cls.is_business_day(check_date) and not cls.is_holiday(check_date)
+
+    @classmethod
+    def interval_seconds(cls, interval: str) -> int:
+        """
+        Duración del intervalo
+        @param interval - Intervalo de las velas (formato de BD)
+        @returns Segundos por vela
+        """
+        seconds = cls.INTERVAL_SECONDS.get(interval)
+        if seconds is None:
+            raise ValueError(
+                f"Unsupported interval '{interval}'. Supported intervals: {', '.join(cls.INTERVAL_SECONDS)}"
+            )
+        return seconds
+
+    @classmethod
+    def _eastern_offset_seconds(cls, seconds: np.ndarray) -> np.ndarray:
+        """
+        Desfase UTC -> ET de cada timestamp
+        Se evalúa una vez por día UTC a mediodía: el cambio de hora ocurre el domingo de madrugada,
+        con el mercado cerrado, así que el desfase de mediodía vale para todas las horas con sesión
+        @param seconds - Timestamps en segundos Unix (UTC)
+        @returns Desfase en segundos (negativo)
+        """
+        days, inverse = np.unique(seconds // 86400, return_inverse=True)
+        offsets = np.array([
+            datetime.fromtimestamp(int(day) * 86400 + 43200, cls.EXCHANGE_TIMEZONE).utcoffset().total_seconds()
+            for day in days
+        ], dtype=np.int64)
+        return offsets[inverse]
+
+    @classmethod
+    def _trading_day_mask(cls, day_numbers: np.ndarray) -> np.ndarray:
+        """
+        Indica qué días (días desde 1970-01-01) tienen sesión
+        @param day_numbers - Días como enteros
+        @returns Array booleano
+        """
+        if len(day_numbers) == 0:
+            return np.zeros(0, dtype=bool)
+        # 1970-01-01 fue jueves: desplazar 3 días para que el lunes sea el día 0
+        weekdays = (day_numbers + 3) % 7
+        first_year = int(day_numbers.min().astype("datetime64[D]").astype(datetime).year)
+        last_year = int(day_numbers.max().astype("datetime64[D]").astype(datetime).year)
+        holiday_days = np.array([
+            (holiday - date(1970, 1, 1)).days
+            for year in range(first_year, last_year + 1)
+            for holiday in cls.holidays(year)
+        ], dtype=np.int64)
+        return (weekdays < 5) & ~np.isin(day_numbers, holiday_days)
+
+    @classmethod
+    def open_mask(cls, seconds: np.ndarray) -> np.ndarray:
+        """
+        Indica si el mercado está abierto en cada instante
+        @param seconds - Timestamps en segundos Unix (UTC)
+        @returns Array booleano
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        eastern = seconds + cls._eastern_offset_seconds(seconds)
+        eastern_hour = (eastern // 3600) % 24
+        # A partir de las 18:00 ET se negocia la sesión del día siguiente
+        session_day = (eastern + (24 - cls.SESSION_OPEN_HOUR) * 3600) // 86400
+        in_pause = (eastern_hour >= cls.SESSION_CLOSE_HOUR) & (eastern_hour < cls.SESSION_OPEN_HOUR)
+        return cls._trading_day_mask(session_day) & ~in_pause
+
+    @classmethod
+    def expected_bar_mask(cls, seconds: np.ndarray, interval: str) -> np.ndarray:
+        """
+        Indica qué velas deben existir: las diarias de días con sesión y las intradía con alguna
+        hora de mercado abierto (las semanales siempre)
+        @param seconds - Timestamps de apertura de vela en segundos Unix (UTC)
+        @param interval - Intervalo de las velas
+        @returns Array booleano
+        """
+        step = cls.interval_seconds(interval)
+        seconds = np.asarray(seconds, dtype=np.int64)
+        if interval == "1w":
+            return np.ones(len(seconds), dtype=bool)
+        if interval == "1d":
+            return cls._trading_day_mask(seconds // 86400)
+        # La pausa y los cierres caen en horas en punto: basta con mirar cada hora de la vela
+        hour_offsets = np.arange(0, max(step, 3600), 3600, dtype=np.int64)
+        return cls.open_mask((seconds[:, None] + hour_offsets).ravel()).reshape(len(seconds), -1).any(axis=1)
+
+    @classmethod
+    def has_expected_bars(cls, start: datetime, end: datetime, interval: str) -> bool:
+        """
+        Indica si en un rango debe existir alguna vela (False si todo cae en fines de semana,
+        festivos o pausas de sesión)
+        @param start - Inicio del rango (naive UTC)
+        @param end - Fin del rango (naive UTC, inclusive)
+        @param interval - Intervalo de las velas (formato de BD)
+        @returns True si el calendario espera al menos una vela
+        """
+        step = cls.interval_seconds(interval)
+        first = cls._to_seconds(start) // step * step
+        seconds = np.arange(first, cls._to_seconds(end) + 1, step, dtype=np.int64)
+        return bool(cls.expected_bar_mask(seconds, interval).any())
+
+    @classmethod
+    def is_market_open(cls, moment: datetime) -> bool:
+        """
+        Verifica si el mercado está abierto en un instante
+        @param moment - Instante (naive UTC)
+        @returns True si hay negociación
+        """
+        return bool(cls.open_mask(np.array([cls._to_seconds(moment)]))[0])
+
+    @classmethod
+    def expected_latest_bar(cls, interval: str, now: Optional[datetime] = None) -> datetime:
+        """
+        Apertura de la última vela cerrada que debe existir en el momento dado
+        Intradía: la última vela completa con alguna hora de mercado. Diario: la última sesión
+        cerrada (a las 17:00 ET). Semanal: el lunes de la última semana con todas sus sesiones cerradas
+        @param interval - Intervalo de las velas (formato de BD)
+        @param now - Momento de referencia (naive UTC, por defecto ahora)
+        @returns Timestamp de apertura esperado (naive UTC)
+        """
+        step = cls.interval_seconds(interval)
+        now_seconds = cls._to_seconds(now or cls.utc_now())
+
+        if interval in ("1d", "1w"):
+            days = now_seconds // 86400 - np.arange(0, cls.LOOKBACK_DAYS, dtype=np.int64)
+            day_seconds = days * 86400
+            session_close = (
+                day_seconds + cls.SESSION_CLOSE_HOUR * 3600 - cls._eastern_offset_seconds(day_seconds)
+            )
+            closed = cls._trading_day_mask(days) & (session_close <= now_seconds)
+            latest_day = int(days[np.argmax(closed)])
+            if interval == "1d":
+                return cls._from_seconds(latest_day * 86400)
+
+            monday = latest_day - (latest_day + 3) % 7
+            pending = np.arange(latest_day + 1, monday + 5, dtype=np.int64)
+            if cls._trading_day_mask(pending).any():
+                monday -= 7
+            return cls._from_seconds(monday * 86400)
+
+        last_closed = (now_seconds // step - 1) * step
+        candidates = last_closed - step * np.arange(0, cls.LOOKBACK_DAYS * 86400 // step, dtype=np.int64)
+        expected = cls.expected_bar_mask(candidates, interval)
+        return cls._from_seconds(int(candidates[np.argmax(expected)]))
+
+    @classmethod
+    def is_fresh(cls, latest_timestamp: datetime, interval: str, now: Optional[datetime] = None) -> bool:
+        """
+        Indica si una serie tiene ya la última vela cerrada esperada
+        Se admite cualquier fase de la rejilla del proveedor (p. ej. velas H4 que abren a las 02:00):
+        la serie está al día si su última vela es posterior a la esperada menos un intervalo
+        @param latest_timestamp - Apertura de la última vela guardada (naive UTC)
+        @param interval - Intervalo de las velas (formato de BD)
+        @param now - Momento de referencia (naive UTC, por defecto ahora)
+        @returns True si no puede haber velas cerradas nuevas en el proveedor
+        """
+        step = timedelta(seconds=cls.interval_seconds(interval))
+        return latest_timestamp + step > cls.expected_latest_bar(interval, now)
+
+    @classmethod
+    def is_closed(cls, timestamp: datetime, interval: str, now: Optional[datetime] = None) -> bool:
+        """
+        Indica si una vela ha cerrado (ha transcurrido su intervalo completo), con cualquier fase de rejilla
+        @param timestamp - Apertura de la vela (naive UTC)
+        @param interval - Intervalo de las velas (formato de BD)
+        @param now - Momento de referencia (naive UTC, por defecto ahora)
+        @returns True si la vela ya no puede cambiar
+        """
+        step = timedelta(seconds=cls.interval_seconds(interval))
+        return timestamp + step <= (now or cls.utc_now())
+
+    @staticmethod
+    def utc_now() -> datetime:
+        """
+        Momento actual naive en UTC
+        @returns Datetime sin zona horaria
+        """
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _to_seconds(moment: datetime) -> int:
+        """
+        Convierte un datetime naive UTC a segundos Unix
+        @param moment - Datetime
+        @returns Segundos
+        """
+        return int(np.datetime64(moment, "s").astype(np.int64))
+
+    @staticmethod
+    def _from_seconds(seconds: int) -> datetime:
+        """
+        Convierte segundos Unix a datetime naive UTC
+        @param seconds - Segundos
+        @returns Datetime
+        """
+        return np.int64(seconds).astype("datetime64[s]").astype(datetime)
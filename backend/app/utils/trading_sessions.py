@@ -4,6 +4,8 @@ Utilidades para definir y trabajar con sesiones de trading
 from datetime import datetime, time, timedelta
 from typing import Optional
 
+import numpy as np
+
 from app.models.market_analysis import SessionType
 
 
@@ -20,6 +22,18 @@ class TradingSessions:
     NEW_YORK_START = time(12, 0)  # 12:00 UTC
     NEW_YORK_END = time(21, 0)     # 21:00 UTC
     
+    # Ventanas extendidas de liquidez (cubren las 24h; el solape Londres/NY se asigna a NY)
+    # Se usan para atribuir reacciones a una sesión aunque ocurran fuera del horario principal
+    EXTENDED_HOURS = {
+        SessionType.ASIA: (23, 8),
+        SessionType.LONDON: (8, 13),
+        SessionType.NEW_YORK: (13, 23),
+    }
+    
+    # Códigos enteros para el etiquetado vectorizado (el índice es el código; -1 = fuera de sesión)
+    SESSION_ORDER = (SessionType.ASIA, SessionType.LONDON, SessionType.NEW_YORK)
+    NO_SESSION = -1
+    
     @classmethod
     def get_session_for_time(cls, timestamp: datetime) -> Optional[SessionType]:
         """
@@ -38,6 +52,56 @@ class TradingSessions:
         
         return None
     
+    @classmethod
+    def get_extended_session_for_time(cls, timestamp: datetime) -> SessionType:
+        """
+        Determina la sesión de un timestamp según las ventanas extendidas de liquidez
+        @param timestamp - Timestamp a analizar (debe estar en UTC)
+        @returns Tipo de sesión (siempre hay una)
+        """
+        return cls.SESSION_ORDER[cls._hour_table(extended=True)[timestamp.hour]]
+    
+    @classmethod
+    def label_sessions(cls, timestamps: np.ndarray, extended: bool = False) -> np.ndarray:
+        """
+        Etiqueta un array completo de timestamps con su sesión en una sola pasada vectorizada
+        @param timestamps - Timestamps en UTC (datetime64)
+        @param extended - Usar las ventanas extendidas en lugar del horario principal
+        @returns Array int8 con el código de sesión (índice en SESSION_ORDER) o NO_SESSION
+        """
+        hours = timestamps.astype("datetime64[h]").astype(np.int64) % 24
+        return cls._hour_table(extended)[hours]
+    
+    @classmethod
+    def session_from_code(cls, code: int) -> Optional[SessionType]:
+        """
+        Convierte un código de label_sessions en SessionType
+        @param code - Código de sesión
+        @returns Tipo de sesión o None si es NO_SESSION
+        """
+        return cls.SESSION_ORDER[code] if code != cls.NO_SESSION else None
+    
+    @classmethod
+    def _hour_table(cls, extended: bool = False) -> np.ndarray:
+        """
+        Tabla hora UTC -> código de sesión (los límites de sesión son horas en punto)
+        @param extended - Usar las ventanas extendidas
+        @returns Array int8 de 24 posiciones
+        """
+        main_hours = {
+            SessionType.ASIA: (cls.ASIA_START.hour, cls.ASIA_END.hour),
+            SessionType.LONDON: (cls.LONDON_START.hour, cls.LONDON_END.hour),
+            SessionType.NEW_YORK: (cls.NEW_YORK_START.hour, cls.NEW_YORK_END.hour),
+        }
+        schedule = cls.EXTENDED_HOURS if extended else main_hours
+        
+        table = np.full(24, cls.NO_SESSION, dtype=np.int8)
+        for code, session in enumerate(cls.SESSION_ORDER):
+            start, end = schedule[session]
+            hours = range(start, end) if start < end else [*range(start, 24), *range(0, end)]
+            table[list(hours)] = code
+        return table
+    
     @classmethod
     def get_session_bounds(cls, session: SessionType, date: datetime) -> tuple[datetime, datetime]:
         """
@@ -4,11 +4,19 @@ Utilidades para calcular volatilidad y ATR (Average True Range)
 from typing import Optional
 
 from app.models.market_analysis import PriceCandle, VolatilityLevel
+from app.utils.volatility_distribution import VolatilityDistribution
 
 
 class VolatilityCalculator:
     """Calculador de volatilidad y ATR"""
     
+    # Ratio ATR actual / ATR promedio a partir del cual se asigna cada nivel (de mayor a menor)
+    RATIO_THRESHOLDS = {
+        VolatilityLevel.EXTREME: 1.5,
+        VolatilityLevel.HIGH: 1.2,
+        VolatilityLevel.NORMAL: 0.8,
+    }
+    
     @classmethod
     def calculate_atr(
         cls,
@@ -71,40 +79,46 @@ class VolatilityCalculator:
     def classify_volatility(
         cls,
         atr: float,
-        average_atr: float
+        average_atr: float,
+        thresholds: Optional[dict[VolatilityLevel, float]] = None
     ) -> VolatilityLevel:
         """
         Clasifica el nivel de volatilidad comparando ATR actual vs promedio
         @param atr - ATR actual
         @param average_atr - ATR promedio histórico
+        @param thresholds - Ratios mínimos de extrema/alta/normal (por defecto RATIO_THRESHOLDS)
         @returns Nivel de volatilidad
         """
         if average_atr == 0:
             return VolatilityLevel.NORMAL
         
+        thresholds = thresholds or cls.RATIO_THRESHOLDS
         ratio = atr / average_atr
         
-        if ratio >= 1.5:
-            return VolatilityLevel.EXTREME
-        elif ratio >= 1.2:
-            return VolatilityLevel.HIGH
-        elif ratio >= 0.8:
-            return VolatilityLevel.NORMAL
-        else:
-            return VolatilityLevel.LOW
+        for level in (VolatilityLevel.EXTREME, VolatilityLevel.HIGH, VolatilityLevel.NORMAL):
+            if ratio >= thresholds[level]:
+                return level
+        return VolatilityLevel.LOW
     
     @classmethod
     def analyze_session_volatility(
         cls,
         session_candles: list[PriceCandle],
         historical_candles: Optional[list[PriceCandle]] = None,
-        period: int = 14
+        period: int = 14,
+        distribution: Optional[VolatilityDistribution] = None
     ) -> dict:
         """
         Analiza la volatilidad de una sesión
+        Con distribución, el ATR de la sesión (media de sus true ranges, como mucho period) se ordena frente
+        al ATR(14) de cada vela guardada en bar_features, y el rango medio por vela de la sesión (high - low)
+        frente al rango de cada vela guardada: ambos son medias de velas del mismo intervalo en las mismas
+        unidades, pero la sesión promedia menos velas que el ATR(14) y el rango medio se compara con velas
+        sueltas, así que sus percentiles son algo más dispersos (ATR) o más centrados (rango)
         @param session_candles - Velas de la sesión
         @param historical_candles - Velas históricas para comparación (opcional)
         @param period - Período para ATR
+        @param distribution - Distribución histórica de ATR y rango; si está disponible se clasifica por percentil
         @returns Diccionario con análisis de volatilidad
         """
         if not session_candles:
@@ -130,8 +144,18 @@ class VolatilityCalculator:
         # Comparar con histórico si está disponible
         volatility_level = VolatilityLevel.NORMAL
         comparison_text = ""
+        atr_percentile = None
+        range_percentile = None
         
-        if historical_candles and len(historical_candles) >= period:
+        percentile_level = distribution.classify("atr", atr) if distribution else None
+        if percentile_level is not None:
+            volatility_level = percentile_level
+            atr_percentile = distribution.percentile("atr", atr)
+            comparison_text = f" (percentil {atr_percentile:.0f} de {distribution.count('atr')} velas)"
+        if distribution and distribution.count("range") >= distribution.MIN_OBSERVATIONS:
+            bar_range = sum(c.high - c.low for c in session_candles) / len(session_candles)
+            range_percentile = distribution.percentile("range", bar_range)
+        elif historical_candles and len(historical_candles) >= period:
             historical_atr = cls.calculate_atr(historical_candles, period=period)
             volatility_level = cls.classify_volatility(atr, historical_atr)
             
@@ -143,11 +167,15 @@ class VolatilityCalculator:
         description = f"ATR: {atr:.2f}, Rango: {range_percent:.2f}% del precio"
         if comparison_text:
             description += comparison_text
+        if range_percentile is not None:
+            description += f", rango por vela en el percentil {range_percentile:.0f}"
         
         return {
             "atr": atr,
             "range_percent": range_percent,
             "level": volatility_level.value,
             "description": description,
-            "vs_historical": comparison_text.strip() if comparison_text else None
+            "vs_historical": comparison_text.strip() if comparison_text else None,
+            "atr_percentile": atr_percentile,
+            "range_percentile": range_percentile
         }
@@ -0,0 +1,109 @@
+"""
+Distribución histórica ordenada de ATR y rangos para clasificar volatilidad por percentil
+Se construye una vez por (instrumento, intervalo), se amplía de forma incremental y se
+consulta con bisect en O(log n)
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Iterable, Optional
+
+from app.models.market_analysis import VolatilityLevel
+
+
+class VolatilityDistribution:
+    """Valores históricos ordenados de ATR y rango (high - low) de un instrumento/intervalo"""
+
+    METRICS = ("atr", "range")
+
+    # Percentil mínimo de cada nivel (se evalúan de mayor a menor)
+    PERCENTILE_LEVELS = (
+        (95.0, VolatilityLevel.EXTREME),
+        (75.0, VolatilityLevel.HIGH),
+        (25.0, VolatilityLevel.NORMAL),
+    )
+
+    # Observaciones mínimas para que el percentil sea representativo
+    MIN_OBSERVATIONS = 30
+
+    # A partir de este tamaño un lote se fusiona con sorted() en lugar de insertarse uno a uno
+    BULK_THRESHOLD = 64
+
+    def __init__(self):
+        """Inicializa la distribución vacía"""
+        self._values: dict[str, list[float]] = {metric: [] for metric in self.METRICS}
+        self.last_timestamp: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._values["atr"])
+
+    def count(self, metric: str) -> int:
+        """
+        Número de observaciones de una métrica
+        @param metric - Métrica (atr o range)
+        @returns Número de valores
+        """
+        return len(self._sorted(metric))
+
+    def add(self, metric: str, value: float) -> None:
+        """
+        Inserta un valor manteniendo el orden
+        @param metric - Métrica (atr o range)
+        @param value - Valor a insertar
+        """
+        insort(self._sorted(metric), float(value))
+
+    def extend(self, metric: str, values: Iterable[float]) -> None:
+        """
+        Inserta un lote de valores manteniendo el orden
+        @param metric - Métrica (atr o range)
+        @param values - Valores a insertar
+        """
+        new_values = [float(value) for value in values]
+        current = self._sorted(metric)
+        if len(new_values) >= self.BULK_THRESHOLD:
+            # Timsort fusiona las dos secuencias ordenadas en tiempo casi lineal
+            self._values[metric] = sorted(current + sorted(new_values))
+        else:
+            for value in new_values:
+                insort(current, value)
+
+    def percentile(self, metric: str, value: float) -> Optional[float]:
+        """
+        Percentil (0-100) de un valor frente al histórico, con rango medio para valores repetidos
+        @param metric - Métrica (atr o range)
+        @param value - Valor a clasificar
+        @returns Percentil o None si no hay histórico
+        """
+        values = self._sorted(metric)
+        if not values:
+            return None
+
+        below = bisect_left(values, value)
+        at_or_below = bisect_right(values, value)
+        return round((below + at_or_below) / 2 / len(values) * 100, 1)
+
+    def classify(self, metric: str, value: float) -> Optional[VolatilityLevel]:
+        """
+        Clasifica un valor por su percentil histórico
+        @param metric - Métrica (atr o range)
+        @param value - Valor a clasificar
+        @returns Nivel de volatilidad o None si el histórico es insuficiente
+        """
+        if self.count(metric) < self.MIN_OBSERVATIONS:
+            return None
+
+        rank = self.percentile(metric, value)
+        for threshold, level in self.PERCENTILE_LEVELS:
+            if rank >= threshold:
+                return level
+        return VolatilityLevel.LOW
+
+    def _sorted(self, metric: str) -> list[float]:
+        """
+        Lista ordenada de una métrica
+        @param metric - Métrica (atr o range)
+        @returns Lista interna de valores ordenados
+        """
+        if metric not in self._values:
+            raise ValueError(f"Unknown volatility metric '{metric}'. Supported: {', '.join(self.METRICS)}")
+        return self._values[metric]
@@ -0,0 +1,94 @@
+"""
+Script para cargar el histórico de velas en market_data (reanudable)
+Uso: python scripts/backfill_market_data.py --instrument XAUUSD --interval 1h --start 2020-01-01 [--end 2025-12-31]
+     [--provider twelvedata] [--concurrency 2] [--no-resume]
+"""
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config.settings import get_settings
+from app.db.session import SessionLocal
+from app.services.backfill_service import BackfillService
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parsea los argumentos de línea de comandos
+    @returns Argumentos parseados
+    """
+    parser = argparse.ArgumentParser(description="Backfill histórico de velas con COPY y checkpoints")
+    parser.add_argument(
+        "--instrument", action="append", required=True,
+        help="Instrumento (repetible: --instrument XAUUSD --instrument EURUSD)"
+    )
+    parser.add_argument(
+        "--interval", action="append", default=None,
+        help=f"Intervalo (repetible; por defecto 1h). Opciones: {', '.join(BackfillService.INTERVAL_MINUTES)}"
+    )
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat, help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument(
+        "--end", default=None, type=datetime.fromisoformat, help="Fecha final (YYYY-MM-DD, por defecto ahora)"
+    )
+    parser.add_argument(
+        "--provider", default=None, choices=list(BackfillService.PROVIDER_LIMITS),
+        help="Proveedor de datos (por defecto MARKET_DATA_PROVIDER)"
+    )
+    parser.add_argument("--concurrency", type=int, default=None, help="Bloques descargados en paralelo")
+    parser.add_argument("--no-resume", action="store_true", help="Ignora los checkpoints y recarga todo el rango")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Ejecuta el backfill e imprime el resumen por serie
+    @returns Código de salida
+    """
+    args = parse_args()
+    if SessionLocal is None:
+        print("DATABASE_URL is not configured; the backfill loads candles into market_data")
+        return 1
+
+    end = datetime.combine(args.end.date(), datetime.max.time()) if args.end else datetime.now()
+    db = SessionLocal()
+    try:
+        service = BackfillService(get_settings(), db, provider_name=args.provider)
+        report = asyncio.run(service.run(
+            args.instrument,
+            args.interval or ["1h"],
+            args.start,
+            end,
+            resume=not args.no_resume,
+            concurrency=args.concurrency
+        ))
+    except ValueError as e:
+        print(f"Backfill failed: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+    print(f"Backfill {report.start} -> {report.end} in {report.elapsed_seconds:.1f}s")
+    for series in report.series:
+        print(
+            f"{series.instrument} {series.interval} ({series.provider}): "
+            f"{series.chunks_loaded}/{series.chunks_total} chunks loaded, {series.chunks_skipped} skipped, "
+            f"{series.chunks_failed} failed; {series.candles_loaded} candles, "
+            f"{series.features_rebuilt} feature rows rebuilt"
+        )
+        for error in series.errors:
+            print(f"  {error}")
+
+    failed = sum(series.chunks_failed for series in report.series)
+    if failed:
+        print(f"{failed} chunks failed; run the same command again to retry them")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
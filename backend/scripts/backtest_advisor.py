@@ -0,0 +1,80 @@
+"""
+Script para ejecutar el backtest de las recomendaciones de trading sobre market_data
+Uso: python scripts/backtest_advisor.py --start 2023-01-01 --end 2025-12-31 [--mode agresivo] [--workers 4]
+"""
+import argparse
+import sys
+import os
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.db.session import SessionLocal
+from app.models.trading_mode import TradingMode
+from app.services.backtest_service import BacktestService
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parsea los argumentos de línea de comandos
+    @returns Argumentos parseados
+    """
+    parser = argparse.ArgumentParser(description="Backtest de recomendaciones de TradingAdvisorService")
+    parser.add_argument("--instrument", default="XAUUSD", help="Instrumento (por defecto XAUUSD)")
+    parser.add_argument("--interval", default="1h", help="Intervalo de las velas guardadas (por defecto 1h)")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat, help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, type=datetime.fromisoformat, help="Fecha final (YYYY-MM-DD)")
+    parser.add_argument(
+        "--mode",
+        default=BacktestService.DEFAULT_MODE.value,
+        choices=[mode.value for mode in TradingMode],
+        help="Modo de trading aplicado a todas las recomendaciones"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, CPUs)")
+    parser.add_argument("--output", default=None, help="Ruta de un JSON con el informe completo (opcional)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Ejecuta el backtest e imprime el resumen
+    @returns Código de salida
+    """
+    args = parse_args()
+    if SessionLocal is None:
+        print("DATABASE_URL is not configured; the backtest reads candles from market_data")
+        return 1
+
+    db = SessionLocal()
+    try:
+        report = BacktestService(db).run_backtest(
+            args.instrument,
+            args.start,
+            datetime.combine(args.end.date(), datetime.max.time()),
+            interval=args.interval,
+            mode=TradingMode(args.mode),
+            workers=args.workers
+        )
+    except ValueError as e:
+        print(f"Backtest failed: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+    print(f"Backtest {report.instrument} {report.interval} {report.start_date} -> {report.end_date} ({report.trading_mode.value})")
+    print(f"Days: {report.days}  Signals: {report.signals}  Wait: {report.wait_days}  Filled: {report.filled}")
+    print(f"Win rate: {report.win_rate:.1%}  Expectancy: {report.expectancy_r:.3f}R ({report.expectancy_points:.2f} pts)")
+    print(f"Total: {report.total_r:.2f}R  Max drawdown: {report.max_drawdown_r:.2f}R")
+    print(f"MAE: {report.average_mae_r:.2f}R  MFE: {report.average_mfe_r:.2f}R")
+    print(f"Outcomes: {report.outcomes}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report.model_dump_json(indent=2))
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
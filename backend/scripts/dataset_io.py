@@ -0,0 +1,89 @@
+"""
+Script para exportar e importar datasets históricos en Parquet / Arrow IPC
+Uso: python scripts/dataset_io.py export market_data velas.parquet [--instrument XAUUSD] [--interval 1h]
+     [--start 2025-01-01] [--end 2025-06-30] [--format parquet]
+     python scripts/dataset_io.py import daily_analyses analisis.arrow [--format arrow]
+"""
+import argparse
+import sys
+import os
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.dataset_io_service import DatasetIOService
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parsea los argumentos de línea de comandos
+    @returns Argumentos parseados
+    """
+    parser = argparse.ArgumentParser(description="Exportación/importación de datasets en Parquet o Arrow IPC")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Exporta un dataset a fichero")
+    export_parser.add_argument("dataset", choices=list(DatasetIOService.DATASETS))
+    export_parser.add_argument("path", help="Fichero de destino (.parquet, .arrow)")
+    export_parser.add_argument("--instrument", default=None, help="Instrumento (por defecto todos)")
+    export_parser.add_argument("--interval", default=None, help="Intervalo de las velas (solo market_data)")
+    export_parser.add_argument(
+        "--start", default=None, type=datetime.fromisoformat, help="Fecha inicial (YYYY-MM-DD)"
+    )
+    export_parser.add_argument(
+        "--end", default=None, type=datetime.fromisoformat, help="Fecha final (YYYY-MM-DD, incluida)"
+    )
+
+    import_parser = subparsers.add_parser("import", help="Importa un fichero en un dataset")
+    import_parser.add_argument("dataset", choices=list(DatasetIOService.DATASETS))
+    import_parser.add_argument("path", help="Fichero de origen (.parquet, .arrow)")
+
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument(
+            "--format", default=None, choices=list(DatasetIOService.FORMATS),
+            help="Formato del fichero (por defecto según la extensión)"
+        )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Ejecuta la exportación o importación e imprime las filas procesadas
+    @returns Código de salida
+    """
+    args = parse_args()
+    if SessionLocal is None:
+        print("DATABASE_URL is not configured; datasets are read from and written to PostgreSQL")
+        return 1
+
+    db = SessionLocal()
+    try:
+        service = DatasetIOService(db)
+        if args.command == "export":
+            end = datetime.combine(args.end.date(), datetime.max.time()) if args.end else None
+            rows = service.export(
+                args.dataset,
+                args.path,
+                fmt=args.format,
+                instrument=args.instrument,
+                start=args.start,
+                end=end,
+                interval=args.interval
+            )
+            print(f"Exported {rows} {args.dataset} rows to {args.path}")
+        else:
+            rows = service.import_file(args.dataset, args.path, fmt=args.format)
+            print(f"Imported {rows} {args.dataset} rows from {args.path}")
+    except ValueError as e:
+        print(f"Dataset {args.command} failed: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Script para barrer los umbrales de análisis técnico sobre las velas guardadas (market_data o CANDLE_STORE_PATH)
+Uso: python scripts/parameter_sweep.py --start 2023-01-01 --end 2025-12-31 \
+        --grid trend_threshold_percent=0.25,0.5,1.0 --grid retest_tolerance=2,5,10 [--workers 4]
+"""
+import argparse
+import csv
+import sys
+import os
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config.settings import get_settings
+from app.db.session import SessionLocal
+from app.repositories.candle_store_repository import create_market_data_repository
+from app.utils.candle_arrays import CandleArrays
+from app.utils.parameter_sweep import ParameterSweep
+
+
+def parse_grid_entry(entry: str) -> tuple[str, list[float]]:
+    """
+    Parsea una entrada nombre=v1,v2,... de la rejilla
+    @param entry - Texto de la entrada
+    @returns Tupla (parámetro, valores)
+    """
+    name, _, values = entry.partition("=")
+    try:
+        return name.strip(), [float(value) for value in values.split(",") if value.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid grid entry '{entry}', expected name=v1,v2,...")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parsea los argumentos de línea de comandos
+    @returns Argumentos parseados
+    """
+    parser = argparse.ArgumentParser(description="Barrido de umbrales de análisis técnico")
+    parser.add_argument("--instrument", default="XAUUSD", help="Instrumento (por defecto XAUUSD)")
+    parser.add_argument("--interval", default="1h", help="Intervalo de las velas guardadas (por defecto 1h)")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat, help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, type=datetime.fromisoformat, help="Fecha final (YYYY-MM-DD)")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        type=parse_grid_entry,
+        default=[],
+        help=f"Valores de un parámetro (repetible): {', '.join(ParameterSweep.DEFAULT_PARAMETERS)}"
+    )
+    parser.add_argument("--forward-bars", type=int, default=ParameterSweep.FORWARD_BARS, help="Velas de validación")
+    parser.add_argument("--level-step", type=float, default=ParameterSweep.LEVEL_STEP, help="Separación de niveles")
+    parser.add_argument("--sort-by", default="score", choices=ParameterSweep.SORT_METRICS, help="Métrica de orden")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, CPUs)")
+    parser.add_argument("--top", type=int, default=20, help="Filas de la tabla impresa")
+    parser.add_argument("--output", default=None, help="Ruta de un CSV con todos los resultados (opcional)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Ejecuta el barrido e imprime la tabla ordenada
+    @returns Código de salida
+    """
+    args = parse_args()
+    settings = get_settings()
+    if SessionLocal is None and not settings.candle_store_path:
+        print("Neither DATABASE_URL nor CANDLE_STORE_PATH is configured; the sweep reads stored candles")
+        return 1
+
+    db = SessionLocal() if SessionLocal is not None else None
+    try:
+        models = create_market_data_repository(db, settings).get_candles(
+            args.instrument,
+            args.start,
+            datetime.combine(args.end.date(), datetime.max.time()),
+            args.interval
+        )
+    finally:
+        if db is not None:
+            db.close()
+    if not models:
+        print(f"No stored market data for {args.instrument} ({args.interval}) in the requested range")
+        return 1
+
+    try:
+        results = ParameterSweep.run(
+            CandleArrays.from_models(models),
+            grid=dict(args.grid),
+            forward_bars=args.forward_bars,
+            level_step=args.level_step,
+            workers=args.workers,
+            sort_by=args.sort_by
+        )
+    except ValueError as e:
+        print(f"Sweep failed: {str(e)}")
+        return 1
+
+    names = list(ParameterSweep.DEFAULT_PARAMETERS)
+    metrics = ["trend_hit_rate", "impulse_hit_rate", "retest_hit_rate", "volatility_hit_rate", "score"]
+    print(f"Sweep {args.instrument} {args.interval}: {len(models)} candles, {len(results)} combinations")
+    print("  ".join(["rank", *names, *metrics]))
+    for result in results[:args.top]:
+        values = [f"{result.parameters[name]:g}" for name in names]
+        rates = ["-" if getattr(result, metric) is None else f"{getattr(result, metric):.4f}" for metric in metrics]
+        print("  ".join([str(result.rank), *values, *rates]))
+
+    if args.output:
+        with open(args.output, "w", newline="") as output:
+            writer = csv.writer(output)
+            counts = ["trend_signals", "impulse_signals", "retest_signals", "volatility_signals"]
+            writer.writerow(["rank", *names, *metrics, *counts])
+            for result in results:
+                writer.writerow([
+                    result.rank,
+                    *[result.parameters[name] for name in names],
+                    *[getattr(result, metric) for metric in metrics],
+                    *[getattr(result, count) for count in counts],
+                ])
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Script para detectar y reparar huecos en las series de market_data
+Uso: python scripts/repair_gaps.py --instrument XAUUSD [--interval 1h] [--start 2025-01-01] [--end 2025-06-30]
+     [--provider twelvedata] [--dry-run]
+"""
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config.settings import get_settings
+from app.db.session import SessionLocal
+from app.services.backfill_service import BackfillService
+from app.services.gap_repair_service import GapRepairService
+from app.utils.trading_calendar import TradingCalendar
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parsea los argumentos de línea de comandos
+    @returns Argumentos parseados
+    """
+    parser = argparse.ArgumentParser(description="Detección y reparación de huecos en market_data")
+    parser.add_argument(
+        "--instrument", action="append", required=True,
+        help="Instrumento (repetible: --instrument XAUUSD --instrument EURUSD)"
+    )
+    parser.add_argument(
+        "--interval", action="append", default=None,
+        help=f"Intervalo (repetible; por defecto 1h, 4h y 1d). Opciones: {', '.join(TradingCalendar.INTERVAL_SECONDS)}"
+    )
+    parser.add_argument(
+        "--start", default=None, type=datetime.fromisoformat,
+        help=f"Fecha inicial (YYYY-MM-DD, por defecto {GapRepairService.DEFAULT_LOOKBACK_DAYS} días atrás)"
+    )
+    parser.add_argument(
+        "--end", default=None, type=datetime.fromisoformat, help="Fecha final (YYYY-MM-DD, por defecto ahora)"
+    )
+    parser.add_argument(
+        "--provider", default=None, choices=list(BackfillService.PROVIDER_LIMITS),
+        help="Proveedor de datos (por defecto MARKET_DATA_PROVIDER)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Solo lista los huecos, sin pedir datos")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Ejecuta el escaneo/reparación e imprime los huecos por serie
+    @returns Código de salida
+    """
+    args = parse_args()
+    if SessionLocal is None:
+        print("DATABASE_URL is not configured; gaps are scanned in market_data")
+        return 1
+
+    end = datetime.combine(args.end.date(), datetime.max.time()) if args.end else None
+    db = SessionLocal()
+    try:
+        service = GapRepairService(get_settings(), db, provider_name=args.provider)
+        report = asyncio.run(service.repair(
+            args.instrument,
+            args.interval or ["1h", "4h", "1d"],
+            start=args.start,
+            end=end,
+            dry_run=args.dry_run
+        ))
+    except ValueError as e:
+        print(f"Gap repair failed: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+    print(f"Gap scan {report.start} -> {report.end}{' (dry run)' if report.dry_run else ''}")
+    for series in report.series:
+        print(
+            f"{series.instrument} {series.interval}: {series.stored_bars} bars, {len(series.gaps)} gaps "
+            f"({series.missing_bars} missing, {series.skipped_gaps} already requested); "
+            f"{series.repaired_bars} repaired with {series.requests} requests"
+        )
+        for gap in series.gaps:
+            print(f"  {gap.start.isoformat()} -> {gap.end.isoformat()} ({gap.missing_bars} bars)")
+        for error in series.errors:
+            print(f"  error: {error}")
+
+    return 1 if any(series.errors for series in report.series) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Serialización de respuestas por la ruta de confianza
+Comprueba que, para las respuestas grandes de niveles psicológicos y análisis técnico, FastJSONResponse
+sobre modelos construidos sin validar produce exactamente el mismo cuerpo que la ruta por defecto de
+FastAPI (validación contra response_model + jsonable_encoder + json.dumps)
+"""
+import asyncio
+from typing import Any, Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.config.settings import Settings
+from app.models.psychological_levels import PsychologicalLevelsResponse
+from app.services.psychological_levels_service import PsychologicalLevelsService
+from app.services.technical_analysis_service import TechnicalAnalysisService
+from app.utils.json_response import FastJSONResponse
+
+
+def _mock_settings() -> Settings:
+    """Configuración con proveedores mock"""
+    return Settings(market_data_provider="mock", economic_calendar_provider="mock")
+
+
+def _serialization_app(payload: Any, response_model: Optional[type]) -> FastAPI:
+    """
+    App mínima que devuelve una respuesta ya calculada: /standard por la ruta por defecto de FastAPI,
+    /trusted con FastJSONResponse
+    """
+    bench = FastAPI()
+
+    @bench.get("/standard", response_model=response_model, response_class=JSONResponse)
+    async def standard() -> Any:
+        return payload
+
+    @bench.get("/trusted")
+    async def trusted() -> FastJSONResponse:
+        return FastJSONResponse(payload)
+
+    return bench
+
+
+@pytest.fixture(scope="module")
+def levels_payload() -> PsychologicalLevelsResponse:
+    """Respuesta de niveles psicológicos con histórico de reacciones (proveedor mock)"""
+    service = PsychologicalLevelsService(_mock_settings())
+    return asyncio.run(service.get_psychological_levels("XAUUSD", lookback_days=60, max_distance_points=200.0))
+
+
+@pytest.fixture(scope="module")
+def technical_payload() -> dict:
+    """Análisis multi-temporalidad con simulación (proveedor mock)"""
+    service = TechnicalAnalysisService(_mock_settings())
+    return asyncio.run(service.analyze_multi_timeframe("XAUUSD", include_simulation=True))
+
+
+class TestSerializationBenchmark:
+    """Serialización de las respuestas de niveles y análisis técnico"""
+
+    @pytest.mark.parametrize(
+        "payload_fixture, response_model",
+        [
+            ("levels_payload", PsychologicalLevelsResponse),
+            ("technical_payload", None),
+        ],
+    )
+    def test_trusted_path_matches_standard(
+        self,
+        request: pytest.FixtureRequest,
+        payload_fixture: str,
+        response_model: Optional[type],
+    ) -> None:
+        """La ruta de confianza produce los mismos bytes que la ruta validada"""
+        payload = request.getfixturevalue(payload_fixture)
+        bench = TestClient(_serialization_app(payload, response_model))
+
+        standard = bench.get("/standard")
+        trusted = bench.get("/trusted")
+
+        assert standard.status_code == trusted.status_code == 200
+        assert len(standard.content) > 1024
+        assert trusted.content == standard.content
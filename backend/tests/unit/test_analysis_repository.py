@@ -0,0 +1,151 @@
+"""
+Tests unitarios para AnalysisRepository (payloads JSONB)
+"""
+from datetime import datetime, timedelta
+from typing import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config.settings import Settings
+from app.db.models import DailyAnalysisModel
+from app.main import app
+from app.models.market_analysis import (
+    DailyMarketAnalysis,
+    MarketDirection,
+    SessionAnalysis,
+    SessionType,
+)
+from app.repositories.analysis_repository import AnalysisRepository
+from app.routers.market_briefing import get_market_analysis_service
+from app.services.market_analysis_service import MarketAnalysisService
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    """Sesión SQLite en memoria con la tabla de análisis diarios (compartida con el hilo del TestClient)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    DailyAnalysisModel.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _build_analysis() -> DailyMarketAnalysis:
+    """Construye un análisis diario mínimo con una sesión"""
+    session = SessionAnalysis(
+        session=SessionType.LONDON,
+        start_time="07:00",
+        end_time="12:00",
+        open_price=2000.0,
+        close_price=2010.0,
+        high=2015.0,
+        low=1995.0,
+        range_value=20.0,
+        direction=MarketDirection.BULLISH,
+        change_percent=0.5,
+        description="Sesión alcista",
+    )
+    return DailyMarketAnalysis(
+        instrument="XAUUSD",
+        date="2026-01-05",
+        previous_day_close=2000.0,
+        current_day_close=2010.0,
+        daily_change_percent=0.5,
+        daily_direction=MarketDirection.BULLISH,
+        previous_day_high=2005.0,
+        previous_day_low=1990.0,
+        sessions=[session],
+        summary="Día alcista",
+    )
+
+
+class TestAnalysisRepositoryJsonb:
+    """Tests para el almacenamiento estructurado de análisis"""
+
+    def test_save_daily_analysis_stores_structured_sessions(self) -> None:
+        """Las sesiones se guardan como lista de dicts (no como texto serializado)"""
+        db = MagicMock()
+        db.query.return_value.filter.return_value.first.return_value = None
+        repository = AnalysisRepository(db)
+
+        model = repository.save_daily_analysis(_build_analysis(), "xauusd")
+
+        assert isinstance(model.analysis_data, list)
+        assert model.analysis_data[0]["session"] == "london"
+        assert model.analysis_data[0]["direction"] == "alcista"
+        assert model.analysis_data[0]["range_value"] == 20.0
+        db.commit.assert_called_once()
+
+
+def _store_days(db: Session, instrument: str, days_ago: list[int]) -> None:
+    """Guarda análisis diarios con dos sesiones (rango asia = días atrás, london = el doble)"""
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    for days in days_ago:
+        db.add(DailyAnalysisModel(
+            instrument=instrument,
+            analysis_date=today - timedelta(days=days),
+            previous_day_close=2000.0,
+            current_day_close=2010.0,
+            daily_change_percent=0.5,
+            daily_direction="alcista",
+            previous_day_high=2015.0,
+            previous_day_low=1995.0,
+            summary=f"Hace {days} días",
+            analysis_data=[
+                {"session": "asia", "range_value": float(days), "change_percent": 0.1, "direction": "alcista"},
+                {"session": "london", "range_value": 2.0 * days, "change_percent": -0.2, "direction": "bajista"},
+            ],
+        ))
+    db.commit()
+
+
+class TestSessionRanges:
+    """Tests de la proyección en SQL de las sesiones guardadas"""
+
+    def test_projects_session_fields_within_window(self, db: Session) -> None:
+        """Una fila por sesión y día dentro de la ventana, en orden cronológico y solo del instrumento"""
+        _store_days(db, "XAUUSD", [120, 30, 2])
+        _store_days(db, "EURUSD", [2])
+
+        ranges = AnalysisRepository(db).get_session_ranges("xauusd", days=90)
+
+        assert [(row["session"], row["range_value"]) for row in ranges] == [
+            ("asia", 30.0), ("london", 60.0), ("asia", 2.0), ("london", 4.0)
+        ]
+        assert ranges[1]["change_percent"] == -0.2 and ranges[1]["direction"] == "bajista"
+
+    def test_session_filter(self, db: Session) -> None:
+        """El filtro de sesión se aplica en la consulta"""
+        _store_days(db, "XAUUSD", [30, 2])
+
+        ranges = AnalysisRepository(db).get_session_ranges("XAUUSD", days=90, session="london")
+
+        assert [row["range_value"] for row in ranges] == [60.0, 4.0]
+        assert AnalysisRepository(None).get_session_ranges("XAUUSD") == []
+
+    def test_session_history_endpoint(self, db: Session) -> None:
+        """El endpoint devuelve la proyección y rechaza sesiones desconocidas"""
+        _store_days(db, "XAUUSD", [3])
+        app.dependency_overrides[get_market_analysis_service] = (
+            lambda: MarketAnalysisService(Settings(market_data_provider="mock"), db)
+        )
+        try:
+            client = TestClient(app)
+            response = client.get("/api/market-briefing/session-history", params={"session": "asia", "days": 10})
+            invalid = client.get("/api/market-briefing/session-history", params={"session": "sydney"})
+        finally:
+            app.dependency_overrides.pop(get_market_analysis_service, None)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["session"] == "asia"
+        assert [row["range_value"] for row in body["ranges"]] == [3.0]
+        assert invalid.status_code == 400
@@ -0,0 +1,195 @@
+"""
+Tests unitarios para BackfillService (backfill histórico reanudable)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config.settings import Settings
+from app.models.market_analysis import PriceCandle
+from app.providers.market_data.base_market_provider import MarketDataProvider
+from app.repositories.market_data_repository import MarketDataRepository
+from app.services.backfill_service import BackfillService
+
+
+class RecordingProvider(MarketDataProvider):
+    """Proveedor que devuelve velas horarias y puede fallar en bloques concretos"""
+
+    def __init__(self, fail_starts: set[datetime] = frozenset(), rate_limited: int = 0):
+        self.calls: list[tuple[datetime, datetime]] = []
+        self.fail_starts = set(fail_starts)
+        self.rate_limited = rate_limited
+
+    async def fetch_historical_candles(self, instrument, start_date, end_date, interval="1h"):
+        self.calls.append((start_date, end_date))
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise ValueError("Failed to fetch market data: API rate limit reached")
+        if start_date in self.fail_starts:
+            raise ValueError("Provider unavailable")
+        hours = int((end_date - start_date).total_seconds() // 3600) + 1
+        return [
+            PriceCandle(timestamp=start_date + timedelta(hours=i), open=1.0, high=1.0, low=1.0, close=1.0)
+            for i in range(hours)
+        ]
+
+
+class InMemoryCheckpoints:
+    """Checkpoints en memoria con la interfaz de BackfillCheckpointRepository"""
+
+    def __init__(self):
+        self.chunks: set[tuple[datetime, datetime]] = set()
+
+    def get_completed_chunks(self, instrument, interval, provider):
+        return set(self.chunks)
+
+    def save_checkpoint(self, instrument, interval, provider, chunk_start, chunk_end, rows):
+        self.chunks.add((chunk_start, chunk_end))
+
+    def clear_checkpoints(self, instrument, interval, provider):
+        cleared = len(self.chunks)
+        self.chunks.clear()
+        return cleared
+
+
+class RecordingMarketData:
+    """Destino de copy_candles que cuenta las velas recibidas"""
+
+    def __init__(self):
+        self.copied = 0
+
+    def copy_candles(self, instrument, interval, candles):
+        self.copied += len(candles)
+        return len(candles)
+
+
+@pytest.fixture
+def settings() -> Settings:
+    """Configuración con proveedor mock"""
+    return Settings(market_data_provider="mock")
+
+
+def _service(settings: Settings, provider: RecordingProvider, checkpoints: InMemoryCheckpoints) -> BackfillService:
+    """Servicio con proveedor, checkpoints y destino en memoria"""
+    service = BackfillService(settings, provider=provider)
+    service.checkpoint_repo = checkpoints
+    service.market_data_repo = RecordingMarketData()
+    return service
+
+
+class TestPlanChunks:
+    """Tests de la división del rango en bloques"""
+
+    def test_chunks_are_contiguous_and_clipped(self) -> None:
+        """Los bloques cubren el rango sin huecos ni solapes y respetan los extremos"""
+        start, end = datetime(2020, 3, 15, 7), datetime(2024, 6, 30, 23)
+        chunks = BackfillService.plan_chunks(start, end, "1h")
+
+        assert chunks[0][0] == start and chunks[-1][1] == end
+        for (_, previous_end), (next_start, _) in zip(chunks, chunks[1:]):
+            assert next_start - previous_end == timedelta(seconds=1)
+        assert all(
+            chunk_end - chunk_start < timedelta(hours=BackfillService.CHUNK_BARS)
+            for chunk_start, chunk_end in chunks
+        )
+
+    def test_interior_chunks_do_not_depend_on_range(self) -> None:
+        """Los bloques interiores son los mismos aunque cambie el rango pedido"""
+        short = BackfillService.plan_chunks(datetime(2021, 1, 1), datetime(2023, 1, 1), "1h")
+        long = BackfillService.plan_chunks(datetime(2020, 6, 1), datetime(2024, 1, 1), "1h")
+
+        assert set(short[1:-1]) <= set(long)
+
+    def test_invalid_arguments(self) -> None:
+        """Intervalo desconocido o rango invertido producen ValueError"""
+        with pytest.raises(ValueError):
+            BackfillService.plan_chunks(datetime(2024, 1, 1), datetime(2024, 2, 1), "2h")
+        with pytest.raises(ValueError):
+            BackfillService.plan_chunks(datetime(2024, 2, 1), datetime(2024, 1, 1), "1h")
+
+
+class TestRun:
+    """Tests de la ejecución y reanudación"""
+
+    async def test_resume_skips_completed_chunks(self, settings: Settings) -> None:
+        """Una segunda ejecución solo descarga los bloques que fallaron en la primera"""
+        start, end = datetime(2022, 1, 1), datetime(2023, 12, 31)
+        chunks = BackfillService.plan_chunks(start, end, "1h")
+        checkpoints = InMemoryCheckpoints()
+
+        first = await _service(settings, RecordingProvider({chunks[1][0]}), checkpoints).run(
+            ["XAUUSD"], ["1h"], start, end
+        )
+        series = first.series[0]
+        assert series.chunks_total == len(chunks)
+        assert (series.chunks_loaded, series.chunks_failed) == (len(chunks) - 1, 1)
+        assert chunks[1] not in checkpoints.chunks
+
+        provider = RecordingProvider()
+        second = await _service(settings, provider, checkpoints).run(["XAUUSD"], ["1h"], start, end)
+
+        assert provider.calls == [chunks[1]]
+        assert second.series[0].chunks_skipped == len(chunks) - 1
+        assert second.series[0].candles_loaded == int((chunks[1][1] - chunks[1][0]).total_seconds() // 3600) + 1
+
+    async def test_no_resume_reloads_everything(self, settings: Settings) -> None:
+        """Con resume=False se ignoran los checkpoints existentes"""
+        start, end = datetime(2023, 1, 1), datetime(2023, 12, 31)
+        checkpoints = InMemoryCheckpoints()
+        await _service(settings, RecordingProvider(), checkpoints).run(["XAUUSD"], ["1h"], start, end)
+
+        provider = RecordingProvider()
+        await _service(settings, provider, checkpoints).run(["XAUUSD"], ["1h"], start, end, resume=False)
+
+        assert len(provider.calls) == len(BackfillService.plan_chunks(start, end, "1h"))
+
+    async def test_rate_limit_is_retried(self, settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Los errores de cuota se reintentan; el bloque acaba cargado"""
+        monkeypatch.setattr(BackfillService, "RETRY_BACKOFF_SECONDS", 0.0)
+        provider = RecordingProvider(rate_limited=2)
+        report = await _service(settings, provider, InMemoryCheckpoints()).run(
+            ["XAUUSD"], ["1h"], datetime(2023, 1, 1), datetime(2023, 1, 2)
+        )
+
+        assert len(provider.calls) == 3
+        assert report.series[0].chunks_loaded == 1 and report.series[0].chunks_failed == 0
+
+    async def test_empty_chunks_follow_calendar(self, settings: Settings) -> None:
+        """Un bloque vacío con sesiones no se registra (se reintenta); uno sin sesiones sí"""
+        service = _service(settings, RecordingProvider(), InMemoryCheckpoints())
+        open_chunk = (datetime(2024, 1, 2), datetime(2024, 1, 3))
+        weekend_chunk = (datetime(2024, 1, 6), datetime(2024, 1, 6, 23))
+
+        await service.load_chunk("XAUUSD", "1h", open_chunk, [])
+        await service.load_chunk("XAUUSD", "1h", weekend_chunk, [])
+
+        assert service.checkpoint_repo.chunks == {weekend_chunk}
+
+    async def test_fred_requires_daily_interval(self, settings: Settings) -> None:
+        """FRED solo admite velas diarias"""
+        service = BackfillService(settings, provider_name="fred", provider=RecordingProvider())
+
+        with pytest.raises(ValueError):
+            await service.run(["DXY"], ["1h"], datetime(2023, 1, 1), datetime(2023, 2, 1))
+
+
+class TestCandlesToCsv:
+    """Tests de la serialización para COPY"""
+
+    def test_csv_rows(self) -> None:
+        """Una fila por vela en el orden de COPY_COLUMNS, volumen vacío como NULL"""
+        candles = [
+            PriceCandle(timestamp=datetime(2024, 1, 2, 3), open=1.1, high=1.2, low=1.0, close=1.15, volume=250.0),
+            PriceCandle(timestamp=datetime(2024, 1, 2, 4), open=1.15, high=1.3, low=1.1, close=1.2),
+        ]
+
+        lines = MarketDataRepository.candles_to_csv("xauusd", "1h", candles).read().splitlines()
+
+        assert lines == [
+            "XAUUSD,1h,2024-01-02 03:00:00,1.1,1.2,1.0,1.15,250.0",
+            "XAUUSD,1h,2024-01-02 04:00:00,1.15,1.3,1.1,1.2,",
+        ]
+
+    def test_copy_without_db(self) -> None:
+        """Sin base de datos no se carga nada"""
+        assert MarketDataRepository(None).copy_candles("XAUUSD", "1h", []) == 0
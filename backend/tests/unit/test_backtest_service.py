@@ -0,0 +1,172 @@
+"""
+Tests unitarios para BacktestService (backtest de recomendaciones sin look-ahead)
+"""
+import numpy as np
+import pytest
+
+from app.models.backtest import BacktestTrade, TradeOutcome
+from app.models.trading_mode import TradingMode
+from app.models.trading_recommendation import TradeDirection
+from app.services.backtest_service import BacktestService
+from app.utils.candle_arrays import CandleArrays
+from app.utils.market_analyzer import MarketAnalyzer
+from app.utils.trading_sessions import TradingSessions
+
+
+def _hourly_series(seed: int, days: int) -> CandleArrays:
+    """Serie H1 continua simulada alrededor de 2000"""
+    rng = np.random.default_rng(seed)
+    count = days * 24
+    start = np.datetime64("2025-01-06T00:00", "s")
+    timestamps = start + np.arange(count) * np.timedelta64(3600, "s")
+    closes = 2000 + np.cumsum(rng.normal(0, 3, count))
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    highs = np.maximum(opens, closes) + rng.random(count) * 3
+    lows = np.minimum(opens, closes) - rng.random(count) * 3
+    return CandleArrays(timestamps, opens, highs, lows, closes)
+
+
+@pytest.fixture
+def series() -> CandleArrays:
+    """Cuarenta días de velas H1"""
+    return _hourly_series(3, 40)
+
+
+def _decision(trade: BacktestTrade) -> tuple:
+    """Campos de la recomendación (independientes de la simulación de ejecución)"""
+    return trade.signal_date, trade.direction, trade.entry_price, trade.stop_loss, trade.take_profit
+
+
+class TestSimulateTrade:
+    """Tests de la simulación de ejecución y salida"""
+
+    def test_buy_hits_target(self) -> None:
+        """Compra que se ejecuta en la segunda vela y alcanza el objetivo"""
+        highs = np.array([105.0, 101.0, 104.0, 111.0])
+        lows = np.array([101.0, 99.0, 100.0, 103.0])
+        closes = np.array([102.0, 100.0, 103.0, 110.0])
+
+        result = BacktestService.simulate_trade(highs, lows, closes, True, 100.0, 95.0, 110.0, entry_window=3)
+
+        assert result["outcome"] == TradeOutcome.TAKE_PROFIT
+        assert (result["fill_index"], result["exit_index"]) == (1, 3)
+        assert result["pnl_points"] == 10.0
+        assert result["mae_points"] == 1.0
+        assert result["mfe_points"] == 11.0
+
+    def test_stop_wins_ties_and_sell_mirrors_buy(self) -> None:
+        """Si stop y objetivo caen en la misma vela se asume el stop; la venta es simétrica"""
+        highs = np.array([101.0, 112.0])
+        lows = np.array([99.0, 94.0])
+        closes = np.array([100.0, 100.0])
+
+        buy = BacktestService.simulate_trade(highs, lows, closes, True, 100.0, 95.0, 110.0, entry_window=1)
+        sell = BacktestService.simulate_trade(highs, lows, closes, False, 100.0, 105.0, 90.0, entry_window=1)
+
+        assert buy["outcome"] == TradeOutcome.STOP_LOSS and buy["pnl_points"] == -5.0
+        assert sell["outcome"] == TradeOutcome.STOP_LOSS and sell["pnl_points"] == -5.0
+        assert sell["exit_price"] == 105.0
+
+    def test_not_filled_timeout_and_invalid(self) -> None:
+        """Orden fuera del rango de la ventana, cierre por tiempo y niveles incoherentes"""
+        highs = np.array([103.0, 102.0, 102.0, 102.0])
+        lows = np.array([101.0, 99.0, 99.0, 99.0])
+        closes = np.array([102.0, 101.0, 100.5, 101.5])
+
+        not_filled = BacktestService.simulate_trade(highs, lows, closes, True, 100.0, 95.0, 110.0, entry_window=1)
+        timeout = BacktestService.simulate_trade(
+            highs, lows, closes, True, 100.0, 95.0, 110.0, entry_window=2, max_holding_bars=2
+        )
+        invalid = BacktestService.simulate_trade(highs, lows, closes, True, 100.0, 101.0, 110.0, entry_window=2)
+
+        assert not_filled["outcome"] == TradeOutcome.NOT_FILLED
+        assert timeout["outcome"] == TradeOutcome.TIMEOUT
+        assert timeout["exit_index"] == 2 and timeout["pnl_points"] == pytest.approx(0.5)
+        assert invalid["outcome"] == TradeOutcome.INVALID
+
+
+class TestBacktest:
+    """Tests del backtest completo"""
+
+    def test_sessions_match_market_analyzer(self, series: CandleArrays) -> None:
+        """Las sesiones del día reproducen rango y dirección de MarketAnalyzer.analyze_session"""
+        inputs = BacktestService.daily_inputs(series)
+        day = 5
+        candles = series.slice(int(inputs["starts"][day]), int(inputs["ends"][day])).to_candles()
+
+        analysis = BacktestService.build_analysis(inputs, day)
+
+        for session in analysis.sessions:
+            session_candles = [
+                c for c in candles if TradingSessions.get_session_for_time(c.timestamp) == session.session
+            ]
+            expected = MarketAnalyzer.analyze_session(session.session, session_candles)
+            assert session.range_value == pytest.approx(expected.range_value)
+            assert session.direction == expected.direction
+        assert analysis.previous_day_high == inputs["highs"][day - 1]
+        assert analysis.current_day_close == series.closes[inputs["ends"][day] - 1]
+
+    def test_no_look_ahead(self, series: CandleArrays) -> None:
+        """Cambiar las velas futuras no altera las recomendaciones de días anteriores"""
+        inputs = BacktestService.daily_inputs(series)
+        cutoff = int(inputs["starts"][20])
+        altered = CandleArrays(
+            series.timestamps,
+            series.opens,
+            np.concatenate([series.highs[:cutoff], series.highs[cutoff:] + 50]),
+            np.concatenate([series.lows[:cutoff], series.lows[cutoff:] - 50]),
+            np.concatenate([series.closes[:cutoff], series.closes[cutoff:][::-1]]),
+        )
+
+        original = BacktestService.backtest_arrays(series, "XAUUSD", workers=1)
+        changed = BacktestService.backtest_arrays(altered, "XAUUSD", workers=1)
+
+        last_date = str(inputs["dates"][19])
+        before = [_decision(t) for t in original.trades if t.signal_date < last_date]
+        assert before
+        assert before == [_decision(t) for t in changed.trades if t.signal_date < last_date]
+
+    def test_process_pool_matches_serial(self, series: CandleArrays) -> None:
+        """Repartir los días en bloques y procesos da el mismo informe"""
+        serial = BacktestService.backtest_arrays(series, "XAUUSD", workers=1)
+        parallel = BacktestService.backtest_arrays(series, "XAUUSD", workers=2, chunk_days=7)
+
+        assert parallel == serial
+        assert serial.days == 38
+        assert serial.signals + serial.wait_days == serial.days
+        assert sum(serial.outcomes.values()) == serial.signals
+
+    def test_observe_mode_always_waits(self, series: CandleArrays) -> None:
+        """En modo observar el asesor siempre recomienda esperar"""
+        report = BacktestService.backtest_arrays(series, "XAUUSD", mode=TradingMode.OBSERVE, workers=1)
+
+        assert report.signals == 0 and report.wait_days == report.days
+
+    def test_requires_three_days(self) -> None:
+        """Sin día anterior y siguiente no hay nada que evaluar"""
+        with pytest.raises(ValueError):
+            BacktestService.backtest_arrays(_hourly_series(1, 2), "XAUUSD", workers=1)
+
+
+class TestSummarize:
+    """Tests de las métricas agregadas"""
+
+    def test_metrics(self) -> None:
+        """Win rate, expectativa y drawdown sobre la curva acumulada en R"""
+        def trade(r_multiple: float, outcome: TradeOutcome = TradeOutcome.TAKE_PROFIT) -> BacktestTrade:
+            return BacktestTrade(
+                signal_date="2025-01-06", direction=TradeDirection.BUY, confidence=0.6,
+                entry_price=100.0, stop_loss=90.0, take_profit=110.0, outcome=outcome,
+                pnl_points=r_multiple * 10, r_multiple=r_multiple, mae_points=5.0, mfe_points=10.0,
+            )
+
+        trades = [trade(1.0), trade(-1.0), trade(-1.0), trade(2.0), trade(0.0, TradeOutcome.NOT_FILLED)]
+
+        report = BacktestService.summarize("XAUUSD", "1h", TradingMode.AGGRESSIVE, "a", "b", 10, 5, trades)
+
+        assert report.filled == 4 and report.wins == 2 and report.losses == 2
+        assert report.win_rate == 0.5
+        assert report.expectancy_r == 0.25
+        assert report.max_drawdown_r == 2.0
+        assert report.average_mae_r == 0.5
+        assert report.outcomes[TradeOutcome.NOT_FILLED.value] == 1
@@ -0,0 +1,110 @@
+"""
+Tests unitarios para BarFeatureCalculator (feature store)
+"""
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.market_analysis import PriceCandle
+from app.utils.bar_feature_calculator import BarFeatureCalculator
+from app.utils.candle_arrays import CandleArrays
+from app.utils.technical_analysis import TechnicalAnalysis
+from app.utils.volatility_calculator import VolatilityCalculator
+
+
+@pytest.fixture
+def candles() -> list[PriceCandle]:
+    """Serie sintética de 260 velas H1 con tendencia y ruido"""
+    rng = np.random.default_rng(42)
+    start = datetime(2026, 1, 5, 0, 0)
+    price = 2000.0
+    result = []
+    for i in range(260):
+        open_price = price
+        price = price + rng.normal(0.3, 4.0)
+        high = max(open_price, price) + abs(rng.normal(0, 2.0))
+        low = min(open_price, price) - abs(rng.normal(0, 2.0))
+        result.append(PriceCandle(
+            timestamp=start + timedelta(hours=i),
+            open=open_price,
+            high=high,
+            low=low,
+            close=price
+        ))
+    return result
+
+
+class TestBarFeatureCalculator:
+    """Tests para los indicadores vectorizados por vela"""
+
+    def test_matches_scalar_indicators_on_every_bar(self, candles: list[PriceCandle]) -> None:
+        """RSI, ATR, tendencia y EMA coinciden con las funciones escalares existentes"""
+        features = BarFeatureCalculator.compute(CandleArrays.from_candles(candles))
+
+        for i in (14, 30, 120, 199, 259):
+            window = candles[: i + 1]
+            assert features["rsi"][i] == pytest.approx(TechnicalAnalysis.calculate_rsi(window), abs=0.01)
+            assert features["atr"][i] == pytest.approx(VolatilityCalculator.calculate_atr(window), abs=0.01)
+            assert features["trend"][i] == TechnicalAnalysis.identify_trend(window).value
+
+        assert features["ema_50"][259] == pytest.approx(TechnicalAnalysis.calculate_ema(candles, 50), abs=0.01)
+        assert features["ema_200"][259] == pytest.approx(TechnicalAnalysis.calculate_ema(candles, 200), abs=0.01)
+        assert features["ema_200"][198] is None
+        assert features["rsi"][13] is None
+
+    def test_incremental_update_matches_full_computation(self, candles: list[PriceCandle]) -> None:
+        """Continuar desde la última fila guardada da el mismo resultado que recalcular todo"""
+        arrays = CandleArrays.from_candles(candles)
+        full = BarFeatureCalculator.compute(arrays)
+
+        stored_until = 239
+        context_start = stored_until + 1 - BarFeatureCalculator.CONTEXT_BARS
+        previous_emas = {period: full[f"ema_{period}"][stored_until] for period in (50, 100, 200)}
+        incremental = BarFeatureCalculator.compute(
+            arrays.slice(context_start),
+            start_index=BarFeatureCalculator.CONTEXT_BARS,
+            previous_emas=previous_emas,
+        )
+
+        assert len(incremental["timestamp"]) == 20
+        for column in ("rsi", "atr", "ema_50", "ema_100", "ema_200"):
+            expected = full[column][stored_until + 1:]
+            assert all(math.isclose(a, b, rel_tol=1e-9) for a, b in zip(incremental[column], expected))
+        assert incremental["trend"] == full["trend"][stored_until + 1:]
+
+    def test_session_tags(self, candles: list[PriceCandle]) -> None:
+        """Cada vela recibe la etiqueta de sesión de TradingSessions"""
+        features = BarFeatureCalculator.compute(CandleArrays.from_candles(candles[:24]))
+
+        assert features["session"][2] == "asia"
+        assert features["session"][8] == "london"
+        assert features["session"][13] == "new_york"
+        assert features["session"][6] is None
+
+
+class TestTrendMatrix:
+    """Tests de la tendencia multi-ventana"""
+
+    def test_rows_match_scalar_trend(self, candles: list[PriceCandle]) -> None:
+        """Cada fila coincide con identify_trend sobre la ventana correspondiente"""
+        arrays = CandleArrays.from_candles(candles)
+        lookbacks = (10, 20, 50)
+
+        matrix = BarFeatureCalculator.trend_matrix(arrays.highs, arrays.lows, arrays.closes, lookbacks)
+
+        assert matrix.shape == (3, 260)
+        for row, lookback in enumerate(lookbacks):
+            for i in (1, 9, 49, 150, 259):
+                expected = TechnicalAnalysis.identify_trend(candles[: i + 1], lookback_periods=lookback)
+                assert BarFeatureCalculator.trend_direction(matrix[row, i]) == expected
+
+    def test_trend_series_is_matrix_row(self, candles: list[PriceCandle]) -> None:
+        """trend_series es la fila de la ventana pedida"""
+        arrays = CandleArrays.from_candles(candles)
+
+        series = BarFeatureCalculator.trend_series(arrays.highs, arrays.lows, arrays.closes, lookback=50)
+        matrix = BarFeatureCalculator.trend_matrix(arrays.highs, arrays.lows, arrays.closes)
+
+        np.testing.assert_array_equal(series, matrix[BarFeatureCalculator.TREND_LOOKBACKS.index(50)])
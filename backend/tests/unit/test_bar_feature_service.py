@@ -0,0 +1,188 @@
+"""
+Tests unitarios para BarFeatureService (reconstrucción del feature store)
+"""
+from datetime import datetime, timedelta
+from typing import Iterator
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config.settings import Settings
+from app.db.models import BarFeatureModel, IndicatorSnapshotModel, MarketDataModel
+from app.models.market_analysis import PriceCandle
+from app.services.bar_feature_service import BarFeatureService
+from app.services.technical_analysis_service import TechnicalAnalysisService
+from app.utils.bar_feature_calculator import BarFeatureCalculator
+from app.utils.candle_arrays import CandleArrays
+from app.utils.streaming_indicators import IndicatorSet
+from app.utils.trading_calendar import TradingCalendar
+
+START = datetime(2025, 3, 3)
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    """Sesión SQLite en memoria con velas, indicadores y snapshots"""
+    engine = create_engine("sqlite://")
+    for model in (MarketDataModel, BarFeatureModel, IndicatorSnapshotModel):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+        BarFeatureService._volatility_distributions.clear()
+
+
+def _add_candles(db: Session, hours: range) -> None:
+    """Inserta velas H1 de XAUUSD en las horas indicadas (desde START)"""
+    for hour in hours:
+        base = 2000.0 + (hour % 7) * 3 - (hour % 5) * 2
+        db.add(MarketDataModel(
+            instrument="XAUUSD",
+            timestamp=START + timedelta(hours=hour),
+            interval="1h",
+            open_price=base,
+            high_price=base + 4 + hour % 3,
+            low_price=base - 3,
+            close_price=base + 1,
+            volume=100.0,
+        ))
+    db.commit()
+
+
+class TestRebuildFeatures:
+    """Tests de la reconstrucción tras insertar velas antiguas"""
+
+    def test_rebuild_replays_older_bars_into_snapshot_and_distribution(self, db: Session) -> None:
+        """Tras un backfill, el snapshot y la distribución incluyen las velas antiguas"""
+        _add_candles(db, range(40, 100))
+        service = BarFeatureService(db)
+        service.update_features("XAUUSD", "1h")
+        stale = service.get_volatility_distribution("XAUUSD", "1h")
+        stale_count = len(stale)
+
+        _add_candles(db, range(0, 40))
+        inserted = service.rebuild_features("XAUUSD", "1h")
+
+        assert inserted == 100
+        candles = db.query(MarketDataModel).order_by(MarketDataModel.timestamp).all()
+        expected = IndicatorSet()
+        for model in candles:
+            expected.update(model.timestamp, model.high_price, model.low_price, model.close_price)
+        assert service.get_live_indicators("XAUUSD", "1h") == expected.values()
+
+        distribution = service.get_volatility_distribution("XAUUSD", "1h")
+        assert distribution is not stale
+        assert len(distribution) == stale_count + 40
+        assert distribution.count("range") == 100
+        assert distribution.percentile("range", 7.0) == 17.0
+
+
+class TestUpdatedBars:
+    """Tests de velas ya guardadas que el proveedor devuelve con otros valores"""
+
+    def test_updated_last_bar_is_recomputed(self, db: Session) -> None:
+        """La vela en formación actualizada in situ recalcula su fila y la continuación de las EMAs"""
+        _add_candles(db, range(0, 260))
+        service = BarFeatureService(db)
+        service.update_features("XAUUSD", "1h")
+        last = db.query(MarketDataModel).order_by(MarketDataModel.timestamp.desc()).first()
+        last.close_price = last.low_price = 1901.0
+        db.commit()
+
+        assert service.update_features("XAUUSD", "1h") == 0
+        assert service.update_features("XAUUSD", "1h", since=last.timestamp) == 1
+        _add_candles(db, range(260, 262))
+        service.update_features("XAUUSD", "1h")
+
+        candles = db.query(MarketDataModel).order_by(MarketDataModel.timestamp).all()
+        expected = BarFeatureCalculator.compute(CandleArrays.from_models(candles))
+        rows = db.query(BarFeatureModel).order_by(BarFeatureModel.timestamp).all()
+        assert len(rows) == 262
+        for index in (259, 261):
+            for column in ("rsi", "atr", "ema_50", "ema_200"):
+                assert getattr(rows[index], column) == pytest.approx(expected[column][index])
+            assert rows[index].trend == expected["trend"][index]
+
+    def test_updated_bar_refreshes_volatility_distribution(self, db: Session) -> None:
+        """La distribución en memoria no conserva el ATR ni el rango anteriores de la vela recalculada"""
+        _add_candles(db, range(0, 60))
+        service = BarFeatureService(db)
+        service.update_features("XAUUSD", "1h")
+        assert service.get_volatility_distribution("XAUUSD", "1h").percentile("range", 50.0) == 100.0
+        last = db.query(MarketDataModel).order_by(MarketDataModel.timestamp.desc()).first()
+        last.high_price = last.low_price + 60.0
+        db.commit()
+
+        service.update_features("XAUUSD", "1h", since=last.timestamp)
+        distribution = service.get_volatility_distribution("XAUUSD", "1h")
+
+        assert distribution.count("range") == 60
+        assert distribution.percentile("range", 50.0) == pytest.approx(59 / 60 * 100, abs=0.1)
+
+    def test_first_changed_timestamp(self) -> None:
+        """Solo cuentan las velas ya guardadas con valores distintos, no las nuevas"""
+        stored = [
+            PriceCandle(timestamp=START + timedelta(hours=hour), open=2000.0, high=2005.0, low=1995.0, close=2001.0)
+            for hour in range(3)
+        ]
+        fetched = [candle.model_copy() for candle in stored] + [
+            stored[-1].model_copy(update={"timestamp": START + timedelta(hours=3)})
+        ]
+
+        assert TechnicalAnalysisService._first_changed_timestamp(stored, fetched) is None
+        fetched[2] = fetched[2].model_copy(update={"close": 1990.0})
+        assert TechnicalAnalysisService._first_changed_timestamp(stored, fetched) == START + timedelta(hours=2)
+
+
+class TestLiveIndicators:
+    """Tests del snapshot incremental y la vela en formación"""
+
+    def test_forming_bar_is_not_persisted_in_snapshot(self, db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+        """El snapshot solo avanza con velas cerradas; la vela en formación se aplica en memoria"""
+        monkeypatch.setattr(TradingCalendar, "utc_now", staticmethod(lambda: START + timedelta(hours=259, minutes=30)))
+        _add_candles(db, range(0, 260))
+        service = BarFeatureService(db)
+        service.update_features("XAUUSD", "1h")
+
+        snapshot = db.query(IndicatorSnapshotModel).one()
+        assert snapshot.last_timestamp == START + timedelta(hours=258)
+
+        forming = db.query(MarketDataModel).order_by(MarketDataModel.timestamp.desc()).first()
+        forming.close_price = forming.low_price = 1901.0
+        db.commit()
+        service.update_features("XAUUSD", "1h", since=forming.timestamp)
+
+        candles = db.query(MarketDataModel).order_by(MarketDataModel.timestamp).all()
+        expected = IndicatorSet()
+        for model in candles:
+            expected.update(model.timestamp, model.high_price, model.low_price, model.close_price)
+        live = service.get_live_indicators("XAUUSD", "1h", expected_timestamp=forming.timestamp)
+        assert live == expected.values()
+        assert db.query(IndicatorSnapshotModel).one().last_timestamp == START + timedelta(hours=258)
+        assert service.get_live_indicators("XAUUSD", "1h", expected_timestamp=START) is None
+
+        row = db.query(BarFeatureModel).order_by(BarFeatureModel.timestamp.desc()).first()
+        analysis = TechnicalAnalysisService(Settings(market_data_provider="mock"), db)
+        emas = analysis._get_live_emas("XAUUSD", "H1", forming.timestamp)
+        assert emas == pytest.approx({50: row.ema_50, 100: row.ema_100, 200: row.ema_200})
+
+    def test_revised_closed_bar_resets_snapshot(self, db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Si cambia una vela cerrada ya incluida en el snapshot, el snapshot se reconstruye"""
+        monkeypatch.setattr(TradingCalendar, "utc_now", staticmethod(lambda: START + timedelta(hours=100)))
+        _add_candles(db, range(0, 100))
+        service = BarFeatureService(db)
+        service.update_features("XAUUSD", "1h")
+        revised = db.query(MarketDataModel).filter(MarketDataModel.timestamp == START + timedelta(hours=90)).one()
+        revised.close_price = 1950.0
+        db.commit()
+
+        service.update_features("XAUUSD", "1h", since=revised.timestamp)
+
+        expected = IndicatorSet()
+        for model in db.query(MarketDataModel).order_by(MarketDataModel.timestamp).all():
+            expected.update(model.timestamp, model.high_price, model.low_price, model.close_price)
+        assert IndicatorSet.restore(db.query(IndicatorSnapshotModel).one().state).values() == expected.values()
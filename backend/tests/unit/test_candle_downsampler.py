@@ -0,0 +1,143 @@
+"""
+Tests unitarios para CandleDownsampler y CandlePyramid (reducción de velas del chart)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.utils.candle_arrays import CandleArrays
+from app.utils.candle_downsampler import CandleDownsampler
+from app.utils.candle_pyramid import CandlePyramid
+
+
+def _series(hours: int, start: datetime = datetime(2025, 1, 6)) -> CandleArrays:
+    """Serie H1 continua con una onda en el cierre y mechas de +-1"""
+    closes = 2000.0 + 20 * np.sin(np.arange(hours) / 24.0)
+    return CandleArrays(
+        np.datetime64(start, "s") + np.arange(hours) * np.timedelta64(3600, "s"),
+        closes - 0.25,
+        closes + 1.0,
+        closes - 1.0,
+        closes,
+        np.where(np.arange(hours) % 2 == 0, 10.0, np.nan),
+    )
+
+
+class TestDownsampler:
+    """Tests de los métodos de reducción"""
+
+    def test_aggregate_preserves_ohlc(self) -> None:
+        """Cada tramo conserva apertura, extremos, cierre y suma de volumen"""
+        arrays = _series(10)
+
+        aggregated = CandleDownsampler.aggregate(arrays, np.array([0, 4, 7]))
+
+        assert len(aggregated) == 3
+        assert aggregated.opens[1] == arrays.opens[4]
+        assert aggregated.highs[1] == arrays.highs[4:7].max()
+        assert aggregated.lows[2] == arrays.lows[7:].min()
+        assert aggregated.closes[0] == arrays.closes[3]
+        assert aggregated.volumes.tolist() == [20.0, 20.0, 10.0]
+
+    def test_aggregate_by_time_aligns_buckets(self) -> None:
+        """Los buckets se alinean a epoch y los huecos no generan buckets vacíos"""
+        arrays = _series(48)
+        gapped = CandleArrays(
+            np.r_[arrays.timestamps[:5], arrays.timestamps[30:]],
+            np.r_[arrays.opens[:5], arrays.opens[30:]],
+            np.r_[arrays.highs[:5], arrays.highs[30:]],
+            np.r_[arrays.lows[:5], arrays.lows[30:]],
+            np.r_[arrays.closes[:5], arrays.closes[30:]],
+            np.r_[arrays.volumes[:5], arrays.volumes[30:]],
+        )
+
+        aggregated = CandleDownsampler.aggregate_by_time(gapped, 4 * 3600)
+
+        hours = aggregated.timestamps.astype(np.int64) // 3600
+        assert (hours % 4 == 0).all()
+        assert len(aggregated) == 2 + 5
+        assert aggregated.highs[0] == gapped.highs[:4].max()
+
+    def test_ohlc_buckets_respect_target(self) -> None:
+        """La reducción OHLC no supera el objetivo y conserva el máximo y mínimo global"""
+        arrays = _series(8760)
+
+        reduced = CandleDownsampler.downsample(arrays, 300, "ohlc")
+
+        assert len(reduced) == 300
+        assert reduced.highs.max() == arrays.highs.max()
+        assert reduced.lows.min() == arrays.lows.min()
+        assert reduced.closes[-1] == arrays.closes[-1]
+
+    def test_lttb_keeps_endpoints_and_spikes(self) -> None:
+        """LTTB conserva los extremos de la serie y un pico aislado"""
+        arrays = _series(5000)
+        arrays.closes[3210] = 2500.0
+
+        reduced = CandleDownsampler.downsample(arrays, 300, "lttb")
+
+        assert len(reduced) == 300
+        assert reduced.timestamps[0] == arrays.timestamps[0]
+        assert reduced.timestamps[-1] == arrays.timestamps[-1]
+        assert 2500.0 in reduced.closes
+        assert (np.diff(reduced.timestamps.astype(np.int64)) > 0).all()
+
+    def test_invalid_method(self) -> None:
+        """Método u objetivo inválidos producen ValueError"""
+        with pytest.raises(ValueError):
+            CandleDownsampler.downsample(_series(10), 5, "average")
+        with pytest.raises(ValueError):
+            CandleDownsampler.downsample(_series(10), 0)
+
+
+class TestPyramid:
+    """Tests de la pirámide de resoluciones"""
+
+    def test_levels_double_duration(self) -> None:
+        """Cada nivel agrega buckets del doble de duración hasta quedar pocas velas"""
+        pyramid = CandlePyramid(_series(8760), 3600)
+
+        assert pyramid.steps[:4] == [3600, 7200, 14400, 28800]
+        assert len(pyramid.levels[-1]) <= CandlePyramid.MIN_LEVEL_BARS
+        assert pyramid.latest == datetime(2025, 1, 6) + timedelta(hours=8759)
+
+    def test_payload_independent_of_range(self) -> None:
+        """Un año y una semana de H1 devuelven como mucho el mismo número de velas"""
+        pyramid = CandlePyramid(_series(8760), 3600)
+        start = datetime(2025, 1, 6)
+
+        year, year_resolution = pyramid.select(start, start + timedelta(days=365), 300)
+        week, week_resolution = pyramid.select(start, start + timedelta(days=7), 300)
+
+        assert len(year) == 300 and year_resolution == 16 * 3600
+        assert len(week) == 7 * 24 + 1 and week_resolution == 3600
+        assert year.highs.max() == pytest.approx(2021.0, abs=0.01)
+
+    def test_extend_matches_rebuild(self) -> None:
+        """Extender con la última vela modificada y velas nuevas equivale a reconstruir la pirámide"""
+        full = _series(1000)
+        full.closes[999] += 5.0
+        full.highs[999] += 6.0
+        pyramid = CandlePyramid(_series(997), 3600)
+
+        pyramid.extend(full.slice(996))
+        rebuilt = CandlePyramid(full, 3600)
+
+        assert pyramid.steps == rebuilt.steps
+        for extended, expected in zip(pyramid.levels, rebuilt.levels):
+            np.testing.assert_array_equal(extended.timestamps, expected.timestamps)
+            np.testing.assert_allclose(extended.highs, expected.highs)
+            np.testing.assert_allclose(extended.closes, expected.closes)
+            np.testing.assert_allclose(extended.volumes, expected.volumes)
+        assert pyramid.last_bar == (full.opens[999], full.highs[999], full.lows[999], full.closes[999])
+
+    def test_extend_adds_levels(self) -> None:
+        """Al crecer la serie se añaden los niveles que antes no tenían velas suficientes"""
+        pyramid = CandlePyramid(_series(40), 3600)
+        levels = len(pyramid)
+
+        pyramid.extend(_series(400).slice(39))
+
+        assert len(pyramid) > levels
+        assert pyramid.steps == CandlePyramid(_series(400), 3600).steps
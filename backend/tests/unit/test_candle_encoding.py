@@ -0,0 +1,90 @@
+"""
+Tests unitarios para CandleEncoder (formatos de respuesta de las velas del chart)
+"""
+import json
+from datetime import datetime, timedelta
+
+import msgpack
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from app.models.market_analysis import PriceCandle
+from app.utils.candle_arrays import CandleArrays
+from app.utils.candle_encoding import CandleEncoder
+
+
+@pytest.fixture
+def arrays() -> CandleArrays:
+    """Serie H1 de 2000 velas con el volumen de la primera vela ausente"""
+    start = datetime(2025, 1, 6)
+    closes = 2000.0 + np.cumsum(np.sin(np.arange(2000) / 7.0))
+    candles = [
+        PriceCandle(
+            timestamp=start + timedelta(hours=i),
+            open=float(closes[i] - 0.5),
+            high=float(closes[i] + 1.25),
+            low=float(closes[i] - 1.75),
+            close=float(closes[i]),
+            volume=None if i == 0 else float(100 + i),
+        )
+        for i in range(2000)
+    ]
+    return CandleArrays.from_candles(candles)
+
+
+class TestNegotiate:
+    """Tests de la elección de formato"""
+
+    def test_explicit_format_wins(self) -> None:
+        """El parámetro format tiene prioridad sobre Accept y se valida"""
+        assert CandleEncoder.negotiate("Columnar", "application/msgpack") == "columnar"
+        with pytest.raises(ValueError):
+            CandleEncoder.negotiate("xml")
+
+    def test_accept_header(self) -> None:
+        """Se elige el formato aceptado de mayor calidad; por defecto JSON"""
+        assert CandleEncoder.negotiate(None, None) == "json"
+        assert CandleEncoder.negotiate(None, "text/html, */*") == "json"
+        assert CandleEncoder.negotiate(None, "application/json;q=0.5, application/msgpack") == "msgpack"
+        assert CandleEncoder.negotiate(
+            None, "application/msgpack;q=0.8, application/vnd.apache.arrow.stream"
+        ) == "arrow"
+
+
+class TestEncode:
+    """Tests de los formatos"""
+
+    def test_rows_match_legacy_format(self, arrays: CandleArrays) -> None:
+        """Las filas conservan el formato de chart_candles (timestamp ISO, volumen None si falta)"""
+        rows = CandleEncoder.to_rows(arrays)
+
+        assert rows[0]["timestamp"] == "2025-01-06T00:00:00" and rows[0]["volume"] is None
+        assert rows[1]["timestamp"] == "2025-01-06T01:00:00" and rows[1]["volume"] == 101.0
+        assert rows[5]["close"] == arrays.closes[5]
+
+    def test_columnar_uses_epoch_seconds(self, arrays: CandleArrays) -> None:
+        """El formato columnar lleva epoch en segundos y ocupa mucho menos que las filas"""
+        columnar = CandleEncoder.encode(arrays, "columnar", {"instrument": "XAUUSD"})
+        rows = CandleEncoder.encode(arrays, "json", {"instrument": "XAUUSD"})
+
+        assert columnar["instrument"] == "XAUUSD"
+        assert columnar["t"][:2] == [1736121600, 1736125200]
+        assert columnar["v"][0] is None and columnar["h"][3] == arrays.highs[3]
+        assert len(json.dumps(columnar)) < 0.6 * len(json.dumps(rows))
+
+    def test_msgpack_round_trip(self, arrays: CandleArrays) -> None:
+        """msgpack reproduce las columnas"""
+        decoded = msgpack.unpackb(CandleEncoder.encode(arrays, "msgpack", {"interval": "1h"}))
+
+        assert decoded["interval"] == "1h"
+        assert decoded["c"] == arrays.closes.tolist()
+
+    def test_arrow_round_trip(self, arrays: CandleArrays) -> None:
+        """El stream Arrow IPC reproduce las columnas con volumen nulo"""
+        table = pa.ipc.open_stream(CandleEncoder.encode(arrays, "arrow", {"instrument": "XAUUSD"})).read_all()
+
+        assert table.num_rows == 2000
+        assert table.schema.metadata[b"instrument"] == b"XAUUSD"
+        assert table.column("v").null_count == 1
+        assert table.column("o").to_pylist() == arrays.opens.tolist()
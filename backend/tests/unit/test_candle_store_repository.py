@@ -0,0 +1,138 @@
+"""
+Tests unitarios para CandleStoreRepository (almacén de velas con numpy.memmap)
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.config.settings import Settings
+from app.models.market_analysis import PriceCandle
+from app.providers.market_data.base_market_provider import MarketDataProvider
+from app.repositories.candle_store_repository import CandleStoreRepository, create_market_data_repository
+from app.repositories.market_data_repository import MarketDataRepository
+from app.services.technical_analysis_service import TechnicalAnalysisService
+from app.utils.trading_calendar import TradingCalendar
+
+
+def _candles(start: datetime, hours: int, price: float = 100.0) -> list[PriceCandle]:
+    """Velas horarias con cierre creciente"""
+    return [
+        PriceCandle(
+            timestamp=start + timedelta(hours=i),
+            open=price + i, high=price + i + 1, low=price + i - 1, close=price + i + 0.5,
+            volume=None if i % 2 else float(i),
+        )
+        for i in range(hours)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> CandleStoreRepository:
+    """Almacén vacío en un directorio temporal"""
+    return CandleStoreRepository(str(tmp_path))
+
+
+class TestWrites:
+    """Tests de escritura y fusión"""
+
+    def test_append_and_range_read(self, store: CandleStoreRepository) -> None:
+        """Los bloques posteriores se añaden al final y el rango se lee como vista del fichero"""
+        start = datetime(2024, 1, 1)
+        store.copy_candles("xauusd", "1h", _candles(start, 100))
+        store.copy_candles("XAUUSD", "1h", _candles(start + timedelta(hours=100), 50, price=200.0))
+
+        arrays = store.get_candle_arrays("XAUUSD", start + timedelta(hours=95), start + timedelta(hours=104), "1h")
+
+        assert len(arrays) == 10
+        assert arrays.closes[5] == 200.5
+        assert isinstance(arrays.closes.base, np.memmap)
+        assert np.isnan(arrays.volumes[0]) and arrays.volumes[1] == 96.0
+
+    def test_out_of_order_write_merges(self, store: CandleStoreRepository) -> None:
+        """Velas antiguas o repetidas se fusionan y sustituyen a las existentes"""
+        start = datetime(2024, 1, 1)
+        store.copy_candles("XAUUSD", "1h", _candles(start + timedelta(hours=10), 10))
+        store.copy_candles("XAUUSD", "1h", _candles(start, 12, price=500.0))
+
+        timestamps = store.get_timestamps("XAUUSD", "1h")
+        rows = store.get_candles("XAUUSD", start, start + timedelta(hours=30), "1h")
+
+        assert len(timestamps) == 20 and np.all(np.diff(timestamps.astype(np.int64)) == 3600)
+        assert rows[11].close_price == 511.5 and rows[12].close_price == 102.5
+        assert rows[0].instrument == "XAUUSD" and rows[0].interval == "1h"
+
+    def test_uncommitted_bytes_are_ignored(self, store: CandleStoreRepository, tmp_path: Path) -> None:
+        """Bytes de una escritura interrumpida no se leen y la siguiente escritura los descarta"""
+        start = datetime(2024, 1, 1)
+        store.copy_candles("XAUUSD", "1h", _candles(start, 5))
+        with open(tmp_path / "XAUUSD" / "1h.bin", "ab") as data_file:
+            data_file.write(b"\x00" * 30)
+
+        assert len(store.get_timestamps("XAUUSD", "1h")) == 5
+
+        store.copy_candles("XAUUSD", "1h", _candles(start + timedelta(hours=5), 1))
+
+        assert store.get_candles_after("XAUUSD", "1h", start + timedelta(hours=4))[0].open_price == 100.0
+        assert (tmp_path / "XAUUSD" / "1h.bin").stat().st_size == 6 * CandleStoreRepository.RECORD_DTYPE.itemsize
+
+
+class TestReads:
+    """Tests de la interfaz compartida con MarketDataRepository"""
+
+    def test_recent_and_latest(self, store: CandleStoreRepository) -> None:
+        """Últimas N velas hasta un timestamp y última vela por intervalo o en cualquiera"""
+        start = datetime(2024, 1, 1)
+        store.save_candles("XAUUSD", _candles(start, 24), "1h")
+        store.save_candles("XAUUSD", _candles(start, 2, price=300.0), "1d")
+
+        recent = store.get_recent_candles("XAUUSD", "1h", start + timedelta(hours=10), 3)
+
+        assert [row.timestamp for row in recent] == [start + timedelta(hours=h) for h in (8, 9, 10)]
+        assert store.get_latest_candle_by_interval("XAUUSD", "1h").timestamp == start + timedelta(hours=23)
+        assert store.get_latest_price("XAUUSD").timestamp == start + timedelta(hours=23)
+        assert store.get_latest_price("EURUSD") is None
+        assert store.count_candles("XAUUSD", "1h") == 24 and store.count_candles("EURUSD", "1h") == 0
+        assert store.get_candles_after("EURUSD", "1h") == []
+
+    def test_rows_convert_like_orm_models(self, store: CandleStoreRepository) -> None:
+        """Las filas se convierten a PriceCandle igual que los modelos de market_data"""
+        candles = _candles(datetime(2024, 1, 1), 4)
+        rows = store.save_candles("XAUUSD", candles, "1h")
+
+        assert store.convert_to_price_candles(rows) == candles
+
+
+class TestFactory:
+    """Tests de la selección de backend"""
+
+    def test_backend_selection(self, tmp_path: Path) -> None:
+        """CANDLE_STORE_PATH activa el almacén en disco; si no, market_data"""
+        store = create_market_data_repository(None, Settings(candle_store_path=str(tmp_path)))
+        postgres = create_market_data_repository(None, Settings())
+
+        assert isinstance(store, CandleStoreRepository) and store.available
+        assert isinstance(postgres, MarketDataRepository) and not postgres.available
+
+    async def test_analysis_uses_store_without_database(self, tmp_path: Path) -> None:
+        """Sin base de datos, velas al día en el almacén evitan la petición al proveedor"""
+        calls = []
+
+        class RecordingProvider(MarketDataProvider):
+            async def fetch_historical_candles(self, instrument, start_date, end_date, interval="1h"):
+                calls.append(interval)
+                return []
+
+        settings = Settings(market_data_provider="mock", candle_store_path=str(tmp_path))
+        service = TechnicalAnalysisService(settings)
+        service.provider = RecordingProvider()
+        latest = TradingCalendar.expected_latest_bar("1h")
+        service.market_data_repo.copy_candles("XAUUSD", "1h", _candles(latest - timedelta(hours=47), 48))
+
+        candles = await service._get_candles_with_cache(
+            "XAUUSD", latest - timedelta(hours=47), latest + timedelta(hours=1), "1h", "H1"
+        )
+
+        assert len(candles) == 48
+        assert calls == []
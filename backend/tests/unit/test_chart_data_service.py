@@ -0,0 +1,194 @@
+"""
+Tests unitarios para ChartDataService (velas del chart por rango)
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config.settings import Settings
+from app.main import app
+from app.models.market_analysis import PriceCandle
+from app.repositories.candle_store_repository import CandleStoreRepository
+from app.routers.market_briefing import get_chart_data_service
+from app.services.chart_data_service import ChartDataService
+from app.services.technical_analysis_service import TechnicalAnalysisService
+
+
+@pytest.fixture
+def settings() -> Settings:
+    """Configuración con proveedor mock"""
+    return Settings(market_data_provider="mock")
+
+
+@pytest.fixture(autouse=True)
+def empty_pyramid_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Caché de pirámides vacía en cada test"""
+    monkeypatch.setattr(ChartDataService, "_pyramids", OrderedDict())
+
+
+def _hourly(start: datetime, hours: int) -> list[PriceCandle]:
+    """Velas horarias continuas"""
+    return [
+        PriceCandle(
+            timestamp=start + timedelta(hours=i),
+            open=2000.0 + i % 50, high=2001.0 + i % 50, low=1999.0 + i % 50, close=2000.5 + i % 50,
+        )
+        for i in range(hours)
+    ]
+
+
+class TestChartDataService:
+    """Tests del servicio de datos del chart"""
+
+    def test_default_range(self) -> None:
+        """Sin inicio se piden DEFAULT_BARS velas antes del fin; rangos invertidos se rechazan"""
+        end = datetime(2025, 3, 7, 12)
+
+        start, resolved_end = ChartDataService.resolve_range("4h", end=end)
+
+        assert resolved_end == end
+        assert start == end - timedelta(hours=4 * ChartDataService.DEFAULT_BARS)
+        with pytest.raises(ValueError):
+            ChartDataService.resolve_range("4h", start=end, end=end - timedelta(hours=1))
+        with pytest.raises(ValueError):
+            ChartDataService.resolve_range("15min")
+
+    def test_aware_range_is_naive_utc(self) -> None:
+        """Las fechas con zona horaria se convierten a naive UTC"""
+        start = datetime(2025, 3, 3, 2, tzinfo=timezone(timedelta(hours=2)))
+        end = datetime(2025, 3, 7, 12, tzinfo=timezone.utc)
+
+        resolved_start, resolved_end = ChartDataService.resolve_range("1h", start, end)
+        default_start, default_end = ChartDataService.resolve_range("1h", start=start)
+
+        assert (resolved_start, resolved_end) == (datetime(2025, 3, 3), datetime(2025, 3, 7, 12))
+        assert default_start == datetime(2025, 3, 3) and default_end.tzinfo is None
+
+    async def test_candles_from_provider(self, settings: Settings) -> None:
+        """Sin almacén las velas llegan del proveedor, ordenadas y dentro del rango"""
+        service = ChartDataService(settings)
+        start, end = datetime(2025, 3, 3), datetime(2025, 3, 7, 23)
+
+        arrays = await service.get_candles("xauusd", "1h", start, end)
+
+        assert len(arrays) > 0
+        assert (arrays.timestamps[1:] > arrays.timestamps[:-1]).all()
+        assert arrays.timestamp_at(0) >= start and arrays.timestamp_at(-1) <= end
+
+    async def test_max_bars_keeps_latest(self, settings: Settings, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Un rango con más de MAX_BARS velas se recorta a las más recientes"""
+        monkeypatch.setattr(ChartDataService, "MAX_BARS", 10)
+        service = ChartDataService(settings)
+        full = await TechnicalAnalysisService(settings).get_candle_arrays(
+            "XAUUSD", datetime(2025, 3, 3), datetime(2025, 3, 7, 23), "1h"
+        )
+
+        arrays = await service.get_candles("XAUUSD", "1h", datetime(2025, 3, 3), datetime(2025, 3, 7, 23))
+
+        assert len(arrays) == 10
+        assert arrays.timestamp_at(-1) == full.timestamp_at(-1)
+
+    async def test_chart_from_cached_pyramid(self, tmp_path: Path) -> None:
+        """Con el almacén al día la pirámide se construye una vez y se extiende al llegar velas nuevas"""
+        start = datetime(2024, 3, 1)
+        store = CandleStoreRepository(str(tmp_path))
+        store.copy_candles("XAUUSD", "1h", _hourly(start, 24 * 365))
+        service = ChartDataService(Settings(market_data_provider="mock", candle_store_path=str(tmp_path)))
+        end = start + timedelta(days=365)
+
+        year, resolution = await service.get_chart("XAUUSD", "1h", start, end, width=1200)
+        pyramid = ChartDataService._pyramids[("XAUUSD", "1h")]
+        week, week_resolution = await service.get_chart("XAUUSD", "1h", end - timedelta(days=7), end, width=1200)
+
+        assert len(year) == 300 and resolution == 16 * 3600
+        assert week_resolution == 3600 and len(week) == 7 * 24
+        assert ChartDataService._pyramids[("XAUUSD", "1h")] is pyramid
+
+        store.copy_candles("XAUUSD", "1h", _hourly(end, 1))
+        await service.get_chart("XAUUSD", "1h", start, end + timedelta(hours=1), width=1200)
+        assert ChartDataService._pyramids[("XAUUSD", "1h")] is pyramid
+        assert pyramid.latest == end and len(pyramid.levels[0]) == 24 * 365 + 1
+
+    async def test_cached_pyramid_follows_store_changes(self, tmp_path: Path) -> None:
+        """La pirámide cacheada refleja la última vela modificada en sitio y el histórico anterior rellenado"""
+        start = datetime(2024, 3, 1)
+        store = CandleStoreRepository(str(tmp_path))
+        store.copy_candles("XAUUSD", "1h", _hourly(start, 24 * 30))
+        service = ChartDataService(Settings(market_data_provider="mock", candle_store_path=str(tmp_path)))
+        end = start + timedelta(days=30)
+        await service.get_chart("XAUUSD", "1h", start, end, width=1200)
+
+        last = _hourly(start, 24 * 30)[-1]
+        store.copy_candles("XAUUSD", "1h", [last.model_copy(update={"high": 2100.0, "close": 2090.0})])
+        arrays, _ = await service.get_chart("XAUUSD", "1h", start, end, width=1200)
+        pyramid = ChartDataService._pyramids[("XAUUSD", "1h")]
+
+        assert arrays.highs[-1] == 2100.0 and arrays.closes[-1] == 2090.0
+        assert pyramid.levels[-1].highs.max() == 2100.0
+
+        store.copy_candles("XAUUSD", "1h", _hourly(start - timedelta(days=10), 24 * 10))
+        arrays, _ = await service.get_chart("XAUUSD", "1h", start - timedelta(days=10), end, width=1200)
+
+        assert ChartDataService._pyramids[("XAUUSD", "1h")] is not pyramid
+        assert arrays.timestamp_at(0) == start - timedelta(days=10)
+        assert arrays.highs.max() == 2100.0
+
+    async def test_chart_without_store(self, settings: Settings) -> None:
+        """Sin almacén la pirámide se construye con el rango del proveedor y respeta el ancho"""
+        service = ChartDataService(settings)
+
+        arrays, resolution = await service.get_chart(
+            "XAUUSD", "1h", datetime(2025, 3, 3), datetime(2025, 3, 7, 23), width=200, method="lttb"
+        )
+
+        assert 0 < len(arrays) <= 50
+        assert resolution >= 3600
+        assert not ChartDataService._pyramids
+        with pytest.raises(ValueError):
+            await service.get_chart("XAUUSD", "1h", width=1)
+
+
+class TestChartCandlesEndpoint:
+    """Tests del endpoint /chart-candles"""
+
+    @pytest.mark.parametrize("width", [None, 200])
+    def test_utc_suffixed_range(self, settings: Settings, width: int) -> None:
+        """Un inicio ISO con sufijo Z (fin por defecto ahora) se acepta con y sin reducción por ancho"""
+        start = (datetime.now(timezone.utc) - timedelta(days=5)).replace(minute=0, second=0, microsecond=0)
+        params = {"interval": "1h", "start": start.strftime("%Y-%m-%dT%H:%M:%SZ")}
+        if width:
+            params["width"] = width
+        app.dependency_overrides[get_chart_data_service] = lambda: ChartDataService(settings)
+        try:
+            response = TestClient(app).get("/api/market-briefing/chart-candles", params=params)
+        finally:
+            app.dependency_overrides.pop(get_chart_data_service, None)
+
+        assert response.status_code == 200
+        candles = response.json()["candles"]
+        assert candles
+        assert candles[0]["timestamp"] >= start.replace(tzinfo=None).isoformat()
+
+    @pytest.mark.parametrize("accept", [None, "application/msgpack"])
+    def test_format_from_accept_varies_on_accept(self, settings: Settings, accept: str) -> None:
+        """El formato sale de Accept (msgpack binario o JSON por defecto) y la respuesta lleva Vary: Accept"""
+        headers = {"Accept": accept} if accept else {}
+        app.dependency_overrides[get_chart_data_service] = lambda: ChartDataService(settings)
+        try:
+            response = TestClient(app).get(
+                "/api/market-briefing/chart-candles", params={"interval": "1h"}, headers=headers
+            )
+        finally:
+            app.dependency_overrides.pop(get_chart_data_service, None)
+
+        assert response.status_code == 200
+        assert response.headers["vary"] == "Accept"
+        if accept:
+            assert response.headers["content-type"] == "application/msgpack"
+            assert msgpack.unpackb(response.content)["c"]
+        else:
+            assert response.json()["candles"]
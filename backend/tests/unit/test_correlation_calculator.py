@@ -1,6 +1,7 @@
 """
 Tests para CorrelationCalculator
 """
+import numpy as np
 import pytest
 from app.utils.correlation_calculator import (
     CorrelationCalculator,
@@ -8,6 +9,7 @@ from app.utils.correlation_calculator import (
     CorrelationResult,
     ImpactProjection,
 )
+from app.utils.series_aligner import AlignedSeries
 
 
 class TestCorrelationCalculator:
@@ -291,3 +293,85 @@ class TestCorrelationCalculator:
         assert "DXY baja 2.00%" in reasoning
         assert "Gold subiría" in reasoning
         assert "1.60%" in reasoning
+
+
+class TestLeadLag:
+    """
+    Tests para la correlación cruzada por FFT y el análisis lead-lag
+    """
+
+    @staticmethod
+    def _aligned_with_lag(lag: int, bars: int = 600):
+        """Serie alineada donde Gold repite (invertidos) los retornos de DXY con 'lag' velas de retraso"""
+        rng = np.random.default_rng(11)
+        dxy_returns = rng.normal(0, 0.1, bars)
+        gold_returns = -np.roll(dxy_returns, lag) + rng.normal(0, 0.03, bars)
+        dxy = 100 * np.cumprod(1 + np.concatenate([[0.0], dxy_returns]) / 100)
+        gold = 2000 * np.cumprod(1 + np.concatenate([[0.0], gold_returns]) / 100)
+        timestamps = np.arange(bars + 1).astype("datetime64[h]").astype("datetime64[s]")
+        return AlignedSeries(timestamps, {"DXY": dxy, "XAUUSD": gold})
+
+    def test_cross_correlation_matches_direct_sum(self) -> None:
+        """
+        La FFT coincide con la suma directa para desfases positivos y negativos
+        """
+        rng = np.random.default_rng(3)
+        x = rng.normal(size=200)
+        y = rng.normal(size=200)
+        max_lag = 5
+
+        result = CorrelationCalculator.cross_correlation(x, y, max_lag)
+
+        xs = (x - x.mean()) / x.std()
+        ys = (y - y.mean()) / y.std()
+        n = len(x)
+        for k in range(-max_lag, max_lag + 1):
+            if k >= 0:
+                expected = np.sum(xs[:n - k] * ys[k:]) / n
+            else:
+                expected = np.sum(xs[-k:] * ys[:n + k]) / n
+            assert result[k + max_lag] == pytest.approx(expected, abs=1e-9)
+
+    def test_cross_correlation_constant_series(self) -> None:
+        """
+        Una serie sin varianza devuelve correlación cero en todos los desfases
+        """
+        result = CorrelationCalculator.cross_correlation(np.ones(50), np.arange(50.0), 3)
+
+        assert list(result) == [0.0] * 7
+
+    def test_lead_lag_detects_leader(self) -> None:
+        """
+        Detecta que DXY se adelanta 3 velas a Gold con correlación inversa estable
+        """
+        aligned = self._aligned_with_lag(3)
+
+        result = CorrelationCalculator.calculate_lead_lag(aligned, "DXY", "XAUUSD", max_lag=6, window=120)
+
+        assert result.dominant_lag == 3
+        assert result.dominant_correlation < -0.8
+        assert abs(result.contemporaneous_correlation) < 0.2
+        assert result.stability == pytest.approx(1.0)
+        assert len(result.lags) == len(result.correlations) == 13
+        assert "DXY se adelanta a XAUUSD en 3" in result.interpretation
+
+    def test_lead_lag_follower_leads(self) -> None:
+        """
+        Un desfase negativo indica que el seguidor se adelanta al líder candidato
+        """
+        aligned = self._aligned_with_lag(-2)
+
+        result = CorrelationCalculator.calculate_lead_lag(aligned, "DXY", "XAUUSD", max_lag=4)
+
+        assert result.dominant_lag == -2
+        assert result.stability is None
+        assert "XAUUSD se adelanta a DXY" in result.interpretation
+
+    def test_lead_lag_requires_enough_bars(self) -> None:
+        """
+        Con muy pocas velas alineadas se lanza ValueError
+        """
+        aligned = self._aligned_with_lag(1, bars=10).tail(8)
+
+        with pytest.raises(ValueError):
+            CorrelationCalculator.calculate_lead_lag(aligned, "DXY", "XAUUSD", max_lag=6)
@@ -0,0 +1,198 @@
+"""
+Tests unitarios para DatasetIOService (exportación/importación Parquet y Arrow IPC)
+"""
+import io
+from datetime import datetime, timedelta
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.models import BarFeatureModel, DailyAnalysisModel, IndicatorSnapshotModel, TradingModeRecommendationModel
+from app.services.bar_feature_service import BarFeatureService
+from app.services.dataset_io_service import DatasetIOService
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    """Sesión SQLite en memoria con las tablas de historial de análisis"""
+    engine = create_engine("sqlite://")
+    for model in (DailyAnalysisModel, TradingModeRecommendationModel, BarFeatureModel, IndicatorSnapshotModel):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+        BarFeatureService._volatility_distributions.clear()
+
+
+def _daily_rows(instrument: str, days: int) -> list[DailyAnalysisModel]:
+    """Análisis diarios consecutivos con payload JSON"""
+    start = datetime(2025, 3, 3)
+    return [
+        DailyAnalysisModel(
+            instrument=instrument,
+            analysis_date=start + timedelta(days=day),
+            previous_day_close=2000.0 + day,
+            current_day_close=2001.0 + day,
+            daily_change_percent=0.05,
+            daily_direction="alcista",
+            previous_day_high=2010.0,
+            previous_day_low=1990.0,
+            summary=f"Día {day}",
+            analysis_data=[{"session": "london", "range": day}],
+        )
+        for day in range(days)
+    ]
+
+
+class TestColumns:
+    """Tests de la conversión filas <-> columnas"""
+
+    def test_json_payload_round_trip(self) -> None:
+        """Los payload JSON viajan como texto y se recuperan como estructuras"""
+        rows = _daily_rows("XAUUSD", 2)
+
+        columns = DatasetIOService.rows_to_columns("daily_analyses", rows)
+        restored = DatasetIOService.columns_to_rows("daily_analyses", columns)
+
+        assert columns["analysis_data"][1] == '[{"session": "london", "range": 1}]'
+        assert restored[1]["analysis_data"] == [{"session": "london", "range": 1}]
+        assert restored[0]["analysis_date"] == datetime(2025, 3, 3)
+        assert set(restored[0]) == set(DatasetIOService.DATASETS["daily_analyses"]["columns"])
+
+    def test_invalid_dataset_format_and_columns(self) -> None:
+        """Dataset o formato desconocidos y columnas ausentes producen ValueError"""
+        with pytest.raises(ValueError):
+            DatasetIOService.dataset_definition("users")
+        with pytest.raises(ValueError):
+            DatasetIOService.resolve_format("csv")
+        with pytest.raises(ValueError):
+            DatasetIOService.columns_to_rows("market_data", {"instrument": ["XAUUSD"]})
+
+        assert DatasetIOService.resolve_format(path="/tmp/velas.PARQUET") == "parquet"
+        assert DatasetIOService.resolve_format(path="velas.feather") == "arrow"
+
+
+class TestBatches:
+    """Tests de la lectura por lotes y la importación"""
+
+    def test_iter_batches_filters_and_splits(self, db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Filtra por instrumento y rango, y reparte las filas en lotes de BATCH_SIZE"""
+        db.add_all(_daily_rows("XAUUSD", 10) + _daily_rows("EURUSD", 10))
+        db.commit()
+        monkeypatch.setattr(DatasetIOService, "BATCH_SIZE", 3)
+
+        batches = list(DatasetIOService(db).iter_batches(
+            "daily_analyses", instrument="xauusd", start=datetime(2025, 3, 5), end=datetime(2025, 3, 11)
+        ))
+
+        assert [len(batch["instrument"]) for batch in batches] == [3, 3, 1]
+        dates = [date for batch in batches for date in batch["analysis_date"]]
+        assert dates == [datetime(2025, 3, 5) + timedelta(days=d) for d in range(7)]
+        assert {instrument for batch in batches for instrument in batch["instrument"]} == {"XAUUSD"}
+        with pytest.raises(ValueError):
+            list(DatasetIOService(db).iter_batches("daily_analyses", interval="1h"))
+
+    def test_import_skips_existing_rows(self, db: Session) -> None:
+        """Importar un lote exportado solo inserta las filas que no existen"""
+        db.add_all(_daily_rows("XAUUSD", 3))
+        db.commit()
+        service = DatasetIOService(db)
+        columns = DatasetIOService.rows_to_columns("daily_analyses", _daily_rows("XAUUSD", 5))
+
+        assert service.import_columns("daily_analyses", columns) == 2
+        assert service.import_columns("daily_analyses", columns) == 0
+        assert db.query(DailyAnalysisModel).count() == 5
+
+    def test_import_dedupes_within_batch(self, db: Session) -> None:
+        """Las filas repetidas dentro de un lote se insertan una sola vez (gana la última)"""
+        rows = _daily_rows("XAUUSD", 3)
+        rows[2].analysis_date = rows[1].analysis_date
+        columns = DatasetIOService.rows_to_columns("daily_analyses", rows)
+
+        assert DatasetIOService(db).import_columns("daily_analyses", columns) == 2
+        summaries = [row.summary for row in db.query(DailyAnalysisModel).order_by(DailyAnalysisModel.analysis_date)]
+        assert summaries == ["Día 0", "Día 2"]
+
+    def test_recommendation_key_includes_bond_symbol(self, db: Session) -> None:
+        """Dos recomendaciones del mismo día con distinto bono son filas distintas"""
+        date = datetime(2025, 3, 3)
+        db.add(TradingModeRecommendationModel(
+            instrument="XAUUSD", bond_symbol="US10Y", recommendation_date=date, mode="calma", confidence=0.6,
+        ))
+        db.commit()
+        rows = [
+            TradingModeRecommendationModel(
+                instrument="XAUUSD", bond_symbol=bond, recommendation_date=date, mode="calma", confidence=0.6,
+            )
+            for bond in ("US10Y", "US02Y")
+        ]
+        columns = DatasetIOService.rows_to_columns("trading_mode_recommendations", rows)
+
+        assert DatasetIOService(db).import_columns("trading_mode_recommendations", columns) == 1
+        bonds = {row.bond_symbol for row in db.query(TradingModeRecommendationModel)}
+        assert bonds == {"US10Y", "US02Y"}
+
+    def test_without_database(self) -> None:
+        """Sin base de datos no hay lotes ni filas importadas"""
+        service = DatasetIOService(None)
+        columns = DatasetIOService.rows_to_columns("daily_analyses", _daily_rows("XAUUSD", 1))
+
+        assert list(service.iter_batches("daily_analyses")) == []
+        assert service.import_columns("daily_analyses", columns) == 0
+
+
+class TestFiles:
+    """Tests de ida y vuelta por fichero"""
+
+    @pytest.mark.parametrize("fmt", DatasetIOService.FORMATS)
+    def test_round_trip(self, db: Session, fmt: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Exportar y reimportar en una base vacía reproduce las filas"""
+        db.add_all(_daily_rows("XAUUSD", 7))
+        db.commit()
+        monkeypatch.setattr(DatasetIOService, "BATCH_SIZE", 2)
+
+        streamed = b"".join(DatasetIOService(db).stream("daily_analyses", fmt, instrument="XAUUSD"))
+        db.query(DailyAnalysisModel).delete()
+        db.commit()
+
+        assert DatasetIOService(db).import_file("daily_analyses", io.BytesIO(streamed), fmt) == 7
+        restored = db.query(DailyAnalysisModel).order_by(DailyAnalysisModel.analysis_date).all()
+        assert [row.summary for row in restored] == [f"Día {day}" for day in range(7)]
+        assert restored[6].analysis_data == [{"session": "london", "range": 6}]
+
+    @pytest.mark.parametrize("fmt", DatasetIOService.FORMATS)
+    def test_candle_import_rebuilds_features(
+        self, db: Session, fmt: str, tmp_path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Importar un fichero de velas (con una vela repetida) reconstruye los indicadores de la serie"""
+        monkeypatch.setenv("CANDLE_STORE_PATH", str(tmp_path / "store"))
+        start = datetime(2025, 3, 3)
+        schema = DatasetIOService.arrow_schema("market_data")
+        sink = io.BytesIO()
+        writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else pa.ipc.new_file(sink, schema)
+        for hours in (list(range(24, 48)) + [47], list(range(0, 24))):
+            writer.write_batch(pa.RecordBatch.from_pydict({
+                "instrument": ["XAUUSD"] * len(hours),
+                "interval": ["1h"] * len(hours),
+                "timestamp": [start + timedelta(hours=hour) for hour in hours],
+                "open_price": [2000.0] * len(hours),
+                "high_price": [2004.0 + hour % 3 for hour in hours],
+                "low_price": [1997.0] * len(hours),
+                "close_price": [2001.0 + hour % 5 for hour in hours],
+                "volume": [100.0] * len(hours),
+            }, schema=schema))
+        writer.close()
+        sink.seek(0)
+
+        assert DatasetIOService(db).import_file("market_data", sink, fmt) == 48
+        features = db.query(BarFeatureModel).order_by(BarFeatureModel.timestamp).all()
+        assert [row.timestamp for row in features] == [start + timedelta(hours=hour) for hour in range(48)]
+        snapshot = db.query(IndicatorSnapshotModel).one()
+        assert snapshot.last_timestamp == start + timedelta(hours=47)
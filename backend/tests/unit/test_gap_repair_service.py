@@ -0,0 +1,202 @@
+"""
+Tests unitarios para GapScanner y GapRepairService (huecos en market_data)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.config.settings import Settings
+from app.models.gap_repair import CandleGap
+from app.models.market_analysis import PriceCandle
+from app.providers.market_data.base_market_provider import MarketDataProvider
+from app.services.gap_repair_service import GapRepairService
+from app.utils.gap_scanner import GapScanner
+from app.utils.trading_calendar import TradingCalendar
+
+
+def _hours(start: datetime, end: datetime) -> list[datetime]:
+    """Timestamps horarios con el mercado abierto entre start y end (inclusive)"""
+    grid = np.arange(np.datetime64(start, "s"), np.datetime64(end, "s") + 1, 3600).astype(np.int64)
+    return list(grid[TradingCalendar.expected_bar_mask(grid, "1h")].astype("datetime64[s]").astype(datetime))
+
+
+class FullProvider(MarketDataProvider):
+    """Proveedor que devuelve todas las velas horarias pedidas"""
+
+    def __init__(self):
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    async def fetch_historical_candles(self, instrument, start_date, end_date, interval="1h"):
+        self.calls.append((start_date, end_date))
+        return [
+            PriceCandle(timestamp=timestamp, open=1.0, high=1.0, low=1.0, close=1.0)
+            for timestamp in _hours(start_date, end_date)
+        ]
+
+
+class InMemoryMarketData:
+    """market_data en memoria con la interfaz usada por el servicio"""
+
+    def __init__(self, timestamps: list[datetime]):
+        self.timestamps = set(timestamps)
+
+    def get_timestamps(self, instrument, interval, start_date=None, end_date=None):
+        return sorted(
+            t for t in self.timestamps
+            if (start_date is None or t >= start_date) and (end_date is None or t <= end_date)
+        )
+
+    def copy_candles(self, instrument, interval, candles):
+        self.timestamps.update(candle.timestamp for candle in candles)
+        return len(candles)
+
+
+class InMemoryCheckpoints:
+    """Checkpoints en memoria con la interfaz de BackfillCheckpointRepository"""
+
+    def __init__(self):
+        self.chunks: dict[str, dict[tuple[datetime, datetime], tuple[int, datetime]]] = {}
+
+    def get_completed_chunks(self, instrument, interval, provider, empty_since=None):
+        return {
+            chunk
+            for chunk, (rows, completed_at) in self.chunks.get(provider, {}).items()
+            if empty_since is None or rows > 0 or completed_at >= empty_since
+        }
+
+    def save_checkpoint(self, instrument, interval, provider, chunk_start, chunk_end, rows):
+        self.chunks.setdefault(provider, {})[(chunk_start, chunk_end)] = (rows, datetime.now())
+
+
+def _service(timestamps: list[datetime], provider: MarketDataProvider) -> GapRepairService:
+    """Servicio con proveedor, market_data y checkpoints en memoria"""
+    service = GapRepairService(Settings(market_data_provider="mock"), provider=provider)
+    market_data, checkpoints = InMemoryMarketData(timestamps), InMemoryCheckpoints()
+    for target in (service, service.backfill_service):
+        target.market_data_repo = market_data
+        target.checkpoint_repo = checkpoints
+    return service
+
+
+class TestGapScanner:
+    """Tests del escaneo vectorizado"""
+
+    def test_weekend_is_not_a_gap(self) -> None:
+        """Una semana completa sin las horas del cierre semanal no tiene huecos"""
+        timestamps = _hours(datetime(2024, 1, 1), datetime(2024, 1, 14, 23))
+
+        assert GapScanner.find_gaps(timestamps, "1h") == []
+        assert datetime(2024, 1, 6, 12) not in timestamps
+
+    def test_missing_ranges_are_grouped(self) -> None:
+        """Horas consecutivas que faltan forman un solo hueco, también a través del fin de semana"""
+        timestamps = _hours(datetime(2024, 1, 1), datetime(2024, 1, 14, 23))
+        dropped = {datetime(2024, 1, 3, h) for h in range(5, 9)}
+        dropped |= {datetime(2024, 1, 5, 20), datetime(2024, 1, 5, 21), datetime(2024, 1, 7, 23), datetime(2024, 1, 8, 0)}
+        timestamps = [t for t in timestamps if t not in dropped]
+
+        gaps = GapScanner.find_gaps(timestamps, "1h")
+
+        assert gaps == [
+            CandleGap(start=datetime(2024, 1, 3, 5), end=datetime(2024, 1, 3, 8), missing_bars=4),
+            CandleGap(start=datetime(2024, 1, 5, 20), end=datetime(2024, 1, 8, 0), missing_bars=4),
+        ]
+
+    def test_grid_follows_stored_phase(self) -> None:
+        """Velas H4 que abren a las 02:00 se comparan con su propia rejilla"""
+        timestamps = [datetime(2024, 1, 2, 2) + timedelta(hours=4 * i) for i in range(12)]
+        del timestamps[5]
+
+        gaps = GapScanner.find_gaps(timestamps, "4h", start=datetime(2024, 1, 1, 22))
+
+        assert [(gap.start, gap.missing_bars) for gap in gaps] == [
+            (datetime(2024, 1, 1, 22), 1),
+            (datetime(2024, 1, 2, 22), 1),
+        ]
+
+    def test_invalid_interval(self) -> None:
+        """Un intervalo desconocido produce ValueError"""
+        with pytest.raises(ValueError):
+            GapScanner.find_gaps([datetime(2024, 1, 1)], "2h")
+
+
+class TestGapRepairService:
+    """Tests de la reparación dirigida"""
+
+    def test_nearby_gaps_share_a_request(self) -> None:
+        """Huecos separados por pocas velas se piden juntos; los lejanos por separado"""
+        gaps = [
+            CandleGap(start=datetime(2024, 1, 2, 1), end=datetime(2024, 1, 2, 2), missing_bars=2),
+            CandleGap(start=datetime(2024, 1, 2, 10), end=datetime(2024, 1, 2, 10), missing_bars=1),
+            CandleGap(start=datetime(2024, 1, 9, 10), end=datetime(2024, 1, 9, 11), missing_bars=2),
+        ]
+
+        assert GapRepairService.plan_requests(gaps, "1h") == [
+            (datetime(2024, 1, 2, 1), datetime(2024, 1, 2, 10)),
+            (datetime(2024, 1, 9, 10), datetime(2024, 1, 9, 11)),
+        ]
+
+    async def test_repair_fills_gaps_with_targeted_requests(self) -> None:
+        """Solo se piden los rangos que faltan y la serie queda completa"""
+        full = _hours(datetime(2024, 1, 1), datetime(2024, 1, 31, 23))
+        dropped = {datetime(2024, 1, 10, 3), datetime(2024, 1, 22, 15), datetime(2024, 1, 22, 16)}
+        provider = FullProvider()
+        service = _service([t for t in full if t not in dropped], provider)
+
+        report = await service.repair(["XAUUSD"], ["1h"], start=datetime(2024, 1, 1), end=datetime(2024, 2, 1))
+
+        series = report.series[0]
+        assert series.missing_bars == 3 and len(series.gaps) == 2
+        assert provider.calls == [
+            (datetime(2024, 1, 10, 3), datetime(2024, 1, 10, 3)),
+            (datetime(2024, 1, 22, 15), datetime(2024, 1, 22, 16)),
+        ]
+        assert series.repaired_bars == 3
+        assert service.scan_series("XAUUSD", "1h", datetime(2024, 1, 1)).gaps == []
+
+    async def test_unrecoverable_gap_is_not_requested_again(self) -> None:
+        """Un hueco que el proveedor no tiene queda registrado y no se vuelve a pedir"""
+
+        class EmptyProvider(FullProvider):
+            async def fetch_historical_candles(self, instrument, start_date, end_date, interval="1h"):
+                await super().fetch_historical_candles(instrument, start_date, end_date, interval)
+                return []
+
+        full = _hours(datetime(2024, 1, 1), datetime(2024, 1, 5, 20))
+        provider = EmptyProvider()
+        service = _service([t for t in full if t != datetime(2024, 1, 3, 12)], provider)
+
+        first = await service.repair(["XAUUSD"], ["1h"], start=datetime(2024, 1, 1), end=datetime(2024, 1, 6))
+        second = await service.repair(["XAUUSD"], ["1h"], start=datetime(2024, 1, 1), end=datetime(2024, 1, 6))
+
+        assert first.series[0].requests == 1 and first.series[0].repaired_bars == 0
+        assert second.series[0].skipped_gaps == 1 and second.series[0].requests == 0
+        assert len(provider.calls) == 1
+
+    async def test_empty_gap_is_retried_after_ttl(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Un hueco pedido sin resultado se vuelve a pedir cuando caduca su checkpoint"""
+        full = _hours(datetime(2024, 1, 1), datetime(2024, 1, 5, 20))
+        missing = datetime(2024, 1, 3, 12)
+        provider = FullProvider()
+        service = _service([t for t in full if t != missing], provider)
+        service.checkpoint_repo.save_checkpoint("XAUUSD", "1h", "mock-gaps", missing, missing, 0)
+
+        skipped = await service.repair(["XAUUSD"], ["1h"], start=datetime(2024, 1, 1), end=datetime(2024, 1, 6))
+        monkeypatch.setattr(GapRepairService, "EMPTY_RETRY_HOURS", 0)
+        retried = await service.repair(["XAUUSD"], ["1h"], start=datetime(2024, 1, 1), end=datetime(2024, 1, 6))
+
+        assert skipped.series[0].skipped_gaps == 1 and skipped.series[0].requests == 0
+        assert retried.series[0].requests == 1 and retried.series[0].repaired_bars == 1
+        assert provider.calls == [(missing, missing)]
+
+    async def test_dry_run_does_not_fetch(self) -> None:
+        """En dry run solo se listan los huecos"""
+        full = _hours(datetime(2024, 1, 1), datetime(2024, 1, 5, 20))
+        provider = FullProvider()
+        service = _service([t for t in full if t != datetime(2024, 1, 3, 12)], provider)
+
+        report = await service.repair(["XAUUSD"], ["1h"], start=datetime(2024, 1, 1), dry_run=True)
+
+        assert report.series[0].missing_bars == 1
+        assert provider.calls == []
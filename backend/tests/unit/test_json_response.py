@@ -0,0 +1,73 @@
+"""
+Tests unitarios para FastJSONResponse (serialización con orjson y modelos de confianza)
+"""
+import json
+from datetime import datetime
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from app.main import app
+from app.models.psychological_levels import (
+    LevelReaction,
+    LevelType,
+    PsychologicalLevel,
+    PsychologicalLevelsResponse,
+    ReactionType,
+    TradingSession,
+    VolatilityLevel,
+)
+from app.utils.json_response import FastJSONResponse
+
+
+def _levels_response() -> PsychologicalLevelsResponse:
+    """Respuesta de niveles construida sin validar, como la genera el servicio"""
+    reaction = LevelReaction.model_construct(
+        date="2025-03-03T14:00:00", price=2899.5, type=ReactionType.BOUNCE, session=TradingSession.NEW_YORK,
+        magnitude_points=12.4, magnitude_percentage=0.43, volatility=VolatilityLevel.HIGH, atr_value=None,
+        was_confirmed=True, candles_in_direction=3, distance_from_level=0.5, explanation="Rebote",
+    )
+    level = PsychologicalLevel.model_construct(
+        level=2900.0, distance_from_current=-10.0, distance_percent=-0.34, strength=0.4, reaction_count=1,
+        last_reaction_date="2025-03-03T14:00:00", last_reaction_type=ReactionType.BOUNCE, type=LevelType.SUPPORT,
+        bounce_count=1, break_count=0, is_round_hundred=True, is_round_fifty=False, reaction_history=[reaction],
+    )
+    return PsychologicalLevelsResponse.model_construct(
+        instrument="XAUUSD", current_price=2910.0, analysis_datetime="2025-03-04T10:00:00", levels=[level],
+        strongest_support=level, strongest_resistance=None, nearest_support=level, nearest_resistance=None,
+        summary="Soporte en 2900",
+    )
+
+
+class TestFastJSONResponse:
+    """Tests de la respuesta JSON por defecto"""
+
+    def test_constructed_model_matches_validated(self) -> None:
+        """Un modelo construido sin validar serializa igual que el validado (defaults incluidos)"""
+        constructed = _levels_response()
+        validated = PsychologicalLevelsResponse.model_validate(constructed.model_dump())
+
+        body = FastJSONResponse(constructed).body
+
+        assert body == validated.model_dump_json().encode("utf-8")
+        assert json.loads(body)["lookback_days"] == 30
+
+    def test_dict_matches_standard_encoding(self) -> None:
+        """Dicts con modelos, enums, datetimes, numpy y sets producen el mismo JSON que jsonable_encoder"""
+        content = {
+            "levels": _levels_response().levels,
+            "type": LevelType.BOTH,
+            "at": datetime(2025, 3, 4, 10, 30),
+            "closes": [1.5, 2.5],
+            "count": np.int64(3),
+            "tags": {"h4"},
+            1: "non-string key",
+        }
+
+        body = json.loads(FastJSONResponse({**content, "closes": np.array([1.5, 2.5])}).body)
+
+        assert body == json.loads(json.dumps(jsonable_encoder({**content, "count": 3})))
+
+    def test_default_response_class(self) -> None:
+        """La app usa FastJSONResponse por defecto"""
+        assert app.router.default_response_class is FastJSONResponse
@@ -0,0 +1,121 @@
+"""
+Tests unitarios para LevelConfluenceEngine (niveles psicológicos en todas las temporalidades en una pasada)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.config.settings import Settings
+from app.models.market_analysis import PriceCandle
+from app.models.psychological_levels import LevelType, ReactionType
+from app.services.psychological_levels_service import PsychologicalLevelsService
+from app.utils.candle_arrays import CandleArrays
+from app.utils.level_confluence import LevelConfluenceEngine
+
+
+def _random_candles(seed: int, count: int, step: timedelta) -> list[PriceCandle]:
+    """Velas simuladas alrededor de 2650 que cruzan varios niveles redondos"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2026, 3, 2)
+    price = 2650.0
+    candles = []
+    for i in range(count):
+        open_price = price
+        price = price + rng.normal(0, 12)
+        candles.append(PriceCandle(
+            timestamp=start + step * i,
+            open=open_price,
+            high=max(open_price, price) + abs(rng.normal(0, 5)),
+            low=min(open_price, price) - abs(rng.normal(0, 5)),
+            close=price
+        ))
+    return candles
+
+
+@pytest.fixture
+def service() -> PsychologicalLevelsService:
+    """Servicio con proveedor mock y sin base de datos"""
+    return PsychologicalLevelsService(Settings(market_data_provider="mock"))
+
+
+@pytest.fixture
+def candles_by_timeframe() -> dict[str, list[PriceCandle]]:
+    """Tres temporalidades con series independientes"""
+    return {
+        "Daily": _random_candles(1, 60, timedelta(days=1)),
+        "H4": _random_candles(2, 120, timedelta(hours=4)),
+        "H1": _random_candles(3, 200, timedelta(hours=1)),
+    }
+
+
+class TestReactionCounts:
+    """Tests del conteo vectorizado frente al análisis por nivel"""
+
+    def test_matches_scalar_level_analysis(
+        self,
+        service: PsychologicalLevelsService,
+        candles_by_timeframe: dict[str, list[PriceCandle]]
+    ) -> None:
+        """Rebotes, rupturas y última reacción coinciden con _analyze_level en cada temporalidad"""
+        levels = [2550.0, 2600.0, 2650.0, 2700.0, 2750.0]
+        series = [CandleArrays.from_candles(candles) for candles in candles_by_timeframe.values()]
+
+        counts = LevelConfluenceEngine.reaction_counts(series, np.array(levels))
+
+        for column, candles in enumerate(candles_by_timeframe.values()):
+            for row, level in enumerate(levels):
+                expected = service._analyze_level(level, 2650.0, candles)
+                assert counts["bounces"][row, column] == expected.bounce_count
+                assert counts["breaks"][row, column] == expected.break_count
+                if expected.last_reaction_date is None:
+                    assert counts["last_index"][row, column] == -1
+                else:
+                    last = candles[counts["last_index"][row, column]]
+                    assert last.timestamp.isoformat() == expected.last_reaction_date
+                    is_break = expected.last_reaction_type == ReactionType.BREAK
+                    assert counts["last_is_break"][row, column] == is_break
+
+    def test_empty_series_raises(self) -> None:
+        """Una serie vacía no puede concatenarse"""
+        empty = CandleArrays.from_candles([])
+
+        with pytest.raises(ValueError):
+            LevelConfluenceEngine.reaction_counts([empty], np.array([2600.0]))
+
+
+class TestConfluence:
+    """Tests de la puntuación combinada y la integración con el servicio"""
+
+    def test_score_weights_timeframes(self, candles_by_timeframe: dict[str, list[PriceCandle]]) -> None:
+        """La puntuación es la media de fuerzas ponderada por el peso de cada temporalidad"""
+        series = {tf: CandleArrays.from_candles(candles) for tf, candles in candles_by_timeframe.items()}
+
+        results = LevelConfluenceEngine.analyze(series, [2600.0, 2650.0], current_price=2630.0)
+
+        weights = LevelConfluenceEngine.TIMEFRAME_WEIGHTS
+        for result in results:
+            expected = sum(s.strength * weights[s.timeframe] for s in result.by_timeframe) / (3 + 2 + 1)
+            assert result.confluence_score == pytest.approx(expected, abs=0.01)
+        assert results[0].type == LevelType.SUPPORT
+        assert results[1].type == LevelType.RESISTANCE
+
+    def test_service_generates_grid_once(
+        self,
+        service: PsychologicalLevelsService,
+        candles_by_timeframe: dict[str, list[PriceCandle]]
+    ) -> None:
+        """El servicio evalúa la rejilla completa y deriva los niveles de cada temporalidad"""
+        confluence = service.analyze_confluence("XAUUSD", 2650.0, {**candles_by_timeframe, "Weekly": []})
+
+        assert confluence.timeframes == ["Daily", "H4", "H1"]
+        assert [level.level for level in confluence.levels] == [2550.0, 2600.0, 2650.0, 2700.0, 2750.0]
+
+        h4_levels = service.levels_for_timeframe(confluence, "H4", 2650.0, max_distance_points=50.0)
+        expected = [
+            service._analyze_level(level, 2650.0, candles_by_timeframe["H4"])
+            for level in (2600.0, 2650.0, 2700.0)
+        ]
+        assert [level.level for level in h4_levels] == [2600.0, 2650.0, 2700.0]
+        assert [level.strength for level in h4_levels] == [level.strength for level in expected]
+        assert [level.reaction_count for level in h4_levels] == [level.reaction_count for level in expected]
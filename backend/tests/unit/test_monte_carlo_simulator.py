@@ -0,0 +1,160 @@
+"""
+Tests unitarios para MonteCarloSimulator (probabilidades de toque/ruptura por simulación vectorizada)
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.models.market_analysis import MarketDirection
+from app.models.scenario_probability import MonteCarloSimulation, ScenarioType, SimulationMethod
+from app.utils.monte_carlo_simulator import MonteCarloSimulator
+from app.utils.multi_tf_analyzer import TimeframeConvergence
+from app.utils.scenario_probability_calculator import ScenarioProbabilityCalculator
+
+
+@pytest.fixture
+def closes() -> np.ndarray:
+    """Serie de cierres con retornos logarítmicos normales (sigma 0.2% por vela)"""
+    rng = np.random.default_rng(5)
+    return 2650.0 * np.exp(np.cumsum(rng.normal(0, 0.002, 400)))
+
+
+class TestSimulatePaths:
+    """Tests de generación de trayectorias"""
+
+    @pytest.mark.parametrize("method", [SimulationMethod.BOOTSTRAP, SimulationMethod.GBM])
+    def test_shape_and_dispersion(self, method: SimulationMethod) -> None:
+        """La dispersión del horizonte escala con la raíz del número de velas"""
+        rng = np.random.default_rng(1)
+        returns = rng.normal(0, 0.01, 1000)
+
+        log_paths = MonteCarloSimulator.simulate_paths(returns, 5000, 16, method, seed=3)
+
+        assert log_paths.shape == (5000, 16)
+        assert np.std(log_paths[:, -1]) == pytest.approx(0.01 * 4, rel=0.1)
+
+    def test_regime_ratio_scales_bootstrap(self) -> None:
+        """El régimen reescala la dispersión de los retornos remuestreados"""
+        returns = np.tile([-0.01, 0.01], 200)
+
+        calm = MonteCarloSimulator.simulate_paths(returns, 2000, 1, regime_ratio=0.5, seed=2)
+
+        assert np.abs(calm).max() == pytest.approx(0.005)
+
+
+class TestSimulate:
+    """Tests de las probabilidades por nivel"""
+
+    def test_probabilities_match_reflection_principle(self) -> None:
+        """Con GBM sin deriva, P(toque) ≈ 2·P(terminar más allá) para un nivel a 1 sigma del horizonte"""
+        # Retornos alternos ±0.2%: media 0, sigma 0.002 y régimen estable
+        closes = 2650.0 * np.exp(np.cumsum(np.tile([0.002, -0.002], 100)))
+        current = float(closes[-1])
+        horizon_sigma = 0.002 * np.sqrt(24)
+        level = current * np.exp(horizon_sigma)
+
+        result = MonteCarloSimulator.simulate(
+            closes, [level], horizon=24, paths=10000, method=SimulationMethod.GBM, seed=7
+        )
+
+        simulated = result.levels[0]
+        assert simulated.side == "above"
+        assert result.regime_ratio == pytest.approx(1.0)
+        # Trayectorias discretas: algo por debajo del continuo 2·(1 - Φ(1)) ≈ 0.317
+        assert 0.22 < simulated.touch_probability < 0.33
+        assert simulated.break_probability <= simulated.touch_probability
+        assert simulated.touch_lower < simulated.touch_probability < simulated.touch_upper
+        assert simulated.hold_probability == pytest.approx(
+            simulated.touch_probability - simulated.break_probability, abs=1e-4
+        )
+
+    def test_sides_and_range(self, closes: np.ndarray) -> None:
+        """Los niveles se clasifican por lado y el rango excluye las trayectorias que tocan alguno"""
+        current = float(closes[-1])
+        levels = [current - 60.0, current - 20.0, current + 20.0]
+
+        result = MonteCarloSimulator.simulate(closes, levels, seed=1)
+
+        assert [level.side for level in result.levels] == ["below", "below", "above"]
+        assert result.levels[0].touch_probability < result.levels[1].touch_probability
+        assert result.nearest_level("below").level == levels[1]
+        assert result.range_probability <= 1 - result.levels[2].touch_probability
+        assert result.range_lower <= result.range_probability <= result.range_upper
+
+    def test_paths_are_bounded(self, closes: np.ndarray) -> None:
+        """El número de trayectorias se acota y la simulación completa es rápida"""
+        started = time.perf_counter()
+        result = MonteCarloSimulator.simulate(closes, [2600.0, 2700.0], paths=10 ** 6, horizon=240)
+        elapsed = time.perf_counter() - started
+
+        assert result.paths == MonteCarloSimulator.MAX_PATHS
+        assert elapsed < 1.5
+
+    def test_invalid_inputs(self, closes: np.ndarray) -> None:
+        """Horizonte fuera de rango o historia insuficiente producen ValueError"""
+        with pytest.raises(ValueError):
+            MonteCarloSimulator.simulate(closes, [2600.0], horizon=0)
+        with pytest.raises(ValueError):
+            MonteCarloSimulator.simulate(closes[:10], [2600.0])
+
+    def test_wilson_interval(self) -> None:
+        """El intervalo contiene la proporción y no sale de [0, 1]"""
+        lower, upper = MonteCarloSimulator.wilson_interval(np.array([0, 50, 100]), 100)
+
+        assert lower[0] == 0.0 and upper[0] > 0.0
+        assert lower[1] < 0.5 < upper[1]
+        assert lower[2] < 1.0 and upper[2] == pytest.approx(1.0)
+
+
+class TestScenarioIntegration:
+    """Tests de la integración con ScenarioProbabilityCalculator"""
+
+    def test_simulation_shifts_rule_probabilities(self, closes: np.ndarray) -> None:
+        """Con simulación, cada escenario se desplaza hacia la probabilidad empírica"""
+        current = float(closes[-1])
+        simulation = MonteCarloSimulator.simulate(closes, [current - 15.0, current + 15.0], seed=4)
+        analysis_input = {
+            "instrument": "XAUUSD",
+            "current_price": current,
+            "weekly_analysis": {"trend": "alcista"},
+            "daily_analysis": {"trend": "alcista"},
+            "h4_analysis": {"trend": "lateral"},
+        }
+
+        without = ScenarioProbabilityCalculator.analyze_scenarios(**analysis_input)
+        with_simulation = ScenarioProbabilityCalculator.analyze_scenarios(**analysis_input, simulation=simulation)
+
+        rules = {s.scenario: s for s in [without.primary_scenario, *without.alternative_scenarios]}
+        for scenario in [with_simulation.primary_scenario, *with_simulation.alternative_scenarios]:
+            assert "simulation" in scenario.factors
+            assert "simulation" not in rules[scenario.scenario].factors
+        assert with_simulation.simulation == simulation
+        assert with_simulation.market_context["simulation_paths"] == simulation.paths
+
+    def test_breakout_factor_moves_halfway(self) -> None:
+        """El factor de simulación lleva la probabilidad a mitad de camino de la empírica"""
+        common = {
+            "direction": MarketDirection.BULLISH,
+            "weekly_trend": MarketDirection.NEUTRAL,
+            "daily_trend": MarketDirection.NEUTRAL,
+            "h4_trend": MarketDirection.NEUTRAL,
+            "level_strength": 0.0,
+            "convergence": TimeframeConvergence.DIVERGENT,
+        }
+
+        rule = ScenarioProbabilityCalculator.calculate_breakout_probability(**common)
+        blended = ScenarioProbabilityCalculator.calculate_breakout_probability(
+            **common, simulated_probability=0.1
+        )
+
+        assert rule.scenario == ScenarioType.BREAKOUT_BULLISH
+        assert blended.probability == pytest.approx((rule.probability + 0.1) / 2)
+
+    def test_simulation_round_trips_json(self, closes: np.ndarray) -> None:
+        """La simulación serializada (respuesta del análisis técnico) se reconstruye igual"""
+        simulation = MonteCarloSimulator.simulate(closes, [2600.0, 2700.0], seed=9)
+
+        restored = MonteCarloSimulation.model_validate(simulation.model_dump(mode="json"))
+
+        assert restored == simulation
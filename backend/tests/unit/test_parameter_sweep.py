@@ -0,0 +1,159 @@
+"""
+Tests unitarios para ParameterSweep (barrido de umbrales de análisis en paralelo)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.market_analysis import MarketDirection, PriceCandle, VolatilityLevel
+from app.utils.candle_arrays import CandleArrays
+from app.utils.parameter_sweep import ParameterSweep
+from app.utils.technical_analysis import TechnicalAnalysis
+from app.utils.volatility_calculator import VolatilityCalculator
+
+
+@pytest.fixture
+def series() -> CandleArrays:
+    """Treinta días de velas H1 simuladas alrededor de 2000"""
+    rng = np.random.default_rng(11)
+    count = 30 * 24
+    timestamps = np.datetime64("2025-01-06T00:00", "s") + np.arange(count) * np.timedelta64(3600, "s")
+    closes = 2000 + np.cumsum(rng.normal(0, 3, count))
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    highs = np.maximum(opens, closes) + rng.random(count) * 3
+    lows = np.minimum(opens, closes) - rng.random(count) * 3
+    return CandleArrays(timestamps, opens, highs, lows, closes)
+
+
+def _candles(closes: list[float]) -> list[PriceCandle]:
+    """Velas con máximos y mínimos a 0.5 puntos del cierre"""
+    start = datetime(2025, 1, 6)
+    return [
+        PriceCandle(timestamp=start + timedelta(hours=i), open=c, high=c + 0.5, low=c - 0.5, close=c)
+        for i, c in enumerate(closes)
+    ]
+
+
+class TestConfigurableThresholds:
+    """Tests de los umbrales expuestos en el código de análisis"""
+
+    def test_defaults_keep_previous_behaviour(self) -> None:
+        """Los valores por defecto reproducen los umbrales fijos anteriores"""
+        assert ParameterSweep.DEFAULT_PARAMETERS == {
+            "trend_threshold_percent": 0.5,
+            "impulse_strong_percent": 0.3,
+            "retest_tolerance": 5.0,
+            "volatility_extreme_ratio": 1.5,
+            "volatility_high_ratio": 1.2,
+            "volatility_normal_ratio": 0.8,
+        }
+        assert VolatilityCalculator.classify_volatility(1.3, 1.0) == VolatilityLevel.HIGH
+        assert VolatilityCalculator.classify_volatility(0.7, 1.0) == VolatilityLevel.LOW
+
+    def test_thresholds_change_classification(self) -> None:
+        """Los umbrales pasados como parámetro cambian tendencia, impulso y volatilidad"""
+        candles = _candles([2000 + i for i in range(21)])  # +1% en la ventana
+        impulse = _candles([1990.0, 2000.0, 2004.0])  # +0.2% en la última vela
+        thresholds = {VolatilityLevel.EXTREME: 2.0, VolatilityLevel.HIGH: 1.4, VolatilityLevel.NORMAL: 0.6}
+
+        assert TechnicalAnalysis.identify_trend(candles) == MarketDirection.BULLISH
+        assert TechnicalAnalysis.identify_trend(candles, threshold_percent=2.0) == MarketDirection.NEUTRAL
+        assert TechnicalAnalysis.analyze_impulse_strength(impulse)[2] is False
+        assert TechnicalAnalysis.analyze_impulse_strength(impulse, strong_percent=0.1)[2] is True
+        assert VolatilityCalculator.classify_volatility(1.3, 1.0, thresholds) == VolatilityLevel.NORMAL
+
+
+class TestExpandGrid:
+    """Tests de la expansión de la rejilla"""
+
+    def test_cartesian_product_with_defaults(self) -> None:
+        """Los parámetros omitidos toman su valor actual"""
+        combinations = ParameterSweep.expand_grid({
+            "trend_threshold_percent": [0.3, 0.5],
+            "retest_tolerance": [2, 5, 8],
+        })
+
+        assert len(combinations) == 6
+        assert {c["impulse_strong_percent"] for c in combinations} == {0.3}
+        assert combinations[0]["retest_tolerance"] == 2.0
+
+    def test_unordered_volatility_ratios_are_dropped(self) -> None:
+        """Se descartan combinaciones con alta > extrema; rejillas inválidas producen ValueError"""
+        combinations = ParameterSweep.expand_grid({"volatility_high_ratio": [1.2, 1.6]})
+
+        assert [c["volatility_high_ratio"] for c in combinations] == [1.2]
+        with pytest.raises(ValueError):
+            ParameterSweep.expand_grid({"unknown": [1.0]})
+        with pytest.raises(ValueError):
+            ParameterSweep.expand_grid({"volatility_normal_ratio": [1.8]})
+
+
+class TestRun:
+    """Tests del barrido completo"""
+
+    def test_process_pool_matches_serial(self, series: CandleArrays) -> None:
+        """Los procesos leen el bloque compartido y producen la misma tabla que la ejecución en serie"""
+        grid = {"trend_threshold_percent": [0.25, 0.5], "impulse_strong_percent": [0.1, 0.3]}
+
+        serial = ParameterSweep.run(series, grid, workers=1)
+        parallel = ParameterSweep.run(series, grid, workers=2)
+
+        assert parallel == serial
+        assert [result.rank for result in serial] == [1, 2, 3, 4]
+
+    def test_results_are_ranked_by_metric(self, series: CandleArrays) -> None:
+        """La tabla se ordena de mayor a menor por la métrica elegida"""
+        results = ParameterSweep.run(
+            series, {"retest_tolerance": [0, 2, 5, 10]}, workers=1, sort_by="retest_hit_rate"
+        )
+
+        rates = [result.retest_hit_rate for result in results]
+        assert rates == sorted(rates, reverse=True)
+        signals = {r.parameters["retest_tolerance"]: r.retest_signals for r in results}
+        assert signals[0.0] <= signals[2.0] <= signals[5.0] <= signals[10.0]
+
+    def test_signal_counts_follow_thresholds(self, series: CandleArrays) -> None:
+        """Umbrales más exigentes producen menos señales de tendencia e impulso"""
+        results = ParameterSweep.run(
+            series,
+            {"trend_threshold_percent": [0.1, 1.0], "impulse_strong_percent": [0.05, 0.3]},
+            workers=1,
+        )
+
+        by_parameters = {
+            (r.parameters["trend_threshold_percent"], r.parameters["impulse_strong_percent"]): r for r in results
+        }
+        assert by_parameters[(1.0, 0.3)].trend_signals < by_parameters[(0.1, 0.3)].trend_signals
+        assert by_parameters[(1.0, 0.3)].impulse_signals < by_parameters[(1.0, 0.05)].impulse_signals
+        for result in results:
+            assert 0.0 <= result.score <= 1.0
+
+    def test_extreme_volatility_ratio_is_scored(self, series: CandleArrays) -> None:
+        """El umbral extremo separa su propio bucket: cambiarlo cambia la tasa de acierto de volatilidad"""
+        block = ParameterSweep.prepare(series)
+        atr_ratio = block[5][np.isfinite(block[5]) & np.isfinite(block[6])]
+        high_value, *extreme_values = [float(np.quantile(atr_ratio, q)) for q in (0.6, 0.8, 0.9, 0.97)]
+
+        results = ParameterSweep.run(
+            series, {"volatility_high_ratio": [high_value], "volatility_extreme_ratio": extreme_values}, workers=1
+        )
+
+        assert len({r.volatility_hit_rate for r in results}) == len(extreme_values)
+        assert len({r.volatility_signals for r in results}) == 1
+
+    def test_prepare_marks_unvalidated_bars(self, series: CandleArrays) -> None:
+        """Las últimas velas no tienen retorno futuro y la primera no tiene impulso"""
+        block = ParameterSweep.prepare(series, forward_bars=12)
+
+        assert block.shape == (len(ParameterSweep.ROWS), len(series))
+        assert np.isnan(block[3, -12:]).all() and not np.isnan(block[3, :-12]).any()
+        assert np.isnan(block[4, 0])
+        assert block[3, 0] == pytest.approx(series.closes[12] - series.closes[0])
+
+    def test_invalid_inputs(self, series: CandleArrays) -> None:
+        """Métrica desconocida o serie demasiado corta producen ValueError"""
+        with pytest.raises(ValueError):
+            ParameterSweep.run(series, workers=1, sort_by="profit")
+        with pytest.raises(ValueError):
+            ParameterSweep.run(series.slice(0, 20), workers=1)
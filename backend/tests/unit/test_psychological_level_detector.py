@@ -1,6 +1,7 @@
 """
 Tests unitarios para psychological_level_detector
 """
+import numpy as np
 import pytest
 from datetime import datetime, timedelta
 
@@ -203,3 +204,45 @@ class TestPsychologicalLevelDetector:
         
         confirmed_breaks = [b for b in breaks if b.confirmed]
         assert len(confirmed_breaks) > 0
+
+
+class TestDetectCrossings:
+    """Tests para la detección vectorizada de cruces (niveles x cierres)"""
+    
+    def test_first_break_and_confirmation_indices(self):
+        """Cada nivel obtiene su primera vela de ruptura, dirección y confirmación"""
+        closes = np.array([4490.0, 4495.0, 4510.0, 4512.0, 4515.0, 4540.0, 4560.0])
+        levels = np.array([4500.0, 4550.0, 4600.0])
+        
+        indices, directions, confirmed = PsychologicalLevelDetector.detect_crossings(closes, levels, 5.0)
+        
+        assert indices.tolist() == [2, 6, -1]
+        assert directions.tolist() == [1, 1, 0]
+        # 4500 se confirma con las 3 velas siguientes; 4550 se rompe en la última vela
+        assert confirmed.tolist() == [True, False, False]
+    
+    def test_bearish_only_when_no_bullish(self):
+        """La ruptura bajista solo se reporta si el nivel no se rompió al alza"""
+        closes = np.array([4520.0, 4490.0, 4485.0, 4520.0])
+        levels = np.array([4500.0])
+        
+        indices, directions, _ = PsychologicalLevelDetector.detect_crossings(closes, levels, 5.0)
+        
+        assert directions.tolist() == [1]
+        assert indices.tolist() == [3]
+        
+        indices, directions, confirmed = PsychologicalLevelDetector.detect_crossings(closes[:3], levels, 5.0)
+        
+        assert directions.tolist() == [-1]
+        assert indices.tolist() == [1]
+        assert confirmed.tolist() == [True]
+    
+    def test_empty_inputs(self):
+        """Sin cierres o sin niveles no hay rupturas"""
+        indices, directions, confirmed = PsychologicalLevelDetector.detect_crossings(
+            np.array([]), np.array([4500.0]), 5.0
+        )
+        
+        assert indices.tolist() == [-1]
+        assert directions.tolist() == [0]
+        assert confirmed.tolist() == [False]
@@ -1,10 +1,12 @@
 """
 Tests unitarios para retest_detector
 """
+import numpy as np
 import pytest
 from datetime import datetime, timedelta
 
 from app.models.market_analysis import PriceCandle
+from app.utils.candle_arrays import CandleArrays
 from app.utils.retest_detector import RetestDetector, CandlePattern
 
 
@@ -250,3 +252,70 @@ class TestRetestDetector:
         )
         
         assert 0.0 <= probability_min <= 1.0
+
+
+class TestBatchPatternClassification:
+    """Tests para la clasificación vectorizada de patrones"""
+    
+    @staticmethod
+    def _random_candles(count: int) -> list[PriceCandle]:
+        """Velas aleatorias con cuerpos y mechas variados (incluye velas sin rango)"""
+        rng = np.random.default_rng(5)
+        candles = []
+        for i in range(count):
+            open_price = 2000 + rng.normal(0, 5)
+            close_price = open_price + rng.choice([0.0, rng.normal(0, 3)])
+            high = max(open_price, close_price) + rng.choice([0.0, abs(rng.normal(0, 4))])
+            low = min(open_price, close_price) - rng.choice([0.0, abs(rng.normal(0, 4))])
+            candles.append(PriceCandle(
+                timestamp=datetime(2026, 1, 5) + timedelta(hours=i),
+                open=open_price, high=high, low=low, close=close_price
+            ))
+        return candles
+    
+    def test_matches_single_candle_classifier(self):
+        """Cada vela recibe el mismo patrón que detect_candle_pattern con su vela anterior"""
+        candles = self._random_candles(500)
+        
+        codes = RetestDetector.classify_patterns(CandleArrays.from_candles(candles))
+        
+        for i, candle in enumerate(candles):
+            previous = candles[i - 1] if i > 0 else None
+            expected = RetestDetector.detect_candle_pattern(candle, previous)
+            assert RetestDetector.pattern_from_code(codes[i]) == expected
+    
+    def test_pattern_masks_are_exclusive(self):
+        """Las máscaras cubren todas las velas sin solaparse"""
+        codes = RetestDetector.classify_patterns(CandleArrays.from_candles(self._random_candles(200)))
+        
+        masks = RetestDetector.pattern_masks(codes)
+        
+        assert set(masks) == set(CandlePattern)
+        assert sum(mask.astype(int) for mask in masks.values()).tolist() == [1] * 200
+    
+    def test_cached_classification(self):
+        """La clasificación se reutiliza mientras no cambie la última vela"""
+        arrays = CandleArrays.from_candles(self._random_candles(50))
+        
+        first = RetestDetector.classify_patterns_cached("XAUUSD", "1h", arrays)
+        second = RetestDetector.classify_patterns_cached("XAUUSD", "1h", arrays)
+        extended = RetestDetector.classify_patterns_cached(
+            "XAUUSD", "1h", CandleArrays.from_candles(self._random_candles(51))
+        )
+        
+        assert first is second
+        assert extended is not first
+        assert len(extended) == 51
+    
+    def test_cached_classification_follows_forming_bar(self):
+        """Si la última vela cambia sin cambiar su timestamp, se vuelve a clasificar"""
+        candles = self._random_candles(50)
+        candles[-1] = candles[-1].model_copy(update={"open": 2000.0, "high": 2010.0, "low": 2000.0, "close": 2001.0})
+        first = RetestDetector.classify_patterns_cached("XAUUSD", "1h", CandleArrays.from_candles(candles))
+        
+        candles[-1] = candles[-1].model_copy(update={"open": 2001.0, "high": 2001.5, "low": 1990.0, "close": 2001.0})
+        updated = RetestDetector.classify_patterns_cached("XAUUSD", "1h", CandleArrays.from_candles(candles))
+        
+        assert updated is not first
+        assert RetestDetector.pattern_from_code(first[-1]) == CandlePattern.PIN_BAR_BEARISH
+        assert RetestDetector.pattern_from_code(updated[-1]) == CandlePattern.PIN_BAR_BULLISH
@@ -0,0 +1,122 @@
+"""
+Tests unitarios para RollingCorrelationEngine (correlaciones móviles multi-ventana)
+"""
+import numpy as np
+import pytest
+
+from app.models.correlation_analysis import CorrelationMode, CorrelationRegime
+from app.utils.rolling_correlation import RollingCorrelationEngine
+from app.utils.series_aligner import AlignedSeries
+
+
+@pytest.fixture
+def random_matrix() -> np.ndarray:
+    """Matriz T x N de precios simulados con correlación entre columnas"""
+    rng = np.random.default_rng(7)
+    base = rng.normal(0, 1, 300)
+    columns = [
+        2000 + np.cumsum(base + rng.normal(0, 0.5, 300)),
+        100 + np.cumsum(-0.3 * base + rng.normal(0, 1, 300)),
+        4 + np.cumsum(rng.normal(0, 0.05, 300)),
+    ]
+    return np.column_stack(columns)
+
+
+def _aligned(values: np.ndarray, symbols: list[str]) -> AlignedSeries:
+    """Crea una serie alineada diaria a partir de una matriz"""
+    timestamps = np.arange(len(values)).astype("datetime64[D]").astype("datetime64[s]")
+    return AlignedSeries(timestamps, {symbol: values[:, i] for i, symbol in enumerate(symbols)})
+
+
+class TestRollingCorrelations:
+    """Tests del cálculo vectorizado frente a np.corrcoef"""
+
+    def test_matches_corrcoef_for_every_window(self, random_matrix: np.ndarray) -> None:
+        """Cada ventana coincide con np.corrcoef sobre las últimas N filas"""
+        windows = [10, 30, 90, 250]
+        rolling = RollingCorrelationEngine.rolling_correlations(random_matrix, windows)
+
+        for window in windows:
+            for end in (window, max(window, 150), len(random_matrix)):
+                expected = np.corrcoef(random_matrix[end - window:end].T)
+                np.testing.assert_allclose(rolling[window][end - 1], expected, atol=1e-8)
+
+    def test_incomplete_windows_are_nan(self, random_matrix: np.ndarray) -> None:
+        """Las filas sin ventana completa son NaN"""
+        rolling = RollingCorrelationEngine.rolling_correlations(random_matrix[:20], [30, 10])
+
+        assert np.isnan(rolling[30]).all()
+        assert np.isnan(rolling[10][8]).all()
+        assert not np.isnan(rolling[10][9]).any()
+
+    def test_constant_column_gives_nan(self) -> None:
+        """Una columna sin varianza no produce correlación"""
+        values = np.column_stack([np.arange(20, dtype=float), np.full(20, 5.0)])
+
+        rolling = RollingCorrelationEngine.rolling_correlations(values, [10])
+
+        assert np.isnan(rolling[10][-1, 0, 1])
+        assert rolling[10][-1, 0, 0] == pytest.approx(1.0)
+
+
+class TestClassifyRegime:
+    """Tests de la clasificación de régimen"""
+
+    def test_strengthening(self) -> None:
+        """La ventana corta más fuerte que la larga indica fortalecimiento"""
+        assert RollingCorrelationEngine.classify_regime(-0.8, -0.4) == CorrelationRegime.STRENGTHENING
+
+    def test_weakening(self) -> None:
+        """La ventana corta más débil que la larga indica debilitamiento"""
+        assert RollingCorrelationEngine.classify_regime(0.1, 0.6) == CorrelationRegime.WEAKENING
+
+    def test_inverted(self) -> None:
+        """Signos opuestos con magnitud suficiente indican inversión"""
+        assert RollingCorrelationEngine.classify_regime(0.5, -0.6) == CorrelationRegime.INVERTED
+
+    def test_stable_and_missing(self) -> None:
+        """Diferencias pequeñas o valores ausentes se consideran estables"""
+        assert RollingCorrelationEngine.classify_regime(0.5, 0.45) == CorrelationRegime.STABLE
+        assert RollingCorrelationEngine.classify_regime(None, 0.5) == CorrelationRegime.STABLE
+
+
+class TestAnalyze:
+    """Tests del análisis completo"""
+
+    def test_returns_mode_matrices_and_pairs(self, random_matrix: np.ndarray) -> None:
+        """En modo retornos la matriz coincide con la correlación de retornos porcentuales"""
+        symbols = ["XAUUSD", "DXY", "US10Y"]
+        analysis = RollingCorrelationEngine.analyze(_aligned(random_matrix, symbols), [10, 90])
+
+        returns = np.diff(random_matrix, axis=0) / random_matrix[:-1] * 100
+        expected = np.corrcoef(returns[-90:].T)
+
+        assert analysis.mode == CorrelationMode.RETURNS
+        assert analysis.observations == 300
+        assert [m.window for m in analysis.matrices] == [10, 90]
+        np.testing.assert_allclose(np.array(analysis.matrices[1].matrix), expected, atol=1e-4)
+        assert [(p.symbol_a, p.symbol_b) for p in analysis.pairs] == [("XAUUSD", "DXY"), ("XAUUSD", "US10Y")]
+        assert len(analysis.pairs[0].history) == RollingCorrelationEngine.HISTORY_LENGTH
+
+    def test_levels_mode_uses_prices(self, random_matrix: np.ndarray) -> None:
+        """En modo niveles se correlacionan los precios directamente"""
+        symbols = ["XAUUSD", "DXY", "US10Y"]
+        analysis = RollingCorrelationEngine.analyze(
+            _aligned(random_matrix, symbols), [30], mode=CorrelationMode.LEVELS, primary="DXY"
+        )
+
+        expected = np.corrcoef(random_matrix[-30:].T)[1, 0]
+        assert analysis.pairs[0].symbol_a == "DXY"
+        assert analysis.pairs[0].by_window[30] == pytest.approx(expected, abs=1e-4)
+
+    def test_windows_longer_than_history_are_none(self, random_matrix: np.ndarray) -> None:
+        """Las ventanas sin datos suficientes se devuelven como None"""
+        analysis = RollingCorrelationEngine.analyze(_aligned(random_matrix[:50], ["A", "B", "C"]), [10, 250])
+
+        assert analysis.pairs[0].by_window[250] is None
+        assert analysis.pairs[0].regime == CorrelationRegime.STABLE
+
+    def test_unknown_primary_raises(self, random_matrix: np.ndarray) -> None:
+        """Un activo principal inexistente produce ValueError"""
+        with pytest.raises(ValueError):
+            RollingCorrelationEngine.analyze(_aligned(random_matrix, ["A", "B", "C"]), primary="Z")
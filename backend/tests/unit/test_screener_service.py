@@ -0,0 +1,199 @@
+"""
+Tests unitarios para ScreenerService y CandleFetchCache (screener multi-instrumento)
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config.settings import Settings
+from app.models.market_analysis import MarketDirection, PriceCandle
+from app.services.screener_service import ScreenerService
+from app.services.technical_analysis_service import TechnicalAnalysisService
+from app.utils.candle_fetch_cache import CandleFetchCache
+
+
+@pytest.fixture
+def settings() -> Settings:
+    """Configuración con proveedor mock"""
+    return Settings(market_data_provider="mock", economic_calendar_provider="mock")
+
+
+def _candles(start: datetime, hours: int) -> list[PriceCandle]:
+    """Velas horarias planas"""
+    return [
+        PriceCandle(timestamp=start + timedelta(hours=i), open=100.0, high=101.0, low=99.0, close=100.0)
+        for i in range(hours)
+    ]
+
+
+def _analysis(trend_code: int, price: float, support: float, resistance: float, impulse: str = "alcista") -> dict:
+    """Análisis multi-temporalidad mínimo con la misma tendencia en todas las ventanas"""
+    history = {"10": [trend_code] * 5, "20": [trend_code] * 5, "50": [trend_code] * 5}
+    timeframe = {"current_price": price, "trend_history": history}
+    return {
+        "daily": dict(timeframe),
+        "h4": {
+            **timeframe,
+            "support": support,
+            "resistance": resistance,
+            "swing_zones": [],
+            "impulse_strong": True,
+            "impulse_direction": impulse,
+        },
+        "h1": dict(timeframe),
+    }
+
+
+class TestCandleFetchCache:
+    """Tests de la caché de velas del escaneo"""
+
+    async def test_concurrent_requests_share_one_fetch(self) -> None:
+        """Peticiones simultáneas del mismo rango esperan una sola descarga"""
+        start = datetime(2025, 1, 6)
+        calls = []
+
+        async def fetch() -> list[PriceCandle]:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return _candles(start, 48)
+
+        cache = CandleFetchCache()
+        end = start + timedelta(hours=47)
+        first, second = await asyncio.gather(
+            cache.get("XAUUSD", "1h", start, end, fetch),
+            cache.get("XAUUSD", "1h", start, end, fetch),
+        )
+
+        assert len(calls) == 1
+        assert first == second and len(first) == 48
+        assert (cache.fetches, cache.shared) == (1, 1)
+
+    async def test_contained_range_is_sliced(self) -> None:
+        """Un rango contenido reutiliza la descarga y se recorta; otro intervalo descarga aparte"""
+        start = datetime(2025, 1, 6)
+
+        async def fetch() -> list[PriceCandle]:
+            return _candles(start, 48)
+
+        cache = CandleFetchCache()
+        await cache.get("XAUUSD", "1h", start, start + timedelta(hours=47), fetch)
+        inner = await cache.get(
+            "XAUUSD", "1h", start + timedelta(hours=10), start + timedelta(hours=19), fetch
+        )
+        await cache.get("XAUUSD", "4h", start, start + timedelta(hours=47), fetch)
+
+        assert [c.timestamp for c in inner] == [start + timedelta(hours=h) for h in range(10, 20)]
+        assert (cache.fetches, cache.shared) == (2, 1)
+
+
+class TestScoreAnalysis:
+    """Tests de la puntuación del setup"""
+
+    def test_aligned_pullback_scores_highest(self) -> None:
+        """Convergencia alcista junto al soporte puntúa más que lejos del soporte o sin convergencia"""
+        near = ScreenerService.score_analysis("XAUUSD", _analysis(1, 2000.0, 1998.0, 2050.0))
+        far = ScreenerService.score_analysis("XAUUSD", _analysis(1, 2000.0, 1900.0, 2050.0))
+        flat = ScreenerService.score_analysis("XAUUSD", _analysis(0, 2000.0, 1998.0, 2050.0))
+
+        assert near.direction == MarketDirection.BULLISH
+        assert near.level == 1998.0 and near.level_type == "support" and near.near_level
+        assert near.impulse_strong
+        assert near.score == pytest.approx(0.5 + 0.35 * (1 - 0.1) + 0.15)
+        assert near.score > far.score > flat.score
+
+    def test_bearish_setup_uses_resistance(self) -> None:
+        """En convergencia bajista el nivel de referencia es la resistencia y el impulso alcista no suma"""
+        entry = ScreenerService.score_analysis("EURUSD", _analysis(-1, 1.08, 1.07, 1.0805))
+
+        assert entry.direction == MarketDirection.BEARISH
+        assert entry.level == 1.0805 and entry.level_type == "resistance"
+        assert not entry.impulse_strong
+
+    def test_missing_data_is_ranked_last(self) -> None:
+        """Un instrumento sin datos H4 queda con error y al final de la tabla"""
+        failed = ScreenerService.score_analysis("DAX", {"h4": {"timeframe": "H4", "error": "No data available"}})
+        ok = ScreenerService.score_analysis("XAUUSD", _analysis(0, 2000.0, 1900.0, 2100.0))
+
+        ranked = ScreenerService.rank([failed, ok])
+
+        assert [entry.instrument for entry in ranked] == ["XAUUSD", "DAX"]
+        assert ranked[1].error == "No data available" and ranked[1].rank == 2
+
+
+class TestScan:
+    """Tests del escaneo completo"""
+
+    async def test_concurrency_is_bounded(self, settings: Settings) -> None:
+        """Nunca hay más análisis en curso que la concurrencia pedida"""
+        in_flight = []
+        peak = []
+
+        class SlowAnalysis(TechnicalAnalysisService):
+            async def analyze_multi_timeframe(self, instrument: str = "XAUUSD", **kwargs) -> dict:
+                in_flight.append(instrument)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.01)
+                in_flight.remove(instrument)
+                return _analysis(1, 100.0, 99.5, 110.0)
+
+        service = ScreenerService(settings, technical_analysis_service=SlowAnalysis(settings))
+        result = await service.scan(concurrency=3)
+
+        assert result.instruments == sum(len(s) for s in ScreenerService.DEFAULT_WATCHLIST.values())
+        assert max(peak) == 3
+        assert {entry.asset_class for entry in result.results} == {"metales", "forex", "indices"}
+
+    async def test_scan_with_mock_provider(self, settings: Settings) -> None:
+        """Escaneo real con el proveedor mock: resultados ordenados, H4 y H1 servidos desde una descarga H1"""
+        service = ScreenerService(settings)
+
+        result = await service.scan(instruments=["XAUUSD", "eurusd", "XAUUSD"], concurrency=2)
+
+        scores = [entry.score for entry in result.results]
+        assert scores == sorted(scores, reverse=True)
+        assert {entry.instrument for entry in result.results} == {"XAUUSD", "EURUSD"}
+        assert [entry.rank for entry in result.results] == [1, 2]
+        assert result.candle_fetches == 6
+        assert result.shared_fetches == 2
+        assert all(entry.error is None for entry in result.results)
+        assert result.results[0].asset_class in ("metales", "forex")
+
+    @pytest.mark.parametrize("shared_cache", [False, True])
+    async def test_aggregated_h4_skips_stored_indicators(
+        self, settings: Settings, monkeypatch: pytest.MonkeyPatch, shared_cache: bool
+    ) -> None:
+        """En un escaneo H4 se agrega desde H1 y no se buscan sus indicadores en bar_features ni en el snapshot"""
+        lookups = []
+        monkeypatch.setattr(
+            TechnicalAnalysisService, "_get_stored_features",
+            lambda self, instrument, timeframe, last_candle_time: lookups.append(("features", timeframe)),
+        )
+        monkeypatch.setattr(
+            TechnicalAnalysisService, "_get_live_emas",
+            lambda self, instrument, timeframe, last_candle_time: lookups.append(("emas", timeframe)),
+        )
+        service = TechnicalAnalysisService(settings)
+
+        await service.analyze_multi_timeframe(
+            "XAUUSD", as_of=datetime(2025, 3, 7, 12), candle_cache=CandleFetchCache() if shared_cache else None
+        )
+
+        assert (("features", "H4") in lookups) is not shared_cache
+        assert (("emas", "H4") in lookups) is not shared_cache
+        assert ("features", "H1") in lookups and ("emas", "H1") in lookups
+
+    async def test_invalid_parameters(self, settings: Settings) -> None:
+        """Concurrencia fuera de rango o instrumento inválido producen ValueError"""
+        service = ScreenerService(settings)
+
+        with pytest.raises(ValueError):
+            await service.scan(concurrency=ScreenerService.MAX_CONCURRENCY + 1)
+        with pytest.raises(ValueError):
+            await service.scan(instruments=["XA$"])
+
+    def test_configured_watchlist(self) -> None:
+        """La watchlist de la configuración sustituye a la de por defecto"""
+        service = ScreenerService(Settings(market_data_provider="mock", screener_watchlist="xauusd, spx"))
+
+        assert service.default_watchlist() == {"XAUUSD": None, "SPX": None}
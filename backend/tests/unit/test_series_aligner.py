@@ -0,0 +1,94 @@
+"""
+Tests unitarios para SeriesAligner (join por timestamp multi-activo)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.market_analysis import PriceCandle
+from app.utils.correlation_calculator import CorrelationCalculator
+from app.utils.series_aligner import SeriesAligner
+
+
+def _daily_candles(start: datetime, closes: list[float], skip: tuple[int, ...] = (), hour: int = 0) -> list[PriceCandle]:
+    """Crea velas diarias omitiendo los índices indicados (p. ej. festivos)"""
+    return [
+        PriceCandle(
+            timestamp=start + timedelta(days=i, hours=hour),
+            open=close,
+            high=close + 1,
+            low=close - 1,
+            close=close
+        )
+        for i, close in enumerate(closes)
+        if i not in skip
+    ]
+
+
+class TestSeriesAligner:
+    """Tests para los modos de join"""
+
+    def test_inner_join_drops_days_missing_in_any_series(self) -> None:
+        """Un festivo omitido en una serie no desplaza el emparejamiento"""
+        start = datetime(2026, 1, 1)
+        gold = _daily_candles(start, [2000.0 + i for i in range(10)])
+        dxy = _daily_candles(start, [100.0 - i for i in range(10)], skip=(3,))
+
+        aligned = SeriesAligner.align({"XAUUSD": gold, "DXY": dxy}, how="inner")
+
+        assert len(aligned) == 9
+        assert np.datetime64("2026-01-04") not in aligned.timestamps
+        # Cada par corresponde al mismo día: gold = 2000 + i, dxy = 100 - i
+        assert np.allclose(aligned.column("XAUUSD") - 2000.0, 100.0 - aligned.column("DXY"))
+
+    def test_daily_resolution_ignores_time_of_day(self) -> None:
+        """Con resolución diaria se unen velas del mismo día con horas distintas"""
+        start = datetime(2026, 1, 1)
+        gold = _daily_candles(start, [1.0, 2.0, 3.0], hour=22)
+        dxy = _daily_candles(start, [4.0, 5.0, 6.0], hour=0)
+
+        assert len(SeriesAligner.align({"A": gold, "B": dxy}, how="inner")) == 3
+        assert len(SeriesAligner.align({"A": gold, "B": dxy}, how="inner", resolution=None)) == 0
+
+    def test_asof_join_forward_fills_from_reference_axis(self) -> None:
+        """El join as-of usa el último valor conocido del otro activo"""
+        start = datetime(2026, 1, 1)
+        gold = _daily_candles(start, [10.0, 11.0, 12.0, 13.0])
+        dxy = _daily_candles(start, [1.0, 2.0, 3.0, 4.0], skip=(2,))
+
+        aligned = SeriesAligner.align({"XAUUSD": gold, "DXY": dxy}, how="asof")
+
+        assert len(aligned) == 4
+        assert aligned.column("DXY").tolist() == [1.0, 2.0, 2.0, 4.0]
+
+    def test_max_staleness_discards_old_values(self) -> None:
+        """Los valores más antiguos que max_staleness no se rellenan"""
+        start = datetime(2026, 1, 1)
+        gold = _daily_candles(start, [10.0, 11.0, 12.0, 13.0, 14.0])
+        dxy = _daily_candles(start, [1.0, 2.0, 3.0, 4.0, 5.0], skip=(2, 3))
+
+        aligned = SeriesAligner.align(
+            {"XAUUSD": gold, "DXY": dxy},
+            how="outer",
+            max_staleness=timedelta(days=1)
+        )
+
+        assert aligned.column("XAUUSD").tolist() == [10.0, 11.0, 12.0, 14.0]
+        assert aligned.column("DXY").tolist() == [1.0, 2.0, 2.0, 5.0]
+
+    def test_invalid_mode_raises(self) -> None:
+        """Un modo de join desconocido lanza ValueError"""
+        with pytest.raises(ValueError):
+            SeriesAligner.align({"A": []}, how="left")
+
+    def test_feeds_correlation_calculator(self) -> None:
+        """La serie alineada alimenta directamente a CorrelationCalculator"""
+        start = datetime(2026, 1, 1)
+        gold = _daily_candles(start, [2000.0 + i * 5 for i in range(40)])
+        dxy = _daily_candles(start, [100.0 - i * 0.2 for i in range(40)], skip=(5, 17))
+
+        aligned = SeriesAligner.align({"XAUUSD": gold, "DXY": dxy})
+        result = CorrelationCalculator.calculate_aligned_correlation(aligned, "XAUUSD", "DXY", window=30)
+
+        assert result.coefficient == pytest.approx(-1.0)
@@ -0,0 +1,111 @@
+"""
+Tests unitarios para el etiquetado vectorizado de sesiones y el cubo de estadísticas por sesión
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.market_analysis import PriceCandle, SessionType
+from app.utils.candle_arrays import CandleArrays
+from app.utils.session_statistics import SessionStatistics
+from app.utils.trading_sessions import TradingSessions
+
+
+def _hourly_candles(start: datetime, days: int) -> list[PriceCandle]:
+    """Velas horarias con precio creciente y rango de 2 puntos"""
+    candles = []
+    for i in range(days * 24):
+        price = 2000.0 + i
+        candles.append(PriceCandle(
+            timestamp=start + timedelta(hours=i),
+            open=price,
+            high=price + 1,
+            low=price - 1,
+            close=price + 0.5
+        ))
+    return candles
+
+
+class TestLabelSessions:
+    """Tests del kernel de etiquetado"""
+
+    def test_matches_scalar_lookup_for_every_hour(self) -> None:
+        """El etiquetado vectorizado coincide con get_session_for_time en las 24 horas"""
+        start = datetime(2026, 3, 2)
+        timestamps = [start + timedelta(hours=h, minutes=30) for h in range(48)]
+
+        codes = TradingSessions.label_sessions(np.array(timestamps, dtype="datetime64[s]"))
+
+        for timestamp, code in zip(timestamps, codes.tolist()):
+            assert TradingSessions.session_from_code(code) == TradingSessions.get_session_for_time(timestamp)
+
+    def test_extended_schedule_covers_whole_day(self) -> None:
+        """Las ventanas extendidas asignan sesión a todas las horas"""
+        timestamps = np.arange(24).astype("datetime64[h]").astype("datetime64[s]")
+
+        codes = TradingSessions.label_sessions(timestamps, extended=True)
+
+        assert (codes != TradingSessions.NO_SESSION).all()
+        assert TradingSessions.session_from_code(codes[23]) == SessionType.ASIA
+        assert TradingSessions.session_from_code(codes[8]) == SessionType.LONDON
+        assert TradingSessions.session_from_code(codes[13]) == SessionType.NEW_YORK
+
+
+class TestSessionCube:
+    """Tests del cubo día x sesión"""
+
+    @pytest.fixture
+    def arrays(self) -> CandleArrays:
+        """Cinco días de velas horarias"""
+        return CandleArrays.from_candles(_hourly_candles(datetime(2026, 3, 2), 5))
+
+    def test_cube_shape_and_session_values(self, arrays: CandleArrays) -> None:
+        """Cada celda resume las velas de su sesión"""
+        cube = SessionStatistics.build_cube(arrays)
+
+        assert cube.field("range").shape == (5, 3)
+        # Asia día 1: velas 00-05 -> apertura 2000, cierre 2005.5, máximo 2006, mínimo 1999
+        assert cube.field("open")[0, 0] == 2000.0
+        assert cube.field("close")[0, 0] == 2005.5
+        assert cube.field("range")[0, 0] == pytest.approx(7.0)
+        assert cube.field("bars")[0, 0] == 6
+        assert cube.field("bars")[0, 2] == 9
+        assert cube.field("direction")[0, 0] == 1
+
+    def test_breaks_use_previous_day(self, arrays: CandleArrays) -> None:
+        """El primer día no tiene rupturas definidas y en tendencia alcista todas rompen el máximo anterior"""
+        cube = SessionStatistics.build_cube(arrays)
+
+        assert np.isnan(cube.field("broke_high")[0]).all()
+        assert cube.field("broke_high")[1].tolist() == [1.0, 1.0, 1.0]
+        assert cube.field("broke_low")[1].tolist() == [0.0, 0.0, 0.0]
+
+    def test_trim_keeps_previous_day_context(self, arrays: CandleArrays) -> None:
+        """Al recortar a N días el primer día conservado mantiene sus rupturas"""
+        cube = SessionStatistics.build_cube(arrays, days=2)
+
+        assert len(cube) == 2
+        assert str(cube.dates[0]) == "2026-03-05"
+        assert not np.isnan(cube.field("broke_high")[0]).any()
+
+    def test_missing_session_is_nan(self) -> None:
+        """Un día sin velas en una sesión deja NaN en esa celda"""
+        candles = [c for c in _hourly_candles(datetime(2026, 3, 2), 2) if c.timestamp.hour < 12]
+
+        cube = SessionStatistics.build_cube(CandleArrays.from_candles(candles))
+
+        assert np.isnan(cube.field("range")[:, 2]).all()
+        assert not np.isnan(cube.field("range")[:, 0]).any()
+
+    def test_baselines(self, arrays: CandleArrays) -> None:
+        """Las estadísticas de referencia agregan todos los días de cada sesión"""
+        baselines = SessionStatistics.baselines(SessionStatistics.build_cube(arrays))
+
+        assert [b.session for b in baselines] == [SessionType.ASIA, SessionType.LONDON, SessionType.NEW_YORK]
+        new_york = baselines[2]
+        assert new_york.days == 5
+        assert new_york.average_range == pytest.approx(10.0)
+        assert new_york.bullish_days == 5
+        assert new_york.broke_previous_high_count == 4
+        assert new_york.last_range_percentile == 100.0
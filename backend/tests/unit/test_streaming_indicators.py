@@ -0,0 +1,131 @@
+"""
+Tests unitarios para indicadores incrementales (streaming)
+"""
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.market_analysis import PriceCandle
+from app.utils.streaming_indicators import (
+    IndicatorSet,
+    RollingHighLow,
+    StreamingATR,
+    StreamingEMA,
+    StreamingRSI,
+)
+from app.utils.technical_analysis import TechnicalAnalysis
+
+
+@pytest.fixture
+def candles() -> list[PriceCandle]:
+    """Serie sintética de 300 velas"""
+    rng = np.random.default_rng(7)
+    start = datetime(2026, 2, 2, 0, 0)
+    price = 2000.0
+    result = []
+    for i in range(300):
+        open_price = price
+        price = price + rng.normal(0.0, 5.0)
+        result.append(PriceCandle(
+            timestamp=start + timedelta(hours=i),
+            open=open_price,
+            high=max(open_price, price) + abs(rng.normal(0, 2.0)),
+            low=min(open_price, price) - abs(rng.normal(0, 2.0)),
+            close=price
+        ))
+    return result
+
+
+def _wilder_rsi_reference(closes: list[float], period: int = 14) -> float:
+    """RSI de Wilder calculado recorriendo toda la serie"""
+    changes = np.diff(closes)
+    gains = np.clip(changes, 0, None)
+    losses = np.clip(-changes, 0, None)
+    avg_gain = gains[:period].mean()
+    avg_loss = losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+class TestStreamingIndicators:
+    """Tests para los indicadores individuales"""
+
+    def test_ema_matches_calculate_ema(self, candles: list[PriceCandle]) -> None:
+        """La EMA incremental coincide con TechnicalAnalysis.calculate_ema"""
+        ema = StreamingEMA(50)
+        for candle in candles:
+            ema.update(candle.close)
+
+        assert ema.value == pytest.approx(TechnicalAnalysis.calculate_ema(candles, 50), abs=0.01)
+
+    def test_ema_not_ready_before_period(self) -> None:
+        """La EMA es None hasta completar el período"""
+        ema = StreamingEMA(3)
+        assert ema.update(1.0) is None
+        assert ema.update(2.0) is None
+        assert ema.update(3.0) == pytest.approx(2.0)
+
+    def test_rsi_matches_wilder_reference(self, candles: list[PriceCandle]) -> None:
+        """El RSI incremental coincide con la definición de Wilder"""
+        rsi = StreamingRSI(14)
+        for candle in candles:
+            rsi.update(candle.close)
+
+        expected = _wilder_rsi_reference([c.close for c in candles])
+        assert rsi.value == pytest.approx(expected, rel=1e-9)
+
+    def test_rsi_only_gains(self) -> None:
+        """Sin pérdidas el RSI es 100"""
+        rsi = StreamingRSI(3)
+        for close in (1.0, 2.0, 3.0, 4.0):
+            rsi.update(close)
+        assert rsi.value == 100.0
+
+    def test_atr_wilder_smoothing(self) -> None:
+        """El ATR usa promedio simple para la semilla y Wilder después"""
+        atr = StreamingATR(2)
+        atr.update(high=10.0, low=8.0, close=9.0)    # TR = 2
+        assert atr.update(high=12.0, low=9.0, close=11.0) == pytest.approx(2.5)  # TR = 3
+        assert atr.update(high=12.0, low=11.0, close=11.5) == pytest.approx(1.75)  # TR = 1
+
+    def test_rolling_high_low_matches_brute_force(self, candles: list[PriceCandle]) -> None:
+        """El máximo/mínimo móvil coincide con el cálculo directo de la ventana"""
+        rolling = RollingHighLow(20)
+        for i, candle in enumerate(candles):
+            highest, lowest = rolling.update(candle.high, candle.low)
+            window = candles[max(0, i - 19): i + 1]
+            assert highest == max(c.high for c in window)
+            assert lowest == min(c.low for c in window)
+
+
+class TestIndicatorSet:
+    """Tests para snapshot/restore del conjunto de indicadores"""
+
+    def test_snapshot_restore_continues_identically(self, candles: list[PriceCandle]) -> None:
+        """Restaurar un snapshot y continuar da el mismo resultado que no interrumpir"""
+        uninterrupted = IndicatorSet()
+        for candle in candles:
+            uninterrupted.update(candle.timestamp, candle.high, candle.low, candle.close)
+
+        partial = IndicatorSet()
+        for candle in candles[:250]:
+            partial.update(candle.timestamp, candle.high, candle.low, candle.close)
+        snapshot = json.loads(json.dumps(partial.snapshot()))
+
+        restored = IndicatorSet.restore(snapshot)
+        for candle in candles[250:]:
+            restored.update(candle.timestamp, candle.high, candle.low, candle.close)
+
+        assert restored.values() == uninterrupted.values()
+
+    def test_rejects_out_of_order_candles(self, candles: list[PriceCandle]) -> None:
+        """No se aceptan velas anteriores o iguales a la última procesada"""
+        indicators = IndicatorSet()
+        indicators.update(candles[1].timestamp, candles[1].high, candles[1].low, candles[1].close)
+
+        with pytest.raises(ValueError):
+            indicators.update(candles[0].timestamp, candles[0].high, candles[0].low, candles[0].close)
@@ -0,0 +1,176 @@
+"""
+Tests unitarios para SwingDetector (swings con cola monótona y zonas por barrido ordenado)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.market_analysis import PriceCandle
+from app.utils.candle_arrays import CandleArrays
+from app.utils.multi_tf_analyzer import MultiTimeframeAnalyzer
+from app.utils.swing_detector import SwingDetector
+from app.utils.technical_analysis import TechnicalAnalysis
+
+
+@pytest.fixture
+def random_walk() -> CandleArrays:
+    """Serie horaria simulada de 2000 velas"""
+    rng = np.random.default_rng(11)
+    closes = 2000 + np.cumsum(rng.normal(0, 2, 2000))
+    highs = closes + rng.random(2000) * 3
+    lows = closes - rng.random(2000) * 3
+    timestamps = np.arange(2000).astype("datetime64[h]").astype("datetime64[s]")
+    return CandleArrays(timestamps, closes, highs, lows, closes)
+
+
+def _naive_swings(highs: np.ndarray, lows: np.ndarray, width: int) -> tuple[list[int], list[int]]:
+    """Referencia O(n·w): compara cada vela con sus vecinas"""
+    swing_highs, swing_lows = [], []
+    for i in range(width, len(highs) - width):
+        neighbours = np.r_[i - width:i, i + 1:i + width + 1]
+        if (highs[i] > highs[neighbours]).all():
+            swing_highs.append(i)
+        if (lows[i] < lows[neighbours]).all():
+            swing_lows.append(i)
+    return swing_highs, swing_lows
+
+
+class TestSlidingExtremes:
+    """Tests de máximos y mínimos deslizantes"""
+
+    def test_matches_naive_window(self, random_walk: CandleArrays) -> None:
+        """Coinciden con max/min sobre la ventana explícita (parcial al inicio)"""
+        for window in (1, 3, 10):
+            result_max = SwingDetector.sliding_max(random_walk.highs, window)
+            result_min = SwingDetector.sliding_min(random_walk.lows, window)
+            for i in (0, 1, window, 500, len(random_walk) - 1):
+                start = max(0, i - window + 1)
+                assert result_max[i] == random_walk.highs[start:i + 1].max()
+                assert result_min[i] == random_walk.lows[start:i + 1].min()
+
+
+class TestFindSwings:
+    """Tests de detección de swings"""
+
+    @pytest.mark.parametrize("width", [1, 2, 5])
+    def test_matches_naive_fractals(self, random_walk: CandleArrays, width: int) -> None:
+        """Los swings coinciden con la comparación directa con las vecinas"""
+        highs, lows = SwingDetector.find_swings(random_walk.highs, random_walk.lows, width)
+        expected_highs, expected_lows = _naive_swings(random_walk.highs, random_walk.lows, width)
+
+        assert highs.tolist() == expected_highs
+        assert lows.tolist() == expected_lows
+
+    def test_plateau_is_not_a_swing(self) -> None:
+        """Dos máximos iguales consecutivos no son swings estrictos"""
+        highs = np.array([1.0, 3.0, 3.0, 1.0, 2.0, 1.0])
+
+        swing_highs, _ = SwingDetector.find_swings(highs, highs - 1, width=1)
+
+        assert swing_highs.tolist() == [4]
+
+    def test_short_series_and_invalid_width(self) -> None:
+        """Series más cortas que la ventana no tienen swings y width < 1 es inválido"""
+        highs, lows = SwingDetector.find_swings(np.array([1.0, 2.0]), np.array([0.0, 1.0]), width=1)
+        assert len(highs) == 0 and len(lows) == 0
+
+        with pytest.raises(ValueError):
+            SwingDetector.find_swings(np.array([1.0]), np.array([1.0]), width=0)
+
+
+class TestClusterZones:
+    """Tests de agrupación de swings en zonas"""
+
+    def test_sort_and_sweep(self) -> None:
+        """Precios cercanos se agrupan y la zona no se encadena más allá de la tolerancia"""
+        zones = SwingDetector.cluster_zones(
+            prices=np.array([2001.0, 1950.0, 2000.0, 2002.5, 2004.0, 1951.0]),
+            indices=np.array([10, 20, 30, 40, 50, 60]),
+            is_high=np.array([True, False, True, True, False, False]),
+            tolerance=3.0,
+            last_index=60,
+        )
+
+        bounds = sorted((zone["lower"], zone["upper"], zone["touches"]) for zone in zones)
+        assert bounds == [(1950.0, 1951.0, 2), (2000.0, 2002.5, 3), (2004.0, 2004.0, 1)]
+
+    def test_recency_weights(self) -> None:
+        """Un toque reciente pesa más y el centro se desplaza hacia él"""
+        zones = SwingDetector.cluster_zones(
+            prices=np.array([100.0, 102.0]),
+            indices=np.array([0, 100]),
+            is_high=np.array([True, False]),
+            tolerance=5.0,
+            last_index=100,
+            half_life=50,
+        )
+
+        assert len(zones) == 1
+        assert zones[0]["weight"] == pytest.approx(1.25)
+        assert zones[0]["level"] == pytest.approx((100.0 * 0.25 + 102.0) / 1.25, abs=0.01)
+        assert zones[0]["swing_highs"] == 1 and zones[0]["swing_lows"] == 1
+        assert zones[0]["last_index"] == 100
+
+
+class TestDetectZones:
+    """Tests de la detección completa sobre CandleArrays"""
+
+    def test_zones_sorted_by_weight(self, random_walk: CandleArrays) -> None:
+        """Las zonas vienen ordenadas por peso y todos los swings quedan asignados"""
+        zones = SwingDetector.detect_zones(random_walk, width=3)
+        highs, lows = SwingDetector.find_swings(random_walk.highs, random_walk.lows, 3)
+
+        weights = [zone.weight for zone in zones]
+        assert weights == sorted(weights, reverse=True)
+        assert sum(zone.touches for zone in zones) == len(highs) + len(lows)
+        assert all(zone.lower <= zone.level <= zone.upper for zone in zones)
+
+    def test_zone_containing(self, random_walk: CandleArrays) -> None:
+        """Se devuelve la zona de mayor peso que contiene el precio"""
+        zones = SwingDetector.detect_zones(random_walk, min_touches=2)
+        best = zones[0]
+
+        assert SwingDetector.zone_containing(zones, best.level) == best
+        assert SwingDetector.zone_containing(zones, 0.0) is None
+
+
+class TestSharedConsumers:
+    """Tests de los consumidores del detector"""
+
+    def test_support_resistance_with_wider_swings(self) -> None:
+        """Con swings más anchos se ignoran los extremos menores"""
+        start = datetime(2026, 3, 2)
+        highs = [10, 12, 11, 20, 11, 13, 11, 12, 10, 11, 10, 12]
+        candles = [
+            PriceCandle(timestamp=start + timedelta(hours=i), open=h - 1, high=h, low=h - 2, close=h - 1)
+            for i, h in enumerate(highs)
+        ]
+
+        _, narrow = TechnicalAnalysis.find_support_resistance(candles)
+        _, wide = TechnicalAnalysis.find_support_resistance(candles, swing_width=2)
+
+        assert narrow == pytest.approx((20 + 13 + 12) / 3, abs=0.01)
+        assert wide == 20.0
+
+    def test_hot_zones_only_scan_lookback_window(self) -> None:
+        """Las reacciones anteriores a la ventana no se evalúan"""
+        now = datetime.now()
+        pattern = [
+            (2010.0, 2012.0, 1995.0, 2011.0),  # rebote (mínimo menor, vela alcista)
+            (2011.0, 2020.0, 2008.0, 2018.0),
+            (2018.0, 2019.0, 2000.0, 2001.0),
+        ]
+        candles = [
+            PriceCandle(
+                timestamp=now - timedelta(minutes=15 * (12 - i)),
+                open=o, high=h, low=l, close=c
+            )
+            for i, (o, h, l, c) in enumerate([(2005.0, 2010.0, 2000.0, 2008.0)] + pattern * 3)
+        ]
+
+        all_zones = MultiTimeframeAnalyzer.detect_hot_zones(candles, "M15", lookback_minutes=600)
+        recent_zones = MultiTimeframeAnalyzer.detect_hot_zones(candles, "M15", lookback_minutes=100)
+
+        assert [zone.reaction_type for zone in all_zones] == ["bounce"] * 3
+        assert [zone.timestamp for zone in recent_zones] == [candles[7].timestamp]
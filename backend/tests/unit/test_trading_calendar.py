@@ -0,0 +1,112 @@
+"""
+Tests unitarios para TradingCalendar (horario, festivos y frescura de velas)
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.utils.trading_calendar import TradingCalendar
+
+
+class TestHolidays:
+    """Tests de festivos de cierre completo"""
+
+    def test_easter_based_good_friday(self) -> None:
+        """El Viernes Santo se calcula a partir de la Pascua"""
+        assert TradingCalendar.easter_sunday(2024) == date(2024, 3, 31)
+        assert TradingCalendar.easter_sunday(2025) == date(2025, 4, 20)
+        assert TradingCalendar.is_holiday(date(2024, 3, 29))
+        assert not TradingCalendar.is_trading_day(date(2025, 4, 18))
+
+    def test_weekend_holidays_are_observed(self) -> None:
+        """Navidad en domingo se observa el lunes; Año Nuevo en sábado no cierra el viernes"""
+        assert TradingCalendar.is_holiday(date(2022, 12, 26))
+        assert not TradingCalendar.is_holiday(date(2021, 12, 31))
+        assert TradingCalendar.is_holiday(date(2021, 12, 24))
+        assert TradingCalendar.is_trading_day(date(2024, 7, 4))
+
+
+class TestMarketHours:
+    """Tests del horario de sesión (UTC, con horario de verano de Nueva York)"""
+
+    @pytest.mark.parametrize("moment, is_open", [
+        (datetime(2024, 1, 5, 21, 30), True),    # viernes 16:30 ET (invierno)
+        (datetime(2024, 1, 5, 22, 30), False),   # viernes 17:30 ET: cierre semanal
+        (datetime(2024, 1, 7, 22, 30), False),   # domingo 17:30 ET
+        (datetime(2024, 1, 7, 23, 0), True),     # domingo 18:00 ET: apertura
+        (datetime(2024, 1, 9, 22, 15), False),   # martes: pausa diaria 17:00-18:00 ET
+        (datetime(2024, 7, 9, 21, 15), False),   # martes de verano: la pausa es una hora antes en UTC
+        (datetime(2024, 7, 9, 22, 15), True),
+        (datetime(2024, 3, 28, 23, 0), False),   # jueves noche: sesión del Viernes Santo
+    ])
+    def test_is_market_open(self, moment: datetime, is_open: bool) -> None:
+        """Apertura y cierre según el horario de CME"""
+        assert TradingCalendar.is_market_open(moment) is is_open
+
+
+class TestHasExpectedBars:
+    """Tests de velas esperadas en un rango"""
+
+    def test_closed_ranges_expect_no_bars(self) -> None:
+        """Sábado completo o Navidad no esperan velas; un rango con sesión sí"""
+        assert not TradingCalendar.has_expected_bars(datetime(2024, 1, 6), datetime(2024, 1, 6, 23), "1h")
+        assert not TradingCalendar.has_expected_bars(datetime(2024, 12, 25), datetime(2024, 12, 25), "1d")
+        assert TradingCalendar.has_expected_bars(datetime(2024, 1, 6), datetime(2024, 1, 8), "1h")
+        assert TradingCalendar.has_expected_bars(datetime(2024, 1, 3, 5), datetime(2024, 1, 3, 5), "4h")
+
+
+class TestExpectedLatestBar:
+    """Tests de la última vela cerrada esperada"""
+
+    def test_weekend_expects_friday_bars(self) -> None:
+        """Durante el fin de semana la última vela esperada es la del cierre del viernes"""
+        saturday = datetime(2024, 1, 6, 12)
+
+        assert TradingCalendar.expected_latest_bar("1h", saturday) == datetime(2024, 1, 5, 21)
+        assert TradingCalendar.expected_latest_bar("4h", saturday) == datetime(2024, 1, 5, 20)
+        assert TradingCalendar.expected_latest_bar("1d", saturday) == datetime(2024, 1, 5)
+        assert TradingCalendar.expected_latest_bar("1w", saturday) == datetime(2024, 1, 1)
+
+    def test_intraday_during_session(self) -> None:
+        """En plena sesión se espera la vela anterior a la actual"""
+        monday = datetime(2024, 1, 8, 10, 30)
+
+        assert TradingCalendar.expected_latest_bar("1h", monday) == datetime(2024, 1, 8, 9)
+        assert TradingCalendar.expected_latest_bar("1d", monday) == datetime(2024, 1, 5)
+
+    def test_holiday_week(self) -> None:
+        """Con el Viernes Santo la semana se completa el jueves"""
+        good_friday = datetime(2024, 3, 29, 12)
+
+        assert TradingCalendar.expected_latest_bar("1d", good_friday) == datetime(2024, 3, 28)
+        assert TradingCalendar.expected_latest_bar("1w", good_friday) == datetime(2024, 3, 25)
+
+
+class TestIsFresh:
+    """Tests del criterio de frescura usado por la caché de velas"""
+
+    def test_weekend_data_is_fresh(self) -> None:
+        """Con la vela del viernes guardada no se refresca en todo el fin de semana"""
+        for hour in range(0, 48, 6):
+            now = datetime(2024, 1, 6) + timedelta(hours=hour)
+            assert TradingCalendar.is_fresh(datetime(2024, 1, 5, 21), "1h", now)
+
+    def test_missing_closed_bar_is_stale(self) -> None:
+        """Si falta una vela cerrada la serie no está al día"""
+        assert not TradingCalendar.is_fresh(datetime(2024, 1, 8, 8), "1h", datetime(2024, 1, 8, 10, 30))
+        assert not TradingCalendar.is_fresh(datetime(2024, 1, 4), "1d", datetime(2024, 1, 6, 12))
+
+    def test_provider_grid_phase_is_accepted(self) -> None:
+        """Velas H4 con otra fase (02:00, 06:00...) cuentan como al día"""
+        assert TradingCalendar.is_fresh(datetime(2024, 1, 8, 6), "4h", datetime(2024, 1, 8, 10, 30))
+        assert not TradingCalendar.is_fresh(datetime(2024, 1, 8, 2), "4h", datetime(2024, 1, 8, 12, 30))
+
+
+class TestIsClosed:
+    """Tests del cierre de una vela"""
+
+    def test_bar_closes_after_its_interval(self) -> None:
+        """La vela cierra al completar su intervalo, con cualquier fase de la rejilla"""
+        assert not TradingCalendar.is_closed(datetime(2024, 1, 8, 6), "4h", datetime(2024, 1, 8, 9, 59))
+        assert TradingCalendar.is_closed(datetime(2024, 1, 8, 6), "4h", datetime(2024, 1, 8, 10))
+        assert not TradingCalendar.is_closed(datetime(2024, 1, 8), "1w", datetime(2024, 1, 12, 23))
@@ -0,0 +1,111 @@
+"""
+Tests unitarios para VolatilityDistribution (clasificación de volatilidad por percentil)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.market_analysis import PriceCandle, VolatilityLevel
+from app.models.psychological_levels import VolatilityLevel as ReactionVolatilityLevel
+from app.utils.reaction_history_builder import ReactionHistoryBuilder
+from app.utils.volatility_calculator import VolatilityCalculator
+from app.utils.volatility_distribution import VolatilityDistribution
+
+
+@pytest.fixture
+def distribution() -> VolatilityDistribution:
+    """Distribución con ATR y rango de 1 a 100"""
+    result = VolatilityDistribution()
+    result.extend("atr", range(100, 0, -1))
+    result.extend("range", range(100, 0, -1))
+    return result
+
+
+class TestVolatilityDistribution:
+    """Tests de construcción, actualización y consulta"""
+
+    def test_values_are_kept_sorted(self) -> None:
+        """Lotes pequeños y grandes mantienen el orden"""
+        result = VolatilityDistribution()
+        result.extend("atr", [5.0, 1.0, 3.0])
+        result.extend("atr", [float(v) for v in range(100, 0, -1)])
+        result.add("atr", 2.5)
+
+        assert len(result) == 104
+        assert [result.percentile("atr", v) for v in (2.5, 5.0, 100.0)] == [3.4, 7.7, 99.5]
+
+    def test_percentile(self, distribution: VolatilityDistribution) -> None:
+        """El percentil se obtiene por bisección con rango medio en empates"""
+        assert distribution.percentile("atr", 0.5) == 0.0
+        assert distribution.percentile("atr", 50.5) == 50.0
+        assert distribution.percentile("atr", 1000.0) == 100.0
+
+    def test_classify(self, distribution: VolatilityDistribution) -> None:
+        """Los niveles se asignan por umbrales de percentil"""
+        assert distribution.classify("atr", 10.0) == VolatilityLevel.LOW
+        assert distribution.classify("atr", 50.0) == VolatilityLevel.NORMAL
+        assert distribution.classify("atr", 80.0) == VolatilityLevel.HIGH
+        assert distribution.classify("atr", 99.0) == VolatilityLevel.EXTREME
+
+    def test_classify_requires_minimum_history(self) -> None:
+        """Con pocas observaciones no se clasifica"""
+        result = VolatilityDistribution()
+        result.extend("atr", [1.0, 2.0, 3.0])
+
+        assert result.classify("atr", 2.0) is None
+
+    def test_unknown_metric_raises(self, distribution: VolatilityDistribution) -> None:
+        """Una métrica desconocida produce ValueError"""
+        with pytest.raises(ValueError):
+            distribution.percentile("volume", 1.0)
+
+
+class TestPercentileClassification:
+    """Tests de la integración con los clasificadores existentes"""
+
+    def test_session_volatility_uses_percentile(self, distribution: VolatilityDistribution) -> None:
+        """Con distribución, la sesión se clasifica por percentil y no por ratio"""
+        candles = [
+            PriceCandle(
+                timestamp=datetime(2026, 1, 5, 8) + timedelta(hours=i),
+                open=2000.0,
+                high=2045.0,
+                low=1955.0,
+                close=2000.0
+            )
+            for i in range(5)
+        ]
+
+        result = VolatilityCalculator.analyze_session_volatility(candles, distribution=distribution)
+
+        assert result["atr"] == 90.0
+        assert result["atr_percentile"] == 89.5
+        assert result["range_percentile"] == 89.5
+        assert result["level"] == VolatilityLevel.HIGH.value
+
+    def test_range_percentile_requires_minimum_history(self) -> None:
+        """Sin rangos suficientes no se informa percentil de rango"""
+        distribution = VolatilityDistribution()
+        distribution.extend("atr", range(100, 0, -1))
+        distribution.extend("range", [1.0, 2.0])
+        candles = [
+            PriceCandle(timestamp=datetime(2026, 1, 5, 8), open=2000.0, high=2010.0, low=1990.0, close=2000.0),
+            PriceCandle(timestamp=datetime(2026, 1, 5, 9), open=2000.0, high=2010.0, low=1990.0, close=2000.0),
+        ]
+
+        result = VolatilityCalculator.analyze_session_volatility(candles, distribution=distribution)
+
+        assert result["atr_percentile"] is not None
+        assert result["range_percentile"] is None
+
+    def test_reaction_volatility_uses_percentile(self, distribution: VolatilityDistribution) -> None:
+        """ReactionHistoryBuilder usa el percentil si hay distribución"""
+        assert ReactionHistoryBuilder.classify_volatility(5.0, 2000.0) == ReactionVolatilityLevel.LOW
+        assert (
+            ReactionHistoryBuilder.classify_volatility(5.0, 2000.0, distribution)
+            == ReactionVolatilityLevel.LOW
+        )
+        assert (
+            ReactionHistoryBuilder.classify_volatility(97.0, 2000.0, distribution)
+            == ReactionVolatilityLevel.EXTREME
+        )
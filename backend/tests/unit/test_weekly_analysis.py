@@ -1,6 +1,7 @@
 """
 Tests para análisis multi-temporalidad con Weekly
 """
+import numpy as np
 import pytest
 from datetime import datetime, timedelta
 from app.utils.multi_tf_analyzer import (
@@ -108,6 +109,32 @@ class TestMultiTimeframeAnalyzer:
         )
         assert strength == 0.3
     
+    def test_score_trend_matrices_aligned(self):
+        """Test alineación total de ventanas y timeframes"""
+        matrices = {
+            "daily": np.array([[0, 1], [0, 1], [1, 1]]),
+            "h4": np.array([[-1, 1], [1, 1], [1, 1]])
+        }
+        convergence, alignment = MultiTimeframeAnalyzer.score_trend_matrices(matrices)
+        assert convergence == TimeframeConvergence.FULL_BULLISH
+        assert alignment == 1.0
+    
+    def test_score_trend_matrices_mixed(self):
+        """Test dirección por mayoría de ventanas en la última vela"""
+        matrices = {
+            "daily": np.array([[1], [1], [-1]]),
+            "h4": np.array([[-1], [-1], [0]])
+        }
+        convergence, alignment = MultiTimeframeAnalyzer.score_trend_matrices(matrices)
+        assert convergence == TimeframeConvergence.DIVERGENT
+        assert alignment == pytest.approx(1 / 6, abs=0.01)
+    
+    def test_score_trend_matrices_empty(self):
+        """Test sin matrices de tendencia"""
+        convergence, alignment = MultiTimeframeAnalyzer.score_trend_matrices({})
+        assert convergence == TimeframeConvergence.NEUTRAL
+        assert alignment == 0.0
+    
     def test_detect_hot_zones_empty_candles(self):
         """Test hot zones con lista vacía"""
         result = MultiTimeframeAnalyzer.detect_hot_zones([], "H4")